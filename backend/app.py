@@ -1,21 +1,30 @@
-from flask import Flask, jsonify, send_from_directory
+from flask import Flask, jsonify, redirect, url_for
 from flask_restful import Api
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
 from flask_mail import Mail
 from db import connect_databases
 from dotenv import load_dotenv
+from utils.logging_config import configure_logging
+import logging
 import os
 
 # Load environment variables
 load_dotenv()
 
+# Logging estructurado (LOG_LEVEL, LOG_FORMAT; ver utils/logging_config.py)
+configure_logging()
+logger = logging.getLogger(__name__)
+
 # Initialize Flask app
 app = Flask(__name__)
 
 # Carpeta para avatares subidos
 app.config['UPLOAD_AVATARS_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'uploads', 'avatars')
 os.makedirs(app.config['UPLOAD_AVATARS_FOLDER'], exist_ok=True)
+# Envío de avatares: none | x-sendfile | x-accel-redirect (ver utils/static_files.py)
+app.config['AVATAR_SENDFILE'] = os.getenv('AVATAR_SENDFILE', 'none').lower()
+app.config['AVATAR_ACCEL_PREFIX'] = os.getenv('AVATAR_ACCEL_PREFIX', '/_protected/avatars/')
 
 # Configuration
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production-min-32-chars')
@@ -35,7 +44,8 @@ CORS(app, resources={
     r"/api/*": {
         "origins": os.getenv('CORS_ORIGINS', '*').split(','),
         "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", "X-Primary-Pin"],
+        "expose_headers": ["X-Primary-Pin"]
     },
     r"/uploads/*": {
         "origins": os.getenv('CORS_ORIGINS', '*').split(','),
@@ -46,42 +56,89 @@ api = Api(app)
 jwt = JWTManager(app)
 mail = Mail(app)
 
-# MongoDB Connection
+# current_user del JWT con cache de perfiles; claims nickName/rol en el token
+from utils.auth import init_auth
+init_auth(app, jwt)
+
+# MongoDB Connection (perezosa: los sockets se abren en la primera consulta;
+# bajo gunicorn cada worker se reconecta en post_fork, ver gunicorn.conf.py)
 try:
     connect_databases()
-    print("✅ Connected to MongoDB")
-except Exception as e:
-    print(f"❌ Error connecting to MongoDB: {e}")
+    logger.info("Connected to MongoDB")
+except Exception:
+    logger.exception("Error connecting to MongoDB")
+
+# Read-your-writes: las marcas de pin_to_primary viajan con el cliente (X-Primary-Pin)
+from utils.read_your_writes import init_read_your_writes
+init_read_your_writes(app)
 
 # Import routes
+from routes.auth import auth_bp
+from routes.logs import logs_bp
 from routes.mensajes_privados import mensajes_privados_bp
 from routes.mensajes import mensajes_bp
 from routes.seguidores import seguidores_bp
 from routes.testing import testing_bp
-from routes.usuarios import usuarios_bp
+from routes.usuarios import usuarios_bp, MAX_AVATAR_SIZE
+
+# Almacenamiento de avatares: disco local o GridFS con cache local (AVATAR_STORAGE)
+from utils.storage import init_storage
+init_storage(app)
+
+# Uploads en streaming a disco con hash y límite de tamaño (MAX_CONTENT_LENGTH)
+from utils.uploads import init_uploads
+init_uploads(app, max_file_size=MAX_AVATAR_SIZE)
 
 # Register blueprints
+app.register_blueprint(auth_bp, url_prefix='/api')
+app.register_blueprint(logs_bp, url_prefix='/api')
 app.register_blueprint(mensajes_privados_bp, url_prefix='/api')
 app.register_blueprint(mensajes_bp, url_prefix='/api')
 app.register_blueprint(seguidores_bp, url_prefix='/api')
 app.register_blueprint(testing_bp, url_prefix='/api')  # Testing routes
 app.register_blueprint(usuarios_bp, url_prefix='/api')
 
-# Servir archivos subidos (avatares)
+# Respuestas JSON con orjson si está instalado (JSON_PROVIDER=auto|orjson|stdlib)
+from utils.json_provider import init_json_provider
+init_json_provider(app)
+
+# Métricas Prometheus (latencia por ruta, tamaños, comandos de MongoDB) en /metrics
+from utils.metrics import init_metrics
+init_metrics(app)
+
+# Presupuesto de consultas por request / detector de N+1
+from utils.query_budget import init_query_budget
+init_query_budget(app)
+
+# Compresión gzip/brotli de /api/* (después de las métricas: se registra el tamaño comprimido)
+from utils.compression import init_compression
+init_compression(app)
+
+# Servir archivos subidos (avatares): inmutables, con ETag, rangos y sendfile opcional
+from utils.static_files import send_immutable
+from utils.avatar_images import original_de_variante
+from utils.storage import get_storage
+
 @app.route('/uploads/avatars/<path:filename>')
 def serve_avatar(filename):
-    folder = app.config['UPLOAD_AVATARS_FOLDER']
-    if not os.path.exists(folder):
-        return jsonify({'error': 'Not found'}), 404
-    return send_from_directory(folder, filename)
+    storage = get_storage(app)
+    # Variante todavía no generada: redirigir al original sin cachear la redirección
+    original = original_de_variante(storage, filename)
+    if original:
+        response = redirect(url_for('serve_avatar', filename=original))
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    return send_immutable(storage.local_folder, filename, ensure_local=storage.ensure_local)
 
 # Health check endpoint
 @app.route('/health', methods=['GET'])
 def health_check():
+    from utils.mongo_monitoring import pool_snapshot
     return jsonify({
         'status': 'healthy',
         'service': 'Backend API',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'mongo_pool': pool_snapshot()
     }), 200
 
 # Server-Sent Events example endpoint
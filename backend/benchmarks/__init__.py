@@ -0,0 +1,6 @@
+"""
+Benchmarks del backend
+
+Scripts independientes (no los recolecta pytest). Se ejecutan desde backend/:
+    python -m benchmarks.<script> --help
+"""
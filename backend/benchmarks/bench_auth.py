@@ -0,0 +1,190 @@
+"""
+Benchmark del costo de autenticación por request
+
+Compara, contra un mongod local, una ruta protegida con @require_role('user')
+que responde un JSON mínimo (todo el tiempo medido es autenticación):
+- anterior:  jwt_required + get_usuario_by_id(get_jwt_identity()) para
+             confirmar que el usuario existe y require_role con
+             Usuario.objects(id=...).first() (2 consultas por request).
+- sin_cache: utils.auth.init_auth con PROFILE_CACHE_TTL=0: el user lookup
+             consulta la base y require_role usa el claim `rol` (1 consulta).
+- cache:     utils.auth.init_auth con el cache de perfiles (0 consultas con
+             el perfil en cache).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_auth --uri mongodb://localhost:27017 --requests 3000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from datetime import datetime
+from functools import wraps
+
+from bson import ObjectId
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, get_jwt_identity, jwt_required
+from mongoengine import connect, disconnect
+from mongoengine.connection import get_db
+
+from utils.query_budget import QueryTracker, get_query_budget_listener
+
+SECRET = 'bench-auth-secret-key-minimum-32-bytes-long'
+
+
+def _seed(db):
+    db.usuarios.drop()
+    usuario_id = ObjectId()
+    db.usuarios.insert_one({
+        '_id': usuario_id,
+        'nickName': 'bench_auth',
+        'nombre': 'Usuario',
+        'apellido': 'Benchmark',
+        'mail': 'bench_auth@example.com',
+        'contraseña': 'x',
+        'fechaDeCreado': datetime.utcnow(),
+        'updatedAt': datetime.utcnow(),
+        'rol': 'user',
+        'seguidores': [],
+        'siguiendo': [],
+    })
+    return usuario_id
+
+
+def _require_role_anterior(required_role):
+    """require_role tal como estaba: una consulta por request"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            from models import Usuario
+            user = Usuario.objects(id=get_jwt_identity()).first()
+            if not user:
+                return jsonify({'success': False, 'code': 'AUTH_ERROR'}), 401
+            if user.rol != required_role:
+                return jsonify({'success': False, 'code': 'FORBIDDEN'}), 403
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def _app_anterior():
+    import utils.mongo_helpers
+
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = SECRET
+    JWTManager(app)
+
+    @app.route('/protegido')
+    @jwt_required()
+    @_require_role_anterior('user')
+    def protegido():
+        usuario = utils.mongo_helpers.get_usuario_by_id(get_jwt_identity())
+        if not usuario:
+            return jsonify({'success': False, 'code': 'AUTH_ERROR'}), 401
+        return jsonify({'success': True, 'nickName': usuario.nickName})
+
+    return app
+
+
+def _app_auth(ttl):
+    from flask_jwt_extended import current_user
+    from utils.auth import init_auth
+    from utils.decorators import require_role
+
+    os.environ['PROFILE_CACHE_TTL'] = str(ttl)
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = SECRET
+    init_auth(app, JWTManager(app))
+
+    @app.route('/protegido')
+    @jwt_required()
+    @require_role('user')
+    def protegido():
+        return jsonify({'success': True, 'nickName': current_user.nickName})
+
+    return app
+
+
+def _medir(app, usuario, n_requests):
+    from utils.auth import crear_token
+
+    with app.app_context():
+        token = crear_token(usuario)
+    headers = {'Authorization': f'Bearer {token}'}
+    client = app.test_client()
+    for _ in range(20):  # calentamiento
+        client.get('/protegido', headers=headers)
+
+    tiempos = []
+    with QueryTracker() as tracker:
+        start_total = time.perf_counter()
+        for _ in range(n_requests):
+            start = time.perf_counter()
+            response = client.get('/protegido', headers=headers)
+            tiempos.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.get_data(as_text=True)
+        elapsed = time.perf_counter() - start_total
+
+    return {
+        'rps': round(n_requests / elapsed, 1),
+        'p50_ms': round(statistics.median(tiempos), 3),
+        'consultas_por_request': round(tracker.total / n_requests, 2),
+    }
+
+
+def run(uri, db_name, n_requests, keep=False):
+    connect(db=db_name, host=f"{uri.rstrip('/')}/{db_name}", alias='default',
+            event_listeners=[get_query_budget_listener()])
+    usuario_id = _seed(get_db())
+
+    from utils.mongo_helpers import get_usuario_by_id
+    usuario = get_usuario_by_id(usuario_id)
+
+    casos = [
+        ('anterior', _app_anterior),
+        ('sin_cache', lambda: _app_auth(0)),
+        ('cache', lambda: _app_auth(60)),
+    ]
+    resultados = []
+    anterior_ttl = os.environ.get('PROFILE_CACHE_TTL')
+    try:
+        for nombre, crear_app in casos:
+            app = crear_app()
+            resultados.append({'caso': nombre, **_medir(app, usuario, n_requests)})
+    finally:
+        if anterior_ttl is None:
+            os.environ.pop('PROFILE_CACHE_TTL', None)
+        else:
+            os.environ['PROFILE_CACHE_TTL'] = anterior_ttl
+        if not keep:
+            get_db().client.drop_database(db_name)
+        disconnect(alias='default')
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de autenticación por request')
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--db', default='bench_main_db')
+    parser.add_argument('--requests', type=int, default=3000)
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    parser.add_argument('--keep', action='store_true', help='No borrar la base de benchmark')
+    args = parser.parse_args()
+
+    resultados = run(args.uri, args.db, args.requests, args.keep)
+
+    base = resultados[0]['rps']
+    print(f"{'caso':<10} {'req/s':>9} {'p50 ms':>9} {'consultas':>10} {'vs anterior':>12}")
+    for r in resultados:
+        print(f"{r['caso']:<10} {r['rps']:>9} {r['p50_ms']:>9} {r['consultas_por_request']:>10} "
+              f"{r['rps'] / base:>11.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark de throughput al servir avatares
+
+Compara, con el test client de Flask sobre archivos en un directorio temporal:
+- anterior: os.path.exists de la carpeta + send_from_directory, sin cache
+  (cada vista de página vuelve a descargar el avatar).
+- inmutable: utils.static_files.send_immutable con el archivo completo.
+- revalidacion: la misma URL con If-None-Match (304 sin leer el archivo).
+- rango: Range de los primeros 64 KB (206).
+- x-accel: AVATAR_SENDFILE=x-accel-redirect (la app solo arma headers; el
+  envío lo haría nginx).
+
+Con Cache-Control immutable el navegador ni siquiera revalida: en la práctica
+las vistas repetidas no llegan al servidor. Mide el costo de la app por
+request; el envío real de bytes depende del servidor (sendfile del proxy).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_avatars --archivos 200 --kb 256 --requests 2000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+
+from flask import Flask, send_from_directory
+
+from utils.static_files import send_immutable
+
+
+def _app(folder):
+    app = Flask(__name__)
+
+    @app.route('/anterior/<path:filename>')
+    def anterior(filename):
+        if not os.path.exists(folder):
+            return {'error': 'Not found'}, 404
+        return send_from_directory(folder, filename)
+
+    @app.route('/uploads/avatars/<path:filename>')
+    def inmutable(filename):
+        return send_immutable(folder, filename)
+
+    return app
+
+
+def _crear_archivos(folder, n_archivos, kb):
+    nombres = []
+    for _ in range(n_archivos):
+        nombre = f"{uuid.uuid4().hex}.png"
+        with open(os.path.join(folder, nombre), 'wb') as f:
+            f.write(os.urandom(kb * 1024))
+        nombres.append(nombre)
+    return nombres
+
+
+def _medir(client, url_fn, headers, n_requests, status):
+    tiempos = []
+    total_bytes = 0
+    start_total = time.perf_counter()
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        response = client.get(url_fn(), headers=headers)
+        body = response.get_data()
+        tiempos.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == status, response.status_code
+        total_bytes += len(body)
+        response.close()
+    elapsed = time.perf_counter() - start_total
+    return {
+        'rps': round(n_requests / elapsed, 1),
+        'p50_ms': round(statistics.median(tiempos), 3),
+        'mb_por_s': round(total_bytes / elapsed / 1024 / 1024, 1),
+    }
+
+
+def run(n_archivos, kb, n_requests):
+    resultados = []
+    with tempfile.TemporaryDirectory() as folder:
+        nombres = _crear_archivos(folder, n_archivos, kb)
+        app = _app(folder)
+        client = app.test_client()
+
+        def url(prefijo):
+            return lambda: f'{prefijo}/{random.choice(nombres)}'
+
+        casos = [
+            ('anterior', url('/anterior'), {}, 200, 'none'),
+            ('inmutable', url('/uploads/avatars'), {}, 200, 'none'),
+            ('rango_64kb', url('/uploads/avatars'), {'Range': 'bytes=0-65535'},
+             206 if kb > 64 else 200, 'none'),
+            ('x-accel', url('/uploads/avatars'), {}, 200, 'x-accel-redirect'),
+        ]
+        for nombre, url_fn, headers, status, modo in casos:
+            app.config['AVATAR_SENDFILE'] = modo
+            resultados.append({'caso': nombre, **_medir(client, url_fn, headers, n_requests, status)})
+
+        # Revalidación: cada request manda el ETag del archivo que pide
+        app.config['AVATAR_SENDFILE'] = 'none'
+        tiempos = []
+        start_total = time.perf_counter()
+        for _ in range(n_requests):
+            nombre = random.choice(nombres)
+            start = time.perf_counter()
+            response = client.get(f'/uploads/avatars/{nombre}', headers={'If-None-Match': f'"{nombre}"'})
+            tiempos.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 304
+        elapsed = time.perf_counter() - start_total
+        resultados.append({
+            'caso': 'revalidacion_304',
+            'rps': round(n_requests / elapsed, 1),
+            'p50_ms': round(statistics.median(tiempos), 3),
+            'mb_por_s': 0.0,
+        })
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de envío de avatares')
+    parser.add_argument('--archivos', type=int, default=200)
+    parser.add_argument('--kb', type=int, default=256, help='Tamaño de cada avatar en KB')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    args = parser.parse_args()
+
+    resultados = run(args.archivos, args.kb, args.requests)
+
+    base = resultados[0]['rps']
+    print(f"{'caso':<18} {'req/s':>9} {'p50 ms':>9} {'MB/s':>8} {'vs anterior':>12}")
+    for r in resultados:
+        print(f"{r['caso']:<18} {r['rps']:>9} {r['p50_ms']:>9} {r['mb_por_s']:>8} {r['rps'] / base:>11.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark de compresión de respuestas (bytes ahorrados y CPU por tamaño)
+
+Arma respuestas JSON con la forma de GET /api/mensajes-privados/conversacion
+(formato normal y ?format=compact) y de GET /api/usuarios/seguidores para
+varios tamaños, y mide con los mismos compresores que usa
+utils.compression:
+- gzip niveles 1, 6 (default) y 9
+- brotli calidades 1, 4 (default) y 11 (si el módulo brotli está instalado)
+
+Reporta bytes antes/después, ratio y tiempo de compresión (p50) por
+respuesta y por KB. Sirve para elegir COMPRESSION_MIN_SIZE y los niveles.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_compression --filas 10 50 200 1000
+"""
+
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from utils.compression import brotli, brotli_compress, gzip_compress
+
+
+def _usuario(i):
+    oid = str(ObjectId())
+    return {
+        'id': oid,
+        'nickName': f'usuario_{i}',
+        'nombre': 'Usuario',
+        'apellido': f'Benchmark {i}',
+        'mail': f'usuario_{i}@example.com',
+        'biografia': 'Desarrollador Full Stack interesado en Python, Angular y MongoDB',
+        'fotoUsuario': f'http://localhost:5000/uploads/avatars/{ObjectId()}.png',
+        'fotoUsuarioPortada': '',
+        'fechaDeCreado': datetime(2025, 1, 1).isoformat(),
+        'rol': 'user',
+        'seguidores': [],
+        'siguiendo': [],
+    }
+
+
+def _payloads(filas):
+    actual, otro = _usuario(0), _usuario(1)
+    inicio = datetime(2026, 1, 1)
+    mensajes = []
+    for i in range(filas):
+        emisor, receptor = (actual, otro) if i % 2 else (otro, actual)
+        mensajes.append({
+            'id': str(ObjectId()),
+            'texto': f'Mensaje número {i} de la conversación de benchmark',
+            'fechaDeCreado': (inicio + timedelta(minutes=i)).isoformat(),
+            'emisor': emisor,
+            'receptor': receptor,
+            'leido': None if i % 3 else (inicio + timedelta(minutes=i + 1)).isoformat(),
+        })
+    compactos = [{**m, 'emisor': m['emisor']['id'], 'receptor': m['receptor']['id']} for m in mensajes]
+
+    def respuesta(data):
+        return json.dumps({'success': True, 'data': data}, sort_keys=True).encode()
+
+    return {
+        'conversacion': respuesta({'conversacion': mensajes, 'total': filas, 'hasMore': False}),
+        'conversacion_compact': respuesta({
+            'conversacion': compactos,
+            'usuarios': {actual['id']: actual, otro['id']: otro},
+            'total': filas,
+            'hasMore': False,
+        }),
+        'seguidores': respuesta([_usuario(i) for i in range(filas)]),
+    }
+
+
+def _compresores():
+    compresores = [(f'gzip-{nivel}', lambda data, nivel=nivel: gzip_compress(data, nivel)) for nivel in (1, 6, 9)]
+    if brotli is not None:
+        compresores += [(f'br-{q}', lambda data, q=q: brotli_compress(data, q)) for q in (1, 4, 11)]
+    return compresores
+
+
+def run(filas_list, iteraciones):
+    resultados = []
+    for filas in filas_list:
+        for nombre_payload, data in _payloads(filas).items():
+            for nombre, compress in _compresores():
+                salida = compress(data)  # calentamiento
+                tiempos = []
+                for _ in range(iteraciones):
+                    start = time.perf_counter()
+                    compress(data)
+                    tiempos.append((time.perf_counter() - start) * 1_000_000)
+                p50 = statistics.median(tiempos)
+                resultados.append({
+                    'payload': nombre_payload,
+                    'filas': filas,
+                    'compresor': nombre,
+                    'bytes': len(data),
+                    'bytes_comprimidos': len(salida),
+                    'ratio': round(len(data) / len(salida), 2),
+                    'us_p50': round(p50, 1),
+                    'us_por_kb': round(p50 / (len(data) / 1024), 2),
+                })
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de compresión de respuestas')
+    parser.add_argument('--filas', type=int, nargs='+', default=[1, 10, 50, 200, 1000])
+    parser.add_argument('--iteraciones', type=int, default=30)
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    args = parser.parse_args()
+
+    if brotli is None:
+        print('brotli no está instalado: solo gzip (pip install Brotli)')
+
+    resultados = run(args.filas, args.iteraciones)
+
+    print(f"{'payload':<22} {'filas':>6} {'compresor':<9} {'bytes':>9} {'comprim.':>9} "
+          f"{'ratio':>6} {'us p50':>9} {'us/KB':>7}")
+    for r in resultados:
+        print(f"{r['payload']:<22} {r['filas']:>6} {r['compresor']:<9} {r['bytes']:>9} "
+              f"{r['bytes_comprimidos']:>9} {r['ratio']:>6} {r['us_p50']:>9} {r['us_por_kb']:>7}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
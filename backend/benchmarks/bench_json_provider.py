@@ -0,0 +1,119 @@
+"""
+Benchmark de codificación de una página de conversación (500 mensajes)
+
+Mide el armado y la codificación de la respuesta de
+GET /api/mensajes-privados/conversacion/<user_id> (sin las consultas, que se
+hacen una vez antes de medir) con:
+- stdlib_to_dict_por_fila: encoder de Flask y emisor/receptor serializados en
+  cada mensaje (comportamiento anterior).
+- stdlib: encoder de Flask, cada usuario serializado una vez por respuesta.
+- orjson: utils.json_provider.OrjsonProvider.
+- orjson_fragments: además, los usuarios pre-codificados con json_fragment
+  (requiere orjson >= 3.9; si no, se omite).
+
+Usa los mismos datos que bench_serialization (mongomock o --uri).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_json_provider --mensajes 500 --seguidores 200
+"""
+
+import argparse
+import json
+import statistics
+import time
+
+from flask import Flask, jsonify
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.bench_serialization import _connect, _seed
+from repositories.mensaje_privado_repository import MensajePrivadoRepository
+from services.mensajes_privados_service import mensaje_de_conversacion_dict
+from utils.json_provider import OrjsonProvider, json_fragment, orjson
+from utils.mongo_helpers import get_usuario_by_id
+
+
+def _app(provider_class):
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    return app
+
+
+def _pagina(mensajes, actual_id, actual, otro, por_fila=False, fragments=False):
+    if por_fila:
+        filas = []
+        for m in mensajes:
+            fila = mensaje_de_conversacion_dict(m, actual_id, actual, otro)
+            fila['emisor'] = fila['emisor'].to_dict()
+            fila['receptor'] = fila['receptor'].to_dict()
+            filas.append(fila)
+    else:
+        actual_data, otro_data = actual.to_dict(), otro.to_dict()
+        if fragments:
+            actual_data, otro_data = json_fragment(actual_data), json_fragment(otro_data)
+        filas = [mensaje_de_conversacion_dict(m, actual_id, actual_data, otro_data) for m in mensajes]
+    return {'success': True, 'data': {'conversacion': filas, 'total': len(filas)}}
+
+
+def run(uri, db_name, n_seguidores, n_mensajes, iteraciones):
+    _connect(uri, db_name)
+    actual_id, otro_id = _seed(n_seguidores, n_mensajes)
+    mensajes, _total = MensajePrivadoRepository.gets_mensaje_privado(actual_id, otro_id, n_mensajes, 0)
+    actual, otro = get_usuario_by_id(actual_id), get_usuario_by_id(otro_id)
+
+    modos = [
+        ('stdlib_to_dict_por_fila', DefaultJSONProvider, {'por_fila': True}),
+        ('stdlib', DefaultJSONProvider, {}),
+    ]
+    if orjson is not None:
+        modos.append(('orjson', OrjsonProvider, {}))
+        if OrjsonProvider.supports_fragments:
+            modos.append(('orjson_fragments', OrjsonProvider, {'fragments': True}))
+
+    resultados = []
+    for nombre, provider_class, opciones in modos:
+        app = _app(provider_class)
+        with app.app_context():
+            def respuesta():
+                return jsonify(_pagina(mensajes, actual_id, actual, otro, **opciones)).get_data()
+
+            body = respuesta()  # calentamiento
+            tiempos = []
+            for _ in range(iteraciones):
+                start = time.perf_counter()
+                respuesta()
+                tiempos.append((time.perf_counter() - start) * 1000)
+        resultados.append({
+            'modo': nombre,
+            'mensajes': len(mensajes),
+            'bytes': len(body),
+            'p50_ms': round(statistics.median(tiempos), 3),
+            'min_ms': round(min(tiempos), 3),
+        })
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del proveedor JSON en una conversación')
+    parser.add_argument('--uri', help='mongod real (default: mongomock en memoria)')
+    parser.add_argument('--db', default='bench_main_db')
+    parser.add_argument('--seguidores', type=int, default=200)
+    parser.add_argument('--mensajes', type=int, default=500)
+    parser.add_argument('--iteraciones', type=int, default=30)
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    args = parser.parse_args()
+
+    resultados = run(args.uri, args.db, args.seguidores, args.mensajes, args.iteraciones)
+
+    base = resultados[0]['p50_ms']
+    print(f"{'modo':<26} {'mensajes':>9} {'bytes':>10} {'p50 ms':>9} {'min ms':>9} {'speedup':>8}")
+    for r in resultados:
+        print(f"{r['modo']:<26} {r['mensajes']:>9} {r['bytes']:>10} {r['p50_ms']:>9} {r['min_ms']:>9} "
+              f"{base / r['p50_ms']:>7.1f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
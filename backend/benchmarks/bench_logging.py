@@ -0,0 +1,198 @@
+"""
+Benchmark del costo del logging en GET /api/mensajes/mios
+
+Compara, con la app real contra un mongod local, tres configuraciones:
+- print:      las líneas de debug que se escribían con print() en cada request
+              (header Authorization, ID del token, búsqueda y resultado en
+              get_usuario_by_id), escritas de forma síncrona con flush.
+- sync-debug: las mismas líneas con logger.debug y un StreamHandler síncrono
+              en nivel DEBUG (logging clásico sin cola).
+- queue-json: la configuración por defecto (utils.logging_config): nivel INFO,
+              JSON, QueueHandler; las líneas de debug se descartan en el nivel.
+
+La salida va a /dev/null (--sink) para medir el costo en la app y no el de la
+terminal; con un pipe de gunicorn o un disco lento la diferencia es mayor.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_logging --uri mongodb://localhost:27017 \\
+        --mensajes 20 --requests 2000
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+
+def _seed(client, db_name, n_mensajes):
+    db = client[db_name]
+    db.usuarios.drop()
+    db.mensajes.drop()
+
+    usuario_id = ObjectId()
+    db.usuarios.insert_one({
+        '_id': usuario_id,
+        'nickName': 'bench_logging',
+        'nombre': 'Usuario',
+        'apellido': 'Benchmark',
+        'mail': 'bench_logging@example.com',
+        'contraseña': 'x',
+        'biografia': '',
+        'fotoUsuario': '',
+        'fotoUsuarioPortada': '',
+        'fechaDeCreado': datetime.utcnow(),
+        'rol': 'user',
+        'seguidores': [],
+        'siguiendo': [],
+    })
+    inicio = datetime.utcnow() - timedelta(days=1)
+    db.mensajes.insert_many([
+        {
+            'texto': f'Mensaje de benchmark {i}',
+            'fechaDeCreado': inicio + timedelta(minutes=i),
+            'autor': usuario_id,
+            'etiquetas': [],
+            'menciones': [],
+        }
+        for i in range(n_mensajes)
+    ])
+    db.mensajes.create_index([('autor', 1), ('fechaDeCreado', -1)])
+    return str(usuario_id)
+
+
+def _debug_lines(usuario_id):
+    """Las líneas que la ruta y get_usuario_by_id escribían en cada request"""
+    from flask import request
+    auth_header = request.headers.get('Authorization', '')
+    return [
+        f"🔑 Authorization header recibido: {auth_header[:50]}...",
+        f"🔑 Usuario ID del token: {usuario_id}",
+        f"🔍 Buscando usuario con ID: {usuario_id} (tipo: <class 'bson.objectid.ObjectId'>)",
+        "✅ Usuario encontrado con pymongo: bench_logging",
+    ]
+
+
+def _configure(modo, app, sink, usuario_id):
+    from utils.logging_config import configure_logging, shutdown_logging
+
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    app.before_request_funcs[None] = [
+        f for f in app.before_request_funcs.get(None, []) if not getattr(f, '_bench', False)
+    ]
+
+    if modo == 'print':
+        root.setLevel(logging.WARNING)
+
+        def hook():
+            for line in _debug_lines(usuario_id):
+                print(line, file=sink, flush=True)
+    elif modo == 'sync-debug':
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG)
+        bench_logger = logging.getLogger('routes.mensajes')
+
+        def hook():
+            for line in _debug_lines(usuario_id):
+                bench_logger.debug(line)
+    else:
+        configure_logging(level='INFO', fmt='json', stream=sink)
+        bench_logger = logging.getLogger('routes.mensajes')
+
+        def hook():
+            for line in _debug_lines(usuario_id):
+                bench_logger.debug(line)
+
+    hook._bench = True
+    app.before_request_funcs.setdefault(None, []).insert(0, hook)
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def run(uri, db_name, n_mensajes, n_requests, sink_path, keep=False):
+    admin_client = MongoClient(uri)
+    usuario_id = _seed(admin_client, db_name, n_mensajes)
+
+    os.environ['MONGODB_URI'] = f"{uri.rstrip('/')}/{db_name}"
+    os.environ.setdefault('QUERY_BUDGET_MAX_QUERIES', '1000')
+    from flask_jwt_extended import create_access_token
+    import app as app_module
+
+    app = app_module.app
+    with app.app_context():
+        token = create_access_token(identity=usuario_id)
+    headers = {'Authorization': f'Bearer {token}'}
+    client = app.test_client()
+
+    resultados = []
+    with open(sink_path, 'w') as sink:
+        for modo in ('print', 'sync-debug', 'queue-json'):
+            _configure(modo, app, sink, usuario_id)
+            for _ in range(20):  # calentamiento
+                client.get('/api/mensajes/mios', headers=headers)
+
+            tiempos = []
+            start_total = time.perf_counter()
+            for _ in range(n_requests):
+                start = time.perf_counter()
+                response = client.get('/api/mensajes/mios', headers=headers)
+                tiempos.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.get_data(as_text=True)
+            elapsed = time.perf_counter() - start_total
+
+            resultados.append({
+                'modo': modo,
+                'requests': n_requests,
+                'rps': round(n_requests / elapsed, 1),
+                'p50_ms': round(statistics.median(tiempos), 3),
+                'p95_ms': round(_percentile(tiempos, 95), 3),
+            })
+
+    from utils.logging_config import shutdown_logging
+    shutdown_logging()
+    if not keep:
+        admin_client.drop_database(db_name)
+    admin_client.close()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de logging en GET /api/mensajes/mios')
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--db', default='bench_main_db')
+    parser.add_argument('--mensajes', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--sink', default=os.devnull, help='Destino de los logs (default /dev/null)')
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    parser.add_argument('--keep', action='store_true', help='No borrar la base de benchmark')
+    args = parser.parse_args()
+
+    resultados = run(args.uri, args.db, args.mensajes, args.requests, args.sink, args.keep)
+
+    base = resultados[0]['rps']
+    print(f"{'modo':<12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'vs print':>9}")
+    for r in resultados:
+        print(f"{r['modo']:<12} {r['rps']:>9} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+              f"{r['rps'] / base:>8.2f}x")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark de throughput de POST /api/auth/login
+
+Con --hilos threads haciendo login en paralelo (ráfaga de logins) y un
+thread extra que pide una ruta liviana (/ping, sin CPU ni base) mide:
+- logins por segundo y p50/p95 del login,
+- p95 de /ping mientras dura la ráfaga: cuánto frena el hash a los requests
+  de I/O que atiende el mismo proceso.
+
+Compara el hash en el thread del request (PASSWORD_HASH_WORKERS=0) con el
+pool de procesos (--workers). El costo del hash sale de --metodo.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_login --uri mongodb://localhost:27017 \\
+        --hilos 8 --logins 200 --workers 2 --metodo scrypt
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+
+from bson import ObjectId
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager
+from mongoengine import connect, disconnect
+from mongoengine.connection import get_db
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _app():
+    from routes.auth import auth_bp
+    from utils.auth import init_auth
+
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'bench-login-secret-key-minimum-32-bytes-long'
+    init_auth(app, JWTManager(app))
+    app.register_blueprint(auth_bp, url_prefix='/api')
+
+    @app.route('/ping')
+    def ping():
+        return jsonify({'ok': True})
+
+    return app
+
+
+def _seed(password):
+    from utils.passwords import hash_password
+
+    db = get_db('default')
+    db.usuarios.drop()
+    db.usuarios.insert_one({
+        '_id': ObjectId(),
+        'nickName': 'bench_login',
+        'nombre': 'Usuario',
+        'apellido': 'Benchmark',
+        'mail': 'bench_login@example.com',
+        'contraseña': hash_password(password),
+        'rol': 'user',
+        'seguidores': [],
+        'siguiendo': [],
+    })
+
+
+def _rafaga(app, n_hilos, n_logins):
+    tiempos_login, tiempos_ping = [], []
+    lock = threading.Lock()
+    restantes = [n_logins]
+    terminado = threading.Event()
+
+    def hacer_logins(hilo):
+        client = app.test_client()
+        while True:
+            with lock:
+                if restantes[0] == 0:
+                    return
+                restantes[0] -= 1
+                numero = restantes[0]
+            start = time.perf_counter()
+            # User-Agent distinto por login: no medir el rate limit
+            response = client.post('/api/auth/login', json={'usuario': 'bench_login', 'password': 'password123'},
+                                   headers={'User-Agent': f'bench-{hilo}-{numero}'})
+            assert response.status_code == 200, response.get_data(as_text=True)
+            with lock:
+                tiempos_login.append((time.perf_counter() - start) * 1000)
+
+    def hacer_pings():
+        client = app.test_client()
+        while not terminado.is_set():
+            start = time.perf_counter()
+            client.get('/ping')
+            tiempos_ping.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    pinger = threading.Thread(target=hacer_pings)
+    hilos = [threading.Thread(target=hacer_logins, args=(i,)) for i in range(n_hilos)]
+    start_total = time.perf_counter()
+    pinger.start()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    elapsed = time.perf_counter() - start_total
+    terminado.set()
+    pinger.join()
+
+    return {
+        'logins_por_s': round(n_logins / elapsed, 1),
+        'login_p50_ms': round(statistics.median(tiempos_login), 1),
+        'login_p95_ms': round(_percentile(tiempos_login, 95), 1),
+        'ping_p95_ms': round(_percentile(tiempos_ping, 95), 2),
+    }
+
+
+def run(uri, db_name, n_hilos, n_logins, workers, metodo, keep=False):
+    from utils.passwords import shutdown_pool
+
+    connect(db=db_name, host=f"{uri.rstrip('/')}/{db_name}", alias='default')
+    connect(db=f'{db_name}_logs', host=f"{uri.rstrip('/')}/{db_name}_logs", alias='logs')
+    anterior = {k: os.environ.get(k) for k in ('PASSWORD_HASH_METHOD', 'PASSWORD_HASH_WORKERS')}
+    os.environ['PASSWORD_HASH_METHOD'] = metodo
+    resultados = []
+    try:
+        _seed('password123')
+        app = _app()
+        for nombre, n_workers in (('inline', 0), (f'pool_{workers}', workers)):
+            os.environ['PASSWORD_HASH_WORKERS'] = str(n_workers)
+            shutdown_pool()
+            _rafaga(app, 1, 2)  # calentamiento (y arranque del pool)
+            resultados.append({'caso': nombre, **_rafaga(app, n_hilos, n_logins)})
+    finally:
+        shutdown_pool()
+        for clave, valor in anterior.items():
+            if valor is None:
+                os.environ.pop(clave, None)
+            else:
+                os.environ[clave] = valor
+        if not keep:
+            get_db('default').client.drop_database(db_name)
+            get_db('logs').client.drop_database(f'{db_name}_logs')
+        disconnect(alias='default')
+        disconnect(alias='logs')
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de throughput de login')
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--db', default='bench_main_db')
+    parser.add_argument('--hilos', type=int, default=8, help='Logins concurrentes')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Procesos del pool')
+    parser.add_argument('--metodo', default='scrypt', help='PASSWORD_HASH_METHOD')
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    parser.add_argument('--keep', action='store_true', help='No borrar la base de benchmark')
+    args = parser.parse_args()
+
+    resultados = run(args.uri, args.db, args.hilos, args.logins, args.workers, args.metodo, args.keep)
+
+    print(f"{'caso':<10} {'logins/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'ping p95 ms':>12}")
+    for r in resultados:
+        print(f"{r['caso']:<10} {r['logins_por_s']:>9} {r['login_p50_ms']:>9} "
+              f"{r['login_p95_ms']:>9} {r['ping_p95_ms']:>12}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Microbenchmarks de serialización (costo por fila)
+
+Mide, por mensaje/usuario devuelto:
+- Usuario.to_dict: usuario armado por get_usuario_by_id (sin listas) y
+  usuario cargado con mongoengine con --seguidores seguidores (las listas
+  de ReferenceField se dereferencian al accederlas).
+- MensajePrivado.to_dict: con emisor/receptor ya resueltos y con los
+  ObjectIds que deja el repositorio (cae en get_usuario_by_id por campo).
+- mensaje_de_conversacion_dict: el armado de cada fila en obtener_conversacion.
+- Codificación JSON de una página de la conversación con el encoder de Flask,
+  json de la stdlib y, si están instalados, orjson / ujson / msgspec.
+
+Por defecto corre contra una base en memoria (mongomock, no incluido en
+requirements.txt); con --uri usa un mongod real. Los resultados se pueden
+guardar (--json) y comparar con una corrida anterior (--comparar): se marcan
+los casos cuyo costo por fila empeoró más de --tolerancia.
+
+Uso (desde backend/):
+    pip install mongomock
+    python -m benchmarks.bench_serialization --mensajes 500 --json serializacion.json
+    python -m benchmarks.bench_serialization --comparar serializacion.json
+"""
+
+import argparse
+import importlib
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from flask import Flask
+from mongoengine import connect, disconnect
+from mongoengine.connection import get_db
+
+from models import MensajePrivado, Usuario
+from repositories.mensaje_privado_repository import MensajePrivadoRepository
+from services.mensajes_privados_service import mensaje_de_conversacion_dict
+from utils.mongo_helpers import get_usuario_by_id
+
+
+def _connect(uri, db_name):
+    disconnect(alias='default')
+    if uri:
+        connect(db=db_name, host=uri, alias='default', uuidRepresentation='standard')
+        return
+    try:
+        import mongomock
+    except ImportError:
+        raise SystemExit("mongomock no está instalado: pip install mongomock, o usar --uri con un mongod")
+    connect(db=db_name, host='mongodb://localhost', alias='default',
+            mongo_client_class=mongomock.MongoClient, uuidRepresentation='standard')
+
+
+def _seed(n_seguidores, n_mensajes):
+    db = get_db('default')
+    db.usuarios.drop()
+    db.mensajes_privados.drop()
+
+    def usuario(nick, seguidores=()):
+        return {
+            '_id': ObjectId(),
+            'nickName': nick,
+            'nombre': 'Usuario',
+            'apellido': 'Benchmark',
+            'mail': f'{nick}@example.com',
+            'contraseña': 'x',
+            'biografia': 'Desarrollador Full Stack interesado en Python, Angular y MongoDB',
+            'fotoUsuario': f'https://ui-avatars.com/api/?name={nick}&size=128',
+            'fotoUsuarioPortada': '',
+            'fechaDeCreado': datetime.utcnow(),
+            'rol': 'user',
+            'seguidores': list(seguidores),
+            'siguiendo': [],
+        }
+
+    seguidores = [usuario(f'seguidor_{i}') for i in range(n_seguidores)]
+    actual = usuario('bench_actual', [s['_id'] for s in seguidores])
+    otro = usuario('bench_otro', [s['_id'] for s in seguidores])
+    db.usuarios.insert_many(seguidores + [actual, otro])
+
+    inicio = datetime.utcnow() - timedelta(days=7)
+    db.mensajes_privados.insert_many([{
+        'texto': f'Mensaje de benchmark número {i}',
+        'fechaDeCreado': inicio + timedelta(minutes=i),
+        'emisor': actual['_id'] if i % 2 else otro['_id'],
+        'receptor': otro['_id'] if i % 2 else actual['_id'],
+        'leido': None if i % 3 else inicio,
+    } for i in range(n_mensajes)])
+    return str(actual['_id']), str(otro['_id'])
+
+
+def _measure(fn, filas, iteraciones):
+    """Ejecuta fn `iteraciones` veces y devuelve microsegundos por fila"""
+    fn()  # calentamiento
+    tiempos = []
+    for _ in range(iteraciones):
+        start = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - start) * 1_000_000 / filas)
+    return {
+        'filas': filas,
+        'us_por_fila_p50': round(statistics.median(tiempos), 3),
+        'us_por_fila_min': round(min(tiempos), 3),
+    }
+
+
+def _encoders():
+    """Serializadores JSON disponibles: nombre -> función(obj) -> bytes|str"""
+    app = Flask(__name__)
+    encoders = {
+        'flask_json_provider': app.json.dumps,
+        'stdlib_json': json.dumps,
+        'stdlib_json_compacto': lambda obj: json.dumps(obj, separators=(',', ':'), ensure_ascii=False),
+    }
+    for modulo, nombre, factory in (
+        ('orjson', 'orjson', lambda m: m.dumps),
+        ('ujson', 'ujson', lambda m: m.dumps),
+        ('msgspec', 'msgspec_json', lambda m: m.json.encode),
+    ):
+        try:
+            encoders[nombre] = factory(importlib.import_module(modulo))
+        except ImportError:
+            pass
+    return encoders
+
+
+def run(uri, db_name, n_seguidores, n_mensajes, iteraciones):
+    _connect(uri, db_name)
+    actual_id, otro_id = _seed(n_seguidores, n_mensajes)
+
+    usuario_helper = get_usuario_by_id(actual_id)
+    usuario_doc = Usuario.objects(id=actual_id).first()
+    otro_helper = get_usuario_by_id(otro_id)
+
+    mensajes_repo, _total = MensajePrivadoRepository.gets_mensaje_privado(actual_id, otro_id, n_mensajes, 0)
+    participantes = [ObjectId(actual_id), ObjectId(otro_id)]
+    mensajes_resueltos = list(MensajePrivado.objects(emisor__in=participantes).limit(n_mensajes))
+    for mensaje in mensajes_resueltos:
+        # Forzar la dereferenciación fuera de la medición
+        mensaje.emisor, mensaje.receptor
+
+    # obtener_conversacion serializa cada usuario una vez por respuesta
+    actual_data, otro_data = usuario_helper.to_dict(), otro_helper.to_dict()
+    filas = len(mensajes_repo)
+    casos = {
+        'usuario_to_dict_helper': (lambda: [usuario_helper.to_dict() for _ in range(filas)], filas),
+        'usuario_to_dict_con_seguidores': (lambda: [usuario_doc.to_dict() for _ in range(10)], 10),
+        'mensaje_privado_to_dict_resuelto': (lambda: [m.to_dict() for m in mensajes_resueltos], filas),
+        # Cada fila consulta la BD dos veces: pocas filas para no eternizar la corrida
+        'mensaje_privado_to_dict_ids': (lambda: [m.to_dict() for m in mensajes_repo[:50]], min(filas, 50)),
+        'conversacion_dict': (
+            lambda: [mensaje_de_conversacion_dict(m, actual_id, actual_data, otro_data) for m in mensajes_repo],
+            filas,
+        ),
+    }
+
+    resultados = {}
+    for nombre, (fn, n) in casos.items():
+        resultados[nombre] = _measure(fn, n, iteraciones)
+
+    pagina = {
+        'success': True,
+        'data': {
+            'conversacion': [
+                mensaje_de_conversacion_dict(m, actual_id, actual_data, otro_data) for m in mensajes_repo
+            ],
+            'total': filas,
+        },
+    }
+    for nombre, encode in _encoders().items():
+        resultado = _measure(lambda: encode(pagina), filas, iteraciones)
+        encoded = encode(pagina)
+        resultado['bytes'] = len(encoded.encode() if isinstance(encoded, str) else encoded)
+        resultados[f'json:{nombre}'] = resultado
+
+    disconnect(alias='default')
+    return resultados
+
+
+def comparar(actual, anterior, tolerancia):
+    """Casos cuyo costo por fila (p50) creció más que la tolerancia (fracción)"""
+    regresiones = []
+    for nombre, datos in actual.items():
+        previo = anterior.get(nombre)
+        if not previo or not previo['us_por_fila_p50']:
+            continue
+        cambio = (datos['us_por_fila_p50'] - previo['us_por_fila_p50']) / previo['us_por_fila_p50']
+        if cambio > tolerancia:
+            regresiones.append((nombre, previo['us_por_fila_p50'], datos['us_por_fila_p50'], cambio))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Microbenchmarks de serialización')
+    parser.add_argument('--uri', help='mongod real (default: mongomock en memoria)')
+    parser.add_argument('--db', default='bench_main_db')
+    parser.add_argument('--seguidores', type=int, default=200)
+    parser.add_argument('--mensajes', type=int, default=500)
+    parser.add_argument('--iteraciones', type=int, default=20)
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    parser.add_argument('--comparar', help='JSON de una corrida anterior')
+    parser.add_argument('--tolerancia', type=float, default=0.2)
+    args = parser.parse_args()
+
+    resultados = run(args.uri, args.db, args.seguidores, args.mensajes, args.iteraciones)
+
+    print(f"{'caso':<40} {'filas':>6} {'us/fila p50':>12} {'us/fila min':>12} {'bytes':>10}")
+    for nombre, r in resultados.items():
+        print(f"{nombre:<40} {r['filas']:>6} {r['us_por_fila_p50']:>12} {r['us_por_fila_min']:>12} "
+              f"{r.get('bytes', ''):>10}")
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            regresiones = comparar(resultados, json.load(f), args.tolerancia)
+        for nombre, antes, ahora, cambio in regresiones:
+            print(f"REGRESIÓN {nombre}: {antes} -> {ahora} us/fila (+{cambio * 100:.0f}%)")
+        if not regresiones:
+            print(f"Sin regresiones mayores a {args.tolerancia * 100:.0f}%")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+Benchmark de compresión de red entre la app y MongoDB
+
+Para cada compresor disponible (none, zlib, snappy, zstd) reconecta el alias
+'default' con ese compresor y mide, contra un mongod local:
+- bytes físicos en la red (serverStatus.network.physicalBytesIn/Out)
+- latencia de MensajePrivadoRepository.gets_mensaje_privados
+- latencia de UsuarioRepository.gets_usuarios
+
+Uso (desde backend/):
+    python -m benchmarks.bench_wire_compression --uri mongodb://localhost:27017 \\
+        --mensajes 2000 --usuarios 500 --iteraciones 50
+
+Los datos se generan en una base aparte (--db, default bench_main_db) que se
+borra al terminar salvo --keep.
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from mongoengine import connect, disconnect
+from pymongo import MongoClient
+
+from db import available_compressors
+from repositories.mensaje_privado_repository import MensajePrivadoRepository
+from repositories.usuario_repository import UsuarioRepository
+
+
+FRASES = [
+    "Hola, ¿podemos hablar sobre el proyecto?",
+    "¿Tienes tiempo para revisar el código esta tarde?",
+    "Te paso los detalles de la configuración del servidor",
+    "Excelente trabajo en la última feature, quedó muy bien",
+    "Propongo hacer la demo el viernes a las 3pm",
+]
+
+
+def _seed(client, db_name, n_usuarios, n_mensajes):
+    db = client[db_name]
+    db.usuarios.drop()
+    db.mensajes_privados.drop()
+
+    usuarios = []
+    for i in range(n_usuarios):
+        usuarios.append({
+            '_id': ObjectId(),
+            'nickName': f'bench_user_{i}',
+            'nombre': 'Usuario',
+            'apellido': f'Benchmark {i}',
+            'mail': f'bench_user_{i}@example.com',
+            'contraseña': 'x',
+            'biografia': 'Desarrollador Full Stack interesado en Python, Angular y MongoDB',
+            'fotoUsuario': f'https://ui-avatars.com/api/?name=Usuario+{i}&size=128',
+            'fotoUsuarioPortada': '',
+            'fechaDeCreado': datetime.utcnow(),
+            'rol': 'user',
+            'seguidores': [],
+            'siguiendo': [],
+        })
+    db.usuarios.insert_many(usuarios)
+
+    # Todos los mensajes involucran al primer usuario: es el inbox que se consulta
+    protagonista = usuarios[0]['_id']
+    inicio = datetime.utcnow() - timedelta(days=30)
+    mensajes = []
+    for i in range(n_mensajes):
+        otro = usuarios[random.randrange(1, n_usuarios)]['_id']
+        emisor, receptor = (protagonista, otro) if i % 2 else (otro, protagonista)
+        mensajes.append({
+            'texto': " ".join(random.choice(FRASES) for _ in range(3)),
+            'fechaDeCreado': inicio + timedelta(seconds=i * 30),
+            'emisor': emisor,
+            'receptor': receptor,
+            'leido': None,
+        })
+    db.mensajes_privados.insert_many(mensajes)
+    db.mensajes_privados.create_index([('emisor', 1), ('receptor', 1)])
+    return str(protagonista), [str(u['_id']) for u in usuarios]
+
+
+def _network_bytes(client):
+    network = client.admin.command('serverStatus')['network']
+    return (
+        network.get('physicalBytesIn', network['bytesIn']),
+        network.get('physicalBytesOut', network['bytesOut']),
+    )
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _measure(fn, iteraciones):
+    tiempos = []
+    for _ in range(iteraciones):
+        start = time.perf_counter()
+        fn()
+        tiempos.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50_ms': round(statistics.median(tiempos), 3),
+        'p95_ms': round(_percentile(tiempos, 95), 3),
+        'mean_ms': round(statistics.fmean(tiempos), 3),
+    }
+
+
+def run(uri, db_name, n_usuarios, n_mensajes, iteraciones, keep=False):
+    admin_client = MongoClient(uri)
+    protagonista, usuario_ids = _seed(admin_client, db_name, n_usuarios, n_mensajes)
+
+    resultados = []
+    for compresor in ['none'] + available_compressors():
+        disconnect(alias='default')
+        options = {} if compresor == 'none' else {'compressors': compresor}
+        connect(db=db_name, host=uri, alias='default', uuidRepresentation='standard', **options)
+
+        casos = {
+            'gets_mensaje_privados': lambda: MensajePrivadoRepository.gets_mensaje_privados(protagonista),
+            'gets_usuarios': lambda: UsuarioRepository.gets_usuarios(usuario_ids),
+        }
+        # Calentamiento: abre la conexión y negocia el compresor
+        for fn in casos.values():
+            fn()
+
+        for nombre, fn in casos.items():
+            bytes_in_0, bytes_out_0 = _network_bytes(admin_client)
+            latencias = _measure(fn, iteraciones)
+            bytes_in_1, bytes_out_1 = _network_bytes(admin_client)
+            # Las dos llamadas a serverStatus del cliente admin también cuentan,
+            # pero son iguales para todos los compresores.
+            resultados.append({
+                'compresor': compresor,
+                'operacion': nombre,
+                'bytes_servidor_a_app_por_llamada': (bytes_out_1 - bytes_out_0) // iteraciones,
+                'bytes_app_a_servidor_por_llamada': (bytes_in_1 - bytes_in_0) // iteraciones,
+                **latencias,
+            })
+
+    disconnect(alias='default')
+    if not keep:
+        admin_client.drop_database(db_name)
+    admin_client.close()
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de compresión de red con MongoDB')
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--db', default='bench_main_db')
+    parser.add_argument('--usuarios', type=int, default=500)
+    parser.add_argument('--mensajes', type=int, default=2000)
+    parser.add_argument('--iteraciones', type=int, default=50)
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    parser.add_argument('--keep', action='store_true', help='No borrar la base de benchmark')
+    args = parser.parse_args()
+
+    resultados = run(args.uri, args.db, args.usuarios, args.mensajes, args.iteraciones, args.keep)
+
+    print(f"{'compresor':<10} {'operación':<24} {'bytes out/llamada':>18} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in resultados:
+        print(f"{r['compresor']:<10} {r['operacion']:<24} {r['bytes_servidor_a_app_por_llamada']:>18} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,537 @@
+"""
+Prueba de carga de las rutas de la API
+
+1. Genera datos con volúmenes configurables en una base aparte (--db):
+   - --usuarios usuarios; la cantidad de seguidores sigue una distribución
+     tipo Zipf (--skew): pocos usuarios concentran la mayoría de seguidores.
+   - --pares-por-usuario conversaciones por usuario con --mensajes-por-par
+     mensajes privados cada una (la mitad sin leer).
+   - --posts-por-usuario mensajes públicos por usuario.
+   - El primer usuario es admin (envío masivo y consulta de logs).
+   - --cuentas-a-eliminar cuentas aparte, fuera del pool de usuarios
+     virtuales, que DELETE /api/usuarios/me consume una vez cada una.
+2. Genera un JWT por usuario (igual que generate_test_token.py).
+3. Lanza --concurrencia hilos que eligen un usuario y una ruta al azar
+   (según RUTAS y sus pesos) hasta completar --duracion segundos.
+4. Reporta por ruta: requests, errores, p50/p95/p99 y RPS, y guarda el
+   resultado en JSON (--json). Con --comparar se compara contra un JSON
+   anterior y se marcan las rutas cuyo p95 empeoró más de --tolerancia.
+
+Modos:
+- sin --base-url: la app corre en este proceso (Flask test client).
+- con --base-url: contra un servidor ya levantado (gunicorn), que tiene que
+  usar la misma base (MONGODB_URI=<uri>/<db>) y el mismo JWT_SECRET_KEY.
+  Las rutas de escritura (crear, leer, eliminar, perfil, avatar) modifican
+  esa base y guardan avatares en el servidor.
+
+Rutas cubiertas: todas las de RUTAS en build_rutas (auth/login, mensajes/mios,
+mensajes privados: crear, masivo, conversación, conversaciones, no-leídos,
+leer uno y varios, eliminar; seguidores; PATCH y DELETE usuarios/me;
+upload/avatar; logs; testing/token). Quedan afuera GET
+/api/usuarios/<id>/eliminacion (sondeo admin de una tarea puntual),
+/health, /metrics, /api/stream y /uploads/avatars/* (estáticos).
+
+Cada usuario virtual manda su propio User-Agent, así el rate limit de
+POST /api/mensajes-privados (por IP + User-Agent) se aplica por usuario; los
+429 se reportan aparte y no cuentan como error.
+
+Uso (desde backend/):
+    python -m benchmarks.load_test --uri mongodb://localhost:27017 \\
+        --usuarios 1000 --duracion 60 --concurrencia 16 --json resultados.json
+    python -m benchmarks.load_test --base-url http://localhost:5000 \\
+        --comparar resultados.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from bson import ObjectId
+from pymongo import MongoClient
+
+from utils.passwords import hash_password
+
+
+FRASES = [
+    "Hola, ¿podemos hablar sobre el proyecto?",
+    "¿Tienes tiempo para revisar el código esta tarde?",
+    "Te paso los detalles de la configuración del servidor",
+    "Excelente trabajo en la última feature, quedó muy bien",
+    "Propongo hacer la demo el viernes a las 3pm",
+]
+
+# PNG de 1x1 para POST /api/upload/avatar
+PNG_1X1 = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000001e221bc330000000049454e44ae426082'
+)
+
+
+# Datos de prueba
+
+def _seguidores_zipf(n_usuarios, skew, max_seguidores):
+    """Cantidad de seguidores de cada usuario: proporcional a 1 / rank^skew"""
+    cantidades = [max_seguidores / (rank ** skew) for rank in range(1, n_usuarios + 1)]
+    return [min(int(c), n_usuarios - 1) for c in cantidades]
+
+
+def _muestra_sin(n, cantidad, excluido):
+    """`cantidad` índices distintos de range(n) sin `excluido`, sin armar la lista de candidatos"""
+    muestra = random.sample(range(n), min(cantidad + 1, n))
+    return [i for i in muestra if i != excluido][:cantidad]
+
+
+def seed(client, db_name, n_usuarios, skew, max_seguidores, pares_por_usuario,
+         mensajes_por_par, posts_por_usuario, cuentas_a_eliminar=0):
+    db = client[db_name]
+    for coleccion in ('usuarios', 'mensajes', 'mensajes_privados', 'eliminaciones_cuenta'):
+        db[coleccion].drop()
+
+    # Un único hash para todos: hash_password es lento a propósito
+    password = hash_password('password123')
+    ahora = datetime.utcnow()
+    ids = [ObjectId() for _ in range(n_usuarios)]
+    usuarios = [{
+        '_id': oid,
+        'nickName': f'load_user_{i}',
+        'nombre': 'Usuario',
+        'apellido': f'Carga {i}',
+        'mail': f'load_user_{i}@example.com',
+        'contraseña': password,
+        'biografia': 'Usuario generado para la prueba de carga',
+        'fotoUsuario': '',
+        'fotoUsuarioPortada': '',
+        'fechaDeCreado': ahora,
+        'updatedAt': ahora,
+        'rol': 'admin' if i == 0 else 'user',
+        'seguidores': [],
+        'siguiendo': [],
+    } for i, oid in enumerate(ids)]
+
+    siguiendo = defaultdict(list)
+    for i, (usuario, cantidad) in enumerate(zip(usuarios, _seguidores_zipf(n_usuarios, skew, max_seguidores))):
+        # range(n) se muestrea sin copiarse: O(cantidad) por usuario, no O(n)
+        seguidores = [ids[j] for j in _muestra_sin(n_usuarios, cantidad, i)]
+        usuario['seguidores'] = seguidores
+        for seguidor in seguidores:
+            siguiendo[seguidor].append(usuario['_id'])
+    for usuario in usuarios:
+        usuario['siguiendo'] = siguiendo[usuario['_id']]
+    db.usuarios.insert_many(usuarios)
+
+    descartables = [{
+        '_id': ObjectId(),
+        'nickName': f'load_delete_{i}',
+        'nombre': 'Usuario',
+        'apellido': f'Descartable {i}',
+        'mail': f'load_delete_{i}@example.com',
+        'contraseña': password,
+        'fechaDeCreado': ahora,
+        'updatedAt': ahora,
+        'rol': 'user',
+        'seguidores': [],
+        'siguiendo': [],
+    } for i in range(cuentas_a_eliminar)]
+    if descartables:
+        db.usuarios.insert_many(descartables)
+
+    inicio = ahora - timedelta(days=30)
+    posts = [{
+        'texto': random.choice(FRASES),
+        'fechaDeCreado': inicio + timedelta(minutes=random.randrange(30 * 24 * 60)),
+        'autor': oid,
+        'etiquetas': [],
+        'menciones': [],
+    } for oid in ids for _ in range(posts_por_usuario)]
+    if posts:
+        db.mensajes.insert_many(posts)
+
+    # Conversaciones: cada usuario con pares_por_usuario contactos al azar
+    pares = set()
+    for i, oid in enumerate(ids):
+        for j in _muestra_sin(n_usuarios, pares_por_usuario, i):
+            pares.add(tuple(sorted((oid, ids[j]))))
+    privados = []
+    for a, b in pares:
+        for i in range(mensajes_por_par):
+            emisor, receptor = (a, b) if i % 2 else (b, a)
+            privados.append({
+                '_id': ObjectId(),
+                'texto': random.choice(FRASES),
+                'fechaDeCreado': inicio + timedelta(minutes=random.randrange(30 * 24 * 60)),
+                'emisor': emisor,
+                'receptor': receptor,
+                'leido': None if i % 4 < 2 else ahora,
+            })
+    if privados:
+        db.mensajes_privados.insert_many(privados)
+
+    # Ids que los escenarios PUT /leer y DELETE consumen (cada uno se usa una vez)
+    contactos = defaultdict(set)
+    no_leidos = defaultdict(deque)
+    enviados = defaultdict(deque)
+    for a, b in pares:
+        contactos[a].add(b)
+        contactos[b].add(a)
+    for mensaje in privados:
+        # Se eliminan solo mensajes ya leídos para no cruzarse con PUT /leer
+        if mensaje['leido'] is None:
+            no_leidos[mensaje['receptor']].append(str(mensaje['_id']))
+        else:
+            enviados[mensaje['emisor']].append(str(mensaje['_id']))
+
+    usuarios_virtuales = [{
+        'id': str(oid),
+        'nickName': f'load_user_{i}',
+        'rol': 'admin' if i == 0 else 'user',
+        'contactos': [str(c) for c in contactos[oid]],
+        'no_leidos': no_leidos[oid],
+        'enviados': enviados[oid],
+    } for i, oid in enumerate(ids)]
+    cuentas = deque({'id': str(d['_id']), 'nickName': d['nickName'], 'rol': 'user'} for d in descartables)
+    return usuarios_virtuales, cuentas
+
+
+def generar_tokens(app, usuarios):
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        for usuario in usuarios:
+            usuario['token'] = create_access_token(
+                identity=usuario['id'],
+                additional_claims={'nickName': usuario['nickName'], 'rol': usuario['rol']},
+            )
+
+
+# Clientes HTTP (uno por hilo)
+
+class HttpClient:
+    """Cliente keep-alive contra un servidor real"""
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        conn_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._conn = conn_class(parts.hostname, parts.port, timeout=30)
+
+    def send(self, method, path, headers, body=None):
+        try:
+            self._conn.request(method, path, body=body, headers=headers)
+            response = self._conn.getresponse()
+            response.read()
+            return response.status
+        except (http.client.HTTPException, OSError):
+            self._conn.close()
+            return 599
+
+
+class InProcessClient:
+    """Flask test client: la app corre en este mismo proceso"""
+
+    def __init__(self, app):
+        self._client = app.test_client()
+
+    def send(self, method, path, headers, body=None):
+        return self._client.open(path, method=method, headers=headers, data=body).status_code
+
+
+# Escenarios: (nombre, peso, función(usuario) -> (method, path, body, headers extra))
+
+def _tomar(cola, lock):
+    with lock:
+        return cola.popleft() if cola else None
+
+
+def _multipart(campo, nombre, contenido, content_type):
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{campo}"; filename="{nombre}"\r\n'
+        f'Content-Type: {content_type}\r\n\r\n'
+    ).encode() + contenido + f'\r\n--{boundary}--\r\n'.encode()
+    return body, {'Content-Type': f'multipart/form-data; boundary={boundary}'}
+
+
+def _auth(usuario):
+    return {'Authorization': f"Bearer {usuario['token']}"}
+
+
+def build_rutas(lock, admin, cuentas_a_eliminar, ids_usuarios):
+    def conversacion(u):
+        if not u['contactos']:
+            return None
+        return 'GET', f"/api/mensajes-privados/conversacion/{random.choice(u['contactos'])}", None, {}
+
+    def crear(u):
+        if not u['contactos']:
+            return None
+        body = json.dumps({'receptor_id': random.choice(u['contactos']), 'texto': random.choice(FRASES)})
+        return 'POST', '/api/mensajes-privados', body, {'Content-Type': 'application/json'}
+
+    def leer(u):
+        mensaje_id = _tomar(u['no_leidos'], lock)
+        return ('PUT', f'/api/mensajes-privados/{mensaje_id}/leer', None, {}) if mensaje_id else None
+
+    def leer_varios(u):
+        ids = [mensaje_id for mensaje_id in (_tomar(u['no_leidos'], lock) for _ in range(20)) if mensaje_id]
+        if not ids:
+            return None
+        return 'POST', '/api/mensajes-privados/leer', json.dumps({'ids': ids}), {'Content-Type': 'application/json'}
+
+    def masivo(u):
+        body = json.dumps({'receptor_ids': random.sample(ids_usuarios, min(50, len(ids_usuarios))),
+                           'texto': random.choice(FRASES)})
+        return 'POST', '/api/mensajes-privados/masivo', body, {'Content-Type': 'application/json', **_auth(admin)}
+
+    def login(u):
+        body = json.dumps({'usuario': u['nickName'], 'password': 'password123'})
+        return 'POST', '/api/auth/login', body, {'Content-Type': 'application/json'}
+
+    def eliminar_cuenta(u):
+        cuenta = _tomar(cuentas_a_eliminar, lock)
+        if cuenta is None:
+            return None
+        body = json.dumps({'password': 'password123'})
+        return 'DELETE', '/api/usuarios/me', body, {'Content-Type': 'application/json', **_auth(cuenta)}
+
+    def logs(u):
+        params = random.choice(['', '?level=ERROR,WARNING', f"?user_id={u['id']}", '?action=user_login&limit=200'])
+        return 'GET', f'/api/logs{params}', None, _auth(admin)
+
+    def eliminar(u):
+        mensaje_id = _tomar(u['enviados'], lock)
+        return ('DELETE', f'/api/mensajes-privados/{mensaje_id}', None, {}) if mensaje_id else None
+
+    def perfil(u):
+        body = json.dumps({'biografia': f'Actualizado {time.time()}'})
+        return 'PATCH', '/api/usuarios/me', body, {'Content-Type': 'application/json'}
+
+    def avatar(u):
+        body, headers = _multipart('file', 'avatar.png', PNG_1X1, 'image/png')
+        return 'POST', '/api/upload/avatar', body, headers
+
+    return [
+        ('GET /api/mensajes/mios', 15, lambda u: ('GET', '/api/mensajes/mios', None, {})),
+        ('GET /api/mensajes-privados/conversaciones', 20,
+         lambda u: ('GET', '/api/mensajes-privados/conversaciones', None, {})),
+        ('GET /api/mensajes-privados/conversacion/<user_id>', 20, conversacion),
+        ('GET /api/mensajes-privados/no-leidos', 20,
+         lambda u: ('GET', '/api/mensajes-privados/no-leidos', None, {})),
+        ('GET /api/usuarios/seguidores', 10, lambda u: ('GET', '/api/usuarios/seguidores', None, {})),
+        ('POST /api/mensajes-privados', 5, crear),
+        ('PUT /api/mensajes-privados/<id>/leer', 4, leer),
+        ('POST /api/mensajes-privados/leer', 2, leer_varios),
+        ('POST /api/mensajes-privados/masivo', 1, masivo),
+        ('POST /api/auth/login', 2, login),
+        ('DELETE /api/usuarios/me', 1, eliminar_cuenta),
+        ('GET /api/logs', 2, logs),
+        ('DELETE /api/mensajes-privados/<id>', 1, eliminar),
+        ('PATCH /api/usuarios/me', 2, perfil),
+        ('POST /api/upload/avatar', 1, avatar),
+        ('GET /api/testing/token/<user>', 2,
+         lambda u: ('GET', f"/api/testing/token/{u['nickName']}", None, {})),
+    ]
+
+
+# Ejecución y reporte
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _worker(make_client, usuarios, rutas, deadline, resultados, lock):
+    client = make_client()
+    nombres = [r[0] for r in rutas]
+    pesos = [r[1] for r in rutas]
+    por_nombre = {r[0]: r[2] for r in rutas}
+    propios = defaultdict(lambda: {'latencias': [], 'status': defaultdict(int)})
+
+    while time.monotonic() < deadline:
+        usuario = random.choice(usuarios)
+        nombre = random.choices(nombres, pesos)[0]
+        peticion = por_nombre[nombre](usuario)
+        if peticion is None:
+            continue
+        method, path, body, extra = peticion
+        # `extra` puede reemplazar el Authorization (rutas de admin, cuentas descartables)
+        headers = {
+            **_auth(usuario),
+            'User-Agent': f"load-test/{usuario['nickName']}",
+            **extra,
+        }
+        start = time.perf_counter()
+        status = client.send(method, path, headers, body)
+        propios[nombre]['latencias'].append((time.perf_counter() - start) * 1000)
+        propios[nombre]['status'][status] += 1
+
+    with lock:
+        for nombre, datos in propios.items():
+            resultados[nombre]['latencias'].extend(datos['latencias'])
+            for status, n in datos['status'].items():
+                resultados[nombre]['status'][status] += n
+
+
+def _resumen(latencias, status, duracion):
+    errores = sum(n for s, n in status.items() if s >= 400 and s != 429)
+    return {
+        'requests': len(latencias),
+        'errores': errores,
+        'rate_limited': status.get(429, 0),
+        'status': {str(s): n for s, n in sorted(status.items())},
+        'rps': round(len(latencias) / duracion, 1),
+        'p50_ms': round(statistics.median(latencias), 3),
+        'p95_ms': round(_percentile(latencias, 95), 3),
+        'p99_ms': round(_percentile(latencias, 99), 3),
+    }
+
+
+def run_load(make_client, usuarios, rutas, duracion, concurrencia):
+    resultados = defaultdict(lambda: {'latencias': [], 'status': defaultdict(int)})
+    lock = threading.Lock()
+    deadline = time.monotonic() + duracion
+    hilos = [
+        threading.Thread(target=_worker, args=(make_client, usuarios, rutas, deadline, resultados, lock))
+        for _ in range(concurrencia)
+    ]
+    start = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    elapsed = time.perf_counter() - start
+
+    rutas_resumen = {
+        nombre: _resumen(datos['latencias'], datos['status'], elapsed)
+        for nombre, datos in sorted(resultados.items())
+        if datos['latencias']
+    }
+    todas = [lat for datos in resultados.values() for lat in datos['latencias']]
+    status_total = defaultdict(int)
+    for datos in resultados.values():
+        for status, n in datos['status'].items():
+            status_total[status] += n
+    return {'total': _resumen(todas, status_total, elapsed), 'rutas': rutas_resumen, 'duracion_s': round(elapsed, 2)}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, anterior, tolerancia):
+    """Rutas cuyo p95 empeoró más que la tolerancia (fracción) respecto de la corrida anterior"""
+    regresiones = []
+    for nombre, datos in actual['rutas'].items():
+        previo = anterior.get('rutas', {}).get(nombre)
+        if not previo or not previo['p95_ms']:
+            continue
+        cambio = (datos['p95_ms'] - previo['p95_ms']) / previo['p95_ms']
+        if cambio > tolerancia:
+            regresiones.append({'ruta': nombre, 'p95_anterior_ms': previo['p95_ms'],
+                                'p95_actual_ms': datos['p95_ms'], 'cambio': round(cambio, 3)})
+    return regresiones
+
+
+def imprimir(resultado):
+    print(f"{'ruta':<50} {'req':>7} {'err':>5} {'429':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    filas = list(resultado['rutas'].items()) + [('TOTAL', resultado['total'])]
+    for nombre, r in filas:
+        print(f"{nombre:<50} {r['requests']:>7} {r['errores']:>5} {r['rate_limited']:>5} {r['rps']:>8} "
+              f"{r['p50_ms']:>9} {r['p95_ms']:>9} {r['p99_ms']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prueba de carga de las rutas de la API')
+    parser.add_argument('--uri', default='mongodb://localhost:27017')
+    parser.add_argument('--db', default='bench_main_db')
+    parser.add_argument('--base-url', help='Servidor a probar (sin esto, la app corre en proceso)')
+    parser.add_argument('--usuarios', type=int, default=1000)
+    parser.add_argument('--skew', type=float, default=1.1, help='Exponente Zipf de seguidores')
+    parser.add_argument('--max-seguidores', type=int, default=500)
+    parser.add_argument('--pares-por-usuario', type=int, default=5)
+    parser.add_argument('--mensajes-por-par', type=int, default=10)
+    parser.add_argument('--posts-por-usuario', type=int, default=20)
+    parser.add_argument('--cuentas-a-eliminar', type=int, default=200,
+                        help='Cuentas descartables para DELETE /api/usuarios/me')
+    parser.add_argument('--duracion', type=float, default=30, help='Segundos de carga')
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Guardar resultados en este archivo')
+    parser.add_argument('--comparar', help='JSON de una corrida anterior')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Empeoramiento de p95 tolerado (0.2 = 20%%)')
+    parser.add_argument('--keep', action='store_true', help='No borrar la base de benchmark')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    admin_client = MongoClient(args.uri)
+    start = time.perf_counter()
+    usuarios, cuentas = seed(admin_client, args.db, args.usuarios, args.skew, args.max_seguidores,
+                             args.pares_por_usuario, args.mensajes_por_par, args.posts_por_usuario,
+                             args.cuentas_a_eliminar)
+    print(f"Datos generados en {time.perf_counter() - start:.1f}s")
+
+    # La app lee MONGODB_URI al importarse: apuntarla a la base de benchmark
+    os.environ['MONGODB_URI'] = f"{args.uri.rstrip('/')}/{args.db}"
+    import app as app_module
+    generar_tokens(app_module.app, usuarios + list(cuentas))
+
+    if args.base_url:
+        make_client = lambda: HttpClient(args.base_url)  # noqa: E731
+    else:
+        # Los avatares subidos durante la prueba van a un directorio temporal: el
+        # storage ya se creó al importar la app, así que se reemplaza (cambiar
+        # UPLOAD_AVATARS_FOLDER a esta altura no tendría efecto)
+        from utils.storage import LocalStorage
+        carpeta = tempfile.mkdtemp(prefix='load_test_avatars_')
+        carpeta_tmp = os.path.join(carpeta, '.tmp')
+        app_module.app.config['UPLOAD_TMP_FOLDER'] = carpeta_tmp
+        app_module.app.extensions['avatar_storage'] = LocalStorage(os.path.join(carpeta, 'avatars'), carpeta_tmp)
+        make_client = lambda: InProcessClient(app_module.app)  # noqa: E731
+
+    rutas = build_rutas(threading.Lock(), usuarios[0], cuentas, [u['id'] for u in usuarios])
+    resultado = run_load(make_client, usuarios, rutas, args.duracion, args.concurrencia)
+    resultado['parametros'] = {
+        key: getattr(args, key) for key in (
+            'usuarios', 'skew', 'max_seguidores', 'pares_por_usuario', 'mensajes_por_par',
+            'posts_por_usuario', 'cuentas_a_eliminar', 'duracion', 'concurrencia', 'seed',
+        )
+    }
+    resultado['parametros']['modo'] = 'http' if args.base_url else 'in-process'
+    resultado['commit'] = _git_commit()
+    resultado['fecha'] = datetime.utcnow().isoformat()
+    imprimir(resultado)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            regresiones = comparar(resultado, json.load(f), args.tolerancia)
+        resultado['regresiones'] = regresiones
+        for r in regresiones:
+            print(f"REGRESIÓN {r['ruta']}: p95 {r['p95_anterior_ms']} -> {r['p95_actual_ms']} ms "
+                  f"(+{r['cambio'] * 100:.0f}%)")
+        if not regresiones:
+            print(f"Sin regresiones de p95 mayores a {args.tolerancia * 100:.0f}%")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(resultado, f, indent=2)
+
+    if not args.keep:
+        admin_client.drop_database(args.db)
+    admin_client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,11 @@
+import logging
 import os
-from mongoengine import connect
+import time
+from mongoengine import connect, disconnect_all
+from mongoengine import connection as me_connection
+from pymongo.read_preferences import SecondaryPreferred
+
+logger = logging.getLogger(__name__)
 
 
 def _get_env_bool(name, default=False):
@@ -9,12 +15,126 @@ def _get_env_bool(name, default=False):
     return str(value).lower() in {"1", "true", "yes", "on"}
 
 
+def _get_env_int(name, default=None):
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
 def _build_local_uri(db_name):
     host = os.getenv("MONGODB_HOST", "localhost")
     port = os.getenv("MONGODB_PORT", "27017")
     return f"mongodb://{host}:{port}/{db_name}"
 
 
+def _replica_set_options():
+    """
+    Extra MongoClient options for a replica set deployment.
+
+    Env vars:
+    - MONGODB_REPLICA_SET: replica set name (e.g. rs0). Empty = standalone.
+    """
+    replica_set = os.getenv("MONGODB_REPLICA_SET")
+    if not replica_set:
+        return {}
+    return {"replicaSet": replica_set}
+
+
+def _pool_options():
+    """
+    Connection pool settings shared by both aliases.
+
+    Env vars (unset = pymongo default):
+    - MONGODB_MAX_POOL_SIZE / MONGODB_MIN_POOL_SIZE: pool size per process.
+      Sync gunicorn workers serve one request at a time, so a small pool is enough.
+    - MONGODB_WAIT_QUEUE_TIMEOUT_MS: max wait for a free connection before failing.
+    - MONGODB_MAX_IDLE_TIME_MS: close connections idle for longer than this.
+    """
+    options = {}
+    for env_name, option in (
+        ("MONGODB_MAX_POOL_SIZE", "maxPoolSize"),
+        ("MONGODB_MIN_POOL_SIZE", "minPoolSize"),
+        ("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "waitQueueTimeoutMS"),
+        ("MONGODB_MAX_IDLE_TIME_MS", "maxIdleTimeMS"),
+    ):
+        value = _get_env_int(env_name)
+        if value is not None:
+            options[option] = value
+    return options
+
+
+# Wire compressor -> Python module it needs (zlib is always available)
+_COMPRESSOR_MODULES = {
+    "zstd": "zstandard",       # pip install "pymongo[zstd]"
+    "snappy": "snappy",        # pip install "pymongo[snappy]"
+    "zlib": "zlib",
+}
+
+
+def available_compressors():
+    """Wire compressors usable in this environment, in preference order."""
+    import importlib.util
+
+    return [
+        name for name, module in _COMPRESSOR_MODULES.items()
+        if importlib.util.find_spec(module) is not None
+    ]
+
+
+def _compression_options():
+    """
+    Wire compression between app and MongoDB (OP_COMPRESSED).
+
+    Env vars:
+    - MONGODB_COMPRESSORS: comma separated, in preference order (e.g. "zstd,snappy,zlib").
+      The server picks the first one it also supports. Compressors whose Python
+      module is missing are dropped instead of failing at connect time.
+    - MONGODB_ZLIB_COMPRESSION_LEVEL: -1 (default) or 0-9, only used by zlib.
+    """
+    requested = [
+        name.strip().lower()
+        for name in (os.getenv("MONGODB_COMPRESSORS") or "").split(",")
+        if name.strip()
+    ]
+    if not requested:
+        return {}
+
+    available = set(available_compressors())
+    unknown = [name for name in requested if name not in _COMPRESSOR_MODULES]
+    if unknown:
+        raise ValueError(f"MONGODB_COMPRESSORS: unknown compressor(s) {', '.join(unknown)}")
+
+    compressors = [name for name in requested if name in available]
+    missing = [name for name in requested if name not in available]
+    if missing:
+        logger.warning("MongoDB compressors not installed, ignoring: %s", ", ".join(missing))
+    if not compressors:
+        return {}
+
+    options = {"compressors": ",".join(compressors)}
+    zlib_level = _get_env_int("MONGODB_ZLIB_COMPRESSION_LEVEL")
+    if zlib_level is not None and "zlib" in compressors:
+        options["zlibCompressionLevel"] = zlib_level
+    return options
+
+
+def _event_listeners(alias):
+    from utils.mongo_monitoring import get_command_listener, get_pool_listener
+    from utils.query_budget import get_query_budget_listener
+    return [get_pool_listener(alias), get_command_listener(alias), get_query_budget_listener()]
+
+
+def secondary_reads_enabled():
+    """True when read-only queries may be routed to secondaries (MONGODB_SECONDARY_READS)."""
+    return _get_env_bool("MONGODB_SECONDARY_READS", False)
+
+
+def max_staleness_seconds():
+    """Upper bound on replication lag accepted for secondary reads (min 90s per MongoDB)."""
+    return max(_get_env_int("MONGODB_MAX_STALENESS_SECONDS", 90), 90)
+
+
 def connect_databases():
     """
     Connect to MongoDB using local URIs by default.
@@ -22,12 +142,22 @@ def connect_databases():
     Env vars:
     - MONGODB_URI / MONGODB_LOGS_URI override local defaults.
     - MONGODB_TLS and MONGODB_TLS_ALLOW_INVALID toggle TLS settings.
+    - MONGODB_REPLICA_SET enables replica set discovery.
+    - Pool settings: see _pool_options.
+    - Wire compression: see _compression_options.
+
+    Clients are created with connect=False: no sockets or monitor threads are
+    opened until the first operation, so calling this before gunicorn forks
+    does not share connections between workers (see gunicorn.conf.py).
     """
     main_uri = os.getenv("MONGODB_URI") or _build_local_uri("main_db")
     logs_uri = os.getenv("MONGODB_LOGS_URI") or _build_local_uri("logs_db")
 
     tls_enabled = _get_env_bool("MONGODB_TLS", False)
     tls_allow_invalid = _get_env_bool("MONGODB_TLS_ALLOW_INVALID", True)
+    replica_set = _replica_set_options()
+    pool_options = _pool_options()
+    compression_options = _compression_options()
 
     connect(
         db="main_db",
@@ -36,6 +166,11 @@ def connect_databases():
         tls=tls_enabled,
         tlsAllowInvalidCertificates=tls_allow_invalid,
         uuidRepresentation='standard',
+        connect=False,
+        event_listeners=_event_listeners("default"),
+        **replica_set,
+        **pool_options,
+        **compression_options,
     )
 
     connect(
@@ -45,5 +180,77 @@ def connect_databases():
         tls=tls_enabled,
         tlsAllowInvalidCertificates=tls_allow_invalid,
         uuidRepresentation='standard',
+        connect=False,
+        event_listeners=_event_listeners("logs"),
+        **replica_set,
+        **pool_options,
+        **compression_options,
     )
 
+
+def disconnect_databases():
+    """
+    Close every client of this process.
+
+    Used by the gunicorn post_fork hook: a forked worker drops the clients
+    inherited from the master and opens its own with connect_databases().
+    """
+    disconnect_all()
+
+
+def request_pins():
+    """
+    Read-your-writes pins of the current request: usuario_id -> expiry (time.time()).
+
+    They live in flask.g: utils.read_your_writes fills them from the token the
+    client sends back and returns them to the client after the request. No
+    pin is kept per process, so with several gunicorn workers the request
+    that reloads a conversation honours the pin whichever worker serves it.
+    Outside a request (jobs, scripts) there is nowhere to keep them: None.
+    """
+    from flask import g, has_request_context
+
+    if not has_request_context():
+        return None
+    if "primary_pins" not in g:
+        g.primary_pins = {}
+    return g.primary_pins
+
+
+def pin_to_primary(usuario_id):
+    """
+    Route the reads of `usuario_id` to the primary for a while after a write,
+    so the user always sees what they just wrote (e.g. a just-sent message).
+
+    The window equals the max staleness bound: after that any eligible
+    secondary is guaranteed to have caught up.
+    """
+    pins = request_pins()
+    if usuario_id is None or pins is None:
+        return
+    pins[str(usuario_id)] = time.time() + max_staleness_seconds()
+
+
+def _is_pinned_to_primary(usuario_id):
+    pins = request_pins()
+    if not pins:
+        return False
+    return pins.get(str(usuario_id), 0) > time.time()
+
+
+def get_read_db(alias="default", usuario_id=None):
+    """
+    Database handle for read-only repository methods.
+
+    With MONGODB_SECONDARY_READS enabled the handle uses `secondaryPreferred`
+    bounded by MONGODB_MAX_STALENESS_SECONDS; otherwise (and for users pinned
+    by `pin_to_primary`) it is the same primary handle as `get_db(alias)`.
+    """
+    database = me_connection.get_db(alias)
+    if not secondary_reads_enabled():
+        return database
+    if usuario_id is not None and _is_pinned_to_primary(usuario_id):
+        return database
+    return database.with_options(
+        read_preference=SecondaryPreferred(max_staleness=max_staleness_seconds())
+    )
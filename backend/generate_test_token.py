@@ -2,7 +2,7 @@
 Script para generar un token JWT de testing
 """
 from app import app
-from flask_jwt_extended import create_access_token
+from utils.auth import crear_token
 from models import Usuario
 from db import connect_databases
 
@@ -13,7 +13,7 @@ with app.app_context():
     usuarios = list(Usuario.objects(nickName='juanperez'))
     if usuarios:
         usuario = usuarios[0]
-        token = create_access_token(identity=str(usuario.id))
+        token = crear_token(usuario)
         print(f"Token para {usuario.nickName}:")
         print(token)
         print(f"\nUsuario ID: {usuario.id}")
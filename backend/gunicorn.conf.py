@@ -0,0 +1,57 @@
+"""
+Configuración de gunicorn
+
+Uso:
+    gunicorn -c gunicorn.conf.py app:app
+
+Con preload_app la aplicación se importa una sola vez en el master (menos
+memoria y arranque más rápido). Los clientes de MongoDB creados en ese import
+no se deben compartir entre procesos: cada worker los descarta en post_fork y
+abre su propio pool. El hilo que escribe los logs (utils.logging_config)
+tampoco sobrevive al fork: cada worker arranca el suyo al nacer
+(os.register_at_fork).
+
+Métricas: con PROMETHEUS_MULTIPROC_DIR definido cada worker escribe sus
+métricas en ese directorio y GET /metrics agrega las de todos los workers.
+"""
+
+import os
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in {"1", "true", "yes", "on"}
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+
+
+def on_starting(server):
+    """Limpia las métricas de una ejecución anterior"""
+    multiproc_dir = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        os.makedirs(multiproc_dir, exist_ok=True)
+        for name in os.listdir(multiproc_dir):
+            if name.endswith('.db'):
+                os.remove(os.path.join(multiproc_dir, name))
+
+
+def post_fork(server, worker):
+    """Cada worker abre sus propias conexiones a MongoDB"""
+    from db import connect_databases, disconnect_databases
+
+    disconnect_databases()
+    connect_databases()
+    server.log.info("Worker %s: conexiones a MongoDB inicializadas", worker.pid)
+
+
+def child_exit(server, worker):
+    """Descarta los gauges 'live' de un worker que terminó"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -10,12 +10,20 @@ Este script:
 Uso:
     python init_db.py
     python init_db.py --with-sample-data
+    python init_db.py --scale 100000 --workers 8   # datos sintéticos masivos
 """
 
 import os
 import sys
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from mongoengine import disconnect
+from mongoengine import connection as me_connection
+from bson import ObjectId
+from utils.passwords import hash_password
 import argparse
 
 # Cargar variables de entorno
@@ -24,7 +32,9 @@ load_dotenv()
 # Importar modelos
 from models import Usuario, Mensaje, MensajePrivado, Etiqueta, Mencion
 from models.log import Log
-from db import connect_databases
+from utils.auth import asegurar_indices_invalidaciones
+from utils.retencion_logs import asegurar_retencion_logs
+from db import connect_databases, disconnect_databases
 
 def connect_db():
     """Conecta a MongoDB (local por defecto)."""
@@ -36,6 +46,37 @@ def connect_db():
         print(f"❌ Error conectando a MongoDB: {e}")
         return False
 
+def completar_avatares(batch_size=1000):
+    """
+    Completa Usuario.avatares en los usuarios guardados antes de que existiera
+    el campo (jobs.eliminar_cuentas lo consulta para no borrar un avatar en uso)
+    
+    Returns:
+        Cantidad de usuarios actualizados
+    """
+    from pymongo import UpdateOne
+    from utils.avatar_images import hashes_de_avatar
+    
+    usuarios = me_connection.get_db('default').usuarios
+    pendientes = usuarios.find(
+        {'avatares': {'$exists': False}, '$or': [
+            {'fotoUsuario': {'$regex': '/uploads/avatars/'}},
+            {'fotoUsuarioPortada': {'$regex': '/uploads/avatars/'}},
+        ]},
+        {'fotoUsuario': 1, 'fotoUsuarioPortada': 1}
+    )
+    total = 0
+    operaciones = []
+    for doc in pendientes:
+        avatares = hashes_de_avatar(doc.get('fotoUsuario'), doc.get('fotoUsuarioPortada'))
+        operaciones.append(UpdateOne({'_id': doc['_id']}, {'$set': {'avatares': avatares}}))
+        if len(operaciones) >= batch_size:
+            total += usuarios.bulk_write(operaciones, ordered=False).modified_count
+            operaciones = []
+    if operaciones:
+        total += usuarios.bulk_write(operaciones, ordered=False).modified_count
+    return total
+
 def create_collections():
     """Crea las colecciones y sus índices"""
     try:
@@ -46,7 +87,8 @@ def create_collections():
         
         # Usuario
         Usuario.ensure_indexes()
-        print("✅ Colección 'usuarios' e índices creados")
+        completados = completar_avatares()
+        print(f"✅ Colección 'usuarios' e índices creados ({completados} usuarios con avatares completados)")
         
         # Etiqueta
         Etiqueta.ensure_indexes()
@@ -64,7 +106,13 @@ def create_collections():
         MensajePrivado.ensure_indexes()
         print("✅ Colección 'mensajes_privados' e índices creados")
         
-        # Log (en logs_db)
+        # Invalidaciones del cache de perfiles entre workers (TTL)
+        asegurar_indices_invalidaciones()
+        print("✅ Colección 'perfiles_invalidados' e índices creados")
+        
+        # Log (en logs_db): primero la colección (time-series si LOG_TIMESERIES)
+        # y los TTL por nivel, después los índices del modelo
+        asegurar_retencion_logs()
         Log.ensure_indexes()
         print("✅ Colección 'logs' e índices creados (en logs_db)")
         
@@ -255,11 +303,266 @@ def insert_sample_data():
         traceback.print_exc()
         return False
 
+# ---------------------------------------------------------------------------
+# Datos sintéticos masivos (--scale N)
+#
+# Se insertan documentos crudos con insert_many en lotes, sin pasar por
+# mongoengine, repartidos en rangos de usuarios que procesan varios procesos
+# en paralelo. Los ObjectId de los usuarios se derivan de su índice, así cada
+# proceso puede referenciar a cualquier usuario sin compartir estado.
+# ---------------------------------------------------------------------------
+
+ETIQUETAS_SCALE = [
+    "#python", "#angular", "#mongodb", "#react", "#nodejs",
+    "#javascript", "#typescript", "#docker", "#kubernetes", "#aws",
+    "#devops", "#frontend"
+]
+
+FRASES_SCALE = [
+    "¿Podemos hablar sobre el proyecto?",
+    "¿Tienes tiempo para revisar el código?",
+    "Te paso los detalles de la configuración",
+    "Excelente trabajo en la última feature",
+    "Propongo hacer la demo el viernes a las 3pm",
+    "Gracias por la ayuda con el diseño",
+]
+
+_SCALE_EPOCH = 0x65000000  # Prefijo (timestamp) de los ObjectId sintéticos
+
+
+def _scale_oid(kind, index):
+    """ObjectId determinístico: timestamp fijo + tipo (1 byte) + índice (7 bytes)"""
+    return ObjectId(f"{_SCALE_EPOCH:08x}{kind:02x}{index:014x}")
+
+
+def _usuario_oid(i):
+    return _scale_oid(1, i)
+
+
+def _scale_offsets(n_usuarios, cantidad, seed):
+    """Desplazamientos de seguimiento compartidos: i sigue a (i + d) % n"""
+    rng = random.Random(seed)
+    return rng.sample(range(1, n_usuarios), min(cantidad, n_usuarios - 1))
+
+
+def _init_scale_worker():
+    # Cada proceso abre sus propias conexiones (los sockets no sobreviven al fork)
+    disconnect_databases()
+    connect_databases()
+
+
+def _insert_batches(collection, docs, batch_size):
+    total = 0
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            collection.insert_many(batch, ordered=False)
+            total += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        total += len(batch)
+    return total
+
+
+def _scale_usuarios(start, end, n_usuarios, offsets, password_hash, now):
+    for i in range(start, end):
+        yield {
+            '_id': _usuario_oid(i),
+            'nickName': f'user{i}',
+            'nombre': 'Usuario',
+            'apellido': f'Sintético {i}',
+            'mail': f'user{i}@example.com',
+            'contraseña': password_hash,
+            'biografia': '',
+            'fotoUsuario': '',
+            'fotoUsuarioPortada': '',
+            'fechaDeCreado': now,
+            'updatedAt': now,
+            'rol': 'user',
+            'seguidores': [_usuario_oid((i - d) % n_usuarios) for d in offsets],
+            'siguiendo': [_usuario_oid((i + d) % n_usuarios) for d in offsets],
+        }
+
+
+def _scale_menciones(start, end, posts_por_usuario, n_usuarios, offsets):
+    # Cada post menciona a uno de los usuarios que sigue su autor
+    for i in range(start, end):
+        for k in range(posts_por_usuario):
+            d = offsets[k % len(offsets)] if offsets else 0
+            yield {
+                '_id': _scale_oid(2, i * posts_por_usuario + k),
+                'usuario': _usuario_oid((i + d) % n_usuarios),
+            }
+
+
+def _scale_mensajes(start, end, posts_por_usuario, etiqueta_ids, now, seed):
+    rng = random.Random(seed + start)
+    for i in range(start, end):
+        for k in range(posts_por_usuario):
+            yield {
+                'texto': rng.choice(FRASES_SCALE),
+                'fechaDeCreado': now - timedelta(minutes=rng.randrange(60 * 24 * 365)),
+                'autor': _usuario_oid(i),
+                'etiquetas': [rng.choice(etiqueta_ids)],
+                'menciones': [_scale_oid(2, i * posts_por_usuario + k)],
+            }
+
+
+def _scale_mensajes_privados(start, end, n_usuarios, dm_offsets, mensajes_por_par, now, seed):
+    rng = random.Random(seed + start)
+    for i in range(start, end):
+        for d in dm_offsets:
+            otro = (i + d) % n_usuarios
+            for k in range(mensajes_por_par):
+                emisor, receptor = (i, otro) if k % 2 == 0 else (otro, i)
+                fecha = now - timedelta(minutes=rng.randrange(60 * 24 * 90))
+                yield {
+                    'texto': rng.choice(FRASES_SCALE),
+                    'fechaDeCreado': fecha,
+                    'emisor': _usuario_oid(emisor),
+                    'receptor': _usuario_oid(receptor),
+                    'leido': fecha if k % 3 == 0 else None,
+                }
+
+
+def _scale_logs(start, end, logs_por_usuario, now, seed):
+    rng = random.Random(seed + start)
+    acciones = ['login', 'send_private_message', 'read_message', 'update_profile', 'create_message']
+    for i in range(start, end):
+        for _ in range(logs_por_usuario):
+            action = rng.choice(acciones)
+            yield {
+                'level': 'INFO',
+                'message': f'Evento {action} de user{i}',
+                'timestamp': now - timedelta(minutes=rng.randrange(60 * 24 * 30)),
+                'user_id': str(_usuario_oid(i)),
+                'action': action,
+                'ip_address': None,
+                'metadata': {},
+            }
+
+
+def _scale_task(coleccion, start, end, params):
+    """Inserta la parte [start, end) de una colección; corre en un proceso del pool"""
+    alias = 'logs' if coleccion == 'logs' else 'default'
+    collection = me_connection.get_db(alias)[coleccion]
+    n = params['n_usuarios']
+    now = params['now']
+    seed = params['seed']
+
+    if coleccion == 'usuarios':
+        docs = _scale_usuarios(start, end, n, params['follow_offsets'], params['password_hash'], now)
+    elif coleccion == 'menciones':
+        docs = _scale_menciones(start, end, params['posts_por_usuario'], n, params['follow_offsets'])
+    elif coleccion == 'mensajes':
+        docs = _scale_mensajes(start, end, params['posts_por_usuario'], params['etiqueta_ids'], now, seed)
+    elif coleccion == 'mensajes_privados':
+        docs = _scale_mensajes_privados(start, end, n, params['dm_offsets'], params['mensajes_por_par'], now, seed)
+    else:
+        docs = _scale_logs(start, end, params['logs_por_usuario'], now, seed)
+
+    started = time.time()
+    inserted = _insert_batches(collection, docs, params['batch_size'])
+    return coleccion, inserted, started, time.time()
+
+
+def insert_scale_data(n_usuarios, workers=None, batch_size=5000, seguidos_por_usuario=20,
+                      posts_por_usuario=10, pares_por_usuario=5, mensajes_por_par=4,
+                      logs_por_usuario=2, seed=42):
+    """
+    Genera datos sintéticos masivos para pruebas de rendimiento.
+
+    - n_usuarios usuarios, cada uno sigue a seguidos_por_usuario usuarios
+    - posts_por_usuario mensajes públicos (con una mención y una etiqueta)
+    - pares_por_usuario conversaciones privadas de mensajes_por_par mensajes
+    - logs_por_usuario eventos en logs_db
+
+    Las colecciones se vacían antes de insertar. Los usuarios se reparten en
+    rangos que insertan en paralelo `workers` procesos (default: CPUs).
+    """
+    try:
+        workers = workers or os.cpu_count() or 1
+        print(f"\n📝 Generando datos sintéticos: {n_usuarios} usuarios, {workers} procesos, lotes de {batch_size}")
+
+        Usuario.objects.delete()
+        Etiqueta.objects.delete()
+        Mencion.objects.delete()
+        Mensaje.objects.delete()
+        MensajePrivado.objects.delete()
+        Log.objects.using('logs').delete()
+        print("🗑️  Datos anteriores eliminados")
+
+        etiquetas = [{'_id': _scale_oid(3, i), 'texto': texto} for i, texto in enumerate(ETIQUETAS_SCALE)]
+        me_connection.get_db('default').etiquetas.insert_many(etiquetas)
+
+        params = {
+            'n_usuarios': n_usuarios,
+            'batch_size': batch_size,
+            # Un solo hash para todos: hash_password tarda ~decenas de ms a propósito
+            'password_hash': hash_password('password123'),
+            'follow_offsets': _scale_offsets(n_usuarios, seguidos_por_usuario, seed),
+            'dm_offsets': _scale_offsets(n_usuarios, pares_por_usuario, seed + 1),
+            'posts_por_usuario': posts_por_usuario,
+            'mensajes_por_par': mensajes_por_par,
+            'logs_por_usuario': logs_por_usuario,
+            'etiqueta_ids': [e['_id'] for e in etiquetas],
+            'now': datetime.utcnow(),
+            'seed': seed,
+        }
+
+        # Rangos de usuarios por tarea: varios por colección para repartir entre procesos
+        chunk = max(1, -(-n_usuarios // (workers * 4)))
+        colecciones = ['usuarios', 'menciones', 'mensajes', 'mensajes_privados', 'logs']
+        tareas = [
+            (coleccion, start, min(start + chunk, n_usuarios))
+            for coleccion in colecciones
+            for start in range(0, n_usuarios, chunk)
+        ]
+
+        resumen = {c: {'docs': 0, 'inicio': None, 'fin': None} for c in colecciones}
+        started = time.time()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_scale_worker) as pool:
+            futures = [pool.submit(_scale_task, coleccion, start, end, params) for coleccion, start, end in tareas]
+            for future in as_completed(futures):
+                coleccion, inserted, t0, t1 = future.result()
+                datos = resumen[coleccion]
+                datos['docs'] += inserted
+                datos['inicio'] = t0 if datos['inicio'] is None else min(datos['inicio'], t0)
+                datos['fin'] = t1 if datos['fin'] is None else max(datos['fin'], t1)
+        elapsed = time.time() - started
+
+        total = sum(d['docs'] for d in resumen.values()) + len(etiquetas)
+        print("\n📊 Throughput de inserción:")
+        for coleccion, datos in resumen.items():
+            duracion = (datos['fin'] - datos['inicio']) if datos['docs'] else 0
+            rate = datos['docs'] / duracion if duracion else 0
+            print(f"   - {coleccion:<18} {datos['docs']:>12,} docs  {duracion:>8.1f}s  {rate:>12,.0f} docs/s")
+        print(f"   - {'total':<18} {total:>12,} docs  {elapsed:>8.1f}s  {total / elapsed:>12,.0f} docs/s")
+        return True
+    except Exception as e:
+        print(f"❌ Error generando datos sintéticos: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
 def main():
     """Función principal"""
     parser = argparse.ArgumentParser(description='Inicializar base de datos MongoDB')
     parser.add_argument('--with-sample-data', action='store_true', 
                        help='Insertar datos de prueba')
+    parser.add_argument('--scale', type=int, metavar='N',
+                       help='Generar datos sintéticos masivos con N usuarios')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Procesos para --scale (default: CPUs)')
+    parser.add_argument('--batch-size', type=int, default=5000,
+                       help='Documentos por insert_many en --scale')
+    parser.add_argument('--seguidos-por-usuario', type=int, default=20)
+    parser.add_argument('--posts-por-usuario', type=int, default=10)
+    parser.add_argument('--pares-por-usuario', type=int, default=5)
+    parser.add_argument('--mensajes-por-par', type=int, default=4)
+    parser.add_argument('--logs-por-usuario', type=int, default=2)
     args = parser.parse_args()
     
     print("🚀 Iniciando proceso de inicialización de base de datos...")
@@ -275,7 +578,21 @@ def main():
         sys.exit(1)
     
     # Insertar datos de prueba si se solicita
-    if args.with_sample_data:
+    if args.scale:
+        ok = insert_scale_data(
+            args.scale,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            seguidos_por_usuario=args.seguidos_por_usuario,
+            posts_por_usuario=args.posts_por_usuario,
+            pares_por_usuario=args.pares_por_usuario,
+            mensajes_por_par=args.mensajes_por_par,
+            logs_por_usuario=args.logs_por_usuario,
+        )
+        if not ok:
+            disconnect()
+            sys.exit(1)
+    elif args.with_sample_data:
         if not insert_sample_data():
             disconnect()
             sys.exit(1)
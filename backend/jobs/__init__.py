@@ -0,0 +1,8 @@
+"""
+Jobs de mantenimiento en segundo plano
+
+Procesos independientes de la app (cron, scheduler de la plataforma o a
+mano), que trabajan en lotes chicos con pausas para no competir con el
+tráfico. Se ejecutan desde backend/:
+    python -m jobs.<job> --help
+"""
@@ -0,0 +1,127 @@
+"""
+Archivo de logs por vencer
+
+Los índices TTL de utils.retencion_logs borran cada nivel de logs_db a su
+tiempo. Este job corre antes: lee con un cursor, ordenado por timestamp,
+los logs que vencen dentro de --anticipacion-horas y los escribe en
+archivos JSONL comprimidos (`logs-<nivel>-<fecha>-<parte>.jsonl.gz`, un
+documento por línea en Extended JSON). Cada archivo se escribe a un
+temporal y se renombra al cerrarlo; recién entonces se borran de la base
+los logs que contiene. En memoria quedan solo los _id del archivo en curso.
+
+Si el job deja de correr más tiempo que la anticipación, el TTL borra sin
+archivar: programarlo con una frecuencia menor, por ejemplo:
+
+    # crontab: todos los días a las 4 UTC, con 48 h de anticipación
+    0 4 * * * cd backend && python -m jobs.archivar_logs --destino /var/archivo/logs --anticipacion-horas 48
+"""
+
+import argparse
+import gzip
+import logging
+import os
+from datetime import datetime, timedelta
+
+from bson import json_util
+from mongoengine.connection import get_db
+
+from utils.retencion_logs import COLECCION, asegurar_retencion_logs, ttl_por_nivel
+
+logger = logging.getLogger(__name__)
+
+
+def _borrar(coleccion, ids, lote):
+    for inicio in range(0, len(ids), lote):
+        coleccion.delete_many({'_id': {'$in': ids[inicio:inicio + lote]}})
+
+
+def _archivar_nivel(coleccion, nivel, antes_de, destino, lote, max_por_archivo, sello):
+    cursor = coleccion.find({'level': nivel, 'timestamp': {'$lt': antes_de}}).sort('timestamp', 1).batch_size(lote)
+    archivos = total = 0
+    salida = temporal = None
+    ids = []
+
+    def cerrar():
+        nonlocal salida, ids, archivos
+        salida.close()
+        salida = None
+        final = temporal[:-len('.part')]
+        os.replace(temporal, final)
+        # El archivo ya está completo en disco: recién ahora se borra de la base
+        _borrar(coleccion, ids, lote)
+        logger.info("Logs archivados", extra={'nivel': nivel, 'archivo': final, 'cantidad': len(ids)})
+        ids = []
+        archivos += 1
+
+    try:
+        for doc in cursor:
+            if salida is None:
+                nombre = f"logs-{nivel.lower()}-{sello}-{archivos + 1:04d}.jsonl.gz"
+                temporal = os.path.join(destino, nombre + '.part')
+                salida = gzip.open(temporal, 'wt', encoding='utf-8')
+            salida.write(json_util.dumps(doc, json_options=json_util.RELAXED_JSON_OPTIONS))
+            salida.write('\n')
+            ids.append(doc['_id'])
+            total += 1
+            if len(ids) >= max_por_archivo:
+                cerrar()
+        if salida is not None:
+            cerrar()
+    finally:
+        cursor.close()
+        if salida is not None:
+            # Corte a mitad de un archivo: se descarta y los logs quedan en la base
+            salida.close()
+            os.unlink(temporal)
+    return total, archivos
+
+
+def archivar(destino, anticipacion_horas=24, lote=1000, max_por_archivo=100000):
+    """
+    Archiva y borra los logs que vencen dentro de `anticipacion_horas`
+
+    Args:
+        destino: Carpeta de los archivos .jsonl.gz
+        anticipacion_horas: Margen antes del vencimiento del TTL
+        lote: Tamaño de lote del cursor y de cada delete_many
+        max_por_archivo: Logs por archivo (acota lo que se pierde si se corta)
+
+    Returns:
+        {nivel: {'logs': n, 'archivos': n}}
+    """
+    os.makedirs(destino, exist_ok=True)
+    coleccion = get_db('logs')[COLECCION]
+    ahora = datetime.utcnow()
+    sello = ahora.strftime('%Y%m%dT%H%M%S')
+    resumen = {}
+    for nivel, segundos in ttl_por_nivel().items():
+        antes_de = ahora - timedelta(seconds=segundos) + timedelta(hours=anticipacion_horas)
+        total, archivos = _archivar_nivel(coleccion, nivel, antes_de, destino, lote, max_por_archivo, sello)
+        resumen[nivel] = {'logs': total, 'archivos': archivos}
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archivo de logs por vencer en JSONL comprimido')
+    parser.add_argument('--destino', default=os.getenv('LOG_ARCHIVE_DIR', 'archivo_logs'),
+                        help='Carpeta de los archivos (default LOG_ARCHIVE_DIR o ./archivo_logs)')
+    parser.add_argument('--anticipacion-horas', type=float, default=24,
+                        help='Archivar lo que vence dentro de estas horas (default 24)')
+    parser.add_argument('--lote', type=int, default=1000)
+    parser.add_argument('--max-por-archivo', type=int, default=100000)
+    args = parser.parse_args()
+
+    from db import connect_databases
+    from utils.logging_config import configure_logging
+
+    configure_logging()
+    connect_databases()
+    asegurar_retencion_logs()
+    resumen = archivar(args.destino, args.anticipacion_horas, args.lote, args.max_por_archivo)
+    print(f"{'nivel':<10} {'logs':>10} {'archivos':>9}")
+    for nivel, datos in resumen.items():
+        print(f"{nivel:<10} {datos['logs']:>10} {datos['archivos']:>9}")
+
+
+if __name__ == '__main__':
+    main()
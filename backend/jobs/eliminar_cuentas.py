@@ -0,0 +1,287 @@
+"""
+Eliminación de cuentas en segundo plano
+
+DELETE /api/usuarios/me borra el documento del usuario y deja una tarea en
+`eliminaciones_cuenta` (ver services.cuentas_service). Este job procesa las
+tareas pendientes borrando, paso a paso y en lotes con pausa entre lotes:
+
+1. usuario: el documento (por si el request se cortó antes de borrarlo)
+2. seguidores: el usuario en las listas seguidores/siguiendo de los demás
+3. menciones: las que lo nombran (y sus referencias en mensajes ajenos)
+4. mensajes: sus mensajes públicos y las menciones que contenían
+5. mensajes_privados: enviados y recibidos
+6. avatar: original y variantes, si ningún otro usuario usa la misma imagen
+
+Cada lote suma su cantidad a `borrados.<paso>` y cada paso terminado queda
+en `pasos_completos`. Todos los pasos son idempotentes: si el job se corta,
+la próxima corrida retoma la tarea (vencido su lease) desde el paso en que
+quedó. Después de MAX_INTENTOS la tarea queda `fallida` (se loguea como
+error y se ve en GET /api/usuarios/<id>/eliminacion) y no se reintenta sola.
+Uso (cron o a mano, desde backend/):
+
+    python -m jobs.eliminar_cuentas --lote 200 --pausa 0.2
+    python -m jobs.eliminar_cuentas --estado <usuario_id>
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from mongoengine.connection import get_db
+from pymongo import ReturnDocument
+
+from services.cuentas_service import COLECCION_TAREAS, estado_eliminacion
+from utils.avatar_images import archivos_de_avatar, generar_variantes
+
+logger = logging.getLogger(__name__)
+
+MAX_INTENTOS = 5
+AVATARS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'static', 'uploads', 'avatars')
+
+
+def _paso_usuario(db, usuario_oid, tarea, lote, storage):
+    return db.usuarios.delete_one({'_id': usuario_oid}).deleted_count
+
+
+def _paso_seguidores(db, usuario_oid, tarea, lote, storage):
+    ids = [doc['_id'] for doc in db.usuarios.find(
+        {'$or': [{'seguidores': usuario_oid}, {'siguiendo': usuario_oid}]}, {'_id': 1}
+    ).limit(lote)]
+    if ids:
+        db.usuarios.update_many(
+            {'_id': {'$in': ids}},
+            # updatedAt: cambia el ETag de los perfiles y listados de seguidores (utils.etag)
+            {'$pull': {'seguidores': usuario_oid, 'siguiendo': usuario_oid},
+             '$set': {'updatedAt': datetime.utcnow()}}
+        )
+    return len(ids)
+
+
+def _paso_menciones(db, usuario_oid, tarea, lote, storage):
+    ids = [doc['_id'] for doc in db.menciones.find({'usuario': usuario_oid}, {'_id': 1}).limit(lote)]
+    if ids:
+        # Primero las referencias: un corte a mitad no deja menciones colgando
+        db.mensajes.update_many({'menciones': {'$in': ids}}, {'$pull': {'menciones': {'$in': ids}}})
+        db.menciones.delete_many({'_id': {'$in': ids}})
+    return len(ids)
+
+
+def _paso_mensajes(db, usuario_oid, tarea, lote, storage):
+    docs = list(db.mensajes.find({'autor': usuario_oid}, {'menciones': 1}).limit(lote))
+    if docs:
+        menciones = [mencion for doc in docs for mencion in doc.get('menciones', [])]
+        if menciones:
+            db.menciones.delete_many({'_id': {'$in': menciones}})
+        db.mensajes.delete_many({'_id': {'$in': [doc['_id'] for doc in docs]}})
+    return len(docs)
+
+
+def _paso_mensajes_privados(db, usuario_oid, tarea, lote, storage):
+    ids = [doc['_id'] for doc in db.mensajes_privados.find(
+        {'$or': [{'emisor': usuario_oid}, {'receptor': usuario_oid}]}, {'_id': 1}
+    ).limit(lote)]
+    if ids:
+        db.mensajes_privados.delete_many({'_id': {'$in': ids}})
+    return len(ids)
+
+
+def _avatar_en_uso(db, stem):
+    # Igualdad sobre el índice multikey de Usuario.avatares
+    return db.usuarios.find_one({'avatares': stem}, {'_id': 1}) is not None
+
+
+def _copiar_original(storage, clave):
+    """Copia temporal del original (None si no está), para reponerlo si hace falta"""
+    if not storage.ensure_local(clave):
+        return None
+    fd, copia = tempfile.mkstemp(dir=storage.tmp_folder, suffix='.part')
+    os.close(fd)
+    shutil.copyfile(os.path.join(storage.local_folder, clave), copia)
+    return copia
+
+
+def _paso_avatar(db, usuario_oid, tarea, lote, storage):
+    borrados = 0
+    for foto in tarea.get('fotos', []):
+        claves = archivos_de_avatar(foto)
+        if not claves:
+            continue
+        original = claves[0]
+        stem = original.rsplit('.', 1)[0]
+        # Direccionado por contenido: otro usuario pudo subir la misma imagen
+        if _avatar_en_uso(db, stem):
+            continue
+        copia = _copiar_original(storage, original)
+        try:
+            borrados += sum(1 for clave in claves if storage.delete(clave))
+            # Un upload del mismo contenido entre el chequeo y el borrado se
+            # deduplicó contra este archivo: si ya lo usa alguien, se repone
+            if copia and _avatar_en_uso(db, stem):
+                logger.warning("Avatar en uso después de borrarlo: se repone",
+                               extra={'usuario_id': str(usuario_oid), 'avatar': original})
+                storage.put_file(original, copia)
+                generar_variantes(storage, original, stem)
+        finally:
+            if copia and os.path.exists(copia):
+                os.unlink(copia)
+    return borrados
+
+
+# (nombre, función, por lotes): los pasos por lotes se repiten hasta que un
+# lote viene incompleto; los demás corren una sola vez
+PASOS = (
+    ('usuario', _paso_usuario, False),
+    ('seguidores', _paso_seguidores, True),
+    ('menciones', _paso_menciones, True),
+    ('mensajes', _paso_mensajes, True),
+    ('mensajes_privados', _paso_mensajes_privados, True),
+    ('avatar', _paso_avatar, False),
+)
+
+
+def _tomar_tarea(db, lease_segundos):
+    """Reserva una tarea pendiente (o abandonada) para este proceso"""
+    ahora = datetime.utcnow()
+    return db[COLECCION_TAREAS].find_one_and_update(
+        {
+            'estado': {'$in': ['pendiente', 'en_curso', 'error']},
+            'intentos': {'$lt': MAX_INTENTOS},
+            '$or': [{'lease': None}, {'lease': {'$lt': ahora}}],
+        },
+        {
+            '$set': {'estado': 'en_curso', 'lease': ahora + timedelta(seconds=lease_segundos), 'actualizada': ahora},
+            '$inc': {'intentos': 1},
+        },
+        sort=[('creada', 1)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def procesar_tarea(tarea, storage, lote=200, pausa=0.2, lease_segundos=300):
+    """
+    Ejecuta los pasos que le faltan a una tarea ya reservada
+
+    Returns:
+        Dict con los documentos borrados por paso en esta corrida
+    """
+    db = get_db('default')
+    tareas = db[COLECCION_TAREAS]
+    usuario_oid = tarea['_id']
+    borrados = {}
+
+    for paso, funcion, por_lotes in PASOS:
+        if paso in tarea.get('pasos_completos', []):
+            continue
+        while True:
+            cantidad = funcion(db, usuario_oid, tarea, lote, storage)
+            ahora = datetime.utcnow()
+            borrados[paso] = borrados.get(paso, 0) + cantidad
+            # Progreso y renovación del lease en la misma escritura
+            tareas.update_one({'_id': usuario_oid}, {
+                '$inc': {f'borrados.{paso}': cantidad},
+                '$set': {'paso': paso, 'actualizada': ahora,
+                         'lease': ahora + timedelta(seconds=lease_segundos)},
+            })
+            if not por_lotes or cantidad < lote:
+                break
+            time.sleep(pausa)
+        tareas.update_one({'_id': usuario_oid}, {'$addToSet': {'pasos_completos': paso}})
+
+    tareas.update_one({'_id': usuario_oid}, {'$set': {
+        'estado': 'completada', 'paso': None, 'lease': None, 'error': None, 'actualizada': datetime.utcnow()
+    }})
+    logger.info("Cuenta eliminada", extra={'usuario_id': str(usuario_oid), 'borrados': borrados})
+    return borrados
+
+
+def _marcar_fallidas(db):
+    """
+    Pasa a `fallida` las tareas que agotaron los intentos y ya no se van a
+    tomar (p. ej. el proceso murió en el último intento, sin llegar al except)
+    """
+    ahora = datetime.utcnow()
+    filtro = {
+        'estado': {'$in': ['pendiente', 'en_curso', 'error']},
+        'intentos': {'$gte': MAX_INTENTOS},
+        '$or': [{'lease': None}, {'lease': {'$lt': ahora}}],
+    }
+    for tarea in db[COLECCION_TAREAS].find(filtro, {'_id': 1, 'error': 1}):
+        resultado = db[COLECCION_TAREAS].update_one(
+            {'_id': tarea['_id'], **filtro},
+            {'$set': {'estado': 'fallida', 'lease': None, 'actualizada': ahora}}
+        )
+        if resultado.modified_count:
+            logger.error("Eliminación de cuenta fallida: se agotaron los intentos",
+                         extra={'usuario_id': str(tarea['_id']), 'error': tarea.get('error')})
+
+
+def procesar_pendientes(storage, lote=200, pausa=0.2, max_tareas=None, lease_segundos=300):
+    """
+    Procesa tareas hasta que no quede ninguna disponible (o `max_tareas`)
+
+    Returns:
+        Cantidad de tareas completadas
+    """
+    db = get_db('default')
+    _marcar_fallidas(db)
+    completadas = procesadas = 0
+    while max_tareas is None or procesadas < max_tareas:
+        tarea = _tomar_tarea(db, lease_segundos)
+        if tarea is None:
+            break
+        procesadas += 1
+        try:
+            procesar_tarea(tarea, storage, lote, pausa, lease_segundos)
+            completadas += 1
+        except Exception as e:
+            ahora = datetime.utcnow()
+            if tarea['intentos'] >= MAX_INTENTOS:
+                logger.exception("Eliminación de cuenta fallida tras %d intentos", tarea['intentos'],
+                                 extra={'usuario_id': str(tarea['_id'])})
+                db[COLECCION_TAREAS].update_one({'_id': tarea['_id']}, {'$set': {
+                    'estado': 'fallida', 'error': str(e), 'actualizada': ahora, 'lease': None
+                }})
+                continue
+            logger.exception("Error eliminando cuenta", extra={'usuario_id': str(tarea['_id'])})
+            # Se reintenta desde el paso en que quedó cuando venza el lease
+            # (en otra corrida, no en un loop dentro de esta)
+            db[COLECCION_TAREAS].update_one({'_id': tarea['_id']}, {'$set': {
+                'estado': 'error', 'error': str(e), 'actualizada': ahora,
+                'lease': ahora + timedelta(seconds=lease_segundos)
+            }})
+    return completadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Eliminación de cuentas en segundo plano')
+    parser.add_argument('--lote', type=int, default=200, help='Documentos por lote')
+    parser.add_argument('--pausa', type=float, default=0.2, help='Segundos entre lotes')
+    parser.add_argument('--max-tareas', type=int, help='Cortar después de N cuentas')
+    parser.add_argument('--lease', type=int, default=300,
+                        help='Segundos sin progreso tras los que otra corrida puede retomar una tarea')
+    parser.add_argument('--avatars-folder', default=os.getenv('UPLOAD_AVATARS_FOLDER', AVATARS_FOLDER))
+    parser.add_argument('--estado', metavar='USUARIO_ID', help='Mostrar el progreso de una cuenta y salir')
+    args = parser.parse_args()
+
+    from db import connect_databases
+    from utils.logging_config import configure_logging
+    from utils.storage import crear_storage
+
+    configure_logging()
+    connect_databases()
+    if args.estado:
+        print(json.dumps(estado_eliminacion(args.estado), indent=2, ensure_ascii=False))
+        return
+    completadas = procesar_pendientes(crear_storage(args.avatars_folder), args.lote, args.pausa,
+                                      args.max_tareas, args.lease)
+    print(f"Cuentas eliminadas: {completadas}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Purga de mensajes privados eliminados
+
+DELETE /api/mensajes-privados/<id> solo marca `eliminado` (borrado lógico);
+este job los borra físicamente en lotes, con una pausa entre lotes, una vez
+pasada la retención. Pensado para correr fuera de hora pico, por ejemplo:
+
+    # crontab: todos los días a las 3 UTC, hasta las 6 como mucho
+    0 3 * * * cd backend && python -m jobs.purgar_mensajes_privados --ventana 3-6
+
+Es idempotente: si se corta (o se sale de la ventana) la próxima corrida
+sigue con lo que quedó.
+"""
+
+import argparse
+import logging
+import time
+from datetime import datetime, timedelta
+
+from repositories.mensaje_privado_repository import MensajePrivadoRepository
+
+logger = logging.getLogger(__name__)
+
+
+def en_ventana(ventana, ahora=None):
+    """True si la hora UTC actual está en la ventana (inicio, fin); None: siempre"""
+    if ventana is None:
+        return True
+    inicio, fin = ventana
+    hora = (ahora or datetime.utcnow()).hour
+    # 22-4: la ventana cruza la medianoche
+    return inicio <= hora < fin if inicio <= fin else hora >= inicio or hora < fin
+
+
+def purgar(retencion_horas=24, lote=500, pausa=0.1, max_lotes=None, ventana=None):
+    """
+    Borra los mensajes eliminados hace más de `retencion_horas`
+
+    Args:
+        retencion_horas: Antigüedad mínima del borrado lógico
+        lote: Documentos por delete_many
+        pausa: Segundos de espera entre lotes
+        max_lotes: Corta después de esta cantidad de lotes (None: hasta terminar)
+        ventana: (hora_inicio, hora_fin) UTC; fuera de ella no se empieza otro lote
+
+    Returns:
+        Cantidad total de mensajes borrados
+    """
+    antes_de = datetime.utcnow() - timedelta(hours=retencion_horas)
+    total = lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        if not en_ventana(ventana):
+            logger.info("Purga de mensajes privados: fuera de la ventana, se sigue en la próxima corrida")
+            break
+        borrados = MensajePrivadoRepository.purgar_eliminados(antes_de, lote)
+        total += borrados
+        lotes += 1
+        if borrados < lote:
+            break
+        time.sleep(pausa)
+
+    logger.info("Purga de mensajes privados", extra={'borrados': total, 'lotes': lotes})
+    return total
+
+
+def _ventana(valor):
+    inicio, fin = (int(hora) for hora in valor.split('-'))
+    if not (0 <= inicio < 24 and 0 <= fin < 24):
+        raise argparse.ArgumentTypeError('Formato: HORA_INICIO-HORA_FIN (UTC, 0-23)')
+    return inicio, fin
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Purga de mensajes privados eliminados')
+    parser.add_argument('--retencion-horas', type=float, default=24,
+                        help='Antigüedad mínima del borrado lógico (default 24)')
+    parser.add_argument('--lote', type=int, default=500, help='Documentos por lote')
+    parser.add_argument('--pausa', type=float, default=0.1, help='Segundos entre lotes')
+    parser.add_argument('--max-lotes', type=int, help='Cortar después de N lotes')
+    parser.add_argument('--ventana', type=_ventana, help='Horas UTC permitidas, p. ej. 3-6')
+    args = parser.parse_args()
+
+    from db import connect_databases
+    from utils.logging_config import configure_logging
+
+    configure_logging()
+    connect_databases()
+    total = purgar(args.retencion_horas, args.lote, args.pausa, args.max_lotes, args.ventana)
+    print(f"Mensajes privados purgados: {total}")
+
+
+if __name__ == '__main__':
+    main()
@@ -32,11 +32,16 @@ class Log(Document):
     meta = {
         'collection': 'logs',
         'db_alias': 'logs',  # Base de datos de logs
+        # GET /api/logs ordena por (-timestamp, -_id) y pagina con esa misma
+        # clave: cada filtro tiene su compuesto con el orden completo, así
+        # ni la página ni el export ordenan en memoria. Los TTL por nivel
+        # los crea utils.retencion_logs.
         'indexes': [
-            '-timestamp',  # Índice descendente
-            'level',
-            'user_id',
-            'action'
+            ('-timestamp', '-_id'),
+            ('level', '-timestamp', '-_id'),
+            ('user_id', '-timestamp', '-_id'),
+            ('action', '-timestamp', '-_id'),
+            ('user_id', 'action', '-timestamp', '-_id'),
         ]
     }
     
@@ -1,7 +1,10 @@
+import logging
 from mongoengine import Document, StringField, DateTimeField, ReferenceField
 from datetime import datetime
 from .usuario import Usuario
 
+logger = logging.getLogger(__name__)
+
 class MensajePrivado(Document):
     """
     Modelo de Mensaje Privado
@@ -13,6 +16,8 @@ class MensajePrivado(Document):
         fechaDeCreado: Fecha y hora de creación
         emisor: Usuario que envía el mensaje
         receptor: Usuario que recibe el mensaje
+        eliminado: Fecha de borrado lógico (None si está vigente); el job
+            jobs.purgar_mensajes_privados lo borra físicamente después
     
     Relaciones:
         - 2 Usuarios (emisor y receptor)
@@ -28,6 +33,7 @@ class MensajePrivado(Document):
     
     # Estado del mensaje
     leido = DateTimeField(default=None)  # null si no ha sido leído
+    eliminado = DateTimeField(default=None)  # null si no fue eliminado (borrado lógico)
     
     # Metadata
     meta = {
@@ -35,10 +41,18 @@ class MensajePrivado(Document):
         'db_alias': 'default',
         'indexes': [
             '-fechaDeCreado',  # Índice descendente para ordenar por fecha
-            'emisor',
-            'receptor',
+            # Con _id descendente: el último mensaje enviado/recibido es una
+            # lectura puntual (versión del listado de conversaciones)
+            ('emisor', '-_id'),
+            ('receptor', '-_id'),
             ('emisor', 'receptor'),  # Índice compuesto para búsquedas de conversaciones
-            'leido'
+            'leido',
+            # Parcial: solo los eliminados, para que la purga los encuentre
+            # sin recorrer (ni agrandar el índice de) los mensajes vigentes
+            {
+                'fields': ['eliminado'],
+                'partialFilterExpression': {'eliminado': {'$type': 'date'}}
+            }
         ]
     }
     
@@ -68,7 +82,7 @@ class MensajePrivado(Document):
                 emisor_obj = get_usuario_by_id(str(self.emisor))
                 emisor_dict = emisor_obj.to_dict() if emisor_obj else None
         except Exception as e:
-            print(f"⚠️ Error obteniendo emisor en to_dict: {e}")
+            logger.warning("Error obteniendo emisor en to_dict: %s", e)
         
         try:
             # Si receptor es un objeto Usuario, usar to_dict()
@@ -84,7 +98,7 @@ class MensajePrivado(Document):
                 receptor_obj = get_usuario_by_id(str(self.receptor))
                 receptor_dict = receptor_obj.to_dict() if receptor_obj else None
         except Exception as e:
-            print(f"⚠️ Error obteniendo receptor en to_dict: {e}")
+            logger.warning("Error obteniendo receptor en to_dict: %s", e)
         
         return {
             'id': str(self.id),
@@ -1,6 +1,11 @@
-from mongoengine import Document, StringField, DateTimeField, ListField, ReferenceField
+import logging
+from mongoengine import Document, StringField, DateTimeField, IntField, ListField, ReferenceField
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+
+from utils.avatar_images import hashes_de_avatar, variant_urls
+from utils.passwords import hash_password, necesita_rehash, verificar_password
+
+logger = logging.getLogger(__name__)
 
 class Usuario(Document):
     """
@@ -16,7 +21,12 @@ class Usuario(Document):
         fechaDeCreado: Fecha de creación de la cuenta
         fotoUsuario: URL de la foto de perfil
         fotoUsuarioPortada: URL de la foto de portada
+        avatares: Hashes de contenido de fotoUsuario/fotoUsuarioPortada si son
+            uploads propios (los archivos se comparten entre usuarios)
         rol: Rol del usuario (admin, user, guest)
+        updatedAt: Última modificación del perfil (versiona las respuestas con ETag)
+        conversacionesVersion: Se incrementa con cada cambio que afecta su
+            listado de conversaciones (versiona ese ETag)
     """
     
     # Campos básicos
@@ -30,9 +40,12 @@ class Usuario(Document):
     biografia = StringField(max_length=500, default="")
     fotoUsuario = StringField(default="")
     fotoUsuarioPortada = StringField(default="")
+    avatares = ListField(StringField(), default=[])
     
     # Campos de sistema
     fechaDeCreado = DateTimeField(default=datetime.utcnow)
+    updatedAt = DateTimeField(default=datetime.utcnow)
+    conversacionesVersion = IntField(default=0)
     rol = StringField(choices=['admin', 'user', 'guest'], default='user')
     
     # Relaciones de seguidores
@@ -48,17 +61,26 @@ class Usuario(Document):
             'mail',
             'fechaDeCreado',
             'seguidores',
-            'siguiendo'
+            'siguiendo',
+            'avatares'
         ]
     }
     
+    def clean(self):
+        """Mantiene `avatares` al guardar con el modelo (PATCH /usuarios/me lo calcula aparte)"""
+        self.avatares = hashes_de_avatar(self.fotoUsuario, self.fotoUsuarioPortada)
+    
     def set_password(self, password):
-        """Hashea y guarda la contraseña"""
-        self.contraseña = generate_password_hash(password)
+        """Hashea y guarda la contraseña (método de PASSWORD_HASH_METHOD)"""
+        self.contraseña = hash_password(password)
     
     def check_password(self, password):
         """Verifica si la contraseña es correcta"""
-        return check_password_hash(self.contraseña, password)
+        return verificar_password(self.contraseña, password)
+    
+    def password_necesita_rehash(self):
+        """La contraseña guardada usa otro método o costo que el configurado"""
+        return necesita_rehash(self.contraseña or '')
     
     def to_dict(self):
         """Convierte el usuario a diccionario (sin contraseña)"""
@@ -70,6 +92,8 @@ class Usuario(Document):
             'mail': self.mail,
             'biografia': self.biografia,
             'fotoUsuario': self.fotoUsuario,
+            # Miniaturas WebP ({'48': url, '128': url, '512': url}) para listados
+            'fotoUsuarioVariantes': variant_urls(self.fotoUsuario),
             'fotoUsuarioPortada': self.fotoUsuarioPortada,
             'fechaDeCreado': self.fechaDeCreado.isoformat(),
             'rol': self.rol,
@@ -115,10 +139,10 @@ class Usuario(Document):
                     usuario = cls._from_son(doc)
                     usuarios.append(usuario)
                 except Exception as e:
-                    print(f"⚠️ Error al convertir usuario {doc.get('_id')}: {e}")
+                    logger.warning("Error al convertir usuario %s: %s", doc.get('_id'), e)
                     continue
             
             return usuarios
         except Exception as e:
-            print(f"Error en gets_usuarios: {e}")
+            logger.exception("Error en gets_usuarios")
             return []
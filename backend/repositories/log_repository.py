@@ -0,0 +1,77 @@
+"""
+Repositorio de Log (Experto de BD)
+Consultas sobre logs_db para la API de administración
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+ORDEN = [('timestamp', -1), ('_id', -1)]
+
+
+class LogRepository:
+    """
+    Experto de BD para Log
+    Lecturas con filtros indexados y paginación por clave (timestamp, _id)
+    """
+
+    @staticmethod
+    def filtro(levels: Optional[List[str]] = None, user_id: Optional[str] = None,
+               action: Optional[str] = None, desde: Optional[datetime] = None,
+               hasta: Optional[datetime] = None,
+               despues_de: Optional[Tuple[datetime, ObjectId]] = None) -> Dict:
+        """
+        Arma el filtro de MongoDB
+
+        Args:
+            levels: Niveles aceptados ($in si son varios)
+            user_id, action: Igualdad
+            desde, hasta: Rango de timestamp (desde inclusive, hasta exclusivo)
+            despues_de: (timestamp, _id) del último log de la página anterior
+
+        Returns:
+            Dict con el filtro
+        """
+        filtro = {}
+        if levels:
+            filtro['level'] = levels[0] if len(levels) == 1 else {'$in': levels}
+        if user_id:
+            filtro['user_id'] = user_id
+        if action:
+            filtro['action'] = action
+        rango = {}
+        if desde:
+            rango['$gte'] = desde
+        if hasta:
+            rango['$lt'] = hasta
+        if rango:
+            filtro['timestamp'] = rango
+        if despues_de:
+            timestamp, log_id = despues_de
+            # Lo que sigue en orden (-timestamp, -_id): sin saltear empates
+            siguiente = {'$or': [
+                {'timestamp': {'$lt': timestamp}},
+                {'timestamp': timestamp, '_id': {'$lt': log_id}},
+            ]}
+            filtro = {'$and': [filtro, siguiente]} if filtro else siguiente
+        return filtro
+
+    @staticmethod
+    def buscar(filtro: Dict, limit: Optional[int] = None, batch_size: int = 1000) -> Iterator[Dict]:
+        """
+        Cursor sobre los logs que cumplen `filtro`, del más nuevo al más viejo
+
+        El cursor trae los documentos del servidor de a `batch_size`: quien
+        lo recorre nunca tiene más que un lote en memoria.
+        """
+        from mongoengine.connection import get_db
+
+        cursor = get_db('logs').logs.find(filtro).sort(ORDEN).batch_size(batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        return cursor
@@ -3,11 +3,14 @@ Repositorio de MensajePrivado (Experto de BD)
 Contiene métodos para acceder a la base de datos de mensajes privados
 """
 
-from typing import List, Tuple, Optional
+import logging
+from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 from models.mensaje_privado import MensajePrivado
 from models.usuario import Usuario
 
+logger = logging.getLogger(__name__)
+
 
 class MensajePrivadoRepository:
     """
@@ -27,11 +30,11 @@ class MensajePrivadoRepository:
         Returns:
             Lista de MensajePrivado ordenados por fecha descendente
         """
-        from mongoengine.connection import get_db
+        from db import get_read_db
         from bson import ObjectId
         
         try:
-            db = get_db('default')
+            db = get_read_db('default', usuario_id=usuario_id)
             
             try:
                 usuario_oid = ObjectId(usuario_id)
@@ -44,7 +47,8 @@ class MensajePrivadoRepository:
                     '$or': [
                         {'emisor': usuario_oid},
                         {'receptor': usuario_oid}
-                    ]
+                    ],
+                    'eliminado': None
                 }).sort('fechaDeCreado', -1)
             )
             
@@ -74,14 +78,12 @@ class MensajePrivadoRepository:
                     mensaje.receptor = doc.get('receptor')
                     mensajes.append(mensaje)
                 except Exception as e:
-                    print(f"⚠️ Error al convertir mensaje {doc.get('_id')}: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.warning("Error al convertir mensaje %s: %s", doc.get('_id'), e, exc_info=True)
                     continue
             
             return mensajes
         except Exception as e:
-            print(f"Error en gets_mensaje_privados: {e}")
+            logger.exception("Error en gets_mensaje_privados")
             return []
     
     @staticmethod
@@ -100,11 +102,12 @@ class MensajePrivadoRepository:
         Returns:
             Tuple[List[MensajePrivado], int]: (mensajes, total)
         """
-        from mongoengine.connection import get_db
+        from db import get_read_db
         from bson import ObjectId
         
         try:
-            db = get_db('default')
+            # Lectura del propio usuario: si acaba de enviar un mensaje se lee del primario
+            db = get_read_db('default', usuario_id=usuario_actual_id)
             
             try:
                 usuario_actual_oid = ObjectId(usuario_actual_id)
@@ -118,7 +121,8 @@ class MensajePrivadoRepository:
                 '$or': [
                     {'emisor': usuario_actual_oid, 'receptor': otro_usuario_oid},
                     {'emisor': otro_usuario_oid, 'receptor': usuario_actual_oid}
-                ]
+                ],
+                'eliminado': None
             }
             
             # Obtener mensajes con paginación
@@ -158,14 +162,12 @@ class MensajePrivadoRepository:
                     mensaje.receptor = doc.get('receptor')
                     mensajes.append(mensaje)
                 except Exception as e:
-                    print(f"⚠️ Error al convertir mensaje {doc.get('_id')}: {e}")
-                    import traceback
-                    traceback.print_exc()
+                    logger.warning("Error al convertir mensaje %s: %s", doc.get('_id'), e, exc_info=True)
                     continue
             
             return mensajes, total
         except Exception as e:
-            print(f"Error en gets_mensaje_privado: {e}")
+            logger.exception("Error en gets_mensaje_privado")
             return [], 0
     
     @staticmethod
@@ -189,9 +191,103 @@ class MensajePrivadoRepository:
         )
         mensaje.save()
         return mensaje
+
+    @staticmethod
+    def post_mensajes(texto: str, emisor_id, receptor_ids: List) -> Tuple[List, List]:
+        """
+        Crea el mismo mensaje para muchos receptores con un solo insert_many
+        (ordered=False: un documento que falla no frena al resto)
+
+        Args:
+            texto: Texto del mensaje
+            emisor_id: ObjectId del emisor
+            receptor_ids: ObjectIds de los receptores (ya validados)
+
+        Returns:
+            (IDs de los mensajes insertados, receptores cuyo insert falló)
+        """
+        from mongoengine.connection import get_db
+        from pymongo.errors import BulkWriteError
+        from bson import ObjectId
+
+        ahora = datetime.utcnow()
+        # Los _id se generan acá para saber cuáles quedaron si falla alguno
+        docs = [{
+            '_id': ObjectId(),
+            'texto': texto,
+            'fechaDeCreado': ahora,
+            'emisor': emisor_id,
+            'receptor': receptor_id,
+            'leido': None,
+        } for receptor_id in receptor_ids]
+        if not docs:
+            return [], []
+
+        fallidos = set()
+        try:
+            get_db('default').mensajes_privados.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            fallidos = {error['index'] for error in e.details.get('writeErrors', [])}
+            logger.warning("insert_many de mensajes privados: %d de %d fallaron", len(fallidos), len(docs))
+
+        insertados = [doc['_id'] for i, doc in enumerate(docs) if i not in fallidos]
+        return insertados, [docs[i]['receptor'] for i in sorted(fallidos)]
+
+    @staticmethod
+    def eliminar(mensaje_id: str, emisor_id: str):
+        """
+        Borrado lógico: marca `eliminado` con un solo find_one_and_update por
+        _id (las lecturas filtran eliminado=None; la purga lo borra después)
+        
+        Args:
+            mensaje_id: ID del mensaje
+            emisor_id: ID del usuario (debe ser el emisor)
+            
+        Returns:
+            ObjectId del receptor si se eliminó; None si no existe, ya estaba
+            eliminado o el usuario no es el emisor
+        """
+        from mongoengine.connection import get_db
+        from bson import ObjectId
+        
+        try:
+            mensaje_oid = ObjectId(mensaje_id)
+            emisor_oid = ObjectId(emisor_id)
+        except:
+            return None
+        
+        doc = get_db('default').mensajes_privados.find_one_and_update(
+            {'_id': mensaje_oid, 'emisor': emisor_oid, 'eliminado': None},
+            {'$set': {'eliminado': datetime.utcnow()}},
+            projection={'receptor': 1}
+        )
+        return doc['receptor'] if doc else None
     
     @staticmethod
-    def marcar_como_leido(mensaje_id: str, usuario_id: str) -> bool:
+    def purgar_eliminados(antes_de: datetime, lote: int) -> int:
+        """
+        Borra físicamente hasta `lote` mensajes eliminados antes de `antes_de`
+        (usa el índice parcial de eliminado)
+        
+        Args:
+            antes_de: Solo mensajes con eliminado <= antes_de
+            lote: Máximo de documentos por llamada
+            
+        Returns:
+            Cantidad de mensajes borrados (0: no queda nada por purgar)
+        """
+        from mongoengine.connection import get_db
+        
+        coleccion = get_db('default').mensajes_privados
+        ids = [doc['_id'] for doc in coleccion.find(
+            {'eliminado': {'$type': 'date', '$lte': antes_de}}, {'_id': 1}
+        ).limit(lote)]
+        if not ids:
+            return 0
+        return coleccion.delete_many({'_id': {'$in': ids}}).deleted_count
+    
+    @staticmethod
+    def marcar_como_leido(mensaje_id: str, usuario_id: str):
         """
         Marca un mensaje como leído
         
@@ -200,7 +296,7 @@ class MensajePrivadoRepository:
             usuario_id: ID del usuario (debe ser el receptor)
             
         Returns:
-            True si se marcó correctamente, False en caso contrario
+            ObjectId del emisor si se marcó correctamente, None en caso contrario
         """
         from mongoengine.connection import get_db
         from bson import ObjectId
@@ -218,7 +314,8 @@ class MensajePrivadoRepository:
             # Buscar mensaje y verificar que el usuario es el receptor
             mensaje_doc = db.mensajes_privados.find_one({
                 '_id': mensaje_oid,
-                'receptor': usuario_oid
+                'receptor': usuario_oid,
+                'eliminado': None
             })
             
             if mensaje_doc:
@@ -227,21 +324,24 @@ class MensajePrivadoRepository:
                     {'_id': mensaje_oid},
                     {'$set': {'leido': datetime.utcnow()}}
                 )
-                return True
+                return mensaje_doc.get('emisor')
             
-            return False
+            return None
         except Exception as e:
-            print(f"Error en marcar_como_leido: {e}")
-            return False
+            logger.exception("Error en marcar_como_leido")
+            return None
     
     @staticmethod
-    def marcar_como_leido_por_receptor(emisor_id: str, receptor_id: str) -> None:
+    def marcar_como_leido_por_receptor(emisor_id: str, receptor_id: str) -> int:
         """
         Marca todos los mensajes no leídos de un emisor a un receptor como leídos
         
         Args:
             emisor_id: ID del emisor
             receptor_id: ID del receptor
+            
+        Returns:
+            Cantidad de mensajes marcados
         """
         from mongoengine.connection import get_db
         from bson import ObjectId
@@ -257,16 +357,67 @@ class MensajePrivadoRepository:
                 receptor_oid = receptor_id
             
             # Actualizar todos los mensajes no leídos
-            db.mensajes_privados.update_many(
+            resultado = db.mensajes_privados.update_many(
                 {
                     'emisor': emisor_oid,
                     'receptor': receptor_oid,
-                    'leido': None
+                    'leido': None,
+                    'eliminado': None
                 },
                 {'$set': {'leido': datetime.utcnow()}}
             )
+            return resultado.modified_count
         except Exception as e:
-            print(f"Error en marcar_como_leido_por_receptor: {e}")
+            logger.exception("Error en marcar_como_leido_por_receptor")
+            return 0
+    
+    @staticmethod
+    def marcar_como_leidos(receptor_id: str, mensaje_ids: List, marcas: List[Dict]) -> int:
+        """
+        Marca como leídos, en un solo update_many, los mensajes no leídos del
+        receptor que estén en `mensaje_ids` o debajo de alguna marca
+        
+        Args:
+            receptor_id: ID del receptor (solo se marcan sus mensajes)
+            mensaje_ids: ObjectIds de mensajes puntuales
+            marcas: Dicts con 'emisor' (ObjectId) y 'hasta_id' (ObjectId) y/o
+                'hasta_fecha' (datetime): todo lo de ese emisor hasta ahí
+            
+        Returns:
+            Cantidad de mensajes marcados
+        """
+        from mongoengine.connection import get_db
+        from bson import ObjectId
+        
+        condiciones = []
+        if mensaje_ids:
+            condiciones.append({'_id': {'$in': list(mensaje_ids)}})
+        for marca in marcas:
+            condicion = {'emisor': marca['emisor']}
+            if marca.get('hasta_id') is not None:
+                condicion['_id'] = {'$lte': marca['hasta_id']}
+            if marca.get('hasta_fecha') is not None:
+                condicion['fechaDeCreado'] = {'$lte': marca['hasta_fecha']}
+            condiciones.append(condicion)
+        if not condiciones:
+            return 0
+        
+        try:
+            receptor_oid = ObjectId(receptor_id)
+        except:
+            receptor_oid = receptor_id
+        
+        filtro = {'receptor': receptor_oid, 'leido': None, 'eliminado': None}
+        if len(condiciones) == 1:
+            filtro.update(condiciones[0])
+        else:
+            filtro['$or'] = condiciones
+        
+        resultado = get_db('default').mensajes_privados.update_many(
+            filtro,
+            {'$set': {'leido': datetime.utcnow()}}
+        )
+        return resultado.modified_count
     
     @staticmethod
     def contar_no_leidos(emisor_id: str, receptor_id: str) -> int:
@@ -280,11 +431,11 @@ class MensajePrivadoRepository:
         Returns:
             Número de mensajes no leídos
         """
-        from mongoengine.connection import get_db
+        from db import get_read_db
         from bson import ObjectId
         
         try:
-            db = get_db('default')
+            db = get_read_db('default', usuario_id=receptor_id)
             
             try:
                 emisor_oid = ObjectId(emisor_id)
@@ -296,12 +447,46 @@ class MensajePrivadoRepository:
             return db.mensajes_privados.count_documents({
                 'emisor': emisor_oid,
                 'receptor': receptor_oid,
-                'leido': None
+                'leido': None,
+                'eliminado': None
             })
         except Exception as e:
-            print(f"Error en contar_no_leidos: {e}")
+            logger.exception("Error en contar_no_leidos")
             return 0
     
+    @staticmethod
+    def contar_no_leidos_por_emisor(receptor_id: str) -> Dict[str, int]:
+        """
+        Cuenta los mensajes no leídos de un receptor agrupados por emisor
+        (un solo $group en lugar de un count por conversación)
+        
+        Args:
+            receptor_id: ID del receptor
+            
+        Returns:
+            Dict {ID del emisor: no leídos}; los emisores sin pendientes no aparecen
+        """
+        from db import get_read_db
+        from bson import ObjectId
+        
+        try:
+            db = get_read_db('default', usuario_id=receptor_id)
+            
+            try:
+                receptor_oid = ObjectId(receptor_id)
+            except:
+                receptor_oid = receptor_id
+            
+            return {
+                str(doc['_id']): doc['total'] for doc in db.mensajes_privados.aggregate([
+                    {'$match': {'receptor': receptor_oid, 'leido': None, 'eliminado': None}},
+                    {'$group': {'_id': '$emisor', 'total': {'$sum': 1}}},
+                ])
+            }
+        except Exception as e:
+            logger.exception("Error en contar_no_leidos_por_emisor")
+            return {}
+    
     @staticmethod
     def contar_no_leidos_por_receptor(receptor_id: str) -> int:
         """
@@ -313,11 +498,11 @@ class MensajePrivadoRepository:
         Returns:
             Número de mensajes no leídos
         """
-        from mongoengine.connection import get_db
+        from db import get_read_db
         from bson import ObjectId
         
         try:
-            db = get_db('default')
+            db = get_read_db('default', usuario_id=receptor_id)
             
             try:
                 receptor_oid = ObjectId(receptor_id)
@@ -326,9 +511,108 @@ class MensajePrivadoRepository:
             
             return db.mensajes_privados.count_documents({
                 'receptor': receptor_oid,
-                'leido': None
+                'leido': None,
+                'eliminado': None
             })
         except Exception as e:
-            print(f"Error en contar_no_leidos_por_receptor: {e}")
+            logger.exception("Error en contar_no_leidos_por_receptor")
             return 0
 
+    
+    @staticmethod
+    def version_conversaciones(usuario_id: str) -> Optional[Dict]:
+        """
+        Datos del listado de conversaciones de un usuario que se leen con
+        consultas puntuales sobre índices (no recorren su historial): el
+        último mensaje enviado y el último recibido (sort por _id + limit 1
+        sobre (emisor, -_id) y (receptor, -_id)) y la cantidad de no leídos
+        
+        Args:
+            usuario_id: ID del usuario
+            
+        Returns:
+            Dict con ultimo_enviado, ultimo_recibido (ObjectId o None) y
+            no_leidos, o None si falla alguna consulta
+        """
+        from db import get_read_db
+        from bson import ObjectId
+        
+        try:
+            db = get_read_db('default', usuario_id=usuario_id)
+            
+            try:
+                usuario_oid = ObjectId(usuario_id)
+            except:
+                usuario_oid = usuario_id
+            
+            def ultimo(campo):
+                docs = list(db.mensajes_privados.find(
+                    {campo: usuario_oid, 'eliminado': None}, {'_id': 1}
+                ).sort('_id', -1).limit(1))
+                return docs[0]['_id'] if docs else None
+            
+            return {
+                'ultimo_enviado': ultimo('emisor'),
+                'ultimo_recibido': ultimo('receptor'),
+                'no_leidos': db.mensajes_privados.count_documents({
+                    'receptor': usuario_oid,
+                    'leido': None,
+                    'eliminado': None
+                }),
+            }
+        except Exception as e:
+            logger.exception("Error en version_conversaciones")
+            return None
+    
+    @staticmethod
+    def participantes(usuario_id: str) -> List:
+        """
+        IDs de los usuarios con los que `usuario_id` tiene mensajes (un solo
+        $group). Recorre su historial: es para escrituras poco frecuentes,
+        como un cambio de perfil o la baja de la cuenta.
+        
+        Args:
+            usuario_id: ID del usuario
+            
+        Returns:
+            Lista de ObjectIds (vacía si falla la consulta)
+        """
+        from mongoengine.connection import get_db
+        from bson import ObjectId
+        
+        try:
+            try:
+                usuario_oid = ObjectId(usuario_id)
+            except:
+                usuario_oid = usuario_id
+            
+            resultado = list(get_db('default').mensajes_privados.aggregate([
+                {'$match': {'$or': [{'emisor': usuario_oid}, {'receptor': usuario_oid}]}},
+                {'$group': {
+                    '_id': None,
+                    'otros': {'$addToSet': {
+                        '$cond': [{'$eq': ['$emisor', usuario_oid]}, '$receptor', '$emisor']
+                    }},
+                }},
+            ]))
+            return resultado[0]['otros'] if resultado else []
+        except Exception as e:
+            logger.exception("Error en participantes")
+            return []
+    
+    @staticmethod
+    def emisores(mensaje_ids: List) -> List:
+        """
+        Emisores distintos de los mensajes indicados (distinct por _id)
+        
+        Args:
+            mensaje_ids: ObjectIds de mensajes
+            
+        Returns:
+            Lista de ObjectIds de emisores
+        """
+        from mongoengine.connection import get_db
+        
+        if not mensaje_ids:
+            return []
+        return get_db('default').mensajes_privados.distinct('emisor', {'_id': {'$in': list(mensaje_ids)}})
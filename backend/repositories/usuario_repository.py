@@ -3,9 +3,13 @@ Repositorio de Usuario (Experto de BD)
 Contiene métodos para acceder a la base de datos de usuarios
 """
 
-from typing import List
+import logging
+from datetime import datetime
+from typing import List, Optional, Set, Tuple
 from models.usuario import Usuario
 
+logger = logging.getLogger(__name__)
+
 
 class UsuarioRepository:
     """
@@ -25,11 +29,11 @@ class UsuarioRepository:
         Returns:
             Lista de Usuario
         """
-        from mongoengine.connection import get_db
+        from db import get_read_db
         from bson import ObjectId
         
         try:
-            db = get_db('default')
+            db = get_read_db('default')
             
             # Convertir IDs a ObjectId
             usuario_oids = []
@@ -51,11 +55,129 @@ class UsuarioRepository:
                     usuario = Usuario._from_son(doc)
                     usuarios.append(usuario)
                 except Exception as e:
-                    print(f"⚠️ Error al convertir usuario {doc.get('_id')}: {e}")
+                    logger.warning("Error al convertir usuario %s: %s", doc.get('_id'), e)
                     continue
             
             return usuarios
         except Exception as e:
-            print(f"Error en gets_usuarios: {e}")
+            logger.exception("Error en gets_usuarios")
             return []
 
+    
+    @staticmethod
+    def resumen_perfiles(usuario_ids: List) -> Optional[Tuple[Optional[datetime], int]]:
+        """
+        Mayor updatedAt y cantidad de usuarios existentes entre los indicados
+        (solo se lee ese campo). La cantidad cambia al borrarse alguno, aunque
+        sus datos sigan en la base hasta que corra jobs.eliminar_cuentas.
+        
+        Args:
+            usuario_ids: Lista de IDs de usuarios (strings u ObjectIds)
+            
+        Returns:
+            (datetime del perfil modificado más recientemente o None, existentes),
+            o None si falla la consulta
+        """
+        from db import get_read_db
+        from bson import ObjectId
+        
+        if not usuario_ids:
+            return None, 0
+        try:
+            db = get_read_db('default')
+            
+            usuario_oids = []
+            for uid in usuario_ids:
+                try:
+                    usuario_oids.append(ObjectId(uid))
+                except:
+                    usuario_oids.append(uid)
+            
+            docs = list(db.usuarios.find({'_id': {'$in': usuario_oids}}, {'updatedAt': 1, '_id': 0}))
+            fechas = [doc['updatedAt'] for doc in docs if doc.get('updatedAt')]
+            return (max(fechas) if fechas else None), len(docs)
+        except Exception as e:
+            logger.exception("Error en resumen_perfiles")
+            return None
+
+    
+    @staticmethod
+    def version_conversaciones(usuario_id: str) -> Optional[int]:
+        """
+        Contador conversacionesVersion del usuario (lectura puntual por _id)
+        
+        Args:
+            usuario_id: ID del usuario
+            
+        Returns:
+            El contador (0 si nunca se incrementó), o None si el usuario no
+            existe o falla la consulta
+        """
+        from db import get_read_db
+        from bson import ObjectId
+        
+        try:
+            try:
+                usuario_oid = ObjectId(usuario_id)
+            except:
+                usuario_oid = usuario_id
+            
+            doc = get_read_db('default', usuario_id=usuario_id).usuarios.find_one(
+                {'_id': usuario_oid}, {'conversacionesVersion': 1, '_id': 0}
+            )
+            return doc.get('conversacionesVersion', 0) if doc is not None else None
+        except Exception as e:
+            logger.exception("Error en version_conversaciones")
+            return None
+
+    
+    @staticmethod
+    def incrementar_version_conversaciones(usuario_ids: List) -> None:
+        """
+        Incrementa conversacionesVersion de los usuarios indicados con un
+        solo update_many (cambia el ETag de su listado de conversaciones)
+        
+        Args:
+            usuario_ids: Lista de IDs de usuarios (strings u ObjectIds)
+        """
+        from mongoengine.connection import get_db
+        from bson import ObjectId
+        
+        usuario_oids = []
+        for uid in usuario_ids:
+            try:
+                usuario_oids.append(ObjectId(uid))
+            except:
+                usuario_oids.append(uid)
+        if not usuario_oids:
+            return
+        try:
+            get_db('default').usuarios.update_many(
+                {'_id': {'$in': usuario_oids}},
+                {'$inc': {'conversacionesVersion': 1}}
+            )
+        except Exception as e:
+            logger.exception("Error en incrementar_version_conversaciones")
+
+    
+    @staticmethod
+    def ids_existentes(usuario_oids: List) -> Set:
+        """
+        Cuáles de los IDs indicados corresponden a usuarios existentes, con
+        una sola consulta $in que solo proyecta _id
+        
+        Args:
+            usuario_oids: Lista de ObjectIds
+            
+        Returns:
+            Set con los ObjectIds que existen
+        """
+        from mongoengine.connection import get_db
+        
+        if not usuario_oids:
+            return set()
+        # Del primario: se valida justo antes de escribir
+        return {
+            doc['_id']
+            for doc in get_db('default').usuarios.find({'_id': {'$in': list(usuario_oids)}}, {'_id': 1})
+        }
@@ -0,0 +1,110 @@
+"""
+Rutas de autenticación
+
+Endpoints:
+- POST /api/auth/login - Login con mail o nickName y contraseña (devuelve JWT)
+"""
+
+import logging
+from flask import Blueprint, request, jsonify
+from mongoengine.connection import get_db
+
+from models import Usuario
+from models.log import Log
+from utils.auth import crear_token
+from utils.decorators import rate_limit, validate_json
+from utils.passwords import (
+    PoolDeHashSaturado,
+    hash_password,
+    necesita_rehash,
+    verificar_password,
+    verificar_password_falsa,
+)
+
+logger = logging.getLogger(__name__)
+
+auth_bp = Blueprint('auth', __name__)
+
+
+def _credenciales_invalidas():
+    return jsonify({
+        'success': False,
+        'error': 'Usuario o contraseña incorrectos',
+        'code': 'INVALID_CREDENTIALS'
+    }), 401
+
+
+def _rehash(doc, password):
+    """Guarda el hash con el método configurado si el guardado es de otro"""
+    try:
+        nuevo = hash_password(password)
+        # Condicional al hash viejo: si otro login ya lo actualizó, no pisarlo
+        get_db('default').usuarios.update_one(
+            {'_id': doc['_id'], 'contraseña': doc['contraseña']},
+            {'$set': {'contraseña': nuevo}},
+        )
+        logger.info("Contraseña rehasheada", extra={'usuario_id': str(doc['_id'])})
+    except PoolDeHashSaturado:
+        # Se reintenta en el próximo login
+        pass
+
+
+@auth_bp.route('/auth/login', methods=['POST'])
+@rate_limit(max_requests=10, window_seconds=60)
+@validate_json('usuario', 'password')
+def login():
+    """
+    Login con mail o nickName
+
+    Body:
+        {
+            "usuario": "mail o nickName",
+            "password": "..."
+        }
+
+    Returns:
+        200: { access_token, usuario }
+        401: credenciales inválidas
+        503: pool de hash saturado (reintentar)
+    """
+    data = request.get_json()
+    identificador = str(data.get('usuario') or '').strip()
+    password = str(data.get('password') or '')
+
+    try:
+        doc = get_db('default').usuarios.find_one(
+            {'$or': [{'mail': identificador}, {'nickName': identificador}]},
+            {'nickName': 1, 'rol': 1, 'contraseña': 1},
+        )
+        if not doc or not doc.get('contraseña'):
+            # Mismo costo que una contraseña incorrecta: no revela si el usuario existe
+            verificar_password_falsa(password)
+            return _credenciales_invalidas()
+
+        if not verificar_password(doc['contraseña'], password):
+            return _credenciales_invalidas()
+
+        if necesita_rehash(doc['contraseña']):
+            _rehash(doc, password)
+    except PoolDeHashSaturado:
+        response = jsonify({
+            'success': False,
+            'error': 'Servicio de autenticación ocupado, reintentá en unos segundos',
+            'code': 'AUTH_BUSY'
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    usuario = Usuario._from_son(doc)
+    Log.log_event(
+        level='INFO',
+        message=f'Login de {usuario.nickName}',
+        user_id=str(usuario.id),
+        action='user_login',
+        ip_address=request.remote_addr,
+    )
+    return jsonify({
+        'success': True,
+        'access_token': crear_token(usuario),
+        'usuario': {'id': str(usuario.id), 'nickName': usuario.nickName, 'rol': usuario.rol}
+    }), 200
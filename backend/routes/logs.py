@@ -0,0 +1,165 @@
+"""
+Rutas de consulta de logs (logs_db), solo admin
+
+Endpoints:
+- GET /api/logs - Logs filtrados, del más nuevo al más viejo, con paginación por cursor
+- GET /api/logs?format=ndjson - Export en streaming (un log por línea)
+"""
+
+import base64
+import logging
+from datetime import datetime, timezone
+
+from bson import ObjectId
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import jwt_required
+
+from repositories.log_repository import LogRepository
+from utils.decorators import require_role
+from utils.retencion_logs import NIVELES
+
+logger = logging.getLogger(__name__)
+
+logs_bp = Blueprint('logs', __name__)
+
+LIMIT_DEFAULT = 50
+LIMIT_MAX = 500
+
+
+def log_dict(doc):
+    """Documento de logs_db -> dict de la API (mismo formato que Log.to_dict)"""
+    timestamp = doc.get('timestamp')
+    return {
+        'id': str(doc['_id']),
+        'level': doc.get('level'),
+        'message': doc.get('message'),
+        'timestamp': timestamp.isoformat() if timestamp else None,
+        'user_id': doc.get('user_id'),
+        'action': doc.get('action'),
+        'ip_address': doc.get('ip_address'),
+        'metadata': doc.get('metadata') or {},
+    }
+
+
+def codificar_cursor(doc):
+    """Cursor opaco con la clave de orden (timestamp, _id) del último log"""
+    clave = f"{doc['timestamp'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(clave.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    relleno = '=' * (-len(cursor) % 4)
+    timestamp, log_id = base64.urlsafe_b64decode(cursor + relleno).decode().split('|')
+    return datetime.fromisoformat(timestamp), ObjectId(log_id)
+
+
+def _fecha(valor):
+    fecha = datetime.fromisoformat(valor.replace('Z', '+00:00'))
+    # Los timestamps se guardan en UTC sin zona
+    if fecha.tzinfo is not None:
+        fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+    return fecha
+
+
+def _parametros():
+    """Filtros del query string; ValueError si alguno es inválido"""
+    args = request.args
+    levels = [nivel.strip().upper() for nivel in args.get('level', '').split(',') if nivel.strip()]
+    desconocidos = [nivel for nivel in levels if nivel not in NIVELES]
+    if desconocidos:
+        raise ValueError(f"Nivel desconocido: {', '.join(desconocidos)}")
+    try:
+        despues_de = decodificar_cursor(args['cursor']) if args.get('cursor') else None
+    except Exception:
+        raise ValueError('Cursor inválido')
+    try:
+        desde = _fecha(args['desde']) if args.get('desde') else None
+        hasta = _fecha(args['hasta']) if args.get('hasta') else None
+    except ValueError:
+        raise ValueError('desde/hasta deben ser fechas ISO 8601')
+    return LogRepository.filtro(
+        levels=levels,
+        user_id=args.get('user_id') or None,
+        action=args.get('action') or None,
+        desde=desde,
+        hasta=hasta,
+        despues_de=despues_de,
+    )
+
+
+def _exportar(filtro, limit):
+    """Respuesta NDJSON en streaming: el cursor se recorre mientras se envía"""
+    dumps = current_app.json.dumps
+
+    def generar():
+        cursor = LogRepository.buscar(filtro, limit=limit)
+        try:
+            for doc in cursor:
+                yield dumps(log_dict(doc)) + '\n'
+        finally:
+            # Cliente que corta la descarga: se libera el cursor del servidor
+            cursor.close()
+
+    return Response(generar(), mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename="logs.ndjson"',
+    })
+
+
+@logs_bp.route('/logs', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+def listar_logs():
+    """
+    Logs de logs_db, del más nuevo al más viejo
+
+    Query params:
+        level: nivel o niveles separados por coma (INFO,ERROR)
+        user_id, action: igualdad
+        desde, hasta: rango de timestamp en ISO 8601 (hasta exclusivo)
+        limit: logs por página (default 50, máximo 500); en el export, tope
+            opcional del total
+        cursor: nextCursor de la página anterior
+        format: 'ndjson' para exportar todo lo que cumple los filtros en
+            streaming, sin paginar
+
+    Returns:
+        200: { logs, nextCursor } (nextCursor null en la última página)
+             o application/x-ndjson con format=ndjson
+        400: Parámetros inválidos
+        403: El usuario no es admin
+    """
+    try:
+        filtro = _parametros()
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            raise ValueError('limit debe ser mayor a 0')
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'code': 'VALIDATION_ERROR'
+        }), 400
+
+    if request.args.get('format') == 'ndjson':
+        return _exportar(filtro, limit)
+
+    limit = min(limit or LIMIT_DEFAULT, LIMIT_MAX)
+    try:
+        # Uno de más para saber si hay otra página sin contar
+        docs = list(LogRepository.buscar(filtro, limit=limit + 1, batch_size=limit + 1))
+    except Exception:
+        logger.exception("Error al consultar logs")
+        return jsonify({
+            'success': False,
+            'error': 'Error al consultar logs',
+            'code': 'INTERNAL_ERROR'
+        }), 500
+
+    pagina = docs[:limit]
+    return jsonify({
+        'success': True,
+        'data': {
+            'logs': [log_dict(doc) for doc in pagina],
+            'nextCursor': codificar_cursor(pagina[-1]) if len(docs) > limit else None,
+        }
+    }), 200
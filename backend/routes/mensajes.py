@@ -5,12 +5,15 @@ Endpoints:
 - GET /api/mensajes/mios - Obtener mensajes propios
 """
 
+import logging
+
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 
-from models import Usuario
 from services.mensajes_service import obtener_mis_mensajes
 
+logger = logging.getLogger(__name__)
+
 mensajes_bp = Blueprint("mensajes", __name__)
 
 
@@ -18,39 +21,8 @@ mensajes_bp = Blueprint("mensajes", __name__)
 @jwt_required()
 def obtener_mis_mensajes_route():
     try:
-        from flask import request
-        # Debug: verificar headers
-        auth_header = request.headers.get('Authorization', 'No Authorization header')
-        print(f"🔑 Authorization header recibido: {auth_header[:50] if len(auth_header) > 50 else auth_header}...")
-        
         usuario_id = get_jwt_identity()
-        print(f"🔑 Usuario ID del token: {usuario_id}")
-        
-        # Usar función helper que maneja el problema de thread local
-        from utils.mongo_helpers import get_usuario_by_id
-        usuario = get_usuario_by_id(usuario_id)
-
-        if not usuario:
-            print(f"❌ Usuario no encontrado para ID: {usuario_id}")
-            # Verificar si hay usuarios en la base de datos
-            from models import Usuario as UsuarioModel
-            try:
-                total_usuarios = UsuarioModel.objects.select_related(0).count()
-                print(f"📊 Total de usuarios en la BD: {total_usuarios}")
-                # Listar algunos IDs para debug
-                if total_usuarios > 0:
-                    primeros_usuarios = list(UsuarioModel.objects.select_related(0).limit(5))
-                    print(f"📋 Primeros usuarios en BD:")
-                    for u in primeros_usuarios:
-                        print(f"  - ID: {u.id}, nickName: {u.nickName}")
-            except Exception as e:
-                print(f"⚠️ Error al contar usuarios: {e}")
-            
-            return jsonify({
-                "success": False,
-                "error": f"Usuario no encontrado para ID: {usuario_id}",
-                "code": "USER_NOT_FOUND",
-            }), 401
+        usuario = current_user
 
         limit = int(request.args.get("limit", 20))
         offset = int(request.args.get("offset", 0))
@@ -71,8 +43,7 @@ def obtener_mis_mensajes_route():
             }
         }), 200
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al obtener mensajes propios")
         return jsonify({
             "success": False,
             "error": f"Error al obtener mensajes propios: {str(e)}",
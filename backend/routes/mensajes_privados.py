@@ -3,21 +3,27 @@ Rutas para Mensajes Privados (CU0010)
 
 Endpoints:
 - POST /api/mensajes-privados - Crear mensaje privado
+- POST /api/mensajes-privados/masivo - Enviar un mensaje a muchos usuarios (admin)
 - GET /api/mensajes-privados/conversacion/<user_id> - Obtener conversación
 - GET /api/mensajes-privados/conversaciones - Listar conversaciones
 - PUT /api/mensajes-privados/<mensaje_id>/leer - Marcar como leído
+- POST /api/mensajes-privados/leer - Marcar muchos como leídos (IDs o hasta una marca)
 - GET /api/mensajes-privados/no-leidos - Contar mensajes no leídos
 """
 
+import logging
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 
 from models.log import Log
-from utils.validators import validar_mensaje_privado
-from utils.decorators import rate_limit
+from utils.validators import validar_mensaje_privado, validar_texto_mensaje_privado
+from utils.decorators import rate_limit, require_role
+from utils.etag import make_etag, not_modified, with_etag
 import utils.mongo_helpers
 import services.mensajes_privados_service
 
+logger = logging.getLogger(__name__)
+
 # Crear blueprint
 mensajes_privados_bp = Blueprint('mensajes_privados', __name__)
 
@@ -44,14 +50,7 @@ def crear_mensaje_privado_route():
     try:
         # Obtener usuario autenticado (emisor)
         emisor_id = get_jwt_identity()
-        emisor = utils.mongo_helpers.get_usuario_by_id(emisor_id)
-        
-        if not emisor:
-            return jsonify({
-                'success': False,
-                'error': 'Usuario no autenticado',
-                'code': 'AUTH_ERROR'
-            }), 401
+        emisor = current_user
         
         # Obtener datos del request
         data = request.get_json()
@@ -78,9 +77,8 @@ def crear_mensaje_privado_route():
             }), 400
         
         # Registrar en logs
-        emisor = utils.mongo_helpers.get_usuario_by_id(emisor_id)
         receptor = utils.mongo_helpers.get_usuario_by_id(receptor_id)
-        if emisor and receptor:
+        if receptor:
             Log.log_event(
                 level='INFO',
                 message=f'Mensaje privado enviado de {emisor.nickName} a {receptor.nickName}',
@@ -117,6 +115,83 @@ def crear_mensaje_privado_route():
         }), 500
 
 
+@mensajes_privados_bp.route('/mensajes-privados/masivo', methods=['POST'])
+@jwt_required()
+@require_role('admin')
+@rate_limit(max_requests=5, window_seconds=60)
+def enviar_mensaje_masivo_route():
+    """
+    Enviar el mismo mensaje a muchos usuarios (anuncios de administración)
+    
+    Body:
+        {
+            "receptor_ids": ["user_id", ...],
+            "texto": "mensaje"
+        }
+    
+    Un solo request valida todos los receptores, inserta todos los mensajes
+    y deja una sola entrada de auditoría. Los IDs inexistentes se informan
+    en la respuesta en lugar de cortar el envío.
+    
+    Returns:
+        201: { enviados, mensajeIds, inexistentes, fallidos }
+        400: Datos inválidos
+        403: El usuario no es admin
+        429: Rate limit excedido
+    """
+    try:
+        emisor_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        receptor_ids = data.get('receptor_ids')
+        texto = str(data.get('texto') or '').strip()
+        
+        es_valido, mensaje_error = validar_texto_mensaje_privado(texto)
+        if not es_valido:
+            return jsonify({
+                'success': False,
+                'error': mensaje_error,
+                'code': 'VALIDATION_ERROR'
+            }), 400
+        
+        try:
+            resultado = services.mensajes_privados_service.enviar_mensaje_masivo(emisor_id, receptor_ids, texto)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'code': 'VALIDATION_ERROR'
+            }), 400
+        
+        # Una sola entrada de auditoría para todo el envío
+        Log.log_event(
+            level='WARNING' if resultado['fallidos'] else 'INFO',
+            message=f"Mensaje masivo de {current_user.nickName} a {resultado['enviados']} usuarios",
+            user_id=str(emisor_id),
+            action='send_private_message_bulk',
+            ip_address=request.remote_addr,
+            metadata={
+                'solicitados': len(receptor_ids),
+                'enviados': resultado['enviados'],
+                'inexistentes': len(resultado['inexistentes']),
+                'fallidos': len(resultado['fallidos']),
+                'texto_length': len(texto)
+            }
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': resultado
+        }), 201
+        
+    except Exception as e:
+        logger.exception("Error en envío masivo de mensajes privados")
+        return jsonify({
+            'success': False,
+            'error': 'Error interno del servidor',
+            'code': 'INTERNAL_ERROR'
+        }), 500
+
+
 @mensajes_privados_bp.route('/mensajes-privados/conversacion/<user_id>', methods=['GET'])
 @jwt_required()
 def obtener_conversacion_route(user_id):
@@ -126,6 +201,8 @@ def obtener_conversacion_route(user_id):
     Query params:
         limit: número de mensajes (default: 50)
         offset: offset para paginación (default: 0)
+        format: 'compact' para recibir emisor/receptor como IDs y los usuarios
+            una sola vez en data.usuarios
     
     Returns:
         200: Conversación obtenida
@@ -134,14 +211,6 @@ def obtener_conversacion_route(user_id):
     try:
         # Obtener usuario autenticado
         usuario_actual_id = get_jwt_identity()
-        usuario_actual = utils.mongo_helpers.get_usuario_by_id(usuario_actual_id)
-        
-        if not usuario_actual:
-            return jsonify({
-                'success': False,
-                'error': 'Usuario no autenticado',
-                'code': 'AUTH_ERROR'
-            }), 401
         
         # Verificar que el otro usuario existe
         otro_usuario = utils.mongo_helpers.get_usuario_by_id(user_id)
@@ -157,7 +226,10 @@ def obtener_conversacion_route(user_id):
         offset = int(request.args.get('offset', 0))
         
         # Usar servicio (Gestor de Mensajes) para obtener conversación
-        data = services.mensajes_privados_service.obtener_conversacion(usuario_actual_id, user_id, limit, offset)
+        compact = request.args.get('format') == 'compact'
+        data = services.mensajes_privados_service.obtener_conversacion(
+            usuario_actual_id, user_id, limit, offset, compact=compact
+        )
         
         return jsonify({
             'success': True,
@@ -178,32 +250,46 @@ def listar_conversaciones_route():
     """
     Listar todas las conversaciones del usuario actual
     
+    Query params:
+        format: 'compact' para recibir { conversaciones, usuarios } con los
+            usuarios referenciados por ID
+    
+    Headers:
+        If-None-Match: ETag de una respuesta anterior
+    
     Returns:
         200: Lista de conversaciones con último mensaje y contador de no leídos
+        304: Sin cambios desde el ETag enviado
     """
     try:
         # Obtener usuario autenticado
         usuario_actual_id = get_jwt_identity()
-        usuario_actual = utils.mongo_helpers.get_usuario_by_id(usuario_actual_id)
         
-        if not usuario_actual:
-            return jsonify({
-                'success': False,
-                'error': 'Usuario no autenticado',
-                'code': 'AUTH_ERROR'
-            }), 401
+        compact = request.args.get('format') == 'compact'
+        
+        # Si nada cambió desde el ETag del cliente, no se arma el listado
+        version = services.mensajes_privados_service.version_conversaciones(usuario_actual_id)
+        etag = make_etag('conversaciones', usuario_actual_id, compact, *version) if version else None
+        if etag:
+            respuesta = not_modified(etag)
+            if respuesta is not None:
+                return respuesta
         
         # Usar servicio (Gestor de Mensajes) para listar conversaciones
-        conversaciones = services.mensajes_privados_service.listar_conversaciones(usuario_actual_id)
+        conversaciones = services.mensajes_privados_service.listar_conversaciones(
+            usuario_actual_id, compact=compact
+        )
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'data': conversaciones
-        }), 200
+        })
+        if etag:
+            with_etag(response, etag)
+        return response, 200
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al listar conversaciones")
         return jsonify({
             'success': False,
             'error': f'Error al listar conversaciones: {str(e)}',
@@ -225,14 +311,6 @@ def marcar_como_leido_route(mensaje_id):
     try:
         # Obtener usuario autenticado
         usuario_actual_id = get_jwt_identity()
-        usuario_actual = utils.mongo_helpers.get_usuario_by_id(usuario_actual_id)
-        
-        if not usuario_actual:
-            return jsonify({
-                'success': False,
-                'error': 'Usuario no autenticado',
-                'code': 'AUTH_ERROR'
-            }), 401
         
         # Usar servicio (Gestor de Mensajes) para marcar como leído
         exito = services.mensajes_privados_service.marcar_mensaje_como_leido(mensaje_id, usuario_actual_id)
@@ -263,40 +341,97 @@ def marcar_como_leido_route(mensaje_id):
         }), 500
 
 
+@mensajes_privados_bp.route('/mensajes-privados/leer', methods=['POST'])
+@jwt_required()
+def marcar_como_leidos_route():
+    """
+    Marcar muchos mensajes como leídos en un solo request
+    
+    Body (uno o ambos):
+        {
+            "ids": ["mensaje_id", ...],
+            "conversaciones": [
+                {"usuario_id": "emisor_id", "hasta": "mensaje_id"},
+                {"usuario_id": "emisor_id", "hasta_fecha": "2024-01-01T12:00:00Z"}
+            ]
+        }
+    
+    Solo se marcan mensajes recibidos por el usuario autenticado; los IDs
+    ajenos o ya leídos se ignoran.
+    
+    Returns:
+        200: { actualizados, noLeidos }
+        400: Datos inválidos
+    """
+    try:
+        usuario_actual_id = get_jwt_identity()
+        data = request.get_json(silent=True) or {}
+        
+        try:
+            actualizados, no_leidos = services.mensajes_privados_service.marcar_mensajes_como_leidos(
+                usuario_actual_id,
+                data.get('ids'),
+                data.get('conversaciones'),
+            )
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e),
+                'code': 'VALIDATION_ERROR'
+            }), 400
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'actualizados': actualizados,
+                'noLeidos': no_leidos
+            }
+        }), 200
+        
+    except Exception as e:
+        logger.exception("Error al marcar mensajes como leídos")
+        return jsonify({
+            'success': False,
+            'error': 'Error al marcar mensajes como leídos',
+            'code': 'INTERNAL_ERROR'
+        }), 500
+
+
 @mensajes_privados_bp.route('/mensajes-privados/no-leidos', methods=['GET'])
 @jwt_required()
 def contar_no_leidos_route():
     """
     Contar mensajes no leídos del usuario actual
     
+    Headers:
+        If-None-Match: ETag de una respuesta anterior
+    
     Returns:
         200: Contador de mensajes no leídos
+        304: El contador no cambió desde el ETag enviado
     """
     try:
         # Obtener usuario autenticado
         usuario_actual_id = get_jwt_identity()
-        usuario_actual = utils.mongo_helpers.get_usuario_by_id(usuario_actual_id)
-        
-        if not usuario_actual:
-            return jsonify({
-                'success': False,
-                'error': 'Usuario no autenticado',
-                'code': 'AUTH_ERROR'
-            }), 401
         
         # Usar servicio (Gestor de Mensajes) para contar no leídos
         no_leidos = services.mensajes_privados_service.contar_mensajes_no_leidos(usuario_actual_id)
         
-        return jsonify({
+        # El contador es la versión: con el mismo valor se responde 304
+        etag = make_etag('no-leidos', usuario_actual_id, no_leidos)
+        respuesta = not_modified(etag)
+        if respuesta is not None:
+            return respuesta
+        
+        return with_etag(jsonify({
             'success': True,
             'data': {
                 'noLeidos': no_leidos
             }
-        }), 200
+        }), etag), 200
         
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al contar mensajes no leídos")
         return jsonify({
             'success': False,
             'error': f'Error al contar mensajes no leídos: {str(e)}',
@@ -318,44 +453,23 @@ def eliminar_mensaje(mensaje_id):
     try:
         # Obtener usuario autenticado
         usuario_actual_id = get_jwt_identity()
-        usuario_actual = utils.mongo_helpers.get_usuario_by_id(usuario_actual_id)
+        usuario_actual = current_user
         
-        if not usuario_actual:
-            return jsonify({
-                'success': False,
-                'error': 'Usuario no autenticado',
-                'code': 'AUTH_ERROR'
-            }), 401
-        
-        # Buscar mensaje para verificar permisos
-        mensaje = utils.mongo_helpers.get_mensaje_privado_by_id(mensaje_id)
-        if not mensaje:
+        # Borrado lógico: un solo update (la purga lo borra físicamente después)
+        error = services.mensajes_privados_service.eliminar_mensaje_privado(mensaje_id, usuario_actual_id)
+        if error == 'MESSAGE_NOT_FOUND':
             return jsonify({
                 'success': False,
                 'error': 'Mensaje no encontrado',
                 'code': 'MESSAGE_NOT_FOUND'
             }), 404
-        
-        # Verificar que el usuario actual es el emisor
-        # Obtener ID del emisor sin intentar dereferenciar
-        emisor_id = None
-        if hasattr(mensaje, '_data') and 'emisor' in mensaje._data:
-            emisor_id = str(mensaje._data['emisor'])
-        elif hasattr(mensaje.emisor, 'id'):
-            emisor_id = str(mensaje.emisor.id)
-        else:
-            emisor_id = str(mensaje.emisor)
-        
-        if emisor_id != str(usuario_actual.id):
+        if error == 'FORBIDDEN':
             return jsonify({
                 'success': False,
                 'error': 'No tienes permiso para eliminar este mensaje',
                 'code': 'FORBIDDEN'
             }), 403
         
-        # Eliminar mensaje (operación directa de BD, no requiere servicio)
-        mensaje.delete()
-        
         # Log del evento
         Log.log_event(
             level='INFO',
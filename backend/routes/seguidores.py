@@ -5,12 +5,16 @@ Endpoints:
 - GET /api/usuarios/seguidores - Obtener seguidores del usuario actual
 """
 
+import logging
 from flask import Blueprint, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 
 from models import Usuario
 import services.seguidores_service
 import utils.mongo_helpers
+from utils.etag import make_etag, not_modified, with_etag
+
+logger = logging.getLogger(__name__)
 
 seguidores_bp = Blueprint("seguidores", __name__)
 
@@ -18,16 +22,22 @@ seguidores_bp = Blueprint("seguidores", __name__)
 @seguidores_bp.route("/usuarios/seguidores", methods=["GET"])
 @jwt_required()
 def listar_seguidores():
+    """
+    Seguidores del usuario autenticado.
+    
+    Acepta If-None-Match: si la lista y los perfiles de los seguidores no
+    cambiaron responde 304 sin consultarlos.
+    """
     try:
         usuario_id = get_jwt_identity()
-        usuario = utils.mongo_helpers.get_usuario_by_id(usuario_id)
+        usuario = current_user
 
-        if not usuario:
-            return jsonify({
-                "success": False,
-                "error": "Usuario no autenticado",
-                "code": "AUTH_ERROR",
-            }), 401
+        version = services.seguidores_service.version_seguidores(usuario)
+        etag = make_etag("seguidores", usuario_id, *version) if version else None
+        if etag:
+            respuesta = not_modified(etag)
+            if respuesta is not None:
+                return respuesta
 
         seguidores = services.seguidores_service.obtener_seguidores(usuario)
         # Convertir a lista para evitar problemas de thread local
@@ -35,20 +45,22 @@ def listar_seguidores():
         data = [seguidor.to_dict() for seguidor in seguidores_list]
 
         if not data:
-            return jsonify({
+            response = jsonify({
                 "success": True,
                 "data": [],
                 "message": "Sin seguidores",
                 "code": "NO_FOLLOWERS"
-            }), 200
-
-        return jsonify({
-            "success": True,
-            "data": data,
-        }), 200
+            })
+        else:
+            response = jsonify({
+                "success": True,
+                "data": data,
+            })
+        if etag:
+            with_etag(response, etag)
+        return response, 200
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al obtener seguidores")
         return jsonify({
             "success": False,
             "error": f"Error al obtener seguidores: {str(e)}",
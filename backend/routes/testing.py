@@ -2,10 +2,13 @@
 Rutas de testing para desarrollo
 Solo deben estar disponibles en modo desarrollo
 """
+import logging
 from flask import Blueprint, jsonify
-from flask_jwt_extended import create_access_token
 from models import Usuario
 import utils.mongo_helpers
+from utils.auth import crear_token
+
+logger = logging.getLogger(__name__)
 
 testing_bp = Blueprint('testing', __name__)
 
@@ -47,9 +50,9 @@ def get_test_token(user_identifier):
         
         # Crear token
         try:
-            token = create_access_token(identity=str(usuario.id))
+            token = crear_token(usuario)
         except Exception as e:
-            print(f"Error al crear token: {e}")
+            logger.exception("Error al crear token")
             return jsonify({
                 'success': False,
                 'error': f'Error al crear token: {str(e)}'
@@ -59,7 +62,7 @@ def get_test_token(user_identifier):
         try:
             user_dict = usuario.to_dict()
         except Exception as e:
-            print(f"Error al convertir usuario a diccionario: {e}")
+            logger.exception("Error al convertir usuario a diccionario")
             return jsonify({
                 'success': False,
                 'error': f'Error al obtener datos del usuario: {str(e)}'
@@ -73,8 +76,7 @@ def get_test_token(user_identifier):
             }
         }), 200
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error al generar token de testing")
         return jsonify({
             'success': False,
             'error': f'Error: {str(e)}'
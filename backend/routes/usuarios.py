@@ -1,18 +1,30 @@
 """
 Rutas para perfil de usuario y subida de fotos
 
-- POST /api/upload/avatar - Subir foto de perfil (devuelve URL)
+- POST /api/upload/avatar - Subir foto de perfil (devuelve URL y variantes)
 - PATCH /api/usuarios/me - Actualizar perfil (fotoUsuario, fotoUsuarioPortada, biografia)
+- DELETE /api/usuarios/me - Eliminar la cuenta (el borrado de sus datos sigue en segundo plano)
+- GET /api/usuarios/<usuario_id>/eliminacion - Progreso de una eliminación de cuenta (admin)
 """
 
+import hashlib
 import os
-import uuid
+from datetime import datetime
 from bson import ObjectId
-from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, current_user
 from mongoengine.connection import get_db
 
 import utils.mongo_helpers
+from models.log import Log
+from services.cuentas_service import estado_eliminacion, solicitar_eliminacion
+from services.mensajes_privados_service import invalidar_conversaciones_de
+from utils.avatar_images import ImagenInvalida, encolar_variantes, hashes_de_avatar, validar_imagen, variant_urls
+from utils.auth import invalidar_perfil
+from utils.decorators import rate_limit, require_role, validate_json
+from utils.passwords import PoolDeHashSaturado, verificar_password
+from utils.storage import get_storage
+from utils.uploads import guardar_upload, upload_info
 
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
 MAX_AVATAR_SIZE = 5 * 1024 * 1024  # 5 MB
@@ -24,8 +36,18 @@ def _allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
-def _upload_folder():
-    return current_app.config['UPLOAD_AVATARS_FOLDER']
+def _too_big():
+    return jsonify({
+        'success': False,
+        'error': 'El archivo supera el tamaño máximo (5 MB)',
+        'code': 'FILE_TOO_BIG'
+    }), 413
+
+
+@usuarios_bp.app_errorhandler(413)
+def request_too_large(error):
+    # MAX_CONTENT_LENGTH o el límite por archivo de utils.uploads cortaron la lectura
+    return _too_big()
 
 
 @usuarios_bp.route('/upload/avatar', methods=['POST'])
@@ -35,11 +57,20 @@ def upload_avatar():
     Sube una imagen como avatar. Guarda el archivo en el servidor y devuelve la URL pública.
     La URL se puede guardar en el perfil con PATCH /api/usuarios/me.
 
+    El archivo llega en streaming a un temporal (utils.uploads) con su
+    SHA-256; el nombre final es el hash, así que subir la misma imagen otra
+    vez no ocupa más espacio ni regenera variantes.
+
+    Se valida el contenido real de la imagen; las variantes de 48/128/512 px
+    (WebP) se generan en segundo plano y hasta que existen sus URLs redirigen
+    al original.
+
     Form-data: 'file' (imagen PNG, JPEG, GIF o WebP; máx 5 MB)
 
     Returns:
-        200: { "success": true, "url": "http://..." }
-        400: sin archivo o tipo no permitido
+        200: { "success": true, "url": "http://...", "variantes": { "48": "http://...", ... } }
+        400: sin archivo, tipo no permitido o imagen inválida
+        413: el archivo supera el tamaño máximo (5 MB)
     """
     if 'file' not in request.files:
         return jsonify({
@@ -63,21 +94,32 @@ def upload_avatar():
             'code': 'INVALID_TYPE'
         }), 400
 
-    file.seek(0, os.SEEK_END)
-    size = file.tell()
-    file.seek(0)
+    # El tamaño y el hash se calcularon mientras se recibía el archivo
+    size, sha256 = upload_info(file)
+    if size is None:
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(0)
     if size > MAX_AVATAR_SIZE:
+        return _too_big()
+
+    # La extensión se toma del contenido, no del nombre que manda el cliente
+    try:
+        ext = validar_imagen(file.stream)
+    except ImagenInvalida as e:
         return jsonify({
             'success': False,
-            'error': 'El archivo supera el tamaño máximo (5 MB)',
-            'code': 'FILE_TOO_BIG'
+            'error': str(e),
+            'code': 'INVALID_IMAGE'
         }), 400
 
-    ext = file.filename.rsplit('.', 1)[1].lower()
-    safe_name = f"{uuid.uuid4().hex}.{ext}"
-    folder = _upload_folder()
-    path = os.path.join(folder, safe_name)
-    file.save(path)
+    # Nombre = hash del contenido: imágenes idénticas comparten archivo y variantes
+    stem = sha256 or hashlib.sha256(file.stream.read()).hexdigest()
+    file.stream.seek(0)
+    safe_name = f"{stem}.{ext}"
+    storage = get_storage()
+    if guardar_upload(file, storage, safe_name):
+        encolar_variantes(storage, safe_name, stem)
 
     # URL que el frontend puede usar en <img src="..."> y guardar en fotoUsuario
     base_url = request.host_url.rstrip('/')
@@ -85,7 +127,8 @@ def upload_avatar():
 
     return jsonify({
         'success': True,
-        'url': url
+        'url': url,
+        'variantes': variant_urls(url)
     }), 200
 
 
@@ -101,13 +144,7 @@ def update_me():
         401: no autenticado
     """
     user_id = get_jwt_identity()
-    usuario = utils.mongo_helpers.get_usuario_by_id(user_id)
-    if not usuario:
-        return jsonify({
-            'success': False,
-            'error': 'Usuario no encontrado',
-            'code': 'USER_NOT_FOUND'
-        }), 401
+    usuario = current_user
 
     data = request.get_json() or {}
     updates = {}
@@ -120,19 +157,103 @@ def update_me():
 
     if not updates:
         return jsonify({'success': True, 'data': usuario.to_dict()}), 200
+    if 'fotoUsuario' in updates or 'fotoUsuarioPortada' in updates:
+        # jobs.eliminar_cuentas busca por igualdad quién más usa un archivo
+        updates['avatares'] = hashes_de_avatar(
+            updates.get('fotoUsuario', usuario.fotoUsuario),
+            updates.get('fotoUsuarioPortada', usuario.fotoUsuarioPortada),
+        )
 
     try:
         oid = ObjectId(user_id)
     except Exception:
         return jsonify({'success': False, 'error': 'ID de usuario inválido', 'code': 'INVALID_ID'}), 400
 
+    # Invalida los ETag de las respuestas que incluyen este perfil
+    updates['updatedAt'] = datetime.utcnow()
     db = get_db('default')
     result = db.usuarios.update_one({'_id': oid}, {'$set': updates})
     if result.matched_count == 0:
         return jsonify({'success': False, 'error': 'Usuario no encontrado', 'code': 'USER_NOT_FOUND'}), 404
 
+    invalidar_perfil(user_id)
+    invalidar_conversaciones_de(user_id)
     usuario_actualizado = utils.mongo_helpers.get_usuario_by_id(user_id)
     return jsonify({
         'success': True,
         'data': usuario_actualizado.to_dict()
     }), 200
+
+
+@usuarios_bp.route('/usuarios/me', methods=['DELETE'])
+@jwt_required()
+@rate_limit(max_requests=5, window_seconds=60)
+@validate_json('password')
+def delete_me():
+    """
+    Elimina la cuenta del usuario autenticado.
+    Body: { "password": "..." }
+
+    El request solo borra el documento del usuario (sus tokens dejan de
+    valer); mensajes, mensajes privados, seguidores, menciones y avatar los
+    borra jobs.eliminar_cuentas en lotes.
+
+    Returns:
+        202: eliminación registrada (estado de la tarea)
+        401: contraseña incorrecta
+        503: pool de hash saturado (reintentar)
+    """
+    usuario = current_user
+    password = str(request.get_json().get('password') or '')
+    # El perfil cacheado no trae el hash: se lee solo ese campo
+    doc = get_db('default').usuarios.find_one({'_id': ObjectId(usuario.id)}, {'contraseña': 1}) or {}
+    try:
+        if not verificar_password(doc.get('contraseña'), password):
+            return jsonify({
+                'success': False,
+                'error': 'Contraseña incorrecta',
+                'code': 'INVALID_CREDENTIALS'
+            }), 401
+    except PoolDeHashSaturado:
+        response = jsonify({
+            'success': False,
+            'error': 'Servicio de autenticación ocupado, reintentá en unos segundos',
+            'code': 'AUTH_BUSY'
+        })
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    estado = solicitar_eliminacion(usuario)
+    Log.log_event(
+        level='INFO',
+        message=f'Eliminación de cuenta solicitada por {usuario.nickName}',
+        user_id=str(usuario.id),
+        action='delete_account',
+        ip_address=request.remote_addr,
+    )
+    return jsonify({
+        'success': True,
+        'data': estado
+    }), 202
+
+
+@usuarios_bp.route('/usuarios/<usuario_id>/eliminacion', methods=['GET'])
+@jwt_required()
+@require_role('admin')
+def estado_eliminacion_route(usuario_id):
+    """
+    Progreso de la eliminación de una cuenta (admin)
+
+    Returns:
+        200: estado (pendiente, en_curso, completada, error o fallida),
+            intentos, pasos completos y documentos borrados por paso
+        404: no hay eliminación registrada para ese usuario
+    """
+    estado = estado_eliminacion(usuario_id)
+    if estado is None:
+        return jsonify({
+            'success': False,
+            'error': 'No hay eliminación registrada para ese usuario',
+            'code': 'NOT_FOUND'
+        }), 404
+    return jsonify({'success': True, 'data': estado}), 200
@@ -0,0 +1,104 @@
+"""
+Servicio de cuentas: baja de usuarios
+
+La baja se hace en dos partes para que el request no dependa de cuántos
+datos tenga el usuario:
+- solicitar_eliminacion (en el request): guarda la tarea con lo que el job
+  necesita del perfil y borra el documento del usuario. Desde ahí sus tokens
+  dejan de valer: el user lookup no lo encuentra, y los workers que lo tenían
+  en cache lo descartan al ver la invalidación (utils.auth). Como en el peor
+  caso un worker lo acepta hasta PROFILE_CACHE_TTL, la tarea recién se puede
+  tomar pasado ese lapso (espera_eliminacion): lo que haya escrito mientras
+  tanto lo borra igual el job.
+- jobs.eliminar_cuentas borra el resto (seguidores, menciones, mensajes,
+  mensajes privados y avatar) en lotes, guardando el progreso en la tarea.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from bson import ObjectId
+from mongoengine.connection import get_db
+
+from services.mensajes_privados_service import invalidar_conversaciones_de
+from utils.auth import get_profile_cache, invalidar_perfil
+
+logger = logging.getLogger(__name__)
+
+# Una tarea por usuario: _id = ID del usuario
+COLECCION_TAREAS = 'eliminaciones_cuenta'
+
+
+def espera_eliminacion() -> int:
+    """Segundos que la tarea espera antes de que el job la tome (vida de un perfil en cache)"""
+    return get_profile_cache().ttl
+
+
+def solicitar_eliminacion(usuario) -> Dict:
+    """
+    Registra la baja de `usuario` y borra su documento (idempotente)
+
+    Args:
+        usuario: Usuario a eliminar (current_user)
+
+    Returns:
+        Estado de la tarea (ver estado_eliminacion)
+    """
+    db = get_db('default')
+    usuario_oid = ObjectId(usuario.id)
+    ahora = datetime.utcnow()
+    db[COLECCION_TAREAS].update_one(
+        {'_id': usuario_oid},
+        {'$setOnInsert': {
+            'nickName': usuario.nickName,
+            # El documento se borra ya: el job necesita saber qué avatar limpiar
+            'fotos': [foto for foto in (usuario.fotoUsuario, usuario.fotoUsuarioPortada) if foto],
+            'estado': 'pendiente',
+            'pasos_completos': [],
+            'borrados': {},
+            'intentos': 0,
+            # El job la toma cuando vence: ningún worker acepta ya el token
+            'lease': ahora + timedelta(seconds=espera_eliminacion()),
+            'error': None,
+            'creada': ahora,
+            'actualizada': ahora,
+        }},
+        upsert=True,
+    )
+    # Directo con pymongo: sin el CASCADE de mongoengine, que borraría todo acá
+    db.usuarios.delete_one({'_id': usuario_oid})
+    invalidar_perfil(usuario_oid)
+    # Sus conversaciones dejan de aparecer en los listados de los demás
+    invalidar_conversaciones_de(usuario_oid)
+    logger.info("Eliminación de cuenta solicitada", extra={'usuario_id': str(usuario_oid)})
+    return estado_eliminacion(usuario_oid)
+
+
+def estado_eliminacion(usuario_id) -> Optional[Dict]:
+    """
+    Progreso de la baja de un usuario
+
+    Returns:
+        Dict con estado (pendiente, en_curso, completada, error o fallida:
+        agotó los intentos y no se reintenta), intentos, pasos completos y
+        documentos borrados por paso; None si no hay tarea
+    """
+    try:
+        usuario_oid = ObjectId(usuario_id)
+    except Exception:
+        return None
+    tarea = get_db('default')[COLECCION_TAREAS].find_one({'_id': usuario_oid})
+    if not tarea:
+        return None
+    return {
+        'usuarioId': str(tarea['_id']),
+        'nickName': tarea.get('nickName'),
+        'estado': tarea['estado'],
+        'intentos': tarea.get('intentos', 0),
+        'pasosCompletos': tarea.get('pasos_completos', []),
+        'borrados': tarea.get('borrados', {}),
+        'error': tarea.get('error'),
+        'creada': tarea['creada'].isoformat(),
+        'actualizada': tarea['actualizada'].isoformat(),
+    }
@@ -6,12 +6,49 @@ Este servicio actúa como intermediario entre las rutas y los expertos de BD
 (MensajePrivado y Usuario), implementando la lógica de negocio.
 """
 
-from typing import List, Dict, Optional, Tuple
-from utils.mongo_helpers import get_usuario_by_id
+import logging
+from typing import List, Dict, Optional, Tuple, Union
+from db import pin_to_primary
+from utils.json_provider import json_fragment
+from utils.mongo_helpers import get_mensaje_privado_by_id, get_usuario_by_id, get_usuarios_by_ids
 from models import MensajePrivado, Usuario
 from repositories.mensaje_privado_repository import MensajePrivadoRepository
 from repositories.usuario_repository import UsuarioRepository
 
+logger = logging.getLogger(__name__)
+
+# Límites del marcado masivo como leído (un request, un update_many)
+MAX_MARCAR_LEIDOS = 1000
+MAX_MARCAR_CONVERSACIONES = 200
+
+# Máximo de receptores por envío masivo (un insert_many por request)
+MAX_ENVIO_MASIVO = 1000
+
+
+def _fecha_texto(valor) -> Optional[str]:
+    """isoformat si es una fecha; cualquier otro valor guardado, como texto"""
+    if valor is None:
+        return None
+    return valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+
+
+def _invalidar_listados(usuario_ids: List) -> None:
+    """Cambia la versión (ETag) del listado de conversaciones de esos usuarios"""
+    UsuarioRepository.incrementar_version_conversaciones(usuario_ids)
+
+
+def invalidar_conversaciones_de(usuario_id: str) -> None:
+    """
+    Cambia la versión del listado de conversaciones del usuario y de todos
+    con los que tiene mensajes: su perfil aparece en esos listados. Se usa al
+    modificar o borrar el perfil (recorre sus mensajes una vez, no en cada
+    lectura).
+    
+    Args:
+        usuario_id: ID del usuario
+    """
+    _invalidar_listados([usuario_id] + MensajePrivadoRepository.participantes(usuario_id))
+
 
 def obtener_mensajes_privados(usuario_id: str) -> Tuple[List[MensajePrivado], bool]:
     """
@@ -29,12 +66,42 @@ def obtener_mensajes_privados(usuario_id: str) -> Tuple[List[MensajePrivado], bo
         hay_mensajes = len(mensajes) > 0
         return mensajes, hay_mensajes
     except Exception as e:
-        print(f"Error en obtener_mensajes_privados: {e}")
+        logger.exception("Error en obtener_mensajes_privados")
         return [], False
 
 
+def mensaje_de_conversacion_dict(mensaje: MensajePrivado, usuario_actual_id: str,
+                                 usuario_actual_data, otro_usuario_data) -> Dict:
+    """
+    Convierte un mensaje de una conversación entre dos usuarios a dict.
+
+    Los usuarios ya vienen serializados una sola vez por respuesta (to_dict o
+    json_fragment): el emisor es el usuario actual o el otro según el ID
+    guardado en el mensaje.
+    """
+    # Obtener IDs directamente
+    if hasattr(mensaje, '_data') and 'emisor' in mensaje._data:
+        emisor_id = str(mensaje._data['emisor'])
+    else:
+        emisor_id = str(mensaje.emisor) if hasattr(mensaje.emisor, '__str__') else str(mensaje.emisor)
+
+    # Determinar qué usuario es emisor y receptor
+    es_emisor = (emisor_id == usuario_actual_id)
+    emisor_data = usuario_actual_data if es_emisor else otro_usuario_data
+    receptor_data = otro_usuario_data if es_emisor else usuario_actual_data
+
+    return {
+        'id': str(mensaje.id),
+        'texto': mensaje.texto,
+        'fechaDeCreado': mensaje.fechaDeCreado.isoformat() if mensaje.fechaDeCreado else None,
+        'emisor': emisor_data,
+        'receptor': receptor_data,
+        'leido': mensaje.leido.isoformat() if mensaje.leido else None
+    }
+
+
 def obtener_conversacion(usuario_actual_id: str, otro_usuario_id: str, 
-                         limit: int = 50, offset: int = 0) -> Dict:
+                         limit: int = 50, offset: int = 0, compact: bool = False) -> Dict:
     """
     Obtiene la conversación entre dos usuarios (equivalente a getsMenPriv del diagrama)
     
@@ -43,9 +110,11 @@ def obtener_conversacion(usuario_actual_id: str, otro_usuario_id: str,
         otro_usuario_id: ID del otro usuario
         limit: Límite de mensajes
         offset: Offset para paginación
+        compact: Si es True, emisor/receptor de cada mensaje son IDs y los
+            usuarios van una sola vez en 'usuarios' (ID -> usuario)
         
     Returns:
-        Dict con conversación, total, limit, offset, hasMore
+        Dict con conversación, total, limit, offset, hasMore (y usuarios si compact)
     """
     try:
         # Usar experto de BD (Repository)
@@ -54,55 +123,62 @@ def obtener_conversacion(usuario_actual_id: str, otro_usuario_id: str,
         )
         
         # Marcar como leídos los mensajes recibidos
-        MensajePrivadoRepository.marcar_como_leido_por_receptor(otro_usuario_id, usuario_actual_id)
+        if MensajePrivadoRepository.marcar_como_leido_por_receptor(otro_usuario_id, usuario_actual_id):
+            _invalidar_listados([usuario_actual_id, otro_usuario_id])
+        # El contador de no leídos debe reflejar esta escritura en las próximas lecturas
+        pin_to_primary(usuario_actual_id)
         
         # Obtener usuarios para el to_dict
         usuario_actual_obj = get_usuario_by_id(usuario_actual_id)
         otro_usuario_obj = get_usuario_by_id(otro_usuario_id)
+        # Cada usuario se serializa una vez y se reutiliza en todos los mensajes
+        usuario_actual_data = json_fragment(usuario_actual_obj.to_dict()) if usuario_actual_obj else None
+        otro_usuario_data = json_fragment(otro_usuario_obj.to_dict()) if otro_usuario_obj else None
+        
+        usuarios = None
+        if compact:
+            usuarios = {}
+            if usuario_actual_obj:
+                usuarios[str(usuario_actual_obj.id)] = usuario_actual_data
+            if otro_usuario_obj:
+                usuarios[str(otro_usuario_obj.id)] = otro_usuario_data
+            # En cada mensaje solo van los IDs
+            usuario_actual_data = str(usuario_actual_obj.id) if usuario_actual_obj else None
+            otro_usuario_data = str(otro_usuario_obj.id) if otro_usuario_obj else None
         
         # Convertir mensajes a dict sin intentar dereferenciar
         conversacion_dicts = []
         for mensaje in mensajes:
             try:
-                # Obtener IDs directamente
-                if hasattr(mensaje, '_data') and 'emisor' in mensaje._data:
-                    emisor_id = str(mensaje._data['emisor'])
-                else:
-                    emisor_id = str(mensaje.emisor) if hasattr(mensaje.emisor, '__str__') else str(mensaje.emisor)
-                
-                # Determinar qué usuario es emisor y receptor
-                es_emisor = (emisor_id == usuario_actual_id)
-                emisor_obj = usuario_actual_obj if es_emisor else otro_usuario_obj
-                receptor_obj = otro_usuario_obj if es_emisor else usuario_actual_obj
-                
-                conversacion_dicts.append({
-                    'id': str(mensaje.id),
-                    'texto': mensaje.texto,
-                    'fechaDeCreado': mensaje.fechaDeCreado.isoformat() if mensaje.fechaDeCreado else None,
-                    'emisor': emisor_obj.to_dict() if emisor_obj else None,
-                    'receptor': receptor_obj.to_dict() if receptor_obj else None,
-                    'leido': mensaje.leido.isoformat() if mensaje.leido else None
-                })
+                conversacion_dicts.append(
+                    mensaje_de_conversacion_dict(mensaje, usuario_actual_id, usuario_actual_data, otro_usuario_data)
+                )
             except Exception as e:
-                print(f"⚠️ Error creando dict de mensaje en conversación: {e}")
+                logger.warning("Error creando dict de mensaje en conversación: %s", e)
                 continue
         
-        return {
+        resultado = {
             'conversacion': conversacion_dicts,
             'total': total,
             'limit': limit,
             'offset': offset,
             'hasMore': (offset + limit) < total
         }
+        if compact:
+            resultado['usuarios'] = usuarios
+        return resultado
     except Exception as e:
-        print(f"Error en obtener_conversacion: {e}")
-        return {
+        logger.exception("Error en obtener_conversacion")
+        resultado = {
             'conversacion': [],
             'total': 0,
             'limit': limit,
             'offset': offset,
             'hasMore': False
         }
+        if compact:
+            resultado['usuarios'] = {}
+        return resultado
 
 
 def crear_mensaje_privado(emisor_id: str, receptor_id: str, texto: str) -> Optional[MensajePrivado]:
@@ -131,22 +207,85 @@ def crear_mensaje_privado(emisor_id: str, receptor_id: str, texto: str) -> Optio
         
         # Usar experto de BD (Repository)
         mensaje = MensajePrivadoRepository.post_mensaje(texto, emisor, receptor)
+        _invalidar_listados([emisor.id, receptor.id])
+        # Read-your-writes: el emisor debe ver su mensaje al recargar la conversación
+        pin_to_primary(emisor_id)
         return mensaje
     except Exception as e:
-        print(f"Error en crear_mensaje_privado: {e}")
+        logger.exception("Error en crear_mensaje_privado")
         return None
 
 
-def listar_conversaciones(usuario_id: str) -> List[Dict]:
+def enviar_mensaje_masivo(emisor_id: str, receptor_ids: List, texto: str) -> Dict:
+    """
+    Envía el mismo mensaje a muchos receptores: una consulta $in para
+    validarlos y un insert_many para escribirlos
+    
+    Los no leídos y el listado de conversaciones de cada receptor salen de
+    los propios mensajes (leido=None); además se cambia la versión de esos
+    listados con un solo update_many.
+    
+    Args:
+        emisor_id: ID del emisor
+        receptor_ids: IDs de los receptores (se ignoran repetidos y el emisor)
+        texto: Texto del mensaje (ya validado)
+        
+    Returns:
+        Dict con enviados, mensajeIds, inexistentes y fallidos
+        
+    Raises:
+        ValueError: si la lista es vacía, excede el máximo o tiene IDs inválidos
+    """
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    
+    if not isinstance(receptor_ids, list) or not receptor_ids:
+        raise ValueError('receptor_ids debe ser una lista no vacía')
+    if len(receptor_ids) > MAX_ENVIO_MASIVO:
+        raise ValueError(f'Máximo {MAX_ENVIO_MASIVO} receptores por request')
+    
+    try:
+        emisor_oid = ObjectId(emisor_id)
+        # dict.fromkeys: sin repetidos y conservando el orden
+        receptor_oids = list(dict.fromkeys(ObjectId(receptor_id) for receptor_id in receptor_ids))
+    except (InvalidId, TypeError) as e:
+        raise ValueError(f'ID inválido: {e}')
+    receptor_oids = [oid for oid in receptor_oids if oid != emisor_oid]
+    
+    existentes = UsuarioRepository.ids_existentes(receptor_oids)
+    validos = [oid for oid in receptor_oids if oid in existentes]
+    insertados, fallidos = MensajePrivadoRepository.post_mensajes(texto, emisor_oid, validos)
+    if insertados:
+        fallidos_set = set(fallidos)
+        _invalidar_listados([emisor_oid] + [oid for oid in validos if oid not in fallidos_set])
+        # Read-your-writes: el emisor debe ver sus mensajes al recargar
+        pin_to_primary(emisor_id)
+    
+    return {
+        'enviados': len(insertados),
+        'mensajeIds': [str(mensaje_id) for mensaje_id in insertados],
+        'inexistentes': [str(oid) for oid in receptor_oids if oid not in existentes],
+        'fallidos': [str(oid) for oid in fallidos],
+    }
+
+
+def listar_conversaciones(usuario_id: str, compact: bool = False) -> Union[List[Dict], Dict]:
     """
     Lista todas las conversaciones del usuario con último mensaje y contador de no leídos
     
     Args:
         usuario_id: ID del usuario
+        compact: Si es True, usuario/emisor/receptor son IDs y se devuelve
+            {'conversaciones': [...], 'usuarios': {ID: usuario}}
         
     Returns:
         Lista de conversaciones con usuario, último mensaje y mensajes no leídos
     """
+    usuarios = {}
+
+    def resultado(conversaciones):
+        return {'conversaciones': conversaciones, 'usuarios': usuarios} if compact else conversaciones
+
     try:
         # Obtener todos los mensajes del usuario usando experto de BD (Repository)
         mensajes = MensajePrivadoRepository.gets_mensaje_privados(usuario_id)
@@ -156,8 +295,13 @@ def listar_conversaciones(usuario_id: str) -> List[Dict]:
         usuario_actual = get_usuario_by_id(usuario_id)
         
         if not usuario_actual:
-            return []
+            return resultado([])
+        usuario_actual_data = json_fragment(usuario_actual.to_dict())
+        usuario_actual_id_str = str(usuario_actual.id)
+        if compact:
+            usuarios[usuario_actual_id_str] = usuario_actual_data
         
+        ultimos = {}
         for mensaje in mensajes:
             # Obtener IDs directamente sin intentar dereferenciar
             # Los mensajes vienen del repositorio con emisor/receptor como ObjectIds
@@ -177,7 +321,7 @@ def listar_conversaciones(usuario_id: str) -> List[Dict]:
                 else:
                     receptor_id = str(mensaje.receptor)
             except Exception as e:
-                print(f"⚠️ Error obteniendo IDs de mensaje: {e}")
+                logger.warning("Error obteniendo IDs de mensaje: %s", e)
                 # Si falla, intentar obtener del documento original
                 from mongoengine.connection import get_db
                 from bson import ObjectId
@@ -189,46 +333,69 @@ def listar_conversaciones(usuario_id: str) -> List[Dict]:
                 else:
                     continue
             
-            usuario_actual_id_str = str(usuario_actual.id)
-            
             if emisor_id == usuario_actual_id_str:
                 otro_usuario_id = receptor_id
             else:
                 otro_usuario_id = emisor_id
             
-            # Si es la primera vez que vemos este usuario, agregarlo
-            if otro_usuario_id not in conversaciones_dict:
-                otro_usuario = get_usuario_by_id(otro_usuario_id)
-                if not otro_usuario:
-                    continue
-                
-                # Contar mensajes no leídos usando experto de BD (Repository)
-                no_leidos = MensajePrivadoRepository.contar_no_leidos(otro_usuario_id, usuario_actual_id_str)
-                
-                # Crear un dict del mensaje sin intentar dereferenciar
-                try:
-                    mensaje_dict = {
-                        'id': str(mensaje.id),
-                        'texto': mensaje.texto,
-                        'fechaDeCreado': mensaje.fechaDeCreado.isoformat() if mensaje.fechaDeCreado else None,
-                        'emisor': otro_usuario.to_dict() if emisor_id == otro_usuario_id else usuario_actual.to_dict(),
-                        'receptor': usuario_actual.to_dict() if receptor_id == usuario_actual_id_str else otro_usuario.to_dict(),
-                        'leido': mensaje.leido.isoformat() if mensaje.leido else None
-                    }
-                except Exception as e:
-                    print(f"⚠️ Error creando dict de mensaje: {e}")
-                    mensaje_dict = mensaje.to_dict()
-                
-                conversaciones_dict[otro_usuario_id] = {
-                    'usuario': otro_usuario.to_dict(),
-                    'ultimoMensaje': mensaje_dict,
-                    'mensajesNoLeidos': no_leidos
-                }
+            # Los mensajes vienen del más nuevo al más viejo: el primero de cada usuario es el último
+            if otro_usuario_id not in ultimos:
+                ultimos[otro_usuario_id] = (mensaje, emisor_id, receptor_id)
+        
+        # Una consulta para todos los otros usuarios y otra para todos los no leídos
+        # (no una de cada una por conversación)
+        otros_usuarios = get_usuarios_by_ids(list(ultimos))
+        no_leidos_por_emisor = MensajePrivadoRepository.contar_no_leidos_por_emisor(usuario_actual_id_str)
         
-        return list(conversaciones_dict.values())
+        for otro_usuario_id, (mensaje, emisor_id, receptor_id) in ultimos.items():
+            otro_usuario = otros_usuarios.get(otro_usuario_id)
+            if not otro_usuario:
+                continue
+            
+            no_leidos = no_leidos_por_emisor.get(otro_usuario_id, 0)
+            
+            otro_usuario_data = json_fragment(otro_usuario.to_dict())
+            if compact:
+                usuarios[otro_usuario_id] = otro_usuario_data
+                otro_ref, actual_ref = otro_usuario_id, usuario_actual_id_str
+            else:
+                otro_ref, actual_ref = otro_usuario_data, usuario_actual_data
+            
+            # Crear un dict del mensaje sin intentar dereferenciar
+            emisor_ref = otro_ref if emisor_id == otro_usuario_id else actual_ref
+            receptor_ref = actual_ref if receptor_id == usuario_actual_id_str else otro_ref
+            try:
+                mensaje_dict = {
+                    'id': str(mensaje.id),
+                    'texto': mensaje.texto,
+                    'fechaDeCreado': mensaje.fechaDeCreado.isoformat() if mensaje.fechaDeCreado else None,
+                    'emisor': emisor_ref,
+                    'receptor': receptor_ref,
+                    'leido': mensaje.leido.isoformat() if mensaje.leido else None
+                }
+            except Exception as e:
+                logger.warning("Error creando dict de mensaje: %s", e)
+                # Mismas referencias que arriba (IDs en compact): to_dict
+                # embebería y dereferenciaría a emisor y receptor
+                mensaje_dict = {
+                    'id': str(mensaje.id),
+                    'texto': getattr(mensaje, 'texto', None),
+                    'fechaDeCreado': _fecha_texto(getattr(mensaje, 'fechaDeCreado', None)),
+                    'emisor': emisor_ref,
+                    'receptor': receptor_ref,
+                    'leido': _fecha_texto(getattr(mensaje, 'leido', None))
+                }
+            
+            conversaciones_dict[otro_usuario_id] = {
+                'usuario': otro_ref,
+                'ultimoMensaje': mensaje_dict,
+                'mensajesNoLeidos': no_leidos
+            }
+    
+        return resultado(list(conversaciones_dict.values()))
     except Exception as e:
-        print(f"Error en listar_conversaciones: {e}")
-        return []
+        logger.exception("Error en listar_conversaciones")
+        return resultado([])
 
 
 def marcar_mensaje_como_leido(mensaje_id: str, usuario_id: str) -> bool:
@@ -244,12 +411,137 @@ def marcar_mensaje_como_leido(mensaje_id: str, usuario_id: str) -> bool:
     """
     try:
         # Usar experto de BD (Repository)
-        return MensajePrivadoRepository.marcar_como_leido(mensaje_id, usuario_id)
+        emisor = MensajePrivadoRepository.marcar_como_leido(mensaje_id, usuario_id)
+        if emisor is None:
+            return False
+        # El emisor ve la marca de leído en su listado
+        _invalidar_listados([usuario_id, emisor])
+        pin_to_primary(usuario_id)
+        return True
     except Exception as e:
-        print(f"Error en marcar_mensaje_como_leido: {e}")
+        logger.exception("Error en marcar_mensaje_como_leido")
         return False
 
 
+def eliminar_mensaje_privado(mensaje_id: str, usuario_id: str) -> Optional[str]:
+    """
+    Elimina (borrado lógico) un mensaje del usuario
+    
+    El camino feliz es un solo update; solo si no se eliminó se busca el
+    mensaje para distinguir "no existe" de "no es tuyo".
+    
+    Args:
+        mensaje_id: ID del mensaje
+        usuario_id: ID del usuario (debe ser el emisor)
+        
+    Returns:
+        None si se eliminó, 'MESSAGE_NOT_FOUND' o 'FORBIDDEN' si no
+    """
+    receptor = MensajePrivadoRepository.eliminar(mensaje_id, usuario_id)
+    if receptor is not None:
+        _invalidar_listados([usuario_id, receptor])
+        # El emisor no debe volver a ver el mensaje al recargar
+        pin_to_primary(usuario_id)
+        return None
+    if get_mensaje_privado_by_id(mensaje_id) is None:
+        return 'MESSAGE_NOT_FOUND'
+    return 'FORBIDDEN'
+
+
+def marcar_mensajes_como_leidos(usuario_id: str, mensaje_ids: Optional[List] = None,
+                                conversaciones: Optional[List[Dict]] = None) -> Tuple[int, int]:
+    """
+    Marca como leídos muchos mensajes del usuario en una sola escritura
+    
+    Args:
+        usuario_id: ID del usuario (receptor)
+        mensaje_ids: IDs de mensajes puntuales
+        conversaciones: [{"usuario_id": emisor, "hasta": mensaje_id}] o
+            [{"usuario_id": emisor, "hasta_fecha": ISO 8601}]: todo lo recibido
+            de ese emisor hasta esa marca (inclusive)
+        
+    Returns:
+        (cantidad marcada, mensajes no leídos que quedan)
+        
+    Raises:
+        ValueError: si algún ID o marca es inválido o se excede el máximo
+    """
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    from datetime import datetime, timezone
+    
+    mensaje_ids = mensaje_ids or []
+    conversaciones = conversaciones or []
+    if not isinstance(mensaje_ids, list) or not isinstance(conversaciones, list):
+        raise ValueError('ids y conversaciones deben ser listas')
+    if not mensaje_ids and not conversaciones:
+        raise ValueError('Indicá ids o conversaciones')
+    if len(mensaje_ids) > MAX_MARCAR_LEIDOS or len(conversaciones) > MAX_MARCAR_CONVERSACIONES:
+        raise ValueError(f'Máximo {MAX_MARCAR_LEIDOS} ids y {MAX_MARCAR_CONVERSACIONES} conversaciones por request')
+    
+    try:
+        oids = [ObjectId(mensaje_id) for mensaje_id in mensaje_ids]
+        marcas = []
+        for conversacion in conversaciones:
+            marca = {'emisor': ObjectId(conversacion['usuario_id'])}
+            if conversacion.get('hasta'):
+                marca['hasta_id'] = ObjectId(conversacion['hasta'])
+            if conversacion.get('hasta_fecha'):
+                fecha = datetime.fromisoformat(str(conversacion['hasta_fecha']).replace('Z', '+00:00'))
+                # Las fechas se guardan en UTC sin zona
+                if fecha.tzinfo is not None:
+                    fecha = fecha.astimezone(timezone.utc).replace(tzinfo=None)
+                marca['hasta_fecha'] = fecha
+            if len(marca) == 1:
+                raise ValueError('Cada conversación necesita hasta o hasta_fecha')
+            marcas.append(marca)
+    except (InvalidId, TypeError, KeyError) as e:
+        raise ValueError(f'ID inválido: {e}')
+    
+    actualizados = MensajePrivadoRepository.marcar_como_leidos(usuario_id, oids, marcas)
+    if actualizados:
+        # Los emisores ven la marca de leído en su listado
+        emisores = {marca['emisor'] for marca in marcas}
+        emisores.update(MensajePrivadoRepository.emisores(oids))
+        _invalidar_listados([usuario_id] + list(emisores))
+        # Leer el nuevo conteo (y las próximas lecturas) del primario
+        pin_to_primary(usuario_id)
+    return actualizados, MensajePrivadoRepository.contar_no_leidos_por_receptor(usuario_id)
+
+
+def version_conversaciones(usuario_id: str) -> Optional[Tuple]:
+    """
+    Versión del listado de conversaciones del usuario, para el ETag
+    
+    Son lecturas puntuales sobre índices, que no dependen de cuántos
+    mensajes ni conversaciones tenga: el último mensaje enviado y el último
+    recibido, los no leídos y el contador conversacionesVersion del usuario.
+    El contador se incrementa al enviar, leer o borrar un mensaje y al
+    modificarse o borrarse el perfil de alguno de los participantes
+    (invalidar_conversaciones_de); el último mensaje y los no leídos cubren
+    además lo que borra jobs.eliminar_cuentas.
+    
+    Args:
+        usuario_id: ID del usuario
+        
+    Returns:
+        Tupla con los valores que determinan el listado, o None si no se pudo
+        calcular (en ese caso no se usa ETag)
+    """
+    resumen = MensajePrivadoRepository.version_conversaciones(usuario_id)
+    if resumen is None:
+        return None
+    contador = UsuarioRepository.version_conversaciones(usuario_id)
+    if contador is None:
+        return None
+    return (
+        resumen['ultimo_enviado'],
+        resumen['ultimo_recibido'],
+        resumen['no_leidos'],
+        contador,
+    )
+
+
 def contar_mensajes_no_leidos(usuario_id: str) -> int:
     """
     Cuenta los mensajes no leídos del usuario
@@ -264,7 +556,7 @@ def contar_mensajes_no_leidos(usuario_id: str) -> int:
         # Usar experto de BD (Repository)
         return MensajePrivadoRepository.contar_no_leidos_por_receptor(usuario_id)
     except Exception as e:
-        print(f"Error en contar_mensajes_no_leidos: {e}")
+        logger.exception("Error en contar_mensajes_no_leidos")
         return 0
 
 
@@ -282,6 +574,6 @@ def obtener_usuarios_por_ids(usuario_ids: List[str]) -> List[Usuario]:
         # Usar experto de BD (Repository)
         return UsuarioRepository.gets_usuarios(usuario_ids)
     except Exception as e:
-        print(f"Error en obtener_usuarios_por_ids: {e}")
+        logger.exception("Error en obtener_usuarios_por_ids")
         return []
 
@@ -1,5 +1,8 @@
+import logging
 from models import Mensaje
 
+logger = logging.getLogger(__name__)
+
 
 def obtener_mis_mensajes(usuario, limit=50, offset=0):
     """
@@ -9,10 +12,10 @@ def obtener_mis_mensajes(usuario, limit=50, offset=0):
         autor_id = usuario.id if hasattr(usuario, 'id') else usuario
         
         # Usar pymongo directamente para evitar problemas de thread local
-        from mongoengine.connection import get_db
+        from db import get_read_db
         from bson import ObjectId
         
-        db = get_db('default')
+        db = get_read_db('default', usuario_id=autor_id)
         
         # Convertir autor_id a ObjectId si es necesario
         try:
@@ -35,7 +38,7 @@ def obtener_mis_mensajes(usuario, limit=50, offset=0):
                 mensaje = Mensaje._from_son(doc)
                 mensajes.append(mensaje)
             except Exception as e:
-                print(f"⚠️ Error al convertir mensaje {doc.get('_id')}: {e}")
+                logger.warning("Error al convertir mensaje %s: %s", doc.get('_id'), e)
                 continue
         
         # Contar total
@@ -43,8 +46,6 @@ def obtener_mis_mensajes(usuario, limit=50, offset=0):
         
         return mensajes, total
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"Error en obtener_mis_mensajes: {e}")
+        logger.exception("Error en obtener_mis_mensajes")
         return [], 0
 
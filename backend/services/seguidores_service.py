@@ -1,10 +1,14 @@
+import logging
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
+
 def obtener_seguidores(usuario):
     """
     Obtiene la lista de seguidores de un usuario usando pymongo directamente.
     """
-    from mongoengine.connection import get_db
+    from db import get_read_db
     from bson import ObjectId
     from models import Usuario as UsuarioModel
     
@@ -21,7 +25,7 @@ def obtener_seguidores(usuario):
             usuario_oid = usuario_id
         
         # Obtener usuario desde la BD usando pymongo para evitar auto-dereferencing
-        db = get_db('default')
+        db = get_read_db('default', usuario_id=usuario_id)
         usuario_doc = db.usuarios.find_one({'_id': usuario_oid})
         
         if not usuario_doc:
@@ -55,13 +59,53 @@ def obtener_seguidores(usuario):
                 seguidor.siguiendo = []
                 seguidores.append(seguidor)
             except Exception as e:
-                print(f"⚠️ Error al convertir seguidor {doc.get('_id')}: {e}")
+                logger.warning("Error al convertir seguidor %s: %s", doc.get('_id'), e)
                 continue
         
         return seguidores
     except Exception as e:
-        import traceback
-        traceback.print_exc()
-        print(f"Error en obtener_seguidores: {e}")
+        logger.exception("Error en obtener_seguidores")
         return []
 
+
+
+def version_seguidores(usuario):
+    """
+    Versión del listado de seguidores de un usuario, para el ETag.
+    
+    Lee solo la lista de IDs de seguidores y el updatedAt de cada uno (y
+    cuántos existen), en lugar de los documentos completos. Devuelve None si
+    no se pudo calcular.
+    """
+    from db import get_read_db
+    from bson import ObjectId
+    from repositories.usuario_repository import UsuarioRepository
+    
+    try:
+        if not usuario or not hasattr(usuario, 'id'):
+            return None
+        
+        try:
+            usuario_oid = ObjectId(usuario.id)
+        except:
+            usuario_oid = usuario.id
+        
+        db = get_read_db('default', usuario_id=usuario.id)
+        usuario_doc = db.usuarios.find_one({'_id': usuario_oid}, {'seguidores': 1})
+        if not usuario_doc:
+            return None
+        
+        seguidores_ids = usuario_doc.get('seguidores', [])
+        perfiles = UsuarioRepository.resumen_perfiles(seguidores_ids)
+        if perfiles is None:
+            return None
+        ultima, existentes = perfiles
+        return (
+            ','.join(str(seguidor_id) for seguidor_id in seguidores_ids),
+            ultima.isoformat() if ultima else None,
+            # Un seguidor borrado sale del listado antes de que el job lo quite de la lista
+            existentes,
+        )
+    except Exception as e:
+        logger.exception("Error en version_seguidores")
+        return None
@@ -6,6 +6,8 @@ import pytest
 from flask_jwt_extended import create_access_token
 from mongoengine import connect, disconnect
 
+from utils.query_budget import QueryTracker, get_query_budget_listener
+
 
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_db():
@@ -27,6 +29,7 @@ def setup_test_db():
         alias="default",
         tls=False,
         uuidRepresentation='standard',
+        event_listeners=[get_query_budget_listener()],
     )
     
     connect(
@@ -35,6 +38,7 @@ def setup_test_db():
         alias="logs",
         tls=False,
         uuidRepresentation='standard',
+        event_listeners=[get_query_budget_listener()],
     )
     
     yield
@@ -89,6 +93,9 @@ def app_module(monkeypatch):
         pass
     
     monkeypatch.setattr(db, "connect_databases", mock_connect)
+    # Las cotas de consultas no dependen de cuánto tarda cada test: la consulta
+    # periódica de invalidaciones de perfiles se prueba aparte (test_auth.py)
+    monkeypatch.setenv("PROFILE_INVALIDATION_INTERVAL", "3600")
 
     if "app" in sys.modules:
         app_module = importlib.reload(sys.modules["app"])
@@ -96,6 +103,8 @@ def app_module(monkeypatch):
         app_module = importlib.import_module("app")
 
     app_module.app.config["TESTING"] = True
+    # Fallar el test si un endpoint excede su presupuesto de consultas o hace N+1
+    app_module.app.config["QUERY_BUDGET_STRICT"] = True
     # Configurar JWT_SECRET_KEY más largo para evitar warnings
     app_module.app.config["JWT_SECRET_KEY"] = "test-jwt-secret-key-minimum-32-bytes-long-for-sha256"
     return app_module
@@ -113,3 +122,38 @@ def auth_headers(app_module):
         token = create_access_token(identity="user_1")
     return {"Authorization": f"Bearer {token}"}
 
+
+@pytest.fixture
+def usuario_headers(app_module):
+    """Headers de un usuario guardado en la base (el token pasa el user lookup real)"""
+    from models import Usuario
+    from utils.auth import crear_token
+
+    usuario = Usuario(nickName="autenticado", nombre="Auth", apellido="Test", mail="autenticado@example.com", contraseña="x")
+    usuario.save()
+    with app_module.app.app_context():
+        token = crear_token(usuario)
+    return {"Authorization": f"Bearer {token}"}
+
+
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Verifica la cantidad de consultas a MongoDB de un bloque
+
+    Usage:
+        with assert_max_queries(3):
+            app_client.get("/api/...")
+    """
+    from contextlib import contextmanager
+
+    @contextmanager
+    def _assert_max_queries(max_queries):
+        with QueryTracker() as tracker:
+            yield tracker
+        assert tracker.total <= max_queries, (
+            f"Se ejecutaron {tracker.total} consultas (máximo {max_queries}): {dict(tracker.shapes)}"
+        )
+
+    return _assert_max_queries
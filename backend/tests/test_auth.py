@@ -0,0 +1,188 @@
+"""
+Tests para la identidad del JWT con cache de perfiles (utils.auth)
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask, jsonify
+from flask_jwt_extended import JWTManager, create_access_token, decode_token, jwt_required
+
+from utils.auth import (
+    COLECCION_INVALIDACIONES,
+    InvalidacionesCompartidas,
+    ProfileCache,
+    crear_token,
+    get_profile_cache,
+    init_auth,
+)
+from utils.decorators import require_role
+
+
+def test_profile_cache_vence_y_descarta_el_menos_usado(monkeypatch):
+    ahora = [100.0]
+    monkeypatch.setattr('utils.auth.time.monotonic', lambda: ahora[0])
+    cache = ProfileCache(ttl=10, max_size=2)
+
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+
+    ahora[0] += 11
+    assert cache.get('a') is None
+    assert len(cache) == 1
+
+
+def test_profile_cache_ttl_cero_no_guarda():
+    cache = ProfileCache(ttl=0)
+    cache.set('a', 1)
+    assert cache.get('a') is None
+
+
+def test_crear_token_incluye_claims_minimos(app_module):
+    usuario = SimpleNamespace(id='abc', nickName='juan', rol='admin')
+    with app_module.app.app_context():
+        claims = decode_token(crear_token(usuario))
+
+    assert claims['sub'] == 'abc'
+    assert claims['nickName'] == 'juan'
+    assert claims['rol'] == 'admin'
+
+
+def test_user_lookup_usa_el_cache(app_client, auth_headers, monkeypatch):
+    import utils.mongo_helpers
+
+    llamadas = []
+
+    def fake_get_usuario_by_id(usuario_id):
+        llamadas.append(usuario_id)
+        return SimpleNamespace(id=usuario_id, seguidores=[])
+
+    monkeypatch.setattr(utils.mongo_helpers, 'get_usuario_by_id', fake_get_usuario_by_id)
+    monkeypatch.setattr('services.seguidores_service.version_seguidores', lambda usuario: None)
+    monkeypatch.setattr('services.seguidores_service.obtener_seguidores', lambda usuario: [])
+
+    for _ in range(3):
+        response = app_client.get('/api/usuarios/seguidores', headers=auth_headers)
+        assert response.status_code == 200
+
+    assert llamadas == ['user_1']
+
+
+def test_user_lookup_usuario_inexistente(app_client, auth_headers, monkeypatch):
+    monkeypatch.setattr('utils.mongo_helpers.get_usuario_by_id', lambda usuario_id: None)
+
+    response = app_client.get('/api/usuarios/seguidores', headers=auth_headers)
+
+    assert response.status_code == 401
+    assert response.get_json()['code'] == 'AUTH_ERROR'
+
+
+def test_actualizar_perfil_invalida_el_cache(app_client, app_module, usuario_headers):
+    app_client.patch('/api/usuarios/me', json={}, headers=usuario_headers)
+    cache = get_profile_cache(app_module.app)
+    assert len(cache) == 1
+
+    response = app_client.patch('/api/usuarios/me', json={'biografia': 'nueva'}, headers=usuario_headers)
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['biografia'] == 'nueva'
+    assert len(cache) == 0
+
+
+def test_invalidacion_llega_a_los_demas_procesos(app_module):
+    """Otro worker descarta el perfil en su próxima consulta de invalidaciones"""
+    from mongoengine.connection import get_db
+
+    get_db('default')[COLECCION_INVALIDACIONES].drop()
+    este, otro = ProfileCache(ttl=60), ProfileCache(ttl=60)
+    invalidaciones_otro = InvalidacionesCompartidas(intervalo=0)
+    for cache in (este, otro):
+        cache.set('u1', 'perfil viejo')
+        cache.set('u2', 'perfil')
+
+    with app_module.app.app_context():
+        app_module.app.extensions['profile_cache'] = este
+        from utils.auth import invalidar_perfil
+        invalidar_perfil('u1')
+
+    invalidaciones_otro.sondear(otro)
+
+    assert este.get('u1') is None
+    assert otro.get('u1') is None
+    assert otro.get('u2') == 'perfil'
+    # Una invalidación ya aplicada no se vuelve a aplicar en la consulta siguiente
+    otro.set('u1', 'perfil nuevo')
+    invalidaciones_otro.sondear(otro)
+    assert otro.get('u1') == 'perfil nuevo'
+
+
+def test_sondeo_respeta_el_intervalo_y_omite_cache_vacio(monkeypatch):
+    consultas = []
+    invalidaciones = InvalidacionesCompartidas(intervalo=10)
+    monkeypatch.setattr(invalidaciones, '_coleccion',
+                        lambda: SimpleNamespace(find=lambda *args: consultas.append(args) or []))
+    ahora = [100.0]
+    monkeypatch.setattr('utils.auth.time.monotonic', lambda: ahora[0])
+    cache = ProfileCache(ttl=60)
+
+    invalidaciones.sondear(cache)  # cache vacío: sin consulta
+    cache.set('u1', 'perfil')
+    ahora[0] += 5
+    invalidaciones.sondear(cache)  # antes del intervalo
+    ahora[0] += 6
+    invalidaciones.sondear(cache)
+
+    assert len(consultas) == 1
+
+
+@pytest.fixture
+def app_roles(monkeypatch):
+    consultas = []
+
+    def fake_get_usuario_by_id(usuario_id):
+        consultas.append(usuario_id)
+        return SimpleNamespace(id=usuario_id, rol='user')
+
+    monkeypatch.setattr('utils.mongo_helpers.get_usuario_by_id', fake_get_usuario_by_id)
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-jwt-secret-key-minimum-32-bytes-long-for-sha256'
+    init_auth(app, JWTManager(app))
+
+    @app.route('/admin')
+    @jwt_required()
+    @require_role('admin')
+    def admin():
+        return jsonify({'success': True})
+
+    return app, consultas
+
+
+def _get_admin(app, token):
+    return app.test_client().get('/admin', headers={'Authorization': f'Bearer {token}'})
+
+
+def test_require_role_usa_el_claim_del_token(app_roles):
+    app, consultas = app_roles
+    with app.app_context():
+        token_admin = crear_token(SimpleNamespace(id='u1', nickName='ana', rol='admin'))
+        token_user = crear_token(SimpleNamespace(id='u2', nickName='juan', rol='user'))
+
+    assert _get_admin(app, token_admin).status_code == 200
+    assert _get_admin(app, token_user).status_code == 403
+    # Solo el user lookup (una vez por usuario), nunca una consulta por el rol
+    assert consultas == ['u1', 'u2']
+
+
+def test_require_role_sin_claim_usa_el_perfil(app_roles):
+    app, _ = app_roles
+    with app.app_context():
+        token = create_access_token(identity='u1')
+
+    response = _get_admin(app, token)
+
+    assert response.status_code == 403
+    assert response.get_json()['code'] == 'FORBIDDEN'
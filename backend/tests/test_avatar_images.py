@@ -0,0 +1,109 @@
+"""
+Tests para el procesamiento de avatares (utils.avatar_images) y el upload
+"""
+
+import io
+
+import pytest
+
+import utils.avatar_images as avatar_images
+from utils.avatar_images import ImagenInvalida, original_de_variante, validar_imagen, variant_urls
+from utils.storage import LocalStorage
+
+PNG_FIRMA = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+STEM = 'a' * 32
+
+
+@pytest.fixture
+def sin_pillow(monkeypatch):
+    monkeypatch.setattr(avatar_images, 'Image', None)
+
+
+@pytest.fixture
+def storage(app_module, tmp_path, monkeypatch):
+    storage = LocalStorage(str(tmp_path / 'avatars'), str(tmp_path / 'tmp'))
+    monkeypatch.setitem(app_module.app.extensions, 'avatar_storage', storage)
+    return storage
+
+
+def test_validar_imagen_por_firma(sin_pillow):
+    stream = io.BytesIO(PNG_FIRMA)
+
+    assert validar_imagen(stream) == 'png'
+    assert stream.tell() == 0
+
+
+def test_validar_imagen_rechaza_contenido_que_no_es_imagen(sin_pillow):
+    with pytest.raises(ImagenInvalida):
+        validar_imagen(io.BytesIO(b'<?php echo "hola"; ?>'))
+
+
+def test_variant_urls(monkeypatch):
+    monkeypatch.setattr(avatar_images, 'Image', object())
+
+    urls = variant_urls(f'http://localhost:5000/uploads/avatars/{STEM}.png')
+
+    assert urls == {
+        str(size): f'http://localhost:5000/uploads/avatars/{STEM}_{size}.webp'
+        for size in (48, 128, 512)
+    }
+    assert variant_urls('https://ui-avatars.com/api/?name=juan') == {}
+    assert variant_urls('') == {}
+
+
+def test_original_de_variante(storage):
+    carpeta = storage.local_folder
+    with open(f'{carpeta}/{STEM}.jpg', 'wb') as f:
+        f.write(b'x')
+
+    assert original_de_variante(storage, f'{STEM}_128.webp') == f'{STEM}.jpg'
+    with open(f'{carpeta}/{STEM}_128.webp', 'wb') as f:
+        f.write(b'x')
+    assert original_de_variante(storage, f'{STEM}_128.webp') is None
+    assert original_de_variante(storage, f'{STEM}_99.webp') is None
+    assert original_de_variante(storage, f'{STEM}.jpg') is None
+
+
+def test_generar_variantes(storage, tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    Image.new('RGBA', (900, 600), (10, 20, 30, 255)).save(tmp_path / 'avatars' / f'{STEM}.png')
+
+    generadas = avatar_images.generar_variantes(storage, f'{STEM}.png', STEM)
+
+    assert set(generadas) == {48, 128, 512}
+    for size, nombre in generadas.items():
+        with Image.open(tmp_path / 'avatars' / nombre) as variante:
+            assert variante.format == 'WEBP'
+            assert variante.size == (size, size)
+    assert list((tmp_path / 'tmp').iterdir()) == []
+
+
+def test_upload_avatar_valida_contenido(app_client, usuario_headers, storage, tmp_path, sin_pillow):
+
+    invalido = app_client.post(
+        '/api/upload/avatar',
+        data={'file': (io.BytesIO(b'no soy una imagen'), 'foto.png')},
+        headers=usuario_headers,
+    )
+    valido = app_client.post(
+        '/api/upload/avatar',
+        data={'file': (io.BytesIO(PNG_FIRMA), 'foto.jpg')},
+        headers=usuario_headers,
+    )
+
+    assert invalido.status_code == 400
+    assert invalido.get_json()['code'] == 'INVALID_IMAGE'
+    assert valido.status_code == 200
+    # La extensión sale del contenido (PNG), no del nombre enviado
+    assert valido.get_json()['url'].endswith('.png')
+    assert [p.suffix for p in (tmp_path / 'avatars').iterdir()] == ['.png']
+
+
+def test_variante_pendiente_redirige_al_original(app_client, storage, tmp_path):
+    (tmp_path / 'avatars' / f'{STEM}.png').write_bytes(PNG_FIRMA)
+
+    response = app_client.get(f'/uploads/avatars/{STEM}_48.webp')
+
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith(f'/uploads/avatars/{STEM}.png')
+    assert response.headers['Cache-Control'] == 'no-store'
@@ -0,0 +1,103 @@
+"""
+Tests para la compresión de respuestas (utils.compression)
+"""
+
+import gzip
+import zlib
+
+import pytest
+from flask import Flask, Response, jsonify, send_file
+
+import utils.compression
+from utils.compression import init_compression
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setenv('COMPRESSION_MIN_SIZE', '500')
+    # Sin brotli para que el resultado no dependa de lo instalado
+    monkeypatch.setattr(utils.compression, 'brotli', None)
+    app = Flask(__name__)
+    avatar = tmp_path / 'avatar.png'
+    avatar.write_bytes(b'\x89PNG' + b'\x00' * 4000)
+
+    @app.route('/api/grande')
+    def grande():
+        return jsonify({'items': [{'texto': 'mensaje de prueba', 'n': i} for i in range(200)]})
+
+    @app.route('/api/chica')
+    def chica():
+        return jsonify({'ok': True})
+
+    @app.route('/api/stream')
+    def stream():
+        return Response((f'{{"n": {i}}}\n' for i in range(100)), mimetype='application/x-ndjson')
+
+    @app.route('/api/avatar')
+    def avatar_route():
+        return send_file(avatar, mimetype='image/png')
+
+    @app.route('/grande-fuera-de-api')
+    def fuera():
+        return grande()
+
+    init_compression(app)
+    return app
+
+
+def test_comprime_respuesta_grande(app):
+    response = app.test_client().get('/api/grande', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    body = gzip.decompress(response.get_data())
+    assert len(body) > len(response.get_data())
+    assert body.startswith(b'{')
+
+
+def test_no_comprime_debajo_del_umbral(app):
+    response = app.test_client().get('/api/chica', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.get_json() == {'ok': True}
+
+
+def test_sin_accept_encoding_no_comprime(app):
+    response = app.test_client().get('/api/grande')
+
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.get_json()['items']) == 200
+
+
+def test_no_comprime_imagenes_ni_fuera_de_api(app):
+    client = app.test_client()
+
+    avatar = client.get('/api/avatar', headers={'Accept-Encoding': 'gzip'})
+    fuera = client.get('/grande-fuera-de-api', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in avatar.headers
+    assert 'Content-Encoding' not in fuera.headers
+
+
+def test_streaming_comprime_por_chunks(app):
+    response = app.test_client().get('/api/stream', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Content-Length' not in response.headers
+    lineas = zlib.decompress(response.get_data(), 31).decode().splitlines()
+    assert len(lineas) == 100
+    assert lineas[-1] == '{"n": 99}'
+
+
+def test_etag_fuerte_pasa_a_debil(app):
+    @app.route('/api/con-etag')
+    def con_etag():
+        response = jsonify({'items': list(range(500))})
+        response.set_etag('abc')
+        return response
+
+    response = app.test_client().get('/api/con-etag', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == 'W/"abc"'
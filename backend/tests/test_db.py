@@ -0,0 +1,143 @@
+"""
+Tests para el enrutamiento de lecturas (db.get_read_db / db.pin_to_primary)
+"""
+
+import pytest
+from flask import Flask
+
+import db
+from utils.read_your_writes import HEADER, emitir_token, init_read_your_writes
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.options = None
+
+    def with_options(self, **kwargs):
+        derived = FakeDatabase()
+        derived.options = kwargs
+        return derived
+
+
+def _patch_get_db(monkeypatch):
+    primary = FakeDatabase()
+    monkeypatch.setattr("mongoengine.connection.get_db", lambda alias="default": primary)
+    return primary
+
+
+@pytest.fixture
+def app_rw():
+    """App mínima con read-your-writes: /escribir fija al usuario, /leer informa a dónde lee"""
+    app = Flask(__name__)
+    app.config["SECRET_KEY"] = "test-secret"
+    init_read_your_writes(app)
+
+    @app.route("/escribir/<usuario_id>")
+    def escribir(usuario_id):
+        db.pin_to_primary(usuario_id)
+        return "ok"
+
+    @app.route("/leer/<usuario_id>")
+    def leer(usuario_id):
+        primary = db.me_connection.get_db("default")
+        return "primary" if db.get_read_db("default", usuario_id=usuario_id) is primary else "secondary"
+
+    return app
+
+
+def test_get_read_db_sin_lecturas_en_secundarios(monkeypatch):
+    """Sin MONGODB_SECONDARY_READS se usa el mismo handle del primario"""
+    primary = _patch_get_db(monkeypatch)
+    monkeypatch.delenv("MONGODB_SECONDARY_READS", raising=False)
+
+    assert db.get_read_db("default") is primary
+
+
+def test_get_read_db_secondary_preferred_con_max_staleness(monkeypatch):
+    """Con lecturas en secundarios habilitadas se usa secondaryPreferred acotado"""
+    _patch_get_db(monkeypatch)
+    monkeypatch.setenv("MONGODB_SECONDARY_READS", "true")
+    monkeypatch.setenv("MONGODB_MAX_STALENESS_SECONDS", "120")
+
+    read_db = db.get_read_db("default", usuario_id="user_1")
+    read_preference = read_db.options["read_preference"]
+
+    assert read_preference.mongos_mode == "secondaryPreferred"
+    assert read_preference.max_staleness == 120
+
+
+def test_max_staleness_minimo_90(monkeypatch):
+    monkeypatch.setenv("MONGODB_MAX_STALENESS_SECONDS", "10")
+    assert db.max_staleness_seconds() == 90
+
+
+def test_pin_to_primary_read_your_writes(monkeypatch):
+    """Dentro de la request que escribió, el usuario lee del primario"""
+    primary = _patch_get_db(monkeypatch)
+    monkeypatch.setenv("MONGODB_SECONDARY_READS", "true")
+
+    with Flask(__name__).test_request_context():
+        db.pin_to_primary("user_1")
+
+        assert db.get_read_db("default", usuario_id="user_1") is primary
+        assert db.get_read_db("default", usuario_id="user_2") is not primary
+
+
+def test_pin_to_primary_sin_request_no_guarda_estado(monkeypatch):
+    _patch_get_db(monkeypatch)
+    monkeypatch.setenv("MONGODB_SECONDARY_READS", "true")
+
+    db.pin_to_primary("user_1")
+
+    assert db.request_pins() is None
+    assert not db._is_pinned_to_primary("user_1")
+
+
+def test_pin_viaja_con_el_cliente_entre_workers(monkeypatch, app_rw):
+    """La marca vuelve en X-Primary-Pin: la request siguiente lee del primario en cualquier worker"""
+    _patch_get_db(monkeypatch)
+    monkeypatch.setenv("MONGODB_SECONDARY_READS", "true")
+    client = app_rw.test_client()
+
+    escritura = client.get("/escribir/user_1")
+    token = escritura.headers[HEADER]
+
+    assert client.get("/leer/user_1").get_data(as_text=True) == "secondary"
+    assert client.get("/leer/user_1", headers={HEADER: token}).get_data(as_text=True) == "primary"
+    assert client.get("/leer/user_2", headers={HEADER: token}).get_data(as_text=True) == "secondary"
+    # Sin escrituras nuevas no se reenvía el token
+    assert HEADER not in client.get("/leer/user_1", headers={HEADER: token}).headers
+
+
+def test_pin_vencido_o_invalido_se_ignora(monkeypatch, app_rw):
+    _patch_get_db(monkeypatch)
+    monkeypatch.setenv("MONGODB_SECONDARY_READS", "true")
+    client = app_rw.test_client()
+
+    with app_rw.app_context():
+        vencido = emitir_token({"user_1": db.time.time() - 1})
+        # Más lejos que la ventana de staleness: no se acepta
+        eterno = emitir_token({"user_1": db.time.time() + 10 * db.max_staleness_seconds()})
+
+    for token in (vencido, eterno, "manipulado." + vencido):
+        assert client.get("/leer/user_1", headers={HEADER: token}).get_data(as_text=True) == "secondary"
+
+
+def test_compression_options_descarta_compresores_no_instalados(monkeypatch):
+    """Los compresores sin módulo instalado se ignoran en lugar de fallar al conectar"""
+    monkeypatch.setenv("MONGODB_COMPRESSORS", "zstd, zlib")
+    monkeypatch.setenv("MONGODB_ZLIB_COMPRESSION_LEVEL", "6")
+    monkeypatch.setattr(db, "available_compressors", lambda: ["zlib"])
+
+    assert db._compression_options() == {"compressors": "zlib", "zlibCompressionLevel": 6}
+
+
+def test_compression_options_compresor_desconocido(monkeypatch):
+    monkeypatch.setenv("MONGODB_COMPRESSORS", "lz4")
+    with pytest.raises(ValueError):
+        db._compression_options()
+
+
+def test_compression_options_sin_configurar(monkeypatch):
+    monkeypatch.delenv("MONGODB_COMPRESSORS", raising=False)
+    assert db._compression_options() == {}
@@ -0,0 +1,257 @@
+"""
+Tests para la eliminación de cuentas: DELETE /api/usuarios/me y el job
+jobs.eliminar_cuentas
+"""
+
+import pytest
+from mongoengine.connection import get_db
+
+import jobs.eliminar_cuentas as eliminar_cuentas
+from jobs.eliminar_cuentas import procesar_pendientes
+from services.cuentas_service import COLECCION_TAREAS
+from utils.storage import LocalStorage
+
+STEM = 'b' * 64
+
+
+@pytest.fixture(autouse=True)
+def hash_barato(monkeypatch):
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    monkeypatch.setattr('jobs.eliminar_cuentas.time.sleep', lambda segundos: None)
+    # Sin la espera por los perfiles cacheados en otros workers (test aparte)
+    monkeypatch.setattr('services.cuentas_service.espera_eliminacion', lambda: 0)
+    from utils.decorators import rate_limit_storage
+    rate_limit_storage.clear()
+    yield
+    get_db('default')[COLECCION_TAREAS].drop()
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'avatars'), str(tmp_path / 'tmp'))
+    for clave in (f'{STEM}.png', f'{STEM}_48.webp'):
+        archivo = tmp_path / 'subida'
+        archivo.write_bytes(b'imagen')
+        storage.put_file(clave, str(archivo))
+    return storage
+
+
+@pytest.fixture
+def datos(app_module):
+    """juan (a eliminar) con seguidores, menciones, mensajes y mensajes privados"""
+    from flask_jwt_extended import create_access_token
+    from models import Mencion, Mensaje, MensajePrivado, Usuario
+
+    def crear(nick, **kwargs):
+        usuario = Usuario(nickName=nick, nombre=nick, apellido='Test', mail=f'{nick}@example.com', **kwargs)
+        usuario.set_password('secreta')
+        usuario.save()
+        return usuario
+
+    juan = crear('juan', fotoUsuario=f'http://localhost/uploads/avatars/{STEM}.png')
+    maria = crear('maria', siguiendo=[juan])
+    carlos = crear('carlos', seguidores=[juan])
+    admin = crear('admin', rol='admin')
+
+    for i in range(3):
+        Mensaje(texto=f'Hola {i}', autor=juan, menciones=[Mencion(usuario=maria).save()]).save()
+    de_maria = Mensaje(texto='Hola @juan @carlos', autor=maria,
+                       menciones=[Mencion(usuario=juan).save(), Mencion(usuario=carlos).save()]).save()
+    for emisor, receptor in ((juan, maria), (maria, juan), (carlos, juan), (maria, carlos)):
+        MensajePrivado(texto='hola', emisor=emisor, receptor=receptor).save()
+
+    with app_module.app.app_context():
+        headers = {
+            usuario.nickName: {'Authorization': f'Bearer {create_access_token(identity=str(usuario.id))}'}
+            for usuario in (juan, maria, admin)
+        }
+    return {'juan': juan, 'maria': maria, 'carlos': carlos, 'de_maria': de_maria, 'headers': headers}
+
+
+def _eliminar(app_client, datos, password='secreta'):
+    return app_client.delete('/api/usuarios/me', json={'password': password}, headers=datos['headers']['juan'])
+
+
+def test_delete_me_borra_el_usuario_y_deja_la_tarea(app_client, datos):
+    incorrecta = _eliminar(app_client, datos, 'otra')
+    assert incorrecta.status_code == 401
+    assert get_db('default').usuarios.find_one({'_id': datos['juan'].id})
+
+    response = _eliminar(app_client, datos)
+
+    assert response.status_code == 202
+    assert response.get_json()['data']['estado'] == 'pendiente'
+    assert get_db('default').usuarios.find_one({'_id': datos['juan'].id}) is None
+    # El token ya no vale: el user lookup no encuentra al usuario
+    assert _eliminar(app_client, datos).status_code == 401
+    # Sus datos siguen hasta que corre el job
+    assert get_db('default').mensajes_privados.count_documents({}) == 4
+
+
+def test_job_borra_todo_en_lotes(app_client, datos, storage):
+    db = get_db('default')
+    _eliminar(app_client, datos)
+
+    assert procesar_pendientes(storage, lote=1) == 1
+
+    juan = datos['juan'].id
+    maria = db.usuarios.find_one({'_id': datos['maria'].id})
+    assert maria['siguiendo'] == []
+    # Los ETag de perfiles y seguidores se versionan por updatedAt
+    assert maria['updatedAt'] > datos['maria'].updatedAt
+    assert db.usuarios.find_one({'_id': datos['carlos'].id})['seguidores'] == []
+    assert db.mensajes.count_documents({'autor': juan}) == 0
+    assert db.menciones.count_documents({'usuario': juan}) == 0
+    # Las menciones de sus mensajes se borran; la de carlos en el mensaje de maria queda
+    assert db.menciones.count_documents({}) == 1
+    assert len(db.mensajes.find_one({'_id': datos['de_maria'].id})['menciones']) == 1
+    assert db.mensajes_privados.count_documents({}) == 1
+    assert not storage.exists(f'{STEM}.png')
+    assert not storage.exists(f'{STEM}_48.webp')
+
+    tarea = db[COLECCION_TAREAS].find_one({'_id': juan})
+    assert tarea['estado'] == 'completada'
+    assert tarea['borrados'] == {
+        'usuario': 0, 'seguidores': 2, 'menciones': 1, 'mensajes': 3, 'mensajes_privados': 3, 'avatar': 2
+    }
+    # Nada más para procesar
+    assert procesar_pendientes(storage) == 0
+
+
+def test_job_retoma_desde_el_paso_que_fallo(app_client, datos, storage, monkeypatch):
+    db = get_db('default')
+    _eliminar(app_client, datos)
+    original = eliminar_cuentas._paso_mensajes_privados
+
+    def falla(*args):
+        raise RuntimeError('conexión perdida')
+
+    pasos = tuple((nombre, falla if nombre == 'mensajes_privados' else funcion, por_lotes)
+                  for nombre, funcion, por_lotes in eliminar_cuentas.PASOS)
+    monkeypatch.setattr(eliminar_cuentas, 'PASOS', pasos)
+
+    assert procesar_pendientes(storage, lote=2) == 0
+    tarea = db[COLECCION_TAREAS].find_one({'_id': datos['juan'].id})
+    assert tarea['estado'] == 'error'
+    assert tarea['pasos_completos'] == ['usuario', 'seguidores', 'menciones', 'mensajes']
+    # El reintento espera a que venza el lease
+    assert procesar_pendientes(storage, lote=2) == 0
+
+    db[COLECCION_TAREAS].update_one({'_id': datos['juan'].id}, {'$set': {'lease': None}})
+    monkeypatch.setattr(eliminar_cuentas, 'PASOS', tuple(
+        (nombre, original if nombre == 'mensajes_privados' else funcion, por_lotes)
+        for nombre, funcion, por_lotes in pasos
+    ))
+    assert procesar_pendientes(storage, lote=2) == 1
+
+    tarea = db[COLECCION_TAREAS].find_one({'_id': datos['juan'].id})
+    assert tarea['estado'] == 'completada'
+    assert tarea['intentos'] == 2
+    assert tarea['borrados']['mensajes'] == 3
+    assert db.mensajes_privados.count_documents({}) == 1
+
+
+def test_job_espera_a_que_venzan_los_perfiles_cacheados(app_client, datos, storage, monkeypatch):
+    """Otro worker puede aceptar el token hasta PROFILE_CACHE_TTL: el job no empieza antes"""
+    from models import MensajePrivado
+
+    monkeypatch.setattr('services.cuentas_service.espera_eliminacion', lambda: 60)
+    _eliminar(app_client, datos)
+    # Escrito por un worker que todavía tenía el perfil en cache
+    MensajePrivado(texto='tarde', emisor=datos['juan'], receptor=datos['maria']).save()
+
+    assert procesar_pendientes(storage) == 0
+    get_db('default')[COLECCION_TAREAS].update_one({'_id': datos['juan'].id}, {'$set': {'lease': None}})
+    assert procesar_pendientes(storage) == 1
+    assert get_db('default').mensajes_privados.count_documents({'emisor': datos['juan'].id}) == 0
+
+
+def test_job_no_borra_un_avatar_compartido(app_client, datos, storage):
+    app_client.patch('/api/usuarios/me', json={'fotoUsuarioPortada': f'http://otro-host/uploads/avatars/{STEM}.png'},
+                     headers=datos['headers']['maria'])
+    assert get_db('default').usuarios.find_one({'_id': datos['maria'].id})['avatares'] == [STEM]
+    _eliminar(app_client, datos)
+
+    procesar_pendientes(storage)
+
+    assert storage.exists(f'{STEM}.png')
+
+
+def test_job_repone_un_avatar_que_empezo_a_usarse_durante_el_borrado(app_client, datos, storage, monkeypatch,
+                                                                    tmp_path):
+    """Otro usuario subió la misma imagen (dedup) y la guardó en su perfil entre el chequeo y el borrado"""
+    respuestas = iter([False, True])
+    monkeypatch.setattr(eliminar_cuentas, '_avatar_en_uso', lambda db, stem: next(respuestas))
+    _eliminar(app_client, datos)
+
+    procesar_pendientes(storage)
+
+    assert (tmp_path / 'avatars' / f'{STEM}.png').read_bytes() == b'imagen'
+    # Sin la copia temporal
+    assert list((tmp_path / 'tmp').iterdir()) == []
+
+
+def test_job_marca_fallida_la_tarea_que_agota_los_intentos(app_client, datos, storage, monkeypatch, caplog):
+    db = get_db('default')
+    _eliminar(app_client, datos)
+
+    def falla(*args):
+        raise RuntimeError('conexión perdida')
+
+    monkeypatch.setattr(eliminar_cuentas, 'PASOS', (('usuario', falla, False),))
+    for _ in range(eliminar_cuentas.MAX_INTENTOS):
+        db[COLECCION_TAREAS].update_one({'_id': datos['juan'].id}, {'$set': {'lease': None}})
+        assert procesar_pendientes(storage) == 0
+
+    tarea = db[COLECCION_TAREAS].find_one({'_id': datos['juan'].id})
+    assert tarea['estado'] == 'fallida'
+    assert tarea['lease'] is None
+    assert 'fallida' in caplog.text
+    response = app_client.get(f"/api/usuarios/{datos['juan'].id}/eliminacion", headers=datos['headers']['admin'])
+    assert response.get_json()['data']['estado'] == 'fallida'
+    assert response.get_json()['data']['intentos'] == eliminar_cuentas.MAX_INTENTOS
+
+
+def test_job_marca_fallida_la_tarea_abandonada_en_el_ultimo_intento(app_client, datos, storage, caplog):
+    """El proceso murió en el último intento: la tarea no queda en_curso para siempre"""
+    db = get_db('default')
+    _eliminar(app_client, datos)
+    db[COLECCION_TAREAS].update_one({'_id': datos['juan'].id}, {'$set': {
+        'estado': 'en_curso', 'intentos': eliminar_cuentas.MAX_INTENTOS, 'lease': None,
+    }})
+
+    assert procesar_pendientes(storage) == 0
+
+    assert db[COLECCION_TAREAS].find_one({'_id': datos['juan'].id})['estado'] == 'fallida'
+    assert 'se agotaron los intentos' in caplog.text
+
+
+def test_estado_eliminacion_solo_admin(app_client, datos):
+    _eliminar(app_client, datos)
+    juan_id = str(datos['juan'].id)
+
+    response = app_client.get(f'/api/usuarios/{juan_id}/eliminacion', headers=datos['headers']['admin'])
+    inexistente = app_client.get(f"/api/usuarios/{datos['maria'].id}/eliminacion",
+                                 headers=datos['headers']['admin'])
+
+    assert response.status_code == 200
+    assert response.get_json()['data']['usuarioId'] == juan_id
+    assert response.get_json()['data']['estado'] == 'pendiente'
+    assert inexistente.status_code == 404
+
+
+def test_init_db_completa_avatares_de_usuarios_anteriores(app_module):
+    from init_db import completar_avatares
+
+    usuarios = get_db('default').usuarios
+    viejo = usuarios.insert_one({
+        'nickName': 'viejo', 'mail': 'viejo@example.com',
+        'fotoUsuario': f'http://localhost/uploads/avatars/{STEM}.png', 'fotoUsuarioPortada': '',
+    }).inserted_id
+    externo = usuarios.insert_one({'nickName': 'externo', 'mail': 'externo@example.com',
+                                  'fotoUsuario': 'https://ui-avatars.com/api/?name=x'}).inserted_id
+
+    assert completar_avatares(batch_size=1) == 1
+    assert usuarios.find_one({'_id': viejo})['avatares'] == [STEM]
+    assert 'avatares' not in usuarios.find_one({'_id': externo})
+    assert completar_avatares() == 0
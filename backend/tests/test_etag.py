@@ -0,0 +1,177 @@
+"""
+Tests para los requests condicionales (ETag / If-None-Match)
+"""
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def usuarios(app_module):
+    from models import Usuario
+
+    creados = []
+    for nick in ("juanperez", "mariagarcia"):
+        usuario = Usuario(nickName=nick, nombre=nick, apellido="Test", mail=f"{nick}@example.com")
+        usuario.set_password("password123")
+        usuario.save()
+        creados.append(usuario)
+
+    juan, maria = creados
+    juan.seguidores = [maria]
+    juan.save()
+
+    with app_module.app.app_context():
+        headers = {
+            usuario.nickName: {"Authorization": f"Bearer {create_access_token(identity=str(usuario.id))}"}
+            for usuario in creados
+        }
+    return {"juan": juan, "maria": maria, "headers": headers}
+
+
+def _revalidar(app_client, path, headers):
+    primera = app_client.get(path, headers=headers)
+    assert primera.status_code == 200
+    etag = primera.headers["ETag"]
+    assert primera.headers["Cache-Control"] == "private, no-cache"
+    return etag, app_client.get(path, headers={**headers, "If-None-Match": etag})
+
+
+@pytest.mark.parametrize("path", [
+    "/api/mensajes-privados/conversaciones",
+    "/api/mensajes-privados/conversaciones?format=compact",
+    "/api/mensajes-privados/no-leidos",
+    "/api/usuarios/seguidores",
+])
+def test_sin_cambios_responde_304(app_client, usuarios, path):
+    etag, response = _revalidar(app_client, path, usuarios["headers"]["juanperez"])
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_etag_distinto_por_formato(app_client, usuarios):
+    headers = usuarios["headers"]["juanperez"]
+    normal = app_client.get("/api/mensajes-privados/conversaciones", headers=headers)
+    compacto = app_client.get("/api/mensajes-privados/conversaciones?format=compact", headers=headers)
+
+    assert normal.headers["ETag"] != compacto.headers["ETag"]
+
+
+def test_mensaje_nuevo_invalida_conversaciones_y_no_leidos(app_client, usuarios):
+    from models import MensajePrivado
+
+    headers = usuarios["headers"]["juanperez"]
+    etags = {
+        path: app_client.get(path, headers=headers).headers["ETag"]
+        for path in ("/api/mensajes-privados/conversaciones", "/api/mensajes-privados/no-leidos")
+    }
+
+    MensajePrivado(texto="hola", emisor=usuarios["maria"], receptor=usuarios["juan"]).save()
+
+    for path, etag in etags.items():
+        response = app_client.get(path, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+def test_lectura_invalida_conversaciones(app_client, usuarios):
+    from models import MensajePrivado
+
+    mensaje = MensajePrivado(texto="hola", emisor=usuarios["juan"], receptor=usuarios["maria"]).save()
+    path = "/api/mensajes-privados/conversaciones"
+    headers = usuarios["headers"]["juanperez"]
+    etag = app_client.get(path, headers=headers).headers["ETag"]
+
+    # María lee el mensaje: cambia ultimoMensaje.leido en el listado de Juan
+    app_client.put(f"/api/mensajes-privados/{mensaje.id}/leer", headers=usuarios["headers"]["mariagarcia"])
+
+    response = app_client.get(path, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+
+
+def test_perfil_de_seguidor_invalida_seguidores(app_client, usuarios):
+    path = "/api/usuarios/seguidores"
+    headers = usuarios["headers"]["juanperez"]
+    etag = app_client.get(path, headers=headers).headers["ETag"]
+
+    app_client.patch("/api/usuarios/me", json={"biografia": "nueva"}, headers=usuarios["headers"]["mariagarcia"])
+
+    response = app_client.get(path, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["data"][0]["biografia"] == "nueva"
+
+
+def test_perfil_de_participante_invalida_conversaciones(app_client, usuarios):
+    from models import MensajePrivado
+
+    MensajePrivado(texto="hola", emisor=usuarios["maria"], receptor=usuarios["juan"]).save()
+    path = "/api/mensajes-privados/conversaciones"
+    headers = usuarios["headers"]["juanperez"]
+    etag = app_client.get(path, headers=headers).headers["ETag"]
+
+    app_client.patch("/api/usuarios/me", json={"biografia": "nueva"}, headers=usuarios["headers"]["mariagarcia"])
+
+    response = app_client.get(path, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["data"][0]["usuario"]["biografia"] == "nueva"
+
+
+def test_borrar_mensaje_que_no_es_el_ultimo_invalida_conversaciones(app_client, usuarios):
+    """El último mensaje de otra conversación no cambia, pero sí el de la conversación borrada"""
+    from models import MensajePrivado, Usuario
+
+    carlos = Usuario(nickName="carloslopez", nombre="carlos", apellido="Test", mail="carlos@example.com")
+    carlos.set_password("password123")
+    carlos.save()
+    viejo = MensajePrivado(texto="viejo", emisor=usuarios["juan"], receptor=carlos).save()
+    MensajePrivado(texto="nuevo", emisor=usuarios["juan"], receptor=usuarios["maria"]).save()
+    path = "/api/mensajes-privados/conversaciones"
+    headers = usuarios["headers"]["juanperez"]
+    etag = app_client.get(path, headers=headers).headers["ETag"]
+
+    assert app_client.delete(f"/api/mensajes-privados/{viejo.id}", headers=headers).status_code == 200
+
+    response = app_client.get(path, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.get_json()["data"]) == 1
+
+
+def test_etag_es_por_usuario(app_client, usuarios):
+    path = "/api/mensajes-privados/no-leidos"
+    etag = app_client.get(path, headers=usuarios["headers"]["juanperez"]).headers["ETag"]
+
+    response = app_client.get(path, headers={**usuarios["headers"]["mariagarcia"], "If-None-Match": etag})
+
+    assert response.status_code == 200
+
+
+def test_cuenta_eliminada_invalida_conversaciones_y_seguidores(app_client, usuarios):
+    """Sus mensajes siguen hasta que corre el job, pero el listado ya no la muestra"""
+    from models import MensajePrivado
+    from utils.decorators import rate_limit_storage
+
+    from datetime import datetime, timedelta
+
+    from mongoengine.connection import get_db
+
+    MensajePrivado(texto="hola", emisor=usuarios["maria"], receptor=usuarios["juan"]).save()
+    # El perfil más reciente no es el que se borra: el mayor updatedAt no cambia
+    get_db("default").usuarios.update_one(
+        {"_id": usuarios["juan"].id}, {"$set": {"updatedAt": datetime.utcnow() + timedelta(days=1)}}
+    )
+    headers = usuarios["headers"]["juanperez"]
+    etags = {
+        path: app_client.get(path, headers=headers).headers["ETag"]
+        for path in ("/api/mensajes-privados/conversaciones", "/api/usuarios/seguidores")
+    }
+
+    rate_limit_storage.clear()
+    eliminada = app_client.delete("/api/usuarios/me", json={"password": "password123"},
+                                  headers=usuarios["headers"]["mariagarcia"])
+    assert eliminada.status_code == 202
+
+    for path, etag in etags.items():
+        response = app_client.get(path, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200, path
+        assert response.get_json()["data"] == []
@@ -0,0 +1,76 @@
+"""
+Tests para el proveedor JSON basado en orjson
+"""
+
+import json
+from datetime import date, datetime
+
+import pytest
+from bson import ObjectId
+from flask import Flask, jsonify
+
+from utils.json_provider import OrjsonProvider, json_fragment, orjson
+
+
+pytestmark = pytest.mark.skipif(orjson is None, reason="orjson no está instalado")
+
+
+@pytest.fixture
+def orjson_app():
+    app = Flask(__name__)
+    app.json = OrjsonProvider(app)
+    return app
+
+
+def test_jsonify_equivale_al_proveedor_por_defecto(orjson_app):
+    data = {'b': 1, 'a': {'texto': 'ñandú', 'lista': [1, 2]}, 'leido': None}
+
+    with orjson_app.app_context():
+        body = jsonify(data).get_data(as_text=True)
+
+    assert json.loads(body) == data
+    assert body.index('"a"') < body.index('"b"')  # claves ordenadas, como Flask
+
+
+def test_serializa_object_id_y_datetime(orjson_app):
+    oid = ObjectId()
+    fecha = datetime(2024, 5, 1, 12, 30)
+
+    with orjson_app.app_context():
+        data = json.loads(jsonify({'id': oid, 'fecha': fecha}).get_data())
+
+    assert data == {'id': str(oid), 'fecha': 'Wed, 01 May 2024 12:30:00 GMT'}
+
+
+def test_fechas_y_compact_como_el_proveedor_por_defecto(orjson_app):
+    """Misma salida byte a byte que DefaultJSONProvider para datos ASCII"""
+    data = {'fecha': datetime(2024, 5, 1, 12, 30), 'dia': date(2024, 5, 1), 'b': [1, 2], 'a': None}
+    por_defecto = Flask(__name__)
+
+    for compact, debug in ((None, False), (None, True), (False, False), (True, True)):
+        orjson_app.json.compact = por_defecto.json.compact = compact
+        orjson_app.debug = por_defecto.debug = debug
+        with orjson_app.app_context():
+            body = jsonify(data).get_data()
+        with por_defecto.app_context():
+            esperado = jsonify(data).get_data()
+
+        assert body == esperado, (compact, debug)
+
+
+def test_json_fragment_produce_la_misma_salida(orjson_app):
+    usuario = {'id': 'abc', 'nickName': 'juanperez'}
+
+    with orjson_app.app_context():
+        fragment = json_fragment(usuario)
+        body = jsonify({'emisor': fragment, 'receptor': fragment}).get_data()
+
+    assert json.loads(body) == {'emisor': usuario, 'receptor': usuario}
+
+
+def test_json_fragment_sin_orjson_devuelve_el_dict():
+    usuario = {'id': 'abc'}
+    assert json_fragment(usuario) is usuario  # fuera de una app
+
+    with Flask(__name__).app_context():
+        assert json_fragment(usuario) is usuario  # proveedor por defecto
@@ -0,0 +1,88 @@
+"""
+Tests para la configuración de logging estructurado
+"""
+
+import io
+import json
+import logging
+import os
+
+import pytest
+
+from utils.logging_config import JsonFormatter, SamplingFilter, configure_logging, shutdown_logging
+
+
+def _record(level=logging.INFO, msg="hola %s", args=("mundo",), **extra):
+    record = logging.LogRecord("test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_incluye_campos_extra():
+    linea = JsonFormatter().format(_record(usuario_id="abc"))
+    payload = json.loads(linea)
+
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "test"
+    assert payload["msg"] == "hola mundo"
+    assert payload["usuario_id"] == "abc"
+
+
+def test_sampling_filter_limita_info_pero_no_warning():
+    filtro = SamplingFilter(burst=3, rate=0)
+
+    info = [filtro.filter(_record()) for _ in range(10)]
+    warnings = [filtro.filter(_record(level=logging.WARNING)) for _ in range(10)]
+
+    assert sum(info) == 3
+    assert all(warnings)
+
+
+def test_configure_logging_escribe_json_por_la_cola():
+    stream = io.StringIO()
+    configure_logging(level="INFO", fmt="json", stream=stream)
+    logger = logging.getLogger("tests.logging")
+    try:
+        logger.debug("descartado")
+        logger.info("enviado", extra={"mensaje_id": "1"})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("fallo")
+    finally:
+        shutdown_logging()
+
+    lineas = [json.loads(linea) for linea in stream.getvalue().splitlines()]
+    assert [linea["msg"] for linea in lineas] == ["enviado", "fallo"]
+    assert lineas[0]["mensaje_id"] == "1"
+    assert "ValueError: boom" in lineas[1]["exc_info"]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requiere os.fork")
+def test_hijo_de_un_fork_escribe_sus_registros(tmp_path):
+    """Como un worker de gunicorn con preload_app: el listener se configuró en el padre"""
+    salida = tmp_path / "salida.log"
+    stream = open(salida, "w")
+    configure_logging(level="INFO", fmt="json", stream=stream)
+    logger = logging.getLogger("tests.logging")
+    try:
+        pid = os.fork()
+        if pid == 0:
+            codigo = 1
+            try:
+                logger.warning("desde el hijo", extra={"pid": os.getpid()})
+                shutdown_logging()
+                codigo = 0
+            finally:
+                os._exit(codigo)
+        _, estado = os.waitpid(pid, 0)
+        logger.info("desde el padre")
+    finally:
+        shutdown_logging()
+        stream.close()
+
+    assert os.WEXITSTATUS(estado) == 0
+    lineas = [json.loads(linea) for linea in salida.read_text().splitlines()]
+    assert [(linea["msg"], linea["pid"] if "pid" in linea else None) for linea in lineas] == [
+        ("desde el hijo", pid), ("desde el padre", None)
+    ]
@@ -0,0 +1,102 @@
+"""
+Tests para GET /api/logs (consulta y export de logs_db, solo admin)
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from mongoengine.connection import get_db
+
+
+@pytest.fixture
+def logs(app_module):
+    """25 logs, uno por minuto; cada 5 un ERROR de ana, el resto INFO"""
+    coleccion = get_db('logs').logs
+    coleccion.drop()
+    inicio = datetime(2026, 1, 1, 10, 0, 0)
+    coleccion.insert_many([{
+        'level': 'ERROR' if i % 5 == 0 else 'INFO',
+        'message': f'evento {i}',
+        'timestamp': inicio + timedelta(minutes=i),
+        'user_id': 'ana' if i % 5 == 0 else 'juan',
+        'action': 'send_private_message',
+        'metadata': {'i': i},
+    } for i in range(25)])
+    yield coleccion
+    coleccion.drop()
+
+
+@pytest.fixture
+def admin_headers(app_module):
+    from models import Usuario
+    from utils.auth import crear_token
+
+    admin = Usuario(nickName='admin', nombre='Admin', apellido='Test', mail='admin@example.com',
+                    contraseña='x', rol='admin')
+    admin.save()
+    with app_module.app.app_context():
+        return {'Authorization': f'Bearer {crear_token(admin)}'}
+
+
+def _get(app_client, headers, **params):
+    return app_client.get('/api/logs', query_string=params, headers=headers)
+
+
+def test_paginacion_por_cursor_recorre_todo_sin_repetir(app_client, logs, admin_headers):
+    vistos = []
+    cursor = None
+    while True:
+        params = {'limit': 10}
+        if cursor:
+            params['cursor'] = cursor
+        data = _get(app_client, admin_headers, **params).get_json()['data']
+        vistos.extend(log['metadata']['i'] for log in data['logs'])
+        cursor = data['nextCursor']
+        if cursor is None:
+            break
+
+    assert vistos == list(range(24, -1, -1))
+
+
+def test_paginacion_con_empates_de_timestamp(app_client, logs, admin_headers):
+    logs.update_many({}, {'$set': {'timestamp': datetime(2026, 1, 1)}})
+
+    primera = _get(app_client, admin_headers, limit=20).get_json()['data']
+    segunda = _get(app_client, admin_headers, limit=20, cursor=primera['nextCursor']).get_json()['data']
+
+    ids = [log['id'] for log in primera['logs'] + segunda['logs']]
+    assert len(ids) == len(set(ids)) == 25
+    assert segunda['nextCursor'] is None
+
+
+def test_filtros(app_client, logs, admin_headers):
+    errores = _get(app_client, admin_headers, level='error').get_json()['data']['logs']
+    de_juan = _get(app_client, admin_headers, user_id='juan', action='send_private_message',
+                   desde='2026-01-01T10:10:00Z', hasta='2026-01-01T10:15:00Z').get_json()['data']['logs']
+
+    assert [log['metadata']['i'] for log in errores] == [20, 15, 10, 5, 0]
+    assert [log['metadata']['i'] for log in de_juan] == [14, 13, 12, 11]
+
+
+def test_parametros_invalidos(app_client, logs, admin_headers):
+    for params in ({'level': 'TRACE'}, {'cursor': 'no-es-un-cursor'}, {'desde': 'ayer'}, {'limit': 0}):
+        response = _get(app_client, admin_headers, **params)
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 'VALIDATION_ERROR'
+
+
+def test_solo_admin(app_client, logs, usuario_headers):
+    assert _get(app_client, usuario_headers).status_code == 403
+
+
+def test_export_ndjson_en_streaming(app_client, logs, admin_headers):
+    response = _get(app_client, admin_headers, format='ndjson', level='INFO')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.is_streamed
+    lineas = [json.loads(linea) for linea in response.get_data(as_text=True).splitlines()]
+    assert len(lineas) == 20
+    assert lineas[0]['metadata']['i'] == 24
+    assert all(linea['level'] == 'INFO' for linea in lineas)
@@ -229,7 +229,7 @@ def test_marcar_como_leido(monkeypatch):
     
     resultado = MensajePrivadoRepository.marcar_como_leido(mensaje_id, usuario_id)
     
-    assert resultado is True
+    assert resultado == mensaje_doc['emisor']
 
 
 def test_contar_no_leidos(monkeypatch):
@@ -90,7 +90,7 @@ def test_listar_conversaciones(app_client, auth_headers, monkeypatch):
             return otro_usuario
         return None
 
-    def fake_listar_conversaciones(usuario_id):
+    def fake_listar_conversaciones(usuario_id, compact=False):
         return [{
             'usuario': otro_usuario.to_dict(),
             'ultimoMensaje': mensaje.to_dict(),
@@ -129,7 +129,7 @@ def test_obtener_conversacion(app_client, auth_headers, monkeypatch):
             return otro_usuario
         return None
 
-    def fake_obtener_conversacion(usuario_actual_id, otro_usuario_id, limit, offset):
+    def fake_obtener_conversacion(usuario_actual_id, otro_usuario_id, limit, offset, compact=False):
         return {
             'conversacion': [mensaje.to_dict()],
             'total': 1,
@@ -150,6 +150,34 @@ def test_obtener_conversacion(app_client, auth_headers, monkeypatch):
     assert payload["data"]["conversacion"][0]["texto"] == "hola"
 
 
+def test_obtener_conversacion_formato_compacto(app_client, auth_headers, monkeypatch):
+    import utils.mongo_helpers
+    import services.mensajes_privados_service as mensajes_service
+
+    usuarios = {"user_1": FakeUsuario("user_1", "juan"), "user_2": FakeUsuario("user_2", "maria")}
+    recibido = {}
+
+    def fake_obtener_conversacion(usuario_actual_id, otro_usuario_id, limit, offset, compact=False):
+        recibido['compact'] = compact
+        return {
+            'conversacion': [],
+            'total': 0,
+            'limit': limit,
+            'offset': offset,
+            'hasMore': False,
+            'usuarios': {'user_2': usuarios['user_2'].to_dict()}
+        }
+
+    monkeypatch.setattr(utils.mongo_helpers, "get_usuario_by_id", usuarios.get)
+    monkeypatch.setattr(mensajes_service, "obtener_conversacion", fake_obtener_conversacion)
+
+    response = app_client.get("/api/mensajes-privados/conversacion/user_2?format=compact", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert recibido['compact'] is True
+    assert response.get_json()["data"]["usuarios"]["user_2"]["nickName"] == "maria"
+
+
 def test_crear_mensaje_privado(app_client, auth_headers, monkeypatch):
     import routes.mensajes_privados as mensajes_privados
     import utils.mongo_helpers
@@ -486,3 +514,186 @@ def test_marcar_como_leido_mensaje_no_encontrado(app_client, auth_headers, monke
     assert payload["success"] is False
     assert "no encontrado" in payload["error"].lower() or "no tienes permiso" in payload["error"].lower()
 
+
+
+def _conversacion_real(app_module, n_mensajes):
+    """Dos usuarios guardados y n mensajes de maria a juan (uno por minuto)"""
+    from datetime import timedelta
+    from flask_jwt_extended import create_access_token
+    from mongoengine.connection import get_db
+    from models import Usuario
+
+    juan = Usuario(nickName="juan", nombre="Juan", apellido="Test", mail="juan@example.com", contraseña="x")
+    maria = Usuario(nickName="maria", nombre="Maria", apellido="Test", mail="maria@example.com", contraseña="x")
+    juan.save()
+    maria.save()
+    inicio = datetime(2026, 1, 1, 10, 0, 0)
+    docs = [{
+        "texto": f"Mensaje {i}",
+        "emisor": maria.id,
+        "receptor": juan.id,
+        "fechaDeCreado": inicio + timedelta(minutes=i),
+        "leido": None,
+    } for i in range(n_mensajes)]
+    ids = get_db("default").mensajes_privados.insert_many(docs).inserted_ids
+    with app_module.app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(juan.id))}"}
+    return juan, maria, ids, headers
+
+
+def test_marcar_leidos_por_ids(app_client, app_module):
+    juan, maria, ids, headers = _conversacion_real(app_module, 5)
+
+    response = app_client.post("/api/mensajes-privados/leer",
+                               json={"ids": [str(i) for i in ids[:3]]}, headers=headers)
+
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"actualizados": 3, "noLeidos": 2}
+
+
+def test_marcar_leidos_hasta_una_marca(app_client, app_module):
+    juan, maria, ids, headers = _conversacion_real(app_module, 5)
+
+    por_id = app_client.post("/api/mensajes-privados/leer", json={
+        "conversaciones": [{"usuario_id": str(maria.id), "hasta": str(ids[1])}]
+    }, headers=headers)
+    por_fecha = app_client.post("/api/mensajes-privados/leer", json={
+        "conversaciones": [{"usuario_id": str(maria.id), "hasta_fecha": "2026-01-01T10:03:00Z"}]
+    }, headers=headers)
+
+    assert por_id.get_json()["data"] == {"actualizados": 2, "noLeidos": 3}
+    assert por_fecha.get_json()["data"] == {"actualizados": 2, "noLeidos": 1}
+
+
+def test_marcar_leidos_ignora_mensajes_ajenos(app_client, app_module):
+    from flask_jwt_extended import create_access_token
+
+    juan, maria, ids, _ = _conversacion_real(app_module, 2)
+    with app_module.app.app_context():
+        headers_maria = {"Authorization": f"Bearer {create_access_token(identity=str(maria.id))}"}
+
+    response = app_client.post("/api/mensajes-privados/leer",
+                               json={"ids": [str(i) for i in ids]}, headers=headers_maria)
+
+    assert response.get_json()["data"] == {"actualizados": 0, "noLeidos": 0}
+
+
+def test_marcar_leidos_datos_invalidos(app_client, app_module, assert_max_queries):
+    juan, maria, ids, headers = _conversacion_real(app_module, 1)
+
+    for body in ({}, {"ids": ["no-es-un-id"]}, {"conversaciones": [{"usuario_id": str(maria.id)}]},
+                 {"ids": [str(ids[0])] * 1001}):
+        with assert_max_queries(1):  # solo el user lookup
+            response = app_client.post("/api/mensajes-privados/leer", json=body, headers=headers)
+        assert response.status_code == 400
+        assert response.get_json()["code"] == "VALIDATION_ERROR"
+
+
+def _admin_y_receptores(app_module, n_receptores):
+    """Un admin guardado (token con claim de rol) y n usuarios receptores"""
+    from models import Usuario
+    from utils.auth import crear_token
+
+    admin = Usuario(nickName="admin", nombre="Admin", apellido="Test", mail="admin@example.com",
+                    contraseña="x", rol="admin")
+    admin.save()
+    receptores = []
+    for i in range(n_receptores):
+        receptor = Usuario(nickName=f"user{i}", nombre="User", apellido="Test", mail=f"user{i}@example.com",
+                           contraseña="x")
+        receptor.save()
+        receptores.append(receptor)
+    with app_module.app.app_context():
+        headers = {"Authorization": f"Bearer {crear_token(admin)}"}
+    return admin, receptores, headers
+
+
+def test_envio_masivo(app_client, app_module):
+    from bson import ObjectId
+    from models import MensajePrivado
+    from models.log import Log
+    from utils.decorators import rate_limit_storage
+
+    rate_limit_storage.clear()
+    admin, receptores, headers = _admin_y_receptores(app_module, 3)
+    inexistente = str(ObjectId())
+    ids = [str(r.id) for r in receptores]
+
+    response = app_client.post("/api/mensajes-privados/masivo", json={
+        # Repetidos, el propio admin y un ID inexistente no generan mensajes
+        "receptor_ids": ids + [ids[0], str(admin.id), inexistente],
+        "texto": "  Mantenimiento el lunes  ",
+    }, headers=headers)
+
+    assert response.status_code == 201
+    data = response.get_json()["data"]
+    assert data["enviados"] == 3
+    assert data["inexistentes"] == [inexistente]
+    assert data["fallidos"] == []
+    mensajes = MensajePrivado.objects(emisor=admin.id)
+    assert sorted(str(m.receptor.id) for m in mensajes) == sorted(ids)
+    assert {m.texto for m in mensajes} == {"Mantenimiento el lunes"}
+    assert all(m.leido is None for m in mensajes)
+
+    logs = Log.objects(action="send_private_message_bulk")
+    assert logs.count() == 1
+    assert logs.first().metadata["enviados"] == 3
+
+
+def test_envio_masivo_solo_admin(app_client, usuario_headers):
+    response = app_client.post("/api/mensajes-privados/masivo", json={
+        "receptor_ids": ["507f1f77bcf86cd799439011"], "texto": "hola"
+    }, headers=usuario_headers)
+
+    assert response.status_code == 403
+    assert response.get_json()["code"] == "FORBIDDEN"
+
+
+def test_envio_masivo_datos_invalidos(app_client, app_module):
+    from utils.decorators import rate_limit_storage
+
+    rate_limit_storage.clear()
+    _, receptores, headers = _admin_y_receptores(app_module, 1)
+
+    for body in (
+        {"receptor_ids": [], "texto": "hola"},
+        {"receptor_ids": "no-es-lista", "texto": "hola"},
+        {"receptor_ids": ["no-es-un-id"], "texto": "hola"},
+        {"receptor_ids": [str(receptores[0].id)], "texto": "   "},
+    ):
+        response = app_client.post("/api/mensajes-privados/masivo", json=body, headers=headers)
+        assert response.status_code == 400
+        assert response.get_json()["code"] == "VALIDATION_ERROR"
+
+
+def test_eliminar_mensaje_es_borrado_logico(app_client, app_module):
+    from flask_jwt_extended import create_access_token
+    from mongoengine.connection import get_db
+
+    juan, maria, ids, headers = _conversacion_real(app_module, 3)
+    with app_module.app.app_context():
+        headers_maria = {"Authorization": f"Bearer {create_access_token(identity=str(maria.id))}"}
+
+    response = app_client.delete(f"/api/mensajes-privados/{ids[0]}", headers=headers_maria)
+
+    assert response.status_code == 200
+    # El documento sigue hasta la purga, pero ninguna lectura lo ve
+    assert get_db("default").mensajes_privados.find_one({"_id": ids[0]})["eliminado"] is not None
+    assert app_client.get("/api/mensajes-privados/no-leidos", headers=headers).get_json()["data"]["noLeidos"] == 2
+    conversacion = app_client.get(f"/api/mensajes-privados/conversacion/{maria.id}", headers=headers)
+    assert [m["texto"] for m in conversacion.get_json()["data"]["conversacion"]] == ["Mensaje 1", "Mensaje 2"]
+    # Eliminar de nuevo: ya no existe
+    assert app_client.delete(f"/api/mensajes-privados/{ids[0]}", headers=headers_maria).status_code == 404
+
+
+def test_eliminar_mensaje_ajeno(app_client, app_module):
+    from bson import ObjectId
+
+    juan, maria, ids, headers = _conversacion_real(app_module, 1)
+
+    ajeno = app_client.delete(f"/api/mensajes-privados/{ids[0]}", headers=headers)
+    inexistente = app_client.delete(f"/api/mensajes-privados/{ObjectId()}", headers=headers)
+
+    assert ajeno.status_code == 403
+    assert ajeno.get_json()["code"] == "FORBIDDEN"
+    assert inexistente.status_code == 404
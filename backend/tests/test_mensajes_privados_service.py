@@ -263,27 +263,119 @@ def test_listar_conversaciones(monkeypatch):
             return FakeUsuario(usuario_oid, "juan")
         return None
     
-    def fake_contar_no_leidos(emisor_id, receptor_id):
-        # Comparar como strings
-        emisor_id_str = str(emisor_id)
-        receptor_id_str = str(receptor_id)
-        if (emisor_id_str == str(otro_usuario_oid1) and receptor_id_str == str(usuario_oid)) or \
-           (emisor_id_str == str(otro_usuario_oid2) and receptor_id_str == str(usuario_oid)):
-            return 0
-        return 0
+    def fake_get_usuarios_by_ids(usuario_ids):
+        # Una sola búsqueda con todos los otros usuarios
+        buscados.append(sorted(usuario_ids))
+        return {str(uid): fake_get_usuario_by_id(uid) for uid in usuario_ids}
     
+    def fake_contar_no_leidos_por_emisor(receptor_id):
+        assert str(receptor_id) == str(usuario_oid)
+        return {str(otro_usuario_oid1): 3}
+    
+    buscados = []
     monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.gets_mensaje_privados", 
                         staticmethod(fake_gets_mensaje_privados))
     monkeypatch.setattr("services.mensajes_privados_service.get_usuario_by_id", fake_get_usuario_by_id)
     monkeypatch.setattr("utils.mongo_helpers.get_usuario_by_id", fake_get_usuario_by_id)
-    monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.contar_no_leidos", 
-                        staticmethod(fake_contar_no_leidos))
+    monkeypatch.setattr("services.mensajes_privados_service.get_usuarios_by_ids", fake_get_usuarios_by_ids)
+    monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.contar_no_leidos_por_emisor", 
+                        staticmethod(fake_contar_no_leidos_por_emisor))
     
     conversaciones = listar_conversaciones(usuario_id)
     
     assert len(conversaciones) == 2
-    assert conversaciones[0]['usuario']['nickName'] in ['maria', 'carlos']
-    assert conversaciones[1]['usuario']['nickName'] in ['maria', 'carlos']
+    assert buscados == [sorted([str(otro_usuario_oid1), str(otro_usuario_oid2)])]
+    no_leidos = {c['usuario']['nickName']: c['mensajesNoLeidos'] for c in conversaciones}
+    assert no_leidos == {'maria': 3, 'carlos': 0}
+
+
+def test_obtener_conversacion_compact(monkeypatch):
+    """Test que verifica que el formato compacto referencia a los usuarios por ID"""
+    from bson import ObjectId
+    actual_oid, otro_oid = ObjectId(), ObjectId()
+    usuarios = {
+        str(actual_oid): FakeUsuario(actual_oid, "juan"),
+        str(otro_oid): FakeUsuario(otro_oid, "maria"),
+    }
+    mensajes = [
+        FakeMensajePrivado("Hola", actual_oid, otro_oid),
+        FakeMensajePrivado("Hola de vuelta", otro_oid, actual_oid),
+    ]
+    
+    monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.gets_mensaje_privado", 
+                        staticmethod(lambda *args: (mensajes, 2)))
+    monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.marcar_como_leido_por_receptor", 
+                        staticmethod(lambda emisor_id, receptor_id: None))
+    monkeypatch.setattr("services.mensajes_privados_service.get_usuario_by_id",
+                        lambda usuario_id: usuarios.get(str(usuario_id)))
+    
+    resultado = obtener_conversacion(str(actual_oid), str(otro_oid), limit=50, offset=0, compact=True)
+    
+    assert resultado['total'] == 2
+    assert set(resultado['usuarios']) == {str(actual_oid), str(otro_oid)}
+    assert resultado['usuarios'][str(otro_oid)]['nickName'] == "maria"
+    assert resultado['conversacion'][0]['emisor'] == str(actual_oid)
+    assert resultado['conversacion'][0]['receptor'] == str(otro_oid)
+    assert resultado['conversacion'][1]['emisor'] == str(otro_oid)
+
+
+def test_listar_conversaciones_compact(monkeypatch):
+    """Test que verifica listar conversaciones en formato compacto"""
+    from bson import ObjectId
+    usuario_oid = ObjectId()
+    otro_usuario_oid = ObjectId()
+    usuarios = {
+        str(usuario_oid): FakeUsuario(usuario_oid, "juan"),
+        str(otro_usuario_oid): FakeUsuario(otro_usuario_oid, "maria"),
+    }
+    mensajes = [FakeMensajePrivado("Hola", FakeUsuario(usuario_oid), FakeUsuario(otro_usuario_oid))]
+    
+    monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.gets_mensaje_privados", 
+                        staticmethod(lambda usuario_id: mensajes))
+    monkeypatch.setattr("services.mensajes_privados_service.get_usuario_by_id",
+                        lambda usuario_id: usuarios.get(str(usuario_id)))
+    monkeypatch.setattr("services.mensajes_privados_service.get_usuarios_by_ids",
+                        lambda usuario_ids: {str(uid): usuarios[str(uid)] for uid in usuario_ids})
+    monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.contar_no_leidos_por_emisor", 
+                        staticmethod(lambda receptor_id: {}))
+    
+    resultado = listar_conversaciones(str(usuario_oid), compact=True)
+    
+    assert set(resultado['usuarios']) == {str(usuario_oid), str(otro_usuario_oid)}
+    assert len(resultado['conversaciones']) == 1
+    conversacion = resultado['conversaciones'][0]
+    assert conversacion['usuario'] == str(otro_usuario_oid)
+    assert conversacion['ultimoMensaje']['emisor'] == str(usuario_oid)
+    assert conversacion['ultimoMensaje']['receptor'] == str(otro_usuario_oid)
+
+
+def test_listar_conversaciones_compact_fecha_invalida(monkeypatch):
+    """Si el mensaje no se puede convertir normalmente, el fallback sigue referenciando por ID"""
+    from bson import ObjectId
+    usuario_oid = ObjectId()
+    otro_usuario_oid = ObjectId()
+    usuarios = {
+        str(usuario_oid): FakeUsuario(usuario_oid, "juan"),
+        str(otro_usuario_oid): FakeUsuario(otro_usuario_oid, "maria"),
+    }
+    mensaje = FakeMensajePrivado("Hola", FakeUsuario(otro_usuario_oid), FakeUsuario(usuario_oid))
+    mensaje.fechaDeCreado = "2026-01-01"  # sin isoformat: falla el camino normal
+    
+    monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.gets_mensaje_privados", 
+                        staticmethod(lambda usuario_id: [mensaje]))
+    monkeypatch.setattr("services.mensajes_privados_service.get_usuario_by_id",
+                        lambda usuario_id: usuarios.get(str(usuario_id)))
+    monkeypatch.setattr("services.mensajes_privados_service.get_usuarios_by_ids",
+                        lambda usuario_ids: {str(uid): usuarios[str(uid)] for uid in usuario_ids})
+    monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.contar_no_leidos_por_emisor", 
+                        staticmethod(lambda receptor_id: {str(otro_usuario_oid): 1}))
+    
+    resultado = listar_conversaciones(str(usuario_oid), compact=True)
+    
+    ultimo = resultado['conversaciones'][0]['ultimoMensaje']
+    assert ultimo['emisor'] == str(otro_usuario_oid)
+    assert ultimo['receptor'] == str(usuario_oid)
+    assert ultimo['fechaDeCreado'] == "2026-01-01"
 
 
 def test_marcar_mensaje_como_leido(monkeypatch):
@@ -291,15 +383,22 @@ def test_marcar_mensaje_como_leido(monkeypatch):
     mensaje_id = "msg_1"
     usuario_id = "user_2"
     
+    emisor = "user_1"
+    invalidados = []
+    
     def fake_marcar_como_leido(mensaje_id, usuario_id):
-        return True
+        return emisor
     
     monkeypatch.setattr("repositories.mensaje_privado_repository.MensajePrivadoRepository.marcar_como_leido", 
                         staticmethod(fake_marcar_como_leido))
+    monkeypatch.setattr("repositories.usuario_repository.UsuarioRepository.incrementar_version_conversaciones",
+                        staticmethod(invalidados.append))
     
     resultado = marcar_mensaje_como_leido(mensaje_id, usuario_id)
     
     assert resultado is True
+    # El listado del receptor y el del emisor cambian de versión
+    assert invalidados == [[usuario_id, emisor]]
 
 
 def test_contar_mensajes_no_leidos(monkeypatch):
@@ -0,0 +1,61 @@
+"""
+Tests para el endpoint /metrics y la instrumentación de rutas
+"""
+
+from types import SimpleNamespace
+
+from utils.mongo_monitoring import CommandMetricsListener, command_collection
+
+
+def test_metrics_endpoint_expone_latencia_por_ruta(app_client):
+    app_client.get("/health")
+
+    response = app_client.get("/metrics")
+
+    assert response.status_code == 200
+    body = response.get_data(as_text=True)
+    assert "http_request_duration_seconds" in body
+    assert 'route="/health"' in body
+    assert "http_response_size_bytes" in body
+
+
+def test_metrics_cuenta_rechazos_por_rate_limit(app_client, usuario_headers):
+    import routes.mensajes_privados as mensajes_privados
+    from utils.decorators import rate_limit_storage
+    from utils.metrics import RATE_LIMIT_REJECTIONS_TOTAL
+
+    rate_limit_storage.clear()
+    counter = RATE_LIMIT_REJECTIONS_TOTAL.labels(endpoint="mensajes_privados.crear_mensaje_privado_route")
+    antes = counter._value.get()
+
+    for _ in range(11):
+        response = app_client.post("/api/mensajes-privados", json={}, headers=usuario_headers)
+
+    assert response.status_code == 429
+    assert counter._value.get() == antes + 1
+    rate_limit_storage.clear()
+
+
+def test_command_collection():
+    assert command_collection("find", {"find": "usuarios", "filter": {}}) == "usuarios"
+    assert command_collection("getMore", {"getMore": 123, "collection": "mensajes"}) == "mensajes"
+    assert command_collection("ping", {"ping": 1}) == "-"
+
+
+def test_command_listener_cuenta_por_coleccion():
+    from utils.metrics import MONGO_COMMANDS_TOTAL
+
+    listener = CommandMetricsListener("test")
+    counter = MONGO_COMMANDS_TOTAL.labels(alias="test", command="find", collection="usuarios", status="ok")
+    antes = counter._value.get()
+
+    listener.started(SimpleNamespace(
+        connection_id=("localhost", 27017), request_id=1,
+        command_name="find", command={"find": "usuarios"},
+    ))
+    listener.succeeded(SimpleNamespace(
+        connection_id=("localhost", 27017), request_id=1,
+        command_name="find", duration_micros=1500,
+    ))
+
+    assert counter._value.get() == antes + 1
@@ -0,0 +1,41 @@
+"""
+Tests para el listener del pool de conexiones de MongoDB
+"""
+
+from types import SimpleNamespace
+
+from utils.mongo_monitoring import PoolMetricsListener
+
+
+def test_pool_listener_cuenta_conexiones_en_uso():
+    listener = PoolMetricsListener("test")
+    event = SimpleNamespace(address=("localhost", 27017), connection_id=1)
+
+    listener.connection_created(event)
+    listener.connection_check_out_started(event)
+    listener.connection_checked_out(event)
+
+    snapshot = listener.snapshot()
+    assert snapshot["open"] == 1
+    assert snapshot["in_use"] == 1
+    assert snapshot["checkouts"] == 1
+    assert snapshot["avg_wait_ms"] >= 0
+
+    listener.connection_checked_in(event)
+    listener.connection_closed(event)
+
+    snapshot = listener.snapshot()
+    assert snapshot["in_use"] == 0
+    assert snapshot["open"] == 0
+
+
+def test_pool_listener_checkout_fallido():
+    listener = PoolMetricsListener("test")
+    event = SimpleNamespace(address=("localhost", 27017), reason="timeout")
+
+    listener.connection_check_out_started(event)
+    listener.connection_check_out_failed(event)
+
+    snapshot = listener.snapshot()
+    assert snapshot["checkout_failures"] == 1
+    assert snapshot["in_use"] == 0
@@ -0,0 +1,153 @@
+"""
+Tests para el hash de contraseñas (utils.passwords) y POST /api/auth/login
+"""
+
+import pytest
+from flask_jwt_extended import decode_token
+from werkzeug.security import generate_password_hash
+
+import utils.passwords as passwords
+from utils.passwords import PoolDeHashSaturado, metodo_configurado, necesita_rehash
+
+
+@pytest.fixture(autouse=True)
+def hash_barato(monkeypatch):
+    # Costo mínimo para que los tests no tarden
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:1000')
+    monkeypatch.delenv('PASSWORD_HASH_WORKERS', raising=False)
+    from utils.decorators import rate_limit_storage
+    rate_limit_storage.clear()
+    yield
+    passwords.shutdown_pool()
+    rate_limit_storage.clear()
+
+
+def _crear_usuario(password_hash):
+    from models import Usuario
+
+    usuario = Usuario(nickName='juan', nombre='Juan', apellido='Pérez', mail='juan@example.com',
+                      contraseña=password_hash, rol='admin')
+    usuario.save()
+    return usuario
+
+
+def _login(app_client, usuario, password):
+    return app_client.post('/api/auth/login', json={'usuario': usuario, 'password': password})
+
+
+def test_metodo_configurado_completa_los_parametros(monkeypatch):
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'scrypt')
+    assert metodo_configurado() == 'scrypt:32768:8:1'
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha512:5000')
+    assert metodo_configurado() == 'pbkdf2:sha512:5000'
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'md5')
+    with pytest.raises(ValueError):
+        metodo_configurado()
+
+
+@pytest.mark.parametrize('metodo, esperado', [
+    ('scrypt:16384', 'scrypt:16384:8:1'),
+    ('scrypt:16384:4', 'scrypt:16384:4:1'),
+    ('pbkdf2:sha512', f'pbkdf2:sha512:{passwords.DEFAULT_PBKDF2_ITERATIONS}'),
+])
+def test_metodo_configurado_con_parametros_parciales(monkeypatch, metodo, esperado):
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', metodo)
+
+    assert metodo_configurado() == esperado
+    assert not necesita_rehash(passwords.hash_password('x'))
+
+
+def test_hash_falso_sigue_al_metodo_configurado(monkeypatch):
+    monkeypatch.setattr(passwords, '_dummy_hashes', {})
+    passwords.verificar_password_falsa('x')
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:2000')
+    passwords.verificar_password_falsa('x')
+
+    assert [h.split('$', 1)[0] for h in passwords._dummy_hashes.values()] == [
+        'pbkdf2:sha256:1000', 'pbkdf2:sha256:2000',
+    ]
+
+
+def test_necesita_rehash_compara_metodo_y_costo():
+    assert not necesita_rehash(generate_password_hash('x', 'pbkdf2:sha256:1000'))
+    assert necesita_rehash(generate_password_hash('x', 'pbkdf2:sha256:2000'))
+    assert necesita_rehash(generate_password_hash('x', 'scrypt:1024:8:1'))
+
+
+def test_set_y_check_password():
+    from models import Usuario
+
+    usuario = Usuario()
+    usuario.set_password('secreta')
+
+    assert usuario.contraseña.startswith('pbkdf2:sha256:1000$')
+    assert usuario.check_password('secreta')
+    assert not usuario.check_password('otra')
+    assert not usuario.password_necesita_rehash()
+
+
+def test_login_devuelve_token_con_claims(app_client, app_module):
+    usuario = _crear_usuario(generate_password_hash('secreta', 'pbkdf2:sha256:1000'))
+
+    por_mail = _login(app_client, 'juan@example.com', 'secreta')
+    por_nick = _login(app_client, 'juan', 'secreta')
+
+    assert por_mail.status_code == por_nick.status_code == 200
+    with app_module.app.app_context():
+        claims = decode_token(por_mail.get_json()['access_token'])
+    assert claims['sub'] == str(usuario.id)
+    assert claims['rol'] == 'admin'
+
+
+def test_login_credenciales_invalidas(app_client):
+    _crear_usuario(generate_password_hash('secreta', 'pbkdf2:sha256:1000'))
+
+    incorrecta = _login(app_client, 'juan', 'otra')
+    inexistente = _login(app_client, 'nadie', 'secreta')
+
+    assert incorrecta.status_code == inexistente.status_code == 401
+    assert incorrecta.get_json() == inexistente.get_json()
+
+
+def test_login_rehashea_si_cambio_el_costo(app_client, monkeypatch):
+    from models import Usuario
+
+    usuario = _crear_usuario(generate_password_hash('secreta', 'pbkdf2:sha256:1000'))
+    monkeypatch.setenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:2000')
+
+    assert _login(app_client, 'juan', 'secreta').status_code == 200
+
+    guardada = Usuario.objects.get(id=usuario.id).contraseña
+    assert guardada.startswith('pbkdf2:sha256:2000$')
+    assert _login(app_client, 'juan', 'secreta').status_code == 200
+
+
+def test_login_pool_saturado_responde_503(app_client, monkeypatch):
+    _crear_usuario(generate_password_hash('secreta', 'pbkdf2:sha256:1000'))
+
+    def saturado(*args):
+        raise PoolDeHashSaturado()
+
+    monkeypatch.setattr('routes.auth.verificar_password', saturado)
+    response = _login(app_client, 'juan', 'secreta')
+
+    assert response.status_code == 503
+    assert response.get_json()['code'] == 'AUTH_BUSY'
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_pool_de_procesos(monkeypatch):
+    monkeypatch.setenv('PASSWORD_HASH_WORKERS', '1')
+    monkeypatch.setenv('PASSWORD_HASH_QUEUE', '0')
+    monkeypatch.setenv('PASSWORD_HASH_TIMEOUT', '0.01')
+
+    password_hash = passwords.hash_password('secreta')
+    assert passwords.verificar_password(password_hash, 'secreta')
+
+    # Con el único lugar ocupado, el siguiente no espera más que el timeout
+    assert passwords._pool_slots.acquire(timeout=1)
+    try:
+        with pytest.raises(PoolDeHashSaturado):
+            passwords.verificar_password(password_hash, 'secreta')
+    finally:
+        passwords._pool_slots.release()
@@ -0,0 +1,58 @@
+"""
+Tests para el job de purga de mensajes privados eliminados
+"""
+
+from datetime import datetime, timedelta
+
+from jobs.purgar_mensajes_privados import en_ventana, purgar
+
+
+def _mensajes(app_module, eliminados):
+    """Un mensaje por fecha de `eliminados` (None: vigente)"""
+    from bson import ObjectId
+    from mongoengine.connection import get_db
+
+    docs = [{
+        "texto": "hola",
+        "emisor": ObjectId(),
+        "receptor": ObjectId(),
+        "fechaDeCreado": datetime(2026, 1, 1),
+        "leido": None,
+        "eliminado": eliminado,
+    } for eliminado in eliminados]
+    coleccion = get_db("default").mensajes_privados
+    coleccion.insert_many(docs)
+    return coleccion
+
+
+def test_purgar_borra_en_lotes_solo_los_vencidos(app_module, monkeypatch):
+    monkeypatch.setattr("jobs.purgar_mensajes_privados.time.sleep", lambda segundos: None)
+    hace_dos_dias = datetime.utcnow() - timedelta(days=2)
+    recien = datetime.utcnow()
+    coleccion = _mensajes(app_module, [hace_dos_dias] * 5 + [recien, None, None])
+
+    assert purgar(retencion_horas=24, lote=2) == 5
+
+    restantes = list(coleccion.find({}, {"eliminado": 1}))
+    assert len(restantes) == 3
+    assert sum(1 for doc in restantes if doc.get("eliminado")) == 1
+
+
+def test_purgar_respeta_max_lotes(app_module, monkeypatch):
+    monkeypatch.setattr("jobs.purgar_mensajes_privados.time.sleep", lambda segundos: None)
+    coleccion = _mensajes(app_module, [datetime.utcnow() - timedelta(days=2)] * 5)
+
+    assert purgar(lote=2, max_lotes=1) == 2
+    # La próxima corrida sigue con lo que quedó
+    assert purgar(lote=2) == 3
+    assert coleccion.count_documents({}) == 0
+
+
+def test_en_ventana():
+    assert en_ventana(None)
+    assert en_ventana((3, 6), datetime(2026, 1, 1, 4))
+    assert not en_ventana((3, 6), datetime(2026, 1, 1, 6))
+    # Cruzando la medianoche
+    assert en_ventana((22, 4), datetime(2026, 1, 1, 23))
+    assert en_ventana((22, 4), datetime(2026, 1, 1, 1))
+    assert not en_ventana((22, 4), datetime(2026, 1, 1, 12))
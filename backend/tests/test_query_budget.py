@@ -0,0 +1,334 @@
+"""
+Tests para el presupuesto de consultas por request (detector de N+1)
+y cantidad de consultas de cada ruta
+
+Cada ruta de la API tiene acá su cota. /api/stream y /uploads/avatars/* no
+consultan la base; /health tampoco (test_rutas_sin_consultas).
+"""
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from utils.query_budget import (
+    QueryBudgetExceeded,
+    QueryTracker,
+    check_budget,
+    query_shape,
+)
+
+
+def test_query_shape_ignora_valores():
+    """Dos consultas que solo difieren en los valores tienen la misma forma"""
+    a = query_shape("find", {"find": "usuarios", "filter": {"_id": "aaa"}})
+    b = query_shape("find", {"find": "usuarios", "filter": {"_id": "bbb"}})
+    c = query_shape("find", {"find": "usuarios", "filter": {"nickName": "bbb"}})
+
+    assert a == b
+    assert a != c
+
+
+def test_tracker_detecta_consultas_repetidas():
+    tracker = QueryTracker()
+    for i in range(4):
+        tracker.record("find", {"find": "usuarios", "filter": {"_id": i}})
+    tracker.record("count", {"count": "mensajes_privados", "query": {"leido": None}})
+
+    assert tracker.total == 5
+    assert tracker.repeated(3) == {'find:usuarios:{"_id": "?"}': 4}
+
+
+def test_check_budget_estricto_lanza_excepcion():
+    tracker = QueryTracker()
+    for i in range(3):
+        tracker.record("find", {"find": "usuarios", "filter": {"_id": i}})
+
+    check_budget(tracker, "endpoint", max_queries=10, max_repeats=3, strict=True)
+    with pytest.raises(QueryBudgetExceeded):
+        check_budget(tracker, "endpoint", max_queries=2, max_repeats=3, strict=True)
+    with pytest.raises(QueryBudgetExceeded):
+        check_budget(tracker, "endpoint", max_queries=10, max_repeats=2, strict=True)
+
+
+def test_check_budget_no_estricto_solo_loguea(caplog):
+    tracker = QueryTracker()
+    for i in range(3):
+        tracker.record("find", {"find": "usuarios", "filter": {"_id": i}})
+
+    check_budget(tracker, "endpoint", max_queries=1, max_repeats=1, strict=False)
+
+    assert "Presupuesto de consultas excedido en endpoint" in caplog.text
+
+
+# Cantidad de consultas por ruta (con datos reales en la BD de test)
+
+@pytest.fixture
+def datos(app_module):
+    from models import Usuario, MensajePrivado
+
+    usuarios = []
+    for nick in ("juanperez", "mariagarcia", "carloslopez"):
+        usuario = Usuario(nickName=nick, nombre=nick, apellido="Test", mail=f"{nick}@example.com")
+        usuario.set_password("password123")
+        usuario.save()
+        usuarios.append(usuario)
+
+    juan, maria, carlos = usuarios
+    juan.seguidores = [maria, carlos]
+    juan.save()
+
+    for emisor, receptor in ((juan, maria), (maria, juan), (carlos, juan)):
+        MensajePrivado(texto="hola", emisor=emisor, receptor=receptor).save()
+
+    with app_module.app.app_context():
+        token = create_access_token(identity=str(juan.id))
+    return {
+        "headers": {"Authorization": f"Bearer {token}"},
+        "juan": juan,
+        "maria": maria,
+        "carlos": carlos,
+    }
+
+
+# Sin If-None-Match, conversaciones y seguidores suman las consultas de su versión (ETag)
+@pytest.mark.parametrize("path, max_queries", [
+    ("/api/mensajes-privados/conversaciones", 10),
+    ("/api/mensajes-privados/no-leidos", 2),
+    ("/api/usuarios/seguidores", 5),
+    ("/api/mensajes/mios", 4),
+])
+def test_consultas_por_ruta_get(app_client, datos, assert_max_queries, path, max_queries):
+    with assert_max_queries(max_queries):
+        response = app_client.get(path, headers=datos["headers"])
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("path, max_queries", [
+    ("/api/mensajes-privados/conversaciones", 4),
+    ("/api/mensajes-privados/no-leidos", 2),
+    ("/api/usuarios/seguidores", 3),
+])
+def test_consultas_por_ruta_no_modificada(app_client, datos, assert_max_queries, path, max_queries):
+    """Con el ETag vigente se responde 304 con solo las consultas de la versión"""
+    etag = app_client.get(path, headers=datos["headers"]).headers["ETag"]
+
+    with assert_max_queries(max_queries):
+        response = app_client.get(path, headers={**datos["headers"], "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.get_data() == b""
+
+
+@pytest.mark.parametrize("compact", ["", "?format=compact"])
+def test_consultas_conversaciones_no_crecen_con_las_conversaciones(
+        app_client, app_module, datos, assert_max_queries, compact):
+    """Usuarios y no leídos salen de una consulta cada uno, no una por conversación"""
+    from models import Usuario, MensajePrivado
+
+    juan = datos["juan"]
+    cantidad = app_module.app.config["QUERY_BUDGET_MAX_REPEATS"] * 2 + 2
+    for i in range(cantidad):
+        otro = Usuario(nickName=f"otro{i}", nombre="Otro", apellido="Test", mail=f"otro{i}@example.com")
+        otro.set_password("password123")
+        otro.save()
+        MensajePrivado(texto="hola", emisor=otro, receptor=juan).save()
+
+    path = "/api/mensajes-privados/conversaciones" + compact
+    with assert_max_queries(10):
+        response = app_client.get(path, headers=datos["headers"])
+
+    assert response.status_code == 200
+    body = response.get_json()
+    conversaciones = body["data"]["conversaciones"] if compact else body["data"]
+    assert len(conversaciones) == cantidad + 2
+    assert sum(c["mensajesNoLeidos"] for c in conversaciones) == cantidad + 2
+
+
+def test_consultas_obtener_conversacion(app_client, datos, assert_max_queries):
+    with assert_max_queries(8):
+        response = app_client.get(
+            f"/api/mensajes-privados/conversacion/{datos['maria'].id}", headers=datos["headers"]
+        )
+
+    assert response.status_code == 200
+
+
+def test_consultas_crear_mensaje_privado(app_client, datos, assert_max_queries):
+    from utils.decorators import rate_limit_storage
+
+    rate_limit_storage.clear()
+    with assert_max_queries(10):
+        response = app_client.post(
+            "/api/mensajes-privados",
+            json={"receptor_id": str(datos["maria"].id), "texto": "hola"},
+            headers=datos["headers"],
+        )
+
+    assert response.status_code == 201
+
+
+def test_consultas_marcar_leidos_masivo(app_client, datos, assert_max_queries):
+    """Lookup del usuario + un update_many + el nuevo conteo, sin importar cuántos IDs"""
+    from models import MensajePrivado
+
+    ids = [str(m.id) for m in MensajePrivado.objects(receptor=datos["juan"].id)]
+    with assert_max_queries(5):
+        response = app_client.post(
+            "/api/mensajes-privados/leer",
+            json={"ids": ids, "conversaciones": [{"usuario_id": str(datos["maria"].id), "hasta_fecha": "2100-01-01"}]},
+            headers=datos["headers"],
+        )
+
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"actualizados": 2, "noLeidos": 0}
+
+
+def test_consultas_envio_masivo(app_client, app_module, datos, assert_max_queries):
+    """Lookup del admin + un $in de receptores + un insert_many (+ el log), sin importar cuántos"""
+    from utils.auth import crear_token
+    from utils.decorators import rate_limit_storage
+
+    juan = datos["juan"]
+    juan.rol = "admin"
+    juan.save()
+    with app_module.app.app_context():
+        headers = {"Authorization": f"Bearer {crear_token(juan)}"}
+    rate_limit_storage.clear()
+
+    with assert_max_queries(5):
+        response = app_client.post(
+            "/api/mensajes-privados/masivo",
+            json={"receptor_ids": [str(datos["maria"].id), str(datos["carlos"].id)], "texto": "aviso"},
+            headers=headers,
+        )
+
+    assert response.status_code == 201
+    assert response.get_json()["data"]["enviados"] == 2
+
+
+def test_consultas_eliminar_mensaje_privado(app_client, datos, assert_max_queries):
+    """Borrado lógico: lookup del usuario + un update_one (+ el log)"""
+    from models import MensajePrivado
+
+    mensaje = MensajePrivado.objects(emisor=datos["juan"].id).first()
+    with assert_max_queries(4):
+        response = app_client.delete(f"/api/mensajes-privados/{mensaje.id}", headers=datos["headers"])
+
+    assert response.status_code == 200
+
+
+def _admin_headers(app_module, usuario):
+    from utils.auth import crear_token
+
+    usuario.rol = "admin"
+    usuario.save()
+    with app_module.app.app_context():
+        return {"Authorization": f"Bearer {crear_token(usuario)}"}
+
+
+@pytest.fixture
+def sin_rate_limit():
+    from utils.decorators import rate_limit_storage
+
+    rate_limit_storage.clear()
+
+
+def test_consultas_login(app_client, datos, sin_rate_limit, assert_max_queries):
+    """Un find_one proyectado (+ el log); sin rehash la contraseña no se vuelve a escribir"""
+    with assert_max_queries(2):
+        response = app_client.post("/api/auth/login", json={"usuario": "juanperez", "password": "password123"})
+
+    assert response.status_code == 200
+
+
+def test_consultas_marcar_como_leido(app_client, datos, assert_max_queries):
+    from models import MensajePrivado
+
+    mensaje = MensajePrivado.objects(receptor=datos["juan"].id).first()
+    with assert_max_queries(5):
+        response = app_client.put(f"/api/mensajes-privados/{mensaje.id}/leer", headers=datos["headers"])
+
+    assert response.status_code == 200
+
+
+def test_consultas_token_de_testing(app_client, datos, assert_max_queries):
+    with assert_max_queries(1):
+        response = app_client.get("/api/testing/token/juanperez")
+
+    assert response.status_code == 200
+
+
+def test_consultas_upload_avatar(app_client, app_module, datos, assert_max_queries, tmp_path, monkeypatch):
+    """Subir un avatar no consulta la base (más allá del user lookup)"""
+    import io
+
+    import utils.avatar_images as avatar_images
+    from utils.storage import LocalStorage
+
+    monkeypatch.setattr(avatar_images, "Image", None)
+    (tmp_path / "avatars").mkdir()
+    (tmp_path / "tmp").mkdir()
+    monkeypatch.setitem(app_module.app.config, "UPLOAD_TMP_FOLDER", str(tmp_path / "tmp"))
+    monkeypatch.setitem(app_module.app.extensions, "avatar_storage",
+                        LocalStorage(str(tmp_path / "avatars"), str(tmp_path / "tmp")))
+    png = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+    with assert_max_queries(1):
+        response = app_client.post("/api/upload/avatar", data={"file": (io.BytesIO(png), "foto.png")},
+                                   headers=datos["headers"])
+
+    assert response.status_code == 200
+
+
+def test_consultas_actualizar_perfil(app_client, datos, assert_max_queries):
+    """Lookup + update_one + la invalidación publicada + el perfil actualizado"""
+    with assert_max_queries(6):
+        response = app_client.patch("/api/usuarios/me", json={"biografia": "nueva"}, headers=datos["headers"])
+
+    assert response.status_code == 200
+
+
+def test_consultas_eliminar_cuenta(app_client, datos, sin_rate_limit, assert_max_queries):
+    """Lookup + hash + upsert y lectura de la tarea + el delete del usuario + la invalidación (+ el log)"""
+    with assert_max_queries(9):
+        response = app_client.delete("/api/usuarios/me", json={"password": "password123"}, headers=datos["headers"])
+
+    assert response.status_code == 202
+
+
+def test_consultas_estado_eliminacion(app_client, app_module, datos, sin_rate_limit, assert_max_queries):
+    headers = _admin_headers(app_module, datos["maria"])
+    app_client.delete("/api/usuarios/me", json={"password": "password123"}, headers=datos["headers"])
+
+    with assert_max_queries(2):
+        response = app_client.get(f"/api/usuarios/{datos['juan'].id}/eliminacion", headers=headers)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("params", [{}, {"level": "INFO", "limit": 5}, {"format": "ndjson"}])
+def test_consultas_logs(app_client, app_module, datos, assert_max_queries, params):
+    """Una sola consulta a logs_db por página o export (+ el lookup del admin)"""
+    from datetime import datetime
+
+    from mongoengine.connection import get_db
+
+    get_db("logs").logs.insert_many([
+        {"level": "INFO", "message": f"log {i}", "timestamp": datetime.utcnow()} for i in range(20)
+    ])
+    headers = _admin_headers(app_module, datos["juan"])
+
+    with assert_max_queries(2):
+        response = app_client.get("/api/logs", query_string=params, headers=headers)
+        response.get_data()
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("path", ["/health"])
+def test_rutas_sin_consultas(app_client, assert_max_queries, path):
+    with assert_max_queries(0):
+        response = app_client.get(path)
+
+    assert response.status_code == 200
@@ -0,0 +1,84 @@
+"""
+Tests para la retención de logs_db (utils.retencion_logs) y el job
+jobs.archivar_logs
+"""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from mongoengine.connection import get_db
+
+from jobs.archivar_logs import archivar
+from utils.retencion_logs import asegurar_retencion_logs, ttl_por_nivel
+
+
+@pytest.fixture
+def logs(app_module):
+    coleccion = get_db('logs').logs
+    coleccion.drop()
+    yield coleccion
+    coleccion.drop()
+
+
+def test_ttl_por_nivel(monkeypatch):
+    monkeypatch.delenv('LOG_TTL_DAYS', raising=False)
+    assert ttl_por_nivel()['DEBUG'] == 7 * 86400
+    assert ttl_por_nivel()['ERROR'] == 365 * 86400
+
+    monkeypatch.setenv('LOG_TTL_DAYS', 'debug=1, INFO=0.5, ERROR=0')
+    assert ttl_por_nivel() == {'DEBUG': 86400, 'INFO': 43200}
+
+    monkeypatch.setenv('LOG_TTL_DAYS', 'TRACE=1')
+    with pytest.raises(ValueError):
+        ttl_por_nivel()
+
+
+def test_asegurar_retencion_crea_cambia_y_borra_indices(logs, monkeypatch):
+    monkeypatch.setenv('LOG_TTL_DAYS', 'DEBUG=7,INFO=30')
+    asegurar_retencion_logs()
+
+    indices = logs.index_information()
+    assert indices['ttl_debug']['expireAfterSeconds'] == 7 * 86400
+    assert indices['ttl_debug']['partialFilterExpression'] == {'level': 'DEBUG'}
+    assert 'ttl_error' not in indices
+
+    comandos = []
+    db = get_db('logs')
+    monkeypatch.setattr(type(db), 'command', lambda self, *args, **kwargs: comandos.append((args, kwargs)))
+    monkeypatch.setenv('LOG_TTL_DAYS', 'DEBUG=14')
+    asegurar_retencion_logs()
+
+    assert comandos == [(('collMod', 'logs'), {'index': {'name': 'ttl_debug', 'expireAfterSeconds': 14 * 86400}})]
+    assert 'ttl_info' not in logs.index_information()
+
+
+def _log(nivel, dias, i=0):
+    return {
+        'level': nivel,
+        'message': f'evento {i}',
+        'timestamp': datetime.utcnow() - timedelta(days=dias),
+        'action': 'send_private_message',
+        'metadata': {'i': i},
+    }
+
+
+def test_archivar_comprime_y_borra_lo_que_vence(logs, monkeypatch, tmp_path):
+    monkeypatch.setenv('LOG_TTL_DAYS', 'DEBUG=7,INFO=30')
+    logs.insert_many(
+        [_log('DEBUG', 6.5, i) for i in range(5)]   # vence en menos de 24 h
+        + [_log('DEBUG', 1)]                        # todavía no
+        + [_log('INFO', 20), _log('ERROR', 400)]    # INFO no vence; ERROR sin TTL
+    )
+
+    resumen = archivar(str(tmp_path), anticipacion_horas=24, lote=2, max_por_archivo=3)
+
+    assert resumen == {'DEBUG': {'logs': 5, 'archivos': 2}, 'INFO': {'logs': 0, 'archivos': 0}}
+    archivos = sorted(tmp_path.iterdir())
+    assert [a.name.split('-')[1] for a in archivos] == ['debug', 'debug']
+    assert all(a.name.endswith('.jsonl.gz') for a in archivos)
+    lineas = [json.loads(linea) for a in archivos for linea in gzip.open(a, 'rt', encoding='utf-8')]
+    assert [linea['metadata']['i'] for linea in lineas] == [0, 1, 2, 3, 4]
+    assert '$date' in json.dumps(lineas[0]['timestamp'])
+    assert logs.count_documents({}) == 3
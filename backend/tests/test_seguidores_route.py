@@ -102,13 +102,14 @@ def test_listar_seguidores_usuario_no_encontrado(app_client, auth_headers, monke
 def test_listar_seguidores_error_interno(app_client, auth_headers, monkeypatch):
     """Test que verifica el manejo de errores internos"""
     import utils.mongo_helpers
+    import services.seguidores_service as seguidores_service
 
-    def fake_get_usuario_by_id(usuario_id):
+    def fake_version_seguidores(usuario):
         raise Exception("Error de base de datos")
 
-    # Mockear en ambos módulos
-    import routes.seguidores as seguidores_route
-    monkeypatch.setattr(utils.mongo_helpers, "get_usuario_by_id", fake_get_usuario_by_id)
+    # El usuario del token se resuelve antes de la ruta: el error ocurre después
+    monkeypatch.setattr(utils.mongo_helpers, "get_usuario_by_id", lambda usuario_id: FakeUsuario(usuario_id))
+    monkeypatch.setattr(seguidores_service, "version_seguidores", fake_version_seguidores)
 
     response = app_client.get("/api/usuarios/seguidores", headers=auth_headers)
     assert response.status_code == 500
@@ -0,0 +1,89 @@
+"""
+Tests para el envío de avatares (utils.static_files)
+"""
+
+import pytest
+from flask import Flask
+
+from utils.static_files import send_immutable
+
+CONTENIDO = b'\x89PNG' + bytes(range(256)) * 8
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    (tmp_path / 'abc123.png').write_bytes(CONTENIDO)
+
+    @app.route('/uploads/avatars/<path:filename>')
+    def serve_avatar(filename):
+        return send_immutable(str(tmp_path), filename)
+
+    return app
+
+
+def test_sirve_con_cache_inmutable_y_etag_fuerte(app):
+    response = app.test_client().get('/uploads/avatars/abc123.png')
+
+    assert response.status_code == 200
+    assert response.get_data() == CONTENIDO
+    assert response.mimetype == 'image/png'
+    assert response.headers['ETag'] == '"abc123.png"'
+    assert response.cache_control.immutable
+    assert response.cache_control.public
+    assert response.cache_control.max_age == 365 * 24 * 3600
+
+
+def test_if_none_match_responde_304(app):
+    response = app.test_client().get(
+        '/uploads/avatars/abc123.png', headers={'If-None-Match': '"abc123.png"'}
+    )
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_if_none_match_de_archivo_borrado_responde_404(app, tmp_path):
+    (tmp_path / 'abc123.png').unlink()
+
+    response = app.test_client().get(
+        '/uploads/avatars/abc123.png', headers={'If-None-Match': '"abc123.png"'}
+    )
+
+    assert response.status_code == 404
+
+
+def test_range_request(app):
+    response = app.test_client().get('/uploads/avatars/abc123.png', headers={'Range': 'bytes=4-19'})
+
+    assert response.status_code == 206
+    assert response.get_data() == CONTENIDO[4:20]
+    assert response.headers['Content-Range'] == f'bytes 4-19/{len(CONTENIDO)}'
+
+
+@pytest.mark.parametrize('filename', ['no-existe.png', '../secreto.png'])
+def test_404(app, filename):
+    response = app.test_client().get(f'/uploads/avatars/{filename}')
+
+    assert response.status_code == 404
+
+
+def test_x_accel_redirect(app):
+    app.config['AVATAR_SENDFILE'] = 'x-accel-redirect'
+    client = app.test_client()
+
+    response = client.get('/uploads/avatars/abc123.png')
+    revalidacion = client.get('/uploads/avatars/abc123.png', headers={'If-None-Match': '"abc123.png"'})
+
+    assert response.headers['X-Accel-Redirect'] == '/_protected/avatars/abc123.png'
+    assert response.get_data() == b''
+    assert response.mimetype == 'image/png'
+    assert revalidacion.status_code == 304
+
+
+def test_x_sendfile(app, tmp_path):
+    app.config['AVATAR_SENDFILE'] = 'x-sendfile'
+
+    response = app.test_client().get('/uploads/avatars/abc123.png')
+
+    assert response.headers['X-Sendfile'] == str(tmp_path / 'abc123.png')
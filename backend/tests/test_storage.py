@@ -0,0 +1,196 @@
+"""
+Tests para el almacenamiento de avatares (utils.storage)
+"""
+
+import gridfs
+import pytest
+
+from utils.storage import GridFSStorage, LocalStorage
+
+KEY = 'a' * 64 + '.png'
+
+
+class FakeGridIn:
+    def __init__(self, bucket, filename):
+        self.bucket = bucket
+        self.filename = filename
+        self.datos = b''
+
+    def write(self, datos):
+        self.datos += datos
+        # Los chunks se escriben antes de insertar en .files
+        self.bucket.chunks[id(self)] = self.datos
+
+    def close(self):
+        # El índice único de filename rechaza el segundo documento
+        if self.filename in self.bucket.archivos:
+            raise gridfs.errors.FileExists(self.filename)
+        self.bucket.archivos[self.filename] = self.bucket.chunks.pop(id(self))
+
+    def abort(self):
+        self.bucket.chunks.pop(id(self), None)
+
+
+class FakeBucket:
+    """GridFSBucket en memoria: solo lo que usa GridFSStorage"""
+
+    def __init__(self):
+        self.archivos = {}
+        self.chunks = {}
+        self.descargas = 0
+
+    def open_upload_stream(self, filename, metadata=None):
+        return FakeGridIn(self, filename)
+
+    def download_to_stream_by_name(self, filename, destination):
+        if filename not in self.archivos:
+            raise gridfs.errors.NoFile(filename)
+        self.descargas += 1
+        destination.write(self.archivos[filename])
+
+    def delete(self, file_id):
+        # En el fake el _id es el nombre
+        del self.archivos[file_id]
+
+
+class FakeFiles:
+    def __init__(self, bucket):
+        self.bucket = bucket
+
+    def find_one(self, filtro, proyeccion=None):
+        return {'_id': 1} if filtro['filename'] in self.bucket.archivos else None
+
+    def find(self, filtro, proyeccion=None):
+        return [{'_id': filtro['filename']}] if filtro['filename'] in self.bucket.archivos else []
+
+    def create_index(self, campo, unique=False, name=None):
+        self.bucket.indices = getattr(self.bucket, 'indices', []) + [(campo, unique)]
+
+
+@pytest.fixture
+def gridfs_storage(tmp_path, monkeypatch):
+    storage = GridFSStorage(str(tmp_path / 'cache'))
+    bucket = FakeBucket()
+    monkeypatch.setattr(storage, '_bucket', lambda: bucket)
+    monkeypatch.setattr(storage, '_files', lambda: FakeFiles(bucket))
+    return storage, bucket
+
+
+def _archivo(tmp_path, contenido=b'contenido'):
+    path = tmp_path / 'subida.part'
+    path.write_bytes(contenido)
+    return str(path)
+
+
+def test_local_put_file_deduplica(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'avatars'), str(tmp_path / 'tmp'))
+
+    assert storage.put_file(KEY, _archivo(tmp_path)) is True
+    assert storage.put_file(KEY, _archivo(tmp_path, b'otro')) is False
+    assert (tmp_path / 'avatars' / KEY).read_bytes() == b'contenido'
+    assert storage.exists(KEY)
+
+
+def test_local_rechaza_claves_con_carpetas(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'avatars'))
+
+    assert storage.ensure_local('../secreto.png') is False
+    assert storage.ensure_local('.tmp/upload-1.part') is False
+    with pytest.raises(ValueError):
+        storage.put_file('../secreto.png', _archivo(tmp_path))
+
+
+def test_local_delete(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'avatars'), str(tmp_path / 'tmp'))
+    storage.put_file(KEY, _archivo(tmp_path))
+
+    assert storage.delete(KEY) is True
+    assert storage.delete(KEY) is False
+    assert not storage.exists(KEY)
+
+
+def test_gridfs_delete_borra_bucket_y_cache(gridfs_storage, tmp_path):
+    storage, bucket = gridfs_storage
+    storage.put_file(KEY, _archivo(tmp_path))
+
+    assert storage.delete(KEY) is True
+    assert bucket.archivos == {}
+    assert not (tmp_path / 'cache' / KEY).exists()
+    assert storage.delete(KEY) is False
+
+
+def test_gridfs_put_file_sube_y_deja_copia_en_cache(gridfs_storage, tmp_path):
+    storage, bucket = gridfs_storage
+
+    assert storage.put_file(KEY, _archivo(tmp_path)) is True
+    assert storage.put_file(KEY, _archivo(tmp_path, b'otro')) is False
+    assert bucket.archivos == {KEY: b'contenido'}
+    assert (tmp_path / 'cache' / KEY).read_bytes() == b'contenido'
+
+
+def test_gridfs_put_file_concurrente_queda_uno(gridfs_storage, tmp_path, monkeypatch):
+    """Otro nodo sube la misma clave entre el exists y el insert en .files"""
+    storage, bucket = gridfs_storage
+    monkeypatch.setattr(storage, 'exists', lambda key: False)
+    storage.put_file(KEY, _archivo(tmp_path))
+    path = _archivo(tmp_path, b'contenido')
+
+    assert storage.put_file(KEY, path) is False
+    assert bucket.indices == [('filename', True)]
+    assert bucket.archivos == {KEY: b'contenido'}
+    # Sin chunks huérfanos; el temporal lo limpia quien llamó
+    assert bucket.chunks == {}
+    assert (tmp_path / 'subida.part').exists()
+
+
+def test_gridfs_ensure_local_descarga_una_sola_vez(gridfs_storage, tmp_path):
+    storage, bucket = gridfs_storage
+    bucket.archivos[KEY] = b'subido desde otro nodo'
+
+    assert storage.exists(KEY)
+    assert storage.ensure_local(KEY) is True
+    assert storage.ensure_local(KEY) is True
+
+    assert bucket.descargas == 1
+    assert (tmp_path / 'cache' / KEY).read_bytes() == b'subido desde otro nodo'
+    assert list((tmp_path / 'cache' / '.tmp').iterdir()) == []
+
+
+def test_gridfs_ensure_local_clave_inexistente(gridfs_storage, tmp_path):
+    storage, _ = gridfs_storage
+
+    assert storage.exists(KEY) is False
+    assert storage.ensure_local(KEY) is False
+    assert list((tmp_path / 'cache' / '.tmp').iterdir()) == []
+
+
+def test_serve_avatar_desde_gridfs(app_client, app_module, gridfs_storage, monkeypatch):
+    storage, bucket = gridfs_storage
+    bucket.archivos[KEY] = b'\x89PNG'
+    monkeypatch.setitem(app_module.app.extensions, 'avatar_storage', storage)
+
+    response = app_client.get(f'/uploads/avatars/{KEY}')
+    faltante = app_client.get(f'/uploads/avatars/{"b" * 64}.png')
+    # El 304 no consulta GridFS
+    bucket.archivos.clear()
+    revalidacion = app_client.get(f'/uploads/avatars/{KEY}', headers={'If-None-Match': f'"{KEY}"'})
+
+    assert response.status_code == 200
+    assert response.data == b'\x89PNG'
+    assert faltante.status_code == 404
+    assert revalidacion.status_code == 304
+
+
+def test_gridfs_contra_mongo_real(tmp_path):
+    pymongo = pytest.importorskip('pymongo')
+    from mongoengine.connection import get_db
+    if type(get_db().client) is not pymongo.MongoClient:
+        pytest.skip('GridFS necesita un MongoDB real')
+    storage = GridFSStorage(str(tmp_path / 'cache'), bucket_name='avatars_test')
+    get_db().drop_collection('avatars_test.files')
+    get_db().drop_collection('avatars_test.chunks')
+
+    assert storage.put_file(KEY, _archivo(tmp_path)) is True
+    (tmp_path / 'cache' / KEY).unlink()
+    assert storage.ensure_local(KEY) is True
+    assert (tmp_path / 'cache' / KEY).read_bytes() == b'contenido'
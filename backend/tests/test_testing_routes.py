@@ -270,12 +270,12 @@ def test_obtener_token_error_al_crear_token(app_client, monkeypatch):
     def fake_get_usuario_by_id(usuario_id):
         return None
 
-    def fake_create_access_token(identity):
+    def fake_crear_token(usuario):
         raise Exception("Error al crear token JWT")
 
     monkeypatch.setattr("mongoengine.connection.get_db", fake_get_db)
     monkeypatch.setattr(utils.mongo_helpers, "get_usuario_by_id", fake_get_usuario_by_id)
-    monkeypatch.setattr(testing_route, "create_access_token", fake_create_access_token)
+    monkeypatch.setattr(testing_route, "crear_token", fake_crear_token)
 
     response = app_client.get("/api/testing/token/juanperez")
 
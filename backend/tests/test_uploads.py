@@ -0,0 +1,89 @@
+"""
+Tests para los uploads en streaming (utils.uploads)
+"""
+
+import hashlib
+import io
+
+import pytest
+
+import utils.avatar_images as avatar_images
+from utils.storage import LocalStorage
+from utils.uploads import HashingUploadFile
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def carpetas(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(avatar_images, 'Image', None)
+    avatars, tmp = tmp_path / 'avatars', tmp_path / 'tmp'
+    avatars.mkdir()
+    tmp.mkdir()
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_TMP_FOLDER', str(tmp))
+    monkeypatch.setitem(app_module.app.extensions, 'avatar_storage', LocalStorage(str(avatars), str(tmp)))
+    return avatars, tmp
+
+
+def _subir(app_client, usuario_headers, contenido, nombre='foto.png'):
+    return app_client.post(
+        '/api/upload/avatar',
+        data={'file': (io.BytesIO(contenido), nombre)},
+        headers=usuario_headers,
+    )
+
+
+def test_hashing_upload_file(tmp_path):
+    archivo = HashingUploadFile(str(tmp_path), max_size=None)
+    for chunk in (PNG[:100], PNG[100:]):
+        archivo.write(chunk)
+    archivo.seek(0)
+
+    assert archivo.read() == PNG
+    assert archivo.size == len(PNG)
+    assert archivo.hexdigest() == hashlib.sha256(PNG).hexdigest()
+    archivo.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_upload_nombra_por_hash_y_deduplica(app_client, usuario_headers, carpetas):
+    avatars, tmp = carpetas
+
+    primera = _subir(app_client, usuario_headers, PNG)
+    segunda = _subir(app_client, usuario_headers, PNG, nombre='otra.png')
+
+    assert primera.status_code == segunda.status_code == 200
+    assert primera.get_json()['url'] == segunda.get_json()['url']
+    assert [p.name for p in avatars.iterdir()] == [f'{hashlib.sha256(PNG).hexdigest()}.png']
+    assert list(tmp.iterdir()) == []
+
+
+def test_upload_invalido_no_deja_temporales(app_client, usuario_headers, carpetas):
+    avatars, tmp = carpetas
+
+    response = _subir(app_client, usuario_headers, b'no es una imagen')
+
+    assert response.status_code == 400
+    assert list(avatars.iterdir()) == []
+    assert list(tmp.iterdir()) == []
+
+
+def test_upload_corta_al_superar_el_limite_por_archivo(app_client, usuario_headers, carpetas, app_module, monkeypatch):
+    avatars, tmp = carpetas
+    monkeypatch.setitem(app_module.app.config, 'UPLOAD_MAX_FILE_SIZE', 512)
+
+    response = _subir(app_client, usuario_headers, PNG)
+
+    assert response.status_code == 413
+    assert response.get_json()['code'] == 'FILE_TOO_BIG'
+    assert list(avatars.iterdir()) == []
+    assert list(tmp.iterdir()) == []
+
+
+def test_upload_rechaza_content_length_excesivo(app_client, usuario_headers, carpetas, app_module, monkeypatch):
+    monkeypatch.setitem(app_module.app.config, 'MAX_CONTENT_LENGTH', 256)
+
+    response = _subir(app_client, usuario_headers, PNG)
+
+    assert response.status_code == 413
+    assert response.get_json()['code'] == 'FILE_TOO_BIG'
@@ -0,0 +1,214 @@
+"""
+Resolución de la identidad del JWT con cache de perfiles
+
+Antes cada ruta protegida hacía `get_usuario_by_id(get_jwt_identity())` solo
+para confirmar que el usuario existe: una consulta a MongoDB por request. Con
+`init_auth(app, jwt)`:
+- `user_lookup_loader`: flask_jwt_extended resuelve el usuario del token al
+  validar el JWT y las rutas lo leen con `current_user`. La búsqueda pasa por
+  un cache en memoria por proceso (ProfileCache, TTL corto); si el usuario no
+  existe se responde 401 AUTH_ERROR.
+- `crear_token(usuario)`: los tokens llevan los claims mínimos (nickName, rol)
+  y `require_role` los usa sin consultar la base.
+
+`invalidar_perfil` (después de modificar o borrar un usuario) descarta el
+perfil en el proceso que atiende el request y lo publica en la colección
+`perfiles_invalidados` de main_db. Los demás procesos la consultan a lo sumo
+una vez cada PROFILE_INVALIDATION_INTERVAL segundos (una consulta por
+proceso, no por request, y solo si tienen perfiles en cache) y descartan esos
+perfiles: un usuario borrado deja de autenticarse en todos los workers en
+alrededor de un segundo. Si la consulta falla, el límite vuelve a ser
+PROFILE_CACHE_TTL. Un cambio de rol se aplica al renovar el token.
+
+Env vars:
+- PROFILE_CACHE_TTL: segundos que vive un perfil en cache (default 60, 0 lo desactiva)
+- PROFILE_CACHE_SIZE: máximo de perfiles por proceso (default 10000)
+- PROFILE_INVALIDATION_INTERVAL: segundos entre consultas de invalidaciones (default 1)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from flask import current_app, jsonify
+from flask_jwt_extended import create_access_token
+
+import utils.mongo_helpers
+from utils.metrics import record_cache_lookup
+
+logger = logging.getLogger(__name__)
+
+# Claims que se copian del usuario al token
+CLAIMS_USUARIO = ('nickName', 'rol')
+
+COLECCION_INVALIDACIONES = 'perfiles_invalidados'
+# Las invalidaciones se borran solas (índice TTL); alcanza con que duren más
+# que el intervalo de consulta
+INVALIDACIONES_TTL = 3600
+
+
+class ProfileCache:
+    """Cache LRU con vencimiento de perfiles de usuario, seguro entre threads"""
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        ahora = time.monotonic()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] <= ahora:
+                del self._items[key]
+                item = None
+            if item is not None:
+                self._items.move_to_end(key)
+        record_cache_lookup('profile', item is not None)
+        return item[1] if item is not None else None
+
+    def set(self, key, value):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class InvalidacionesCompartidas:
+    """
+    Invalidaciones de perfiles entre procesos a través de MongoDB
+
+    Args:
+        intervalo: segundos mínimos entre consultas de este proceso
+        margen: segundos que se vuelven a mirar en cada consulta (inserts que
+            tardaron en verse, relojes de distintos hosts)
+    """
+
+    def __init__(self, intervalo=1.0, margen=5.0):
+        self.intervalo = intervalo
+        self.margen = margen
+        self._lock = threading.Lock()
+        self._proxima = 0.0
+        self._desde = datetime.utcnow()
+        self._vistas = set()
+
+    @staticmethod
+    def _coleccion():
+        from mongoengine.connection import get_db
+        return get_db('default')[COLECCION_INVALIDACIONES]
+
+    def publicar(self, usuario_id):
+        try:
+            self._coleccion().insert_one({'usuario_id': str(usuario_id), 'ts': datetime.utcnow()})
+        except Exception:
+            logger.warning("No se pudo publicar la invalidación del perfil %s", usuario_id, exc_info=True)
+
+    def sondear(self, cache):
+        """Descarta de `cache` los perfiles invalidados por otros procesos"""
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora < self._proxima:
+                return
+            self._proxima = ahora + self.intervalo
+            desde, vistas = self._desde, self._vistas
+            inicio = datetime.utcnow()
+            if not len(cache):
+                # Nada que descartar: no hace falta consultar
+                self._desde, self._vistas = inicio - timedelta(seconds=self.margen), set()
+                return
+        try:
+            docs = list(self._coleccion().find({'ts': {'$gte': desde}}, {'usuario_id': 1}))
+        except Exception:
+            logger.warning("No se pudieron consultar las invalidaciones de perfiles", exc_info=True)
+            return
+        for doc in docs:
+            if doc['_id'] not in vistas:
+                cache.invalidate(doc['usuario_id'])
+        with self._lock:
+            self._desde = inicio - timedelta(seconds=self.margen)
+            self._vistas = {doc['_id'] for doc in docs}
+
+
+def asegurar_indices_invalidaciones(db=None):
+    """Índice TTL de `perfiles_invalidados` (lo llama init_db)"""
+    from mongoengine.connection import get_db
+
+    db = db if db is not None else get_db('default')
+    db[COLECCION_INVALIDACIONES].create_index('ts', expireAfterSeconds=INVALIDACIONES_TTL)
+
+
+def get_profile_cache(app=None):
+    """Cache de perfiles de la app (o de current_app)"""
+    return (app or current_app).extensions['profile_cache']
+
+
+def cargar_usuario(usuario_id, app=None):
+    """Usuario por id pasando por el cache de perfiles; None si no existe"""
+    cache = get_profile_cache(app)
+    (app or current_app).extensions['profile_invalidations'].sondear(cache)
+    usuario = cache.get(usuario_id)
+    if usuario is None:
+        usuario = utils.mongo_helpers.get_usuario_by_id(usuario_id)
+        if usuario is not None:
+            cache.set(usuario_id, usuario)
+    return usuario
+
+
+def invalidar_perfil(usuario_id):
+    """Descarta el perfil cacheado (después de modificarlo o borrarlo), acá y en los demás procesos"""
+    get_profile_cache().invalidate(str(usuario_id))
+    current_app.extensions['profile_invalidations'].publicar(usuario_id)
+
+
+def claims_de_usuario(usuario):
+    return {campo: getattr(usuario, campo, None) for campo in CLAIMS_USUARIO}
+
+
+def crear_token(usuario, **kwargs):
+    """Access token para `usuario` con su id como identidad y los claims mínimos"""
+    return create_access_token(
+        identity=str(usuario.id),
+        additional_claims=claims_de_usuario(usuario),
+        **kwargs,
+    )
+
+
+def init_auth(app, jwt):
+    """Registra la carga del usuario del JWT en `jwt` (JWTManager)"""
+    app.extensions['profile_cache'] = ProfileCache(
+        ttl=int(os.getenv('PROFILE_CACHE_TTL', 60)),
+        max_size=int(os.getenv('PROFILE_CACHE_SIZE', 10000)),
+    )
+    app.extensions['profile_invalidations'] = InvalidacionesCompartidas(
+        intervalo=float(os.getenv('PROFILE_INVALIDATION_INTERVAL', 1)),
+    )
+
+    @jwt.user_lookup_loader
+    def _user_lookup(jwt_header, jwt_data):
+        return cargar_usuario(jwt_data[app.config['JWT_IDENTITY_CLAIM']], app)
+
+    @jwt.user_lookup_error_loader
+    def _user_lookup_error(jwt_header, jwt_data):
+        return jsonify({
+            'success': False,
+            'error': 'Usuario no autenticado',
+            'code': 'AUTH_ERROR'
+        }), 401
@@ -0,0 +1,227 @@
+"""
+Procesamiento de avatares: validación del contenido y variantes WebP
+
+- `validar_imagen(stream)` mira el contenido real del archivo (no la
+  extensión): con Pillow abre y verifica la imagen y limita la cantidad de
+  píxeles; sin Pillow reconoce PNG/JPEG/GIF/WebP por sus bytes iniciales.
+- `encolar_variantes(storage, key, stem)` genera en un pool de threads las
+  variantes cuadradas de VARIANT_SIZES px en WebP y las guarda en el mismo
+  almacenamiento que el original (`<stem>_<size>.webp`, ver utils.storage).
+  Pillow libera el GIL al decodificar, redimensionar y codificar, así que los
+  threads corren en paralelo con los requests.
+- `variant_urls(foto_url)` arma las URLs de las variantes a partir de la URL
+  del original (sin tocar el disco), para Usuario.to_dict.
+- `archivos_de_avatar(foto_url)`: claves del original y sus variantes (para
+  borrarlos con la cuenta, ver jobs.eliminar_cuentas).
+- `hashes_de_avatar(*foto_urls)`: hashes de contenido de los uploads propios
+  (Usuario.avatares, para saber por igualdad si alguien más usa un archivo).
+- `original_de_variante(storage, filename)`: mientras una variante no existe
+  (recién subido, o avatares anteriores a este cambio) se redirige al
+  original.
+
+Pillow es opcional: sin Pillow no se generan variantes y variant_urls
+devuelve {}.
+
+Env vars:
+- AVATAR_WORKERS: threads del pool de variantes (default 2)
+- AVATAR_MAX_PIXELS: ancho x alto máximo aceptado (default 40 millones)
+"""
+
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+VARIANT_SIZES = (48, 128, 512)
+WEBP_QUALITY = 80
+
+# formato detectado -> extensión con la que se guarda el original
+FORMATOS = {'PNG': 'png', 'JPEG': 'jpg', 'GIF': 'gif', 'WEBP': 'webp'}
+EXTENSIONES_ORIGINAL = ('png', 'jpg', 'jpeg', 'gif', 'webp')
+
+_VARIANTE_RE = re.compile(r'^(?P<stem>[0-9a-f]{32,64})_(?P<size>\d+)\.webp$')
+_ORIGINAL_URL_RE = re.compile(r'^(?P<base>.*/uploads/avatars/)(?P<stem>[0-9a-f]{32,64})\.[a-z]+$')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ImagenInvalida(ValueError):
+    """El archivo subido no es una imagen aceptada"""
+
+
+def _formato_por_firma(cabecera):
+    if cabecera.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'PNG'
+    if cabecera.startswith(b'\xff\xd8\xff'):
+        return 'JPEG'
+    if cabecera[:6] in (b'GIF87a', b'GIF89a'):
+        return 'GIF'
+    if cabecera[:4] == b'RIFF' and cabecera[8:12] == b'WEBP':
+        return 'WEBP'
+    return None
+
+
+def validar_imagen(stream):
+    """
+    Valida que `stream` sea una imagen PNG, JPEG, GIF o WebP.
+
+    Returns:
+        Extensión con la que guardar el archivo ('png', 'jpg', 'gif', 'webp').
+        El stream queda posicionado al inicio.
+
+    Raises:
+        ImagenInvalida
+    """
+    inicio = stream.tell()
+    try:
+        formato = _formato_por_firma(stream.read(16))
+        if formato is None:
+            raise ImagenInvalida('El archivo no es una imagen PNG, JPEG, GIF o WebP')
+        if Image is not None:
+            stream.seek(inicio)
+            try:
+                with Image.open(stream) as img:
+                    if img.format not in FORMATOS:
+                        raise ImagenInvalida(f'Formato de imagen no permitido: {img.format}')
+                    max_pixels = int(os.getenv('AVATAR_MAX_PIXELS', 40_000_000))
+                    if img.width * img.height > max_pixels:
+                        raise ImagenInvalida('La imagen tiene demasiados píxeles')
+                    img.verify()
+                    formato = img.format
+            except ImagenInvalida:
+                raise
+            except Exception as e:
+                raise ImagenInvalida(f'Imagen dañada o ilegible: {e}')
+        return FORMATOS[formato]
+    finally:
+        stream.seek(inicio)
+
+
+def nombre_variante(stem, size):
+    return f"{stem}_{size}.webp"
+
+
+def generar_variantes(storage, key, stem):
+    """
+    Genera las variantes WebP del original `key`. Cada una se escribe a un
+    temporal y se guarda con storage.put_file, así nunca se sirve una
+    variante a medias.
+
+    Returns:
+        Dict tamaño -> nombre de archivo
+    """
+    if Image is None or not storage.ensure_local(key):
+        return {}
+    generadas = {}
+    with Image.open(os.path.join(storage.local_folder, key)) as img:
+        # JPEG: decodificar directamente a una escala reducida
+        img.draft('RGB', (max(VARIANT_SIZES), max(VARIANT_SIZES)))
+        img = ImageOps.exif_transpose(img)
+        modo = 'RGBA' if img.mode in ('RGBA', 'LA', 'P') else 'RGB'
+        actual = img.convert(modo)
+        # De la más grande a la más chica: cada una parte de la anterior
+        for size in sorted(VARIANT_SIZES, reverse=True):
+            actual = ImageOps.fit(actual, (size, size), Image.Resampling.LANCZOS)
+            nombre = nombre_variante(stem, size)
+            fd, temporal = tempfile.mkstemp(dir=storage.tmp_folder, suffix='.webp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    actual.save(f, 'WEBP', quality=WEBP_QUALITY, method=4)
+                storage.put_file(nombre, temporal)
+            finally:
+                if os.path.exists(temporal):
+                    os.unlink(temporal)
+            generadas[size] = nombre
+    return generadas
+
+
+def _get_executor():
+    # Se crea en el primer upload: bajo gunicorn con preload, ya dentro del worker
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=int(os.getenv('AVATAR_WORKERS', 2)),
+                thread_name_prefix='avatar-variantes',
+            )
+        return _executor
+
+
+def _generar_y_loguear(storage, key, stem):
+    try:
+        return generar_variantes(storage, key, stem)
+    except Exception:
+        logger.exception("Error generando variantes de avatar", extra={'archivo': key})
+        return {}
+
+
+def encolar_variantes(storage, key, stem):
+    """Genera las variantes en segundo plano. Devuelve el Future (o None sin Pillow)"""
+    if Image is None:
+        return None
+    return _get_executor().submit(_generar_y_loguear, storage, key, stem)
+
+
+def variant_urls(foto_url):
+    """
+    URLs de las variantes de un avatar subido ({'48': url, ...}); {} si la
+    foto no es un upload propio (p. ej. ui-avatars.com) o no hay Pillow.
+    """
+    if not foto_url or Image is None:
+        return {}
+    match = _ORIGINAL_URL_RE.match(foto_url)
+    if not match:
+        return {}
+    base, stem = match.group('base'), match.group('stem')
+    return {str(size): f"{base}{nombre_variante(stem, size)}" for size in VARIANT_SIZES}
+
+
+def archivos_de_avatar(foto_url):
+    """
+    Claves de almacenamiento de un avatar subido (original y variantes);
+    [] si la URL no es un upload propio. No necesita Pillow.
+    """
+    match = _ORIGINAL_URL_RE.match(foto_url or '')
+    if not match:
+        return []
+    stem = match.group('stem')
+    original = foto_url[match.start('stem'):]
+    return [original] + [nombre_variante(stem, size) for size in VARIANT_SIZES]
+
+
+def hashes_de_avatar(*foto_urls):
+    """Hashes de contenido (stem) de las URLs que son uploads propios, sin repetir"""
+    hashes = []
+    for foto_url in foto_urls:
+        match = _ORIGINAL_URL_RE.match(foto_url or '')
+        if match and match.group('stem') not in hashes:
+            hashes.append(match.group('stem'))
+    return hashes
+
+
+def original_de_variante(storage, filename):
+    """
+    Si `filename` es una variante que todavía no existe, devuelve el nombre
+    del original; si no (no es variante, ya existe, o no hay original), None.
+    """
+    match = _VARIANTE_RE.match(filename)
+    if not match or int(match.group('size')) not in VARIANT_SIZES:
+        return None
+    if storage.exists(filename):
+        return None
+    stem = match.group('stem')
+    for ext in EXTENSIONES_ORIGINAL:
+        original = f"{stem}.{ext}"
+        if storage.exists(original):
+            return original
+    return None
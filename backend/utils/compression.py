@@ -0,0 +1,185 @@
+"""
+Compresión de respuestas HTTP (gzip / brotli)
+
+`init_compression(app)` registra un after_request que comprime las respuestas
+de /api/* según el Accept-Encoding del cliente:
+- brotli si el módulo `brotli` está instalado y el cliente lo acepta; si no,
+  gzip.
+- Solo tipos de contenido comprimibles (JSON, NDJSON, texto): las imágenes y
+  otros formatos ya comprimidos (avatares) se dejan tal cual.
+- Respuestas normales: solo a partir de COMPRESSION_MIN_SIZE bytes y si el
+  resultado es más chico que el original.
+- Respuestas en streaming: se comprime cada chunk a medida que se genera,
+  con flush para que el cliente lo reciba sin esperar al final.
+
+Un ETag fuerte se convierte en débil al comprimir (el cuerpo ya no es el
+mismo byte a byte). Las respuestas elegibles llevan Vary: Accept-Encoding
+aunque no se compriman por tamaño.
+
+Env vars:
+- COMPRESSION_ENABLED: true (default) | false
+- COMPRESSION_MIN_SIZE: bytes mínimos para comprimir (default 1024)
+- COMPRESSION_GZIP_LEVEL: 1-9 (default 6)
+- COMPRESSION_BROTLI_QUALITY: 0-11 (default 4)
+- COMPRESSION_PATHS: prefijos de ruta, separados por coma (default /api/)
+- COMPRESSION_MIMETYPES: tipos comprimibles, separados por coma
+- COMPRESSION_STREAMING: comprimir respuestas en streaming (default true)
+"""
+
+import os
+import zlib
+
+from flask import current_app, request
+
+from utils.metrics import record_compression
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_MIMETYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/plain',
+    'text/html',
+    'text/css',
+    'text/csv',
+    'text/event-stream',
+)
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in {'1', 'true', 'yes', 'on'}
+
+
+def _env_list(name, default):
+    value = os.getenv(name)
+    if not value:
+        return tuple(default)
+    return tuple(item.strip() for item in value.split(',') if item.strip())
+
+
+def gzip_compress(data, level=6):
+    """gzip en un solo paso (mismo formato que el de streaming)"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def brotli_compress(data, quality=4):
+    return brotli.compress(data, quality=quality)
+
+
+class _StreamCompressor:
+    """Compresor incremental: cada chunk sale comprimido y con flush"""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        if self.encoding == 'br':
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def _stream(iterable, compressor):
+    original = compressed = 0
+    try:
+        for data in iterable:
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            if not data:
+                continue
+            salida = compressor.chunk(data)
+            original += len(data)
+            compressed += len(salida)
+            yield salida
+        salida = compressor.finish()
+        compressed += len(salida)
+        yield salida
+    finally:
+        if hasattr(iterable, 'close'):
+            iterable.close()
+        record_compression(compressor.encoding, original, compressed)
+
+
+def _elegible(response, config):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if request.method == 'HEAD' or 'Content-Encoding' in response.headers:
+        return False
+    # send_file / send_from_directory: se deja al servidor (sendfile, rangos)
+    if response.direct_passthrough:
+        return False
+    if not request.path.startswith(config['paths']):
+        return False
+    return response.mimetype in config['mimetypes']
+
+
+def _encoding(config):
+    candidatos = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(candidatos)
+
+
+def _compress_response(response):
+    config = current_app.extensions['compression']
+    if not _elegible(response, config):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = _encoding(config)
+    if encoding is None:
+        return response
+    level = config['brotli_quality'] if encoding == 'br' else config['gzip_level']
+
+    if response.is_streamed:
+        if not config['streaming']:
+            return response
+        response.response = _stream(response.response, _StreamCompressor(encoding, level))
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['min_size']:
+            return response
+        if encoding == 'br':
+            compressed = brotli_compress(data, level)
+        else:
+            compressed = gzip_compress(data, level)
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        record_compression(encoding, len(data), len(compressed))
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Registra la compresión de respuestas en la app (ver docstring del módulo)"""
+    if not _env_bool('COMPRESSION_ENABLED', True):
+        return
+    app.extensions['compression'] = {
+        'min_size': int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),
+        'gzip_level': int(os.getenv('COMPRESSION_GZIP_LEVEL', 6)),
+        'brotli_quality': int(os.getenv('COMPRESSION_BROTLI_QUALITY', 4)),
+        'paths': _env_list('COMPRESSION_PATHS', ['/api/']),
+        'mimetypes': frozenset(_env_list('COMPRESSION_MIMETYPES', DEFAULT_MIMETYPES)),
+        'streaming': _env_bool('COMPRESSION_STREAMING', True),
+    }
+    app.after_request(_compress_response)
@@ -50,6 +50,8 @@ def rate_limit(max_requests=10, window_seconds=60):
             
             # Verificar si excede el límite
             if len(rate_limit_storage[client_id]) >= max_requests:
+                from utils.metrics import RATE_LIMIT_REJECTIONS_TOTAL
+                RATE_LIMIT_REJECTIONS_TOTAL.labels(endpoint=request.endpoint or f.__name__).inc()
                 return jsonify({
                     'success': False,
                     'error': f'Demasiadas solicitudes. Máximo {max_requests} por {window_seconds} segundos',
@@ -71,6 +73,9 @@ def require_role(required_role):
     """
     Decorador para verificar rol del usuario
     
+    Usa el claim `rol` del token (ver utils.auth.crear_token); los tokens
+    sin ese claim caen en el rol de current_user (cache de perfiles).
+    
     Args:
         required_role: rol requerido ('admin', 'user', etc.)
     
@@ -82,22 +87,20 @@ def require_role(required_role):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            from flask_jwt_extended import get_jwt_identity
-            from models import Usuario
-            
-            # Obtener usuario actual
-            user_id = get_jwt_identity()
-            user = Usuario.objects(id=user_id).first()
-            
-            if not user:
-                return jsonify({
-                    'success': False,
-                    'error': 'Usuario no autenticado',
-                    'code': 'AUTH_ERROR'
-                }), 401
+            from flask_jwt_extended import current_user, get_jwt
+            
+            rol = get_jwt().get('rol')
+            if rol is None:
+                if not current_user:
+                    return jsonify({
+                        'success': False,
+                        'error': 'Usuario no autenticado',
+                        'code': 'AUTH_ERROR'
+                    }), 401
+                rol = current_user.rol
             
             # Verificar rol
-            if user.rol != required_role:
+            if rol != required_role:
                 return jsonify({
                     'success': False,
                     'error': 'No tienes permisos para esta acción',
@@ -0,0 +1,51 @@
+"""
+Requests condicionales (ETag / If-None-Match) para endpoints que el frontend
+consulta periódicamente
+
+Cada endpoint calcula un token de versión barato (p. ej. último mensaje +
+contadores, o el updatedAt de los usuarios) antes de la consulta completa:
+- si coincide con If-None-Match se responde 304 sin cuerpo y sin armar ni
+  serializar la respuesta;
+- si no, se arma la respuesta normal y se le agrega el ETag.
+
+Las respuestas son por usuario: Cache-Control private, no-cache (el cliente
+puede guardarla pero debe revalidar siempre) y Vary: Authorization.
+"""
+
+import hashlib
+
+from flask import current_app, request
+
+from utils.metrics import record_cache_lookup
+
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*partes) -> str:
+    """Token de versión a partir de los valores que determinan la respuesta"""
+    texto = '|'.join('' if parte is None else str(parte) for parte in partes)
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:20]
+
+
+def _headers(response, etag):
+    # Débil: el cuerpo puede variar en bytes (encoder JSON, compresión) sin cambiar el contenido
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    response.vary.add('Authorization')
+    return response
+
+
+def not_modified(etag):
+    """
+    Respuesta 304 si el If-None-Match del request incluye `etag`; si no, None.
+    """
+    hit = request.if_none_match.contains_weak(etag)
+    record_cache_lookup('http_etag', hit)
+    if not hit:
+        return None
+    return _headers(current_app.response_class(status=304), etag)
+
+
+def with_etag(response, etag):
+    """Agrega ETag y Cache-Control a una respuesta 200"""
+    return _headers(response, etag)
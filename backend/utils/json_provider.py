@@ -0,0 +1,121 @@
+"""
+Proveedor JSON de Flask basado en orjson (opcional)
+
+`init_json_provider(app)` reemplaza el encoder de la stdlib que usa jsonify
+por orjson cuando está instalado (JSON_PROVIDER=auto, default) o cuando se
+pide explícitamente (JSON_PROVIDER=orjson). Con JSON_PROVIDER=stdlib se deja
+el de Flask. Igual que DefaultJSONProvider: claves ordenadas (`sort_keys`),
+date/datetime como fecha HTTP (RFC 822), Decimal/UUID como string e indentado
+según `compact` (None: solo en debug). Diferencias: los caracteres no ASCII
+salen en UTF-8 en lugar de escapados (\\uXXXX) y además se aceptan ObjectId,
+DBRef y sets.
+
+`json_fragment(data)` pre-codifica un dict que se repite muchas veces en una
+misma respuesta (p. ej. el emisor/receptor de cada mensaje de una
+conversación): con orjson >= 3.9 devuelve un orjson.Fragment que se copia tal
+cual en la salida en lugar de volver a serializarse. Sin orjson, o fuera de una
+app que lo use, devuelve el mismo dict.
+"""
+
+import os
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+from bson import DBRef, ObjectId
+from flask import current_app, has_app_context
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    """Tipos que orjson no serializa por sí solo"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, DBRef):
+        return str(obj.id)
+    if isinstance(obj, (Decimal, UUID)):
+        return str(obj)
+    if isinstance(obj, date):
+        # Como Flask (orjson los pasa acá por OPT_PASSTHROUGH_DATETIME)
+        return http_date(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """JSONProvider de Flask que codifica con orjson"""
+
+    mimetype = 'application/json'
+    supports_fragments = orjson is not None and hasattr(orjson, 'Fragment')
+    # Mismos atributos que DefaultJSONProvider
+    sort_keys = True
+    compact = None
+
+    def _options(self, pretty=False, sort_keys=None):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys if sort_keys is None else sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def _encode(self, obj, pretty=False, sort_keys=None):
+        return orjson.dumps(obj, default=_default, option=self._options(pretty, sort_keys))
+
+    def dumps(self, obj, **kwargs):
+        return self._encode(obj, pretty=bool(kwargs.get('indent')), sort_keys=kwargs.get('sort_keys')).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Igual que el proveedor por defecto: compact=None indenta solo en debug
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(self._encode(obj, pretty) + b'\n', mimetype=self.mimetype)
+
+    def fragment(self, data):
+        if not self.supports_fragments:
+            return data
+        return orjson.Fragment(self._encode(data))
+
+
+def json_fragment(data):
+    """
+    Pre-codifica `data` si el proveedor JSON de la app lo permite.
+
+    Usar solo para valores que van directo a la respuesta (no se pueden
+    inspeccionar ni modificar después).
+    """
+    if data is None or not has_app_context():
+        return data
+    provider = current_app.json
+    if isinstance(provider, OrjsonProvider):
+        return provider.fragment(data)
+    return data
+
+
+def init_json_provider(app):
+    """
+    Configura el proveedor JSON de la app.
+
+    Env vars:
+    - JSON_PROVIDER: auto (default, orjson si está instalado) | orjson | stdlib
+    """
+    modo = os.getenv('JSON_PROVIDER', 'auto').lower()
+    if modo not in {'auto', 'orjson', 'stdlib'}:
+        raise ValueError(f"JSON_PROVIDER: valor desconocido {modo!r} (auto, orjson, stdlib)")
+    if modo == 'orjson' and orjson is None:
+        raise RuntimeError("JSON_PROVIDER=orjson pero orjson no está instalado")
+    if modo == 'stdlib' or orjson is None:
+        return
+    app.json = OrjsonProvider(app)
@@ -0,0 +1,180 @@
+"""
+Configuración de logging estructurado
+
+- Formato JSON lines (un objeto por línea) o texto para desarrollo.
+- Nivel configurable (LOG_LEVEL).
+- Muestreo de DEBUG/INFO a alto volumen: por cada logger pasan los primeros
+  LOG_SAMPLE_BURST registros de cada segundo y, superado ese umbral, solo una
+  fracción LOG_SAMPLE_RATE. WARNING y superiores nunca se descartan.
+- No bloqueante: los handlers de la app solo encolan el registro
+  (QueueHandler); un hilo aparte (QueueListener) formatea y escribe.
+- Después de un fork (workers de gunicorn con preload_app) el hijo no hereda
+  el hilo: se arranca uno propio con una cola nueva (os.register_at_fork).
+
+Uso:
+    from utils.logging_config import configure_logging
+    configure_logging()
+
+    logger = logging.getLogger(__name__)
+    logger.info("Mensaje enviado", extra={'mensaje_id': str(mensaje.id)})
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# Atributos estándar de LogRecord: el resto viene de `extra` y se serializa aparte
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como un objeto JSON en una sola línea"""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class StructuredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler que conserva los campos de `extra` y deja el traceback en
+    exc_text (el QueueHandler estándar los mezcla en el texto del mensaje).
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Limita registros DEBUG/INFO por logger cuando el volumen es alto.
+
+    Args:
+        burst: registros por segundo y logger que pasan siempre
+        rate: fracción (0-1) de los registros que pasan por encima del burst
+    """
+
+    def __init__(self, burst=100, rate=0.1):
+        super().__init__()
+        self.burst = burst
+        self.rate = rate
+        self._lock = threading.Lock()
+        self._windows = {}  # logger -> (segundo, cantidad)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        second = int(time.monotonic())
+        with self._lock:
+            window_second, count = self._windows.get(record.name, (second, 0))
+            if window_second != second:
+                window_second, count = second, 0
+            count += 1
+            self._windows[record.name] = (window_second, count)
+        if count <= self.burst:
+            return True
+        return random.random() < self.rate
+
+
+def configure_logging(level=None, fmt=None, stream=None):
+    """
+    Configura el logger raíz con un QueueHandler y un QueueListener que escribe en stream.
+
+    Env vars:
+    - LOG_LEVEL (default INFO)
+    - LOG_FORMAT: json (default) | text
+    - LOG_SAMPLE_BURST (default 100) / LOG_SAMPLE_RATE (default 0.1)
+
+    Es idempotente: si se llama de nuevo reemplaza la configuración anterior.
+    """
+    global _listener, _queue_handler
+
+    level = (level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    fmt = (fmt or os.getenv('LOG_FORMAT', 'json')).lower()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if fmt == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(name)s] %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = StructuredQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(
+        burst=int(os.getenv('LOG_SAMPLE_BURST', 100)),
+        rate=float(os.getenv('LOG_SAMPLE_RATE', 0.1)),
+    ))
+
+    # Solo se reemplaza el handler propio (no los de pytest/gunicorn)
+    shutdown_logging()
+    root = logging.getLogger()
+    _queue_handler = queue_handler
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Quita el handler y detiene el hilo de escritura vaciando la cola (se llama también al salir)"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _reiniciar_despues_de_fork():
+    """
+    En el hijo de un fork el QueueListener copiado no tiene hilo: sin esto los
+    registros se encolan y nadie los escribe. Se arranca un listener nuevo
+    sobre una cola nueva (lo que quedaba en la copia es del padre).
+    """
+    global _listener
+    if _listener is None or _queue_handler is None:
+        return
+    log_queue = queue.SimpleQueue()
+    _queue_handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reiniciar_despues_de_fork)
@@ -0,0 +1,165 @@
+"""
+Métricas del backend (formato Prometheus)
+
+Las métricas se definen una sola vez a nivel de módulo y se actualizan desde
+los listeners de pymongo y los hooks de Flask. `init_metrics(app)` registra
+los hooks y el endpoint GET /metrics.
+
+Con gunicorn (varios procesos) definir PROMETHEUS_MULTIPROC_DIR apuntando a un
+directorio vacío antes de arrancar: cada worker escribe sus valores ahí y
+/metrics los agrega (ver gunicorn.conf.py).
+"""
+
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+
+_SIZE_BUCKETS = (100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000, 5_000_000)
+
+# HTTP: una serie por blueprint + regla de ruta (no por URL, para acotar cardinalidad)
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Latencia de las requests HTTP',
+    ['blueprint', 'route', 'method', 'status'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUEST_SIZE_BYTES = Histogram(
+    'http_request_size_bytes',
+    'Tamaño del body de las requests HTTP',
+    ['blueprint', 'route', 'method'],
+    buckets=_SIZE_BUCKETS,
+)
+HTTP_RESPONSE_SIZE_BYTES = Histogram(
+    'http_response_size_bytes',
+    'Tamaño del body de las respuestas HTTP',
+    ['blueprint', 'route', 'method'],
+    buckets=_SIZE_BUCKETS,
+)
+# Compresión de respuestas (utils.compression): bytes antes y después de comprimir
+HTTP_RESPONSE_COMPRESSION_BYTES = Counter(
+    'http_response_compression_bytes_total',
+    'Bytes de respuestas comprimidas, antes (original) y después (compressed)',
+    ['encoding', 'stage'],
+)
+
+# Comandos de MongoDB (CommandListener, ver utils.mongo_monitoring)
+MONGO_COMMANDS_TOTAL = Counter(
+    'mongo_commands_total',
+    'Comandos enviados a MongoDB',
+    ['alias', 'command', 'collection', 'status'],
+)
+MONGO_COMMAND_DURATION_SECONDS = Histogram(
+    'mongo_command_duration_seconds',
+    'Duración de los comandos de MongoDB',
+    ['alias', 'command', 'collection'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# Caches en memoria: hit rate = hits / (hits + misses)
+CACHE_REQUESTS_TOTAL = Counter(
+    'cache_requests_total',
+    'Consultas a caches en memoria',
+    ['cache', 'result'],
+)
+
+# Rate limiting (utils.decorators.rate_limit)
+RATE_LIMIT_REJECTIONS_TOTAL = Counter(
+    'rate_limit_rejections_total',
+    'Requests rechazadas por rate limit',
+    ['endpoint'],
+)
+
+
+# Pool de conexiones a MongoDB (por alias de mongoengine: default / logs)
+MONGO_POOL_CONNECTIONS_IN_USE = Gauge(
+    'mongo_pool_connections_in_use',
+    'Conexiones del pool de MongoDB actualmente prestadas',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+MONGO_POOL_CONNECTIONS_OPEN = Gauge(
+    'mongo_pool_connections_open',
+    'Conexiones abiertas en el pool de MongoDB',
+    ['alias'],
+    multiprocess_mode='livesum',
+)
+MONGO_POOL_CHECKOUT_WAIT_SECONDS = Histogram(
+    'mongo_pool_checkout_wait_seconds',
+    'Tiempo de espera para obtener una conexión del pool de MongoDB',
+    ['alias'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+MONGO_POOL_CHECKOUT_FAILURES = Counter(
+    'mongo_pool_checkout_failures_total',
+    'Checkouts fallidos del pool de MongoDB (timeout, pool cerrado, error de conexión)',
+    ['alias', 'reason'],
+)
+
+
+def record_cache_lookup(cache, hit):
+    """Registra un hit o miss de un cache en memoria"""
+    CACHE_REQUESTS_TOTAL.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+def record_compression(encoding, original, compressed):
+    """Registra los bytes de una respuesta comprimida"""
+    HTTP_RESPONSE_COMPRESSION_BYTES.labels(encoding=encoding, stage='original').inc(original)
+    HTTP_RESPONSE_COMPRESSION_BYTES.labels(encoding=encoding, stage='compressed').inc(compressed)
+
+
+def _route_labels():
+    rule = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    return request.blueprint or 'app', rule, request.method
+
+
+def _before_request():
+    g._metrics_start = time.perf_counter()
+
+
+def _after_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is None or request.path == '/metrics':
+        return response
+
+    blueprint, route, method = _route_labels()
+    HTTP_REQUEST_DURATION_SECONDS.labels(
+        blueprint=blueprint, route=route, method=method, status=str(response.status_code)
+    ).observe(time.perf_counter() - start)
+    HTTP_REQUEST_SIZE_BYTES.labels(
+        blueprint=blueprint, route=route, method=method
+    ).observe(request.content_length or 0)
+    # Las respuestas en streaming no tienen tamaño conocido
+    if not response.is_streamed:
+        HTTP_RESPONSE_SIZE_BYTES.labels(
+            blueprint=blueprint, route=route, method=method
+        ).observe(response.calculate_content_length() or 0)
+    return response
+
+
+def metrics_view():
+    """GET /metrics en formato de texto de Prometheus"""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app):
+    """Registra los hooks de medición y el endpoint /metrics en la app"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
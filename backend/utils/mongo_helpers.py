@@ -2,8 +2,35 @@
 Helper functions para consultas de MongoEngine que evitan problemas de thread local
 Usa pymongo directamente para evitar problemas de thread local
 """
+import logging
+
 from bson import ObjectId
 
+logger = logging.getLogger(__name__)
+
+
+def _usuario_desde_doc(user_doc):
+    """
+    Crea un Usuario desde el documento de pymongo, sin seguidores ni siguiendo
+    (no se dereferencian)
+    """
+    from models import Usuario
+    
+    usuario = Usuario()
+    usuario.id = user_doc['_id']
+    usuario.nickName = user_doc.get('nickName', '')
+    usuario.nombre = user_doc.get('nombre', '')
+    usuario.apellido = user_doc.get('apellido', '')
+    usuario.mail = user_doc.get('mail', '')
+    usuario.biografia = user_doc.get('biografia', '')
+    usuario.fotoUsuario = user_doc.get('fotoUsuario', '')
+    usuario.fotoUsuarioPortada = user_doc.get('fotoUsuarioPortada', '')
+    usuario.fechaDeCreado = user_doc.get('fechaDeCreado', None)
+    usuario.rol = user_doc.get('rol', 'user')
+    usuario.seguidores = []
+    usuario.siguiendo = []
+    return usuario
+
 
 def get_usuario_by_id(usuario_id):
     """
@@ -18,33 +45,15 @@ def get_usuario_by_id(usuario_id):
         except:
             oid = usuario_id
         
-        print(f"🔍 Buscando usuario con ID: {oid} (tipo: {type(oid)})")
-        
         # Intentar primero con pymongo directamente para evitar problemas de thread local
         try:
             db = get_db('default')
             user_doc = db.usuarios.find_one({'_id': oid})
             if user_doc:
-                print(f"✅ Usuario encontrado con pymongo: {user_doc.get('nickName', 'N/A')}")
-                # Crear objeto Usuario desde el documento
-                usuario = Usuario()
-                usuario.id = user_doc['_id']
-                usuario.nickName = user_doc.get('nickName', '')
-                usuario.nombre = user_doc.get('nombre', '')
-                usuario.apellido = user_doc.get('apellido', '')
-                usuario.mail = user_doc.get('mail', '')
-                usuario.biografia = user_doc.get('biografia', '')
-                usuario.fotoUsuario = user_doc.get('fotoUsuario', '')
-                usuario.fotoUsuarioPortada = user_doc.get('fotoUsuarioPortada', '')
-                usuario.fechaDeCreado = user_doc.get('fechaDeCreado', None)
-                usuario.rol = user_doc.get('rol', 'user')
-                usuario.seguidores = []
-                usuario.siguiendo = []
-                return usuario
-            else:
-                print(f"❌ Usuario no encontrado con pymongo para ID: {oid}")
+                return _usuario_desde_doc(user_doc)
+            logger.debug("Usuario no encontrado con pymongo", extra={'usuario_id': str(oid)})
         except Exception as e:
-            print(f"⚠️ Error usando pymongo: {e}")
+            logger.warning("Error buscando usuario con pymongo: %s", e, extra={'usuario_id': str(oid)})
         
         # Fallback: intentar obtener con MongoEngine sin select_related para evitar thread local
         try:
@@ -52,21 +61,44 @@ def get_usuario_by_id(usuario_id):
             usuarios = list(Usuario.objects(id=oid).limit(1))
             if usuarios:
                 usuario = usuarios[0]
-                print(f"✅ Usuario encontrado con MongoEngine: {usuario.nickName}")
                 return usuario
-            else:
-                print(f"❌ Usuario no encontrado con MongoEngine para ID: {oid}")
+            logger.debug("Usuario no encontrado con MongoEngine", extra={'usuario_id': str(oid)})
         except Exception as e:
-            print(f"⚠️ Error en fallback MongoEngine: {e}")
+            logger.warning("Error en fallback MongoEngine: %s", e, extra={'usuario_id': str(oid)})
         
         return None
     except Exception as e:
-        print(f"❌ Error en get_usuario_by_id: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error en get_usuario_by_id")
         return None
 
 
+def get_usuarios_by_ids(usuario_ids):
+    """
+    Obtiene muchos usuarios con un solo find por $in (mismo armado que
+    get_usuario_by_id)
+    
+    Returns:
+        Dict {ID como string: Usuario}; los IDs inexistentes no aparecen
+    """
+    from mongoengine.connection import get_db
+    
+    oids = []
+    for usuario_id in usuario_ids:
+        try:
+            oids.append(ObjectId(usuario_id))
+        except:
+            oids.append(usuario_id)
+    if not oids:
+        return {}
+    
+    try:
+        docs = get_db('default').usuarios.find({'_id': {'$in': oids}})
+        return {str(doc['_id']): _usuario_desde_doc(doc) for doc in docs}
+    except Exception as e:
+        logger.exception("Error en get_usuarios_by_ids")
+        return {}
+
+
 def get_usuario_by_nickname(nickname):
     """
     Obtiene un usuario por nickname de forma segura usando pymongo directamente
@@ -100,7 +132,7 @@ def get_usuario_by_nickname(nickname):
         
         return None
     except Exception as e:
-        print(f"Error en get_usuario_by_nickname: {e}")
+        logger.warning("Error en get_usuario_by_nickname: %s", e)
         return None
 
 
@@ -119,7 +151,7 @@ def get_mensaje_privado_by_id(mensaje_id):
         except:
             oid = mensaje_id
         
-        msg_doc = db.mensajes_privados.find_one({'_id': oid})
+        msg_doc = db.mensajes_privados.find_one({'_id': oid, 'eliminado': None})
         
         if msg_doc:
             # Crear objeto MensajePrivado manualmente para evitar auto-dereferencing
@@ -0,0 +1,177 @@
+"""
+Listeners de monitoreo de pymongo
+
+Se registran al crear cada MongoClient (ver db.connect_databases) y publican
+el estado del pool de conexiones y los comandos ejecutados en utils.metrics.
+"""
+
+import threading
+import time
+
+from pymongo import monitoring
+
+from utils.metrics import (
+    MONGO_COMMANDS_TOTAL,
+    MONGO_COMMAND_DURATION_SECONDS,
+    MONGO_POOL_CONNECTIONS_IN_USE,
+    MONGO_POOL_CONNECTIONS_OPEN,
+    MONGO_POOL_CHECKOUT_WAIT_SECONDS,
+    MONGO_POOL_CHECKOUT_FAILURES,
+)
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """
+    Listener del pool de conexiones de un alias de mongoengine.
+
+    Mide el tiempo de espera de cada checkout (desde que se pide la conexión
+    hasta que se obtiene) y lleva la cuenta de conexiones abiertas y en uso.
+    Los eventos de checkout se publican en el hilo que pide la conexión, por
+    eso el inicio de la espera se guarda en un thread-local.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.in_use = 0
+        self.open = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def snapshot(self):
+        """Estado del pool en este proceso (para /health)"""
+        with self._lock:
+            avg_wait = self.total_wait_seconds / self.checkouts if self.checkouts else 0.0
+            return {
+                'in_use': self.in_use,
+                'open': self.open,
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'avg_wait_ms': round(avg_wait * 1000, 3),
+                'max_wait_ms': round(self.max_wait_seconds * 1000, 3),
+            }
+
+    # Ciclo de vida del pool
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    # Ciclo de vida de las conexiones
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+        MONGO_POOL_CONNECTIONS_OPEN.labels(alias=self.alias).inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open = max(self.open - 1, 0)
+        MONGO_POOL_CONNECTIONS_OPEN.labels(alias=self.alias).dec()
+
+    # Checkout / checkin
+    def connection_check_out_started(self, event):
+        self._local.started_at = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._local.started_at = None
+        with self._lock:
+            self.checkout_failures += 1
+        MONGO_POOL_CHECKOUT_FAILURES.labels(alias=self.alias, reason=str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        started_at = getattr(self._local, 'started_at', None)
+        self._local.started_at = None
+        wait = time.perf_counter() - started_at if started_at is not None else 0.0
+        with self._lock:
+            self.in_use += 1
+            self.checkouts += 1
+            self.total_wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
+        MONGO_POOL_CONNECTIONS_IN_USE.labels(alias=self.alias).inc()
+        MONGO_POOL_CHECKOUT_WAIT_SECONDS.labels(alias=self.alias).observe(wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+        MONGO_POOL_CONNECTIONS_IN_USE.labels(alias=self.alias).dec()
+
+
+def command_collection(command_name, command):
+    """
+    Nombre de la colección de un comando de MongoDB.
+
+    En find/insert/update/delete/aggregate/count... es el valor del propio
+    comando ({'find': 'usuarios', ...}); getMore lo lleva en 'collection'.
+    """
+    if command_name == 'getMore':
+        value = command.get('collection')
+    else:
+        value = command.get(command_name)
+    return value if isinstance(value, str) else '-'
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    Listener de comandos de un alias: cuenta comandos y mide su duración
+    por colección. El nombre de la colección solo viene en el evento de
+    inicio, así que se guarda por request_id hasta el evento de fin.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self._pending = {}
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = command_collection(
+            event.command_name, event.command
+        )
+
+    def _finish(self, event, status):
+        collection = self._pending.pop((event.connection_id, event.request_id), '-')
+        MONGO_COMMANDS_TOTAL.labels(
+            alias=self.alias, command=event.command_name, collection=collection, status=status
+        ).inc()
+        MONGO_COMMAND_DURATION_SECONDS.labels(
+            alias=self.alias, command=event.command_name, collection=collection
+        ).observe(event.duration_micros / 1_000_000)
+
+    def succeeded(self, event):
+        self._finish(event, 'ok')
+
+    def failed(self, event):
+        self._finish(event, 'error')
+
+
+# Un listener por alias; se reutiliza si el proceso se reconecta (post_fork)
+_pool_listeners = {}
+_command_listeners = {}
+
+
+def get_pool_listener(alias):
+    if alias not in _pool_listeners:
+        _pool_listeners[alias] = PoolMetricsListener(alias)
+    return _pool_listeners[alias]
+
+
+def get_command_listener(alias):
+    if alias not in _command_listeners:
+        _command_listeners[alias] = CommandMetricsListener(alias)
+    return _command_listeners[alias]
+
+
+def pool_snapshot():
+    """Estado de todos los pools de este proceso"""
+    return {alias: listener.snapshot() for alias, listener in _pool_listeners.items()}
@@ -0,0 +1,124 @@
+"""
+Hash de contraseñas configurable, con rehash al login y pool de procesos
+
+- El esquema y su costo salen de PASSWORD_HASH_METHOD con el formato de
+  Werkzeug (`scrypt:n:r:p` o `pbkdf2:hash:iteraciones`). Los hashes
+  guardados llevan su método, así que los viejos se siguen verificando.
+- `necesita_rehash(hash)`: el hash guardado usa otro esquema o costo que el
+  configurado. El login (routes/auth.py) lo rehashea con la contraseña en
+  claro que acaba de verificar.
+- Con PASSWORD_HASH_WORKERS > 0, hash y verificación corren en un pool de
+  procesos acotado: el trabajo de CPU no compite con los threads que
+  atienden requests de I/O y como mucho PASSWORD_HASH_WORKERS hashes corren
+  a la vez. Los requests que esperan un lugar más de PASSWORD_HASH_TIMEOUT
+  segundos reciben PoolDeHashSaturado (503 en la ruta).
+
+Env vars:
+- PASSWORD_HASH_METHOD: default `scrypt` (el default de Werkzeug, 2**15:8:1)
+- PASSWORD_HASH_WORKERS: procesos del pool (default 0: en el thread del request)
+- PASSWORD_HASH_QUEUE: hashes en cola por encima de los workers (default 4x workers)
+- PASSWORD_HASH_TIMEOUT: segundos de espera por un lugar en el pool (default 5)
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+_dummy_hashes = {}
+
+
+class PoolDeHashSaturado(Exception):
+    """No hubo lugar en el pool de hash dentro del timeout"""
+
+
+def metodo_configurado():
+    """PASSWORD_HASH_METHOD con todos sus parámetros (como queda en el hash)"""
+    metodo, *args = os.getenv('PASSWORD_HASH_METHOD', 'scrypt').split(':')
+    if metodo == 'scrypt':
+        # Como en pbkdf2, los parámetros que faltan toman el default (scrypt:16384 -> 16384:8:1):
+        # Werkzeug exige los tres
+        n = int(args[0]) if args else 2 ** 15
+        r = int(args[1]) if len(args) > 1 else 8
+        p = int(args[2]) if len(args) > 2 else 1
+        return f"scrypt:{n}:{r}:{p}"
+    if metodo == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"PASSWORD_HASH_METHOD: método desconocido {metodo!r} (scrypt, pbkdf2)")
+
+
+def necesita_rehash(password_hash):
+    """True si `password_hash` no usa el método y costo configurados"""
+    return password_hash.split('$', 1)[0] != metodo_configurado()
+
+
+def _get_pool():
+    # Se crea en el primer login: bajo gunicorn, ya dentro del worker
+    global _pool, _pool_slots
+    workers = int(os.getenv('PASSWORD_HASH_WORKERS', 0))
+    if workers <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            cola = int(os.getenv('PASSWORD_HASH_QUEUE', 4 * workers))
+            # spawn: no heredar locks de los threads del worker al hacer fork
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _pool_slots = threading.BoundedSemaphore(workers + cola)
+        return _pool
+
+
+def _ejecutar(fn, *args):
+    pool = _get_pool()
+    if pool is None:
+        return fn(*args)
+    if not _pool_slots.acquire(timeout=float(os.getenv('PASSWORD_HASH_TIMEOUT', 5))):
+        logger.warning("Pool de hash de contraseñas saturado")
+        raise PoolDeHashSaturado()
+    try:
+        return pool.submit(fn, *args).result()
+    finally:
+        _pool_slots.release()
+
+
+def hash_password(password):
+    """Hash de `password` con el método configurado"""
+    return _ejecutar(generate_password_hash, password, metodo_configurado())
+
+
+def verificar_password(password_hash, password):
+    """Compara `password` con el hash guardado (con su propio método)"""
+    if not password_hash:
+        return False
+    return _ejecutar(check_password_hash, password_hash, password)
+
+
+def verificar_password_falsa(password):
+    """
+    Verificación contra un hash descartable, para que un login con usuario
+    inexistente tarde lo mismo que uno con contraseña incorrecta.
+    """
+    # Uno por método: si cambia PASSWORD_HASH_METHOD, el costo sigue al de los hashes nuevos
+    metodo = metodo_configurado()
+    if metodo not in _dummy_hashes:
+        _dummy_hashes[metodo] = hash_password('usuario-inexistente')
+    verificar_password(_dummy_hashes[metodo], password)
+    return False
+
+
+def shutdown_pool():
+    """Cierra el pool (tests, benchmarks o al terminar el worker)"""
+    global _pool, _pool_slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = _pool_slots = None
@@ -0,0 +1,214 @@
+"""
+Presupuesto de consultas por request y detector de N+1
+
+Un CommandListener de pymongo registra cada comando de datos ejecutado dentro
+de una request de Flask. Al terminar la request se compara contra el
+presupuesto configurado:
+- total de consultas > QUERY_BUDGET_MAX_QUERIES, o
+- la misma "forma" de consulta (comando + colección + estructura del filtro,
+  sin valores) repetida más de QUERY_BUDGET_MAX_REPEATS veces (patrón N+1).
+
+Por defecto solo se registra un warning; con QUERY_BUDGET_STRICT (tests) se
+lanza QueryBudgetExceeded. Un endpoint puede ajustar su presupuesto con el
+decorador @query_budget(max_queries=..., max_repeats=...).
+"""
+
+import contextvars
+import json
+import logging
+import os
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, g, request
+from pymongo import monitoring
+
+
+logger = logging.getLogger(__name__)
+
+# Comandos que cuentan como consulta (getMore continúa un cursor ya contado)
+DATA_COMMANDS = {
+    'find', 'aggregate', 'count', 'distinct',
+    'insert', 'update', 'delete', 'findAndModify',
+}
+
+# Trackers activos en el contexto actual (se permiten anidados: request + fixture de test)
+_active_trackers = contextvars.ContextVar('query_trackers', default=())
+
+
+class QueryBudgetExceeded(Exception):
+    """Se superó el presupuesto de consultas de un endpoint (modo estricto)"""
+
+
+def _shape(value):
+    """Estructura de un filtro sin los valores: {'_id': {'$in': '?'}}"""
+    if isinstance(value, dict):
+        return {key: _shape(val) for key, val in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_shape(val) for val in value[:1]] if value and isinstance(value[0], dict) else '?'
+    return '?'
+
+
+def query_shape(command_name, command):
+    """Clave que identifica consultas equivalentes salvo por sus valores"""
+    collection = command.get(command_name)
+    if command_name == 'find':
+        filtro = command.get('filter', {})
+    elif command_name == 'count':
+        filtro = command.get('query', {})
+    elif command_name == 'aggregate':
+        filtro = [list(stage.keys())[0] for stage in command.get('pipeline', [])]
+    elif command_name == 'update':
+        filtro = [_shape(u.get('q', {})) for u in command.get('updates', [])[:1]]
+    elif command_name == 'delete':
+        filtro = [_shape(d.get('q', {})) for d in command.get('deletes', [])[:1]]
+    elif command_name == 'findAndModify':
+        filtro = command.get('query', {})
+    else:
+        filtro = {}
+    return f"{command_name}:{collection}:{json.dumps(_shape(filtro), sort_keys=True)}"
+
+
+class QueryTracker:
+    """Consultas ejecutadas mientras el tracker está activo"""
+
+    def __init__(self):
+        self.shapes = Counter()
+
+    @property
+    def total(self):
+        return sum(self.shapes.values())
+
+    def record(self, command_name, command):
+        self.shapes[query_shape(command_name, command)] += 1
+
+    def repeated(self, max_repeats):
+        """Formas de consulta repetidas más de max_repeats veces"""
+        return {shape: n for shape, n in self.shapes.items() if n > max_repeats}
+
+    def __enter__(self):
+        self._token = _active_trackers.set(_active_trackers.get() + (self,))
+        return self
+
+    def __exit__(self, *exc):
+        _active_trackers.reset(self._token)
+        return False
+
+
+class QueryBudgetListener(monitoring.CommandListener):
+    """
+    Envía cada comando de datos a los trackers activos.
+
+    pymongo publica el evento de inicio en el hilo que ejecuta la operación,
+    así que el contextvar corresponde a la request que hizo la consulta.
+    """
+
+    def started(self, event):
+        if event.command_name not in DATA_COMMANDS:
+            return
+        for tracker in _active_trackers.get():
+            tracker.record(event.command_name, event.command)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+_listener = QueryBudgetListener()
+
+
+def get_query_budget_listener():
+    return _listener
+
+
+def query_budget(max_queries=None, max_repeats=None):
+    """
+    Ajusta el presupuesto de consultas de un endpoint
+
+    Usage:
+        @query_budget(max_queries=5)
+        def my_endpoint():
+            ...
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            return f(*args, **kwargs)
+
+        decorated_function._query_budget = {'max_queries': max_queries, 'max_repeats': max_repeats}
+        return decorated_function
+    return decorator
+
+
+def _budget_for_endpoint():
+    config = current_app.config
+    budget = {
+        'max_queries': config['QUERY_BUDGET_MAX_QUERIES'],
+        'max_repeats': config['QUERY_BUDGET_MAX_REPEATS'],
+    }
+    view = current_app.view_functions.get(request.endpoint)
+    # Los decoradores con @wraps copian __dict__, así que el atributo sobrevive a jwt_required
+    overrides = getattr(view, '_query_budget', {}) if view else {}
+    budget.update({key: value for key, value in overrides.items() if value is not None})
+    return budget
+
+
+def check_budget(tracker, endpoint, max_queries, max_repeats, strict=False):
+    """Registra (o lanza, en modo estricto) los excesos de presupuesto de un tracker"""
+    problemas = []
+    if tracker.total > max_queries:
+        problemas.append(f"{tracker.total} consultas (máximo {max_queries})")
+    for shape, n in tracker.repeated(max_repeats).items():
+        problemas.append(f"posible N+1: {shape} x{n} (máximo {max_repeats})")
+
+    if not problemas:
+        return
+    mensaje = f"Presupuesto de consultas excedido en {endpoint}: " + "; ".join(problemas)
+    if strict:
+        raise QueryBudgetExceeded(mensaje)
+    logger.warning(mensaje, extra={'endpoint': endpoint, 'query_count': tracker.total})
+
+
+def _before_request():
+    tracker = QueryTracker()
+    tracker.__enter__()
+    g._query_tracker = tracker
+
+
+def _after_request(response):
+    tracker = g.get('_query_tracker')
+    if tracker is not None and request.endpoint:
+        budget = _budget_for_endpoint()
+        check_budget(
+            tracker, request.endpoint, budget['max_queries'], budget['max_repeats'],
+            strict=current_app.config['QUERY_BUDGET_STRICT'],
+        )
+    return response
+
+
+def _teardown_request(_exc):
+    tracker = g.pop('_query_tracker', None)
+    if tracker is not None:
+        tracker.__exit__(None, None, None)
+
+
+def init_query_budget(app):
+    """
+    Registra el control de presupuesto de consultas en la app.
+
+    Env vars:
+    - QUERY_BUDGET_MAX_QUERIES (default 20)
+    - QUERY_BUDGET_MAX_REPEATS (default 5)
+    - QUERY_BUDGET_STRICT (default false): lanzar QueryBudgetExceeded en lugar de loguear
+    """
+    app.config.setdefault('QUERY_BUDGET_MAX_QUERIES', int(os.getenv('QUERY_BUDGET_MAX_QUERIES', 20)))
+    app.config.setdefault('QUERY_BUDGET_MAX_REPEATS', int(os.getenv('QUERY_BUDGET_MAX_REPEATS', 5)))
+    app.config.setdefault(
+        'QUERY_BUDGET_STRICT',
+        os.getenv('QUERY_BUDGET_STRICT', 'false').lower() in {'1', 'true', 'yes', 'on'},
+    )
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,75 @@
+"""
+Read-your-writes entre workers
+
+`db.pin_to_primary` manda al primario las lecturas de un usuario que acaba de
+escribir. La marca no se guarda en el proceso: con varios workers de gunicorn
+la request que recarga la conversación suele caer en otro. En cambio viaja
+con el cliente:
+
+- after_request: si la request fijó usuarios al primario, la respuesta lleva
+  el header X-Primary-Pin con {usuario_id: vencimiento} firmado con SECRET_KEY.
+- before_request: el cliente devuelve ese header y las marcas vigentes se
+  cargan en flask.g (db.request_pins), cualquiera sea el worker.
+
+Un vencimiento más lejano que MONGODB_MAX_STALENESS_SECONDS se descarta: un
+token viejo o manipulado no deja a nadie en el primario más que la ventana.
+"""
+
+import logging
+import time
+
+from flask import current_app, g, request
+from itsdangerous import BadSignature, URLSafeSerializer
+
+from db import max_staleness_seconds, request_pins
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'X-Primary-Pin'
+SALT = 'read-your-writes'
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=SALT)
+
+
+def emitir_token(pins):
+    """Token firmado con {usuario_id: vencimiento}"""
+    return _serializer().dumps({usuario_id: round(vence, 3) for usuario_id, vence in pins.items()})
+
+
+def leer_token(token, ahora=None):
+    """Marcas vigentes del token; {} si es inválido o venció"""
+    try:
+        pins = _serializer().loads(token)
+    except BadSignature:
+        return {}
+    if not isinstance(pins, dict):
+        return {}
+    ahora = time.time() if ahora is None else ahora
+    limite = ahora + max_staleness_seconds()
+    return {
+        str(usuario_id): float(vence) for usuario_id, vence in pins.items()
+        if isinstance(vence, (int, float)) and ahora < vence <= limite
+    }
+
+
+def _cargar_pins():
+    token = request.headers.get(HEADER)
+    pins = request_pins()
+    if token and pins is not None:
+        pins.update(leer_token(token))
+    g.primary_pins_cliente = dict(pins or {})
+
+
+def _devolver_pins(response):
+    pins = request_pins()
+    if pins and pins != g.get('primary_pins_cliente'):
+        response.headers[HEADER] = emitir_token(pins)
+    return response
+
+
+def init_read_your_writes(app):
+    """Registra la carga y devolución de las marcas (ver docstring del módulo)"""
+    app.before_request(_cargar_pins)
+    app.after_request(_devolver_pins)
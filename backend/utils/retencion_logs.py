@@ -0,0 +1,110 @@
+"""
+Retención de logs_db: TTL por nivel y colección time-series opcional
+
+- Un índice TTL parcial sobre `timestamp` por nivel (`ttl_<nivel>`, con
+  partialFilterExpression {level: <nivel>}): MongoDB borra solo cada nivel a
+  su tiempo. Requiere MongoDB >= 5.0 (varios índices parciales con la misma
+  clave).
+- Con LOG_TIMESERIES=1 la colección `logs` se crea como time-series
+  (timeField `timestamp`, metaField `level`): menos espacio e inserts más
+  baratos. Los TTL parciales siguen funcionando porque filtran por el
+  metaField (MongoDB >= 6.3; docker-compose usa 7.0). Una colección ya
+  existente no se convierte: hay que migrarla a mano.
+- jobs.archivar_logs guarda en JSONL comprimido los logs que están por
+  vencer, antes de que el TTL los borre.
+
+`asegurar_retencion_logs()` deja los índices como dice la configuración
+(crea, cambia el vencimiento con collMod o borra). La llaman init_db y el
+job de archivo.
+
+Env vars:
+- LOG_TTL_DAYS: días por nivel, default
+  "DEBUG=7,INFO=30,WARNING=90,ERROR=365,CRITICAL=365"; 0 o un nivel ausente
+  = sin vencimiento
+- LOG_TIMESERIES: crear `logs` como time-series (default 0)
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+NIVELES = ('DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL')
+TTL_DEFAULT = 'DEBUG=7,INFO=30,WARNING=90,ERROR=365,CRITICAL=365'
+COLECCION = 'logs'
+
+
+def ttl_por_nivel():
+    """{nivel: segundos} de los niveles con vencimiento, según LOG_TTL_DAYS"""
+    ttl = {}
+    for parte in os.getenv('LOG_TTL_DAYS', TTL_DEFAULT).split(','):
+        if not parte.strip():
+            continue
+        nivel, _, dias = parte.partition('=')
+        nivel = nivel.strip().upper()
+        if nivel not in NIVELES:
+            raise ValueError(f"LOG_TTL_DAYS: nivel desconocido {nivel!r}")
+        segundos = int(float(dias) * 86400)
+        if segundos > 0:
+            ttl[nivel] = segundos
+    return ttl
+
+
+def _nombre_indice(nivel):
+    return f'ttl_{nivel.lower()}'
+
+
+def _crear_timeseries(db):
+    if COLECCION in db.list_collection_names():
+        opciones = db[COLECCION].options()
+        if 'timeseries' not in opciones:
+            logger.warning("LOG_TIMESERIES=1 pero la colección logs ya existe como colección común; "
+                           "se mantiene así (migrarla a mano)")
+        return
+    db.create_collection(COLECCION, timeseries={
+        'timeField': 'timestamp',
+        'metaField': 'level',
+        'granularity': 'seconds',
+    })
+    logger.info("Colección logs creada como time-series")
+
+
+def asegurar_retencion_logs(db=None):
+    """
+    Crea la colección (time-series si corresponde) y deja un índice TTL por
+    nivel con el vencimiento configurado
+
+    Returns:
+        {nivel: segundos} aplicado
+    """
+    from mongoengine.connection import get_db
+
+    db = db if db is not None else get_db('logs')
+    if os.getenv('LOG_TIMESERIES', '0').lower() in ('1', 'true', 'yes', 'on'):
+        _crear_timeseries(db)
+
+    coleccion = db[COLECCION]
+    ttl = ttl_por_nivel()
+    existentes = coleccion.index_information()
+    for nivel in NIVELES:
+        nombre = _nombre_indice(nivel)
+        actual = existentes.get(nombre)
+        if nivel not in ttl:
+            if actual:
+                coleccion.drop_index(nombre)
+                logger.info("TTL de logs eliminado", extra={'nivel': nivel})
+            continue
+        if actual is None:
+            coleccion.create_index(
+                [('timestamp', 1)],
+                name=nombre,
+                expireAfterSeconds=ttl[nivel],
+                partialFilterExpression={'level': nivel},
+            )
+        elif actual.get('expireAfterSeconds') != ttl[nivel]:
+            # collMod cambia el vencimiento sin reconstruir el índice
+            db.command('collMod', COLECCION, index={'name': nombre, 'expireAfterSeconds': ttl[nivel]})
+        else:
+            continue
+        logger.info("TTL de logs actualizado", extra={'nivel': nivel, 'segundos': ttl[nivel]})
+    return ttl
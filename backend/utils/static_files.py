@@ -0,0 +1,86 @@
+"""
+Servir archivos subidos inmutables (avatares)
+
+Los nombres de los archivos subidos son aleatorios y nunca se reescriben, así
+que una URL siempre devuelve el mismo contenido:
+- Cache-Control: public, max-age=1 año, immutable (el navegador no vuelve a
+  pedirlos ni a revalidarlos).
+- ETag fuerte derivado del nombre: no depende del mtime ni del servidor que
+  atiende, y permite responder 304 sin abrir el archivo (solo se verifica
+  que siga existiendo: un avatar borrado responde 404).
+- Range requests (206) para descargas parciales / reanudadas.
+- Con un proxy delante, el envío del archivo se le puede delegar:
+  X-Sendfile (Apache, lighttpd) o X-Accel-Redirect (nginx).
+
+Configuración (app.config, ver app.py):
+- AVATAR_SENDFILE: none (default) | x-sendfile | x-accel-redirect
+- AVATAR_ACCEL_PREFIX: location interna de nginx que apunta a la carpeta de
+  avatares (default /_protected/avatars/)
+"""
+
+import mimetypes
+import os
+
+from flask import current_app, request
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+from werkzeug.utils import send_file
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _cache_headers(response, etag):
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = ONE_YEAR
+    response.cache_control.immutable = True
+    return response
+
+
+def send_immutable(folder, filename, ensure_local=None):
+    """
+    Respuesta para `filename` dentro de `folder` (404 si no existe o si el
+    nombre intenta salir de la carpeta).
+
+    `ensure_local(filename) -> bool`, si se pasa, se llama antes del 304 y
+    de leer el archivo (p. ej. para bajarlo de GridFS al cache local).
+    """
+    path = safe_join(folder, filename)
+    if path is None:
+        raise NotFound()
+
+    etag = filename
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    modo = current_app.config.get('AVATAR_SENDFILE', 'none')
+
+    if ensure_local is not None and not ensure_local(filename):
+        raise NotFound()
+
+    # El contenido de un nombre no cambia: el 304 no necesita abrir el archivo,
+    # pero sí que exista (si se borró, el 304 lo mantendría vivo en el cliente)
+    if request.if_none_match.contains(etag):
+        if not os.path.isfile(path):
+            raise NotFound()
+        return _cache_headers(current_app.response_class(status=304), etag)
+
+    if modo == 'x-accel-redirect':
+        # nginx resuelve el archivo, los rangos y el 404
+        response = current_app.response_class(mimetype=mimetype)
+        prefix = current_app.config.get('AVATAR_ACCEL_PREFIX', '/_protected/avatars/')
+        response.headers['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + filename
+        return _cache_headers(response, etag)
+
+    try:
+        # conditional=True: 304 con If-None-Match/If-Modified-Since y 206 con Range
+        response = send_file(
+            path,
+            request.environ,
+            mimetype=mimetype,
+            conditional=True,
+            etag=etag,
+            use_x_sendfile=modo == 'x-sendfile',
+            response_class=current_app.response_class,
+        )
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        raise NotFound()
+    return _cache_headers(response, etag)
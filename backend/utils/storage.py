@@ -0,0 +1,214 @@
+"""
+Almacenamiento de avatares (direccionado por contenido)
+
+Las claves son los nombres de archivo que ya usan las URLs:
+`<sha256>.<ext>` para el original y `<sha256>_<size>.webp` para las
+variantes. Como una clave nunca cambia de contenido, cualquier copia local se
+puede servir (y cachear) para siempre.
+
+Backends (AVATAR_STORAGE):
+- local (default): carpeta UPLOAD_AVATARS_FOLDER del propio nodo.
+- gridfs: bucket GridFS `avatars` en la base principal, compartido por todos
+  los nodos. Delante hay un cache local de lectura (AVATAR_CACHE_FOLDER): el
+  primer request de una clave la descarga a disco y los siguientes se sirven
+  con send_file / sendfile como en local. El cache se puede borrar en
+  cualquier momento. Un índice único sobre `avatars.files.filename` hace
+  atómico el dedup: si dos nodos suben la misma clave a la vez, queda una.
+
+API común:
+- put_file(key, path) -> bool: guarda el archivo `path` bajo `key`. True si
+  se creó (y `path` fue movido); False si la clave ya existía (dedup).
+- exists(key) -> bool
+- delete(key) -> bool: borra la clave (y su copia local). False si no existía.
+- ensure_local(key) -> bool: deja una copia en `local_folder` (read-through).
+- local_folder: carpeta desde la que se sirven los archivos.
+- tmp_folder: carpeta para temporales en el mismo disco que local_folder.
+"""
+
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+_KEY_RE = re.compile(r'^[0-9A-Za-z_-]+\.[0-9A-Za-z]+$')
+
+
+def key_valida(key):
+    """Nombre de archivo plano (sin carpetas ni caracteres raros)"""
+    return bool(_KEY_RE.match(key or ''))
+
+
+def _validar_key(key):
+    if not key_valida(key):
+        raise ValueError(f"Clave de almacenamiento inválida: {key!r}")
+
+
+class LocalStorage:
+    """Archivos en una carpeta del disco local"""
+
+    def __init__(self, folder, tmp_folder=None):
+        self.local_folder = folder
+        self.tmp_folder = tmp_folder or os.path.join(os.path.dirname(folder), '.tmp')
+        os.makedirs(self.local_folder, exist_ok=True)
+        os.makedirs(self.tmp_folder, exist_ok=True)
+
+    def _path(self, key):
+        _validar_key(key)
+        return os.path.join(self.local_folder, key)
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def put_file(self, key, path):
+        destino = self._path(key)
+        if os.path.exists(destino):
+            return False
+        # rename si están en el mismo disco; si no, copia
+        shutil.move(path, destino)
+        return True
+
+    def delete(self, key):
+        try:
+            os.unlink(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def ensure_local(self, key):
+        # send_file ya responde 404 si no existe: no hace falta otro stat
+        return key_valida(key)
+
+
+class GridFSStorage:
+    """Archivos en un bucket GridFS, con cache local de lectura"""
+
+    def __init__(self, cache_folder, db_alias='default', bucket_name='avatars'):
+        self.local_folder = cache_folder
+        self.tmp_folder = os.path.join(cache_folder, '.tmp')
+        self.db_alias = db_alias
+        self.bucket_name = bucket_name
+        self._indice_creado = False
+        os.makedirs(self.tmp_folder, exist_ok=True)
+
+    def _bucket(self):
+        # Por request: get_db devuelve el cliente del proceso (reconectado tras el fork)
+        import gridfs
+        from mongoengine.connection import get_db
+        return gridfs.GridFSBucket(get_db(self.db_alias), bucket_name=self.bucket_name)
+
+    def _files(self):
+        from mongoengine.connection import get_db
+        return get_db(self.db_alias)[f'{self.bucket_name}.files']
+
+    def _asegurar_indice(self):
+        # Índice único por nombre: de dos subidas simultáneas de la misma clave
+        # solo una puede insertar su documento en .files
+        if self._indice_creado:
+            return
+        try:
+            self._files().create_index('filename', unique=True, name='filename_unique')
+        except Exception:
+            logger.warning("No se pudo crear el índice único de %s.files", self.bucket_name, exc_info=True)
+        self._indice_creado = True
+
+    def _cache_path(self, key):
+        _validar_key(key)
+        return os.path.join(self.local_folder, key)
+
+    def exists(self, key):
+        if os.path.exists(self._cache_path(key)):
+            return True
+        return self._files().find_one({'filename': key}, {'_id': 1}) is not None
+
+    def put_file(self, key, path):
+        if self.exists(key):
+            return False
+        import gridfs
+        self._asegurar_indice()
+        content_type = mimetypes.guess_type(key)[0] or 'application/octet-stream'
+        grid_in = self._bucket().open_upload_stream(key, metadata={'contentType': content_type})
+        try:
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, grid_in)
+            # Los chunks ya están escritos: close inserta el documento en .files
+            grid_in.close()
+        except gridfs.errors.FileExists:
+            # Otro nodo subió la misma clave después del exists: el índice único
+            # rechazó este documento (es el mismo contenido). abort borra los
+            # chunks que quedaron huérfanos
+            grid_in.abort()
+            return False
+        except Exception:
+            grid_in.abort()
+            raise
+        # El nodo que lo subió ya lo tiene en cache
+        shutil.move(path, self._cache_path(key))
+        return True
+
+    def delete(self, key):
+        cache = self._cache_path(key)
+        if os.path.exists(cache):
+            os.unlink(cache)
+        # Los otros nodos pueden seguir sirviendo su copia en cache hasta limpiarla
+        bucket = self._bucket()
+        borrado = False
+        for doc in self._files().find({'filename': key}, {'_id': 1}):
+            bucket.delete(doc['_id'])
+            borrado = True
+        return borrado
+
+    def ensure_local(self, key):
+        if not key_valida(key):
+            return False
+        destino = self._cache_path(key)
+        if os.path.exists(destino):
+            return True
+        import gridfs
+        fd, temporal = tempfile.mkstemp(dir=self.tmp_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self._bucket().download_to_stream_by_name(key, f)
+            # Atómico: otro request nunca ve una copia a medias
+            os.replace(temporal, destino)
+            return True
+        except gridfs.errors.NoFile:
+            return False
+        finally:
+            if os.path.exists(temporal):
+                os.unlink(temporal)
+
+
+def crear_storage(folder, tmp_folder=None):
+    """Backend según AVATAR_STORAGE (también para jobs que corren sin app)"""
+    backend = os.getenv('AVATAR_STORAGE', 'local').lower()
+    if backend == 'local':
+        return LocalStorage(folder, tmp_folder)
+    if backend == 'gridfs':
+        return GridFSStorage(os.getenv('AVATAR_CACHE_FOLDER') or folder)
+    raise ValueError(f"AVATAR_STORAGE: valor desconocido {backend!r} (local, gridfs)")
+
+
+def init_storage(app):
+    """
+    Crea el almacenamiento de avatares de la app.
+
+    Env vars:
+    - AVATAR_STORAGE: local (default) | gridfs
+    - AVATAR_CACHE_FOLDER: cache local de GridFS (default: UPLOAD_AVATARS_FOLDER)
+    """
+    storage = crear_storage(app.config['UPLOAD_AVATARS_FOLDER'], app.config.get('UPLOAD_TMP_FOLDER'))
+    app.extensions['avatar_storage'] = storage
+    # Los uploads se escriben al lado de los archivos para moverlos sin copiar
+    app.config['UPLOAD_TMP_FOLDER'] = storage.tmp_folder
+    return storage
+
+
+def get_storage(app=None):
+    """Almacenamiento de avatares de la app (o de current_app)"""
+    return (app or current_app).extensions['avatar_storage']
@@ -0,0 +1,130 @@
+"""
+Subida de archivos en streaming
+
+Werkzeug, por defecto, guarda cada archivo de un multipart en memoria (hasta
+500 KB) o en un temporal, y recién después la ruta puede medirlo. Con
+`init_uploads(app)`:
+- MAX_CONTENT_LENGTH: un Content-Length mayor se rechaza con 413 antes de
+  leer el body.
+- Cada archivo del multipart se escribe en chunks a un temporal en
+  UPLOAD_TMP_FOLDER (mismo disco que los avatares, para moverlo sin copiar)
+  mientras se calcula su SHA-256. Si supera UPLOAD_MAX_FILE_SIZE se corta la
+  lectura con 413 (también con Transfer-Encoding: chunked).
+- La ruta obtiene tamaño y hash sin releer el archivo (`upload_info`) y lo
+  guarda con `guardar_upload` en el almacenamiento (utils.storage); si no
+  se guarda, el temporal se borra al terminar la request.
+"""
+
+import hashlib
+import os
+import tempfile
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+# Margen para los headers y campos de texto del multipart
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class HashingUploadFile:
+    """Temporal en disco que calcula el SHA-256 y limita el tamaño al escribir"""
+
+    def __init__(self, folder, max_size):
+        fd, self.path = tempfile.mkstemp(dir=folder, prefix='upload-', suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self._max_size = max_size
+        self.size = 0
+        self.moved = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self._max_size is not None and self.size > self._max_size:
+            # Werkzeug descarta el archivo sin cerrarlo: borrar el temporal ya
+            self.close()
+            raise RequestEntityTooLarge()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self._file.close()
+        if not self.moved:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __del__(self):
+        # Request cortada a mitad del multipart (el cliente se desconectó)
+        if '_file' in self.__dict__:
+            self.close()
+
+    def __getattr__(self, name):
+        # read / seek / tell / flush ... del archivo real
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class UploadRequest(Request):
+    """Request de Flask cuyos archivos multipart van a HashingUploadFile"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        config = current_app.config
+        return HashingUploadFile(config['UPLOAD_TMP_FOLDER'], config['UPLOAD_MAX_FILE_SIZE'])
+
+
+def upload_info(file_storage):
+    """(tamaño, sha256 hex) de un archivo subido, o (None, None) si no pasó por UploadRequest"""
+    stream = file_storage.stream
+    if isinstance(stream, HashingUploadFile):
+        return stream.size, stream.hexdigest()
+    return None, None
+
+
+def guardar_upload(file_storage, storage, key):
+    """
+    Guarda el archivo subido en `storage` bajo `key` (en local, un rename
+    del temporal). Si la clave ya existe se conserva la existente (mismo
+    contenido).
+
+    Returns:
+        True si se creó el archivo, False si ya existía
+    """
+    stream = file_storage.stream
+    if isinstance(stream, HashingUploadFile):
+        stream.flush()
+        creado = storage.put_file(key, stream.path)
+        stream.moved = creado
+        return creado
+    fd, temporal = tempfile.mkstemp(dir=storage.tmp_folder, suffix='.part')
+    os.close(fd)
+    try:
+        file_storage.save(temporal)
+        return storage.put_file(key, temporal)
+    finally:
+        if os.path.exists(temporal):
+            os.unlink(temporal)
+
+
+def init_uploads(app, max_file_size):
+    """
+    Configura los uploads en streaming. `max_file_size` es el tamaño máximo
+    de cada archivo; el body completo se limita a eso más el margen del
+    multipart (si MAX_CONTENT_LENGTH no estaba configurado).
+    """
+    app.config.setdefault('UPLOAD_MAX_FILE_SIZE', max_file_size)
+    if app.config.get('MAX_CONTENT_LENGTH') is None:
+        app.config['MAX_CONTENT_LENGTH'] = max_file_size + MULTIPART_OVERHEAD
+    if not app.config.get('UPLOAD_TMP_FOLDER'):
+        app.config['UPLOAD_TMP_FOLDER'] = os.path.join(
+            os.path.dirname(app.config['UPLOAD_AVATARS_FOLDER']), '.tmp'
+        )
+    os.makedirs(app.config['UPLOAD_TMP_FOLDER'], exist_ok=True)
+    app.request_class = UploadRequest
@@ -80,14 +80,12 @@ def validar_nickname(nickname):
     return True, ""
 
 
-def validar_mensaje_privado(texto, emisor_id, receptor_id):
+def validar_texto_mensaje_privado(texto):
     """
-    Valida un mensaje privado
+    Valida el texto de un mensaje privado (también lo usa el envío masivo)
     
     Args:
         texto: contenido del mensaje
-        emisor_id: ID del emisor
-        receptor_id: ID del receptor
     
     Returns:
         tuple: (bool, str) - (es_valido, mensaje_error)
@@ -100,6 +98,25 @@ def validar_mensaje_privado(texto, emisor_id, receptor_id):
     if len(texto) > 1000:
         return False, "El mensaje no puede exceder 1000 caracteres"
     
+    return True, ""
+
+
+def validar_mensaje_privado(texto, emisor_id, receptor_id):
+    """
+    Valida un mensaje privado
+    
+    Args:
+        texto: contenido del mensaje
+        emisor_id: ID del emisor
+        receptor_id: ID del receptor
+    
+    Returns:
+        tuple: (bool, str) - (es_valido, mensaje_error)
+    """
+    es_valido, mensaje_error = validar_texto_mensaje_privado(texto)
+    if not es_valido:
+        return False, mensaje_error
+    
     # Validar que existan IDs
     if not emisor_id or not receptor_id:
         return False, "Emisor y receptor son requeridos"
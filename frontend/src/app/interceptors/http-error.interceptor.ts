@@ -1,7 +1,12 @@
 import { Injectable } from '@angular/core';
-import { HttpInterceptor, HttpRequest, HttpHandler, HttpEvent, HttpErrorResponse } from '@angular/common/http';
+import { HttpInterceptor, HttpRequest, HttpHandler, HttpEvent, HttpErrorResponse, HttpResponse } from '@angular/common/http';
 import { Observable, throwError } from 'rxjs';
-import { catchError } from 'rxjs/operators';
+import { catchError, tap } from 'rxjs/operators';
+
+// Read-your-writes: el backend marca al usuario que acaba de escribir y el
+// token vuelve en cada request, así cualquier worker lee del primario
+const PRIMARY_PIN_HEADER = 'X-Primary-Pin';
+const PRIMARY_PIN_KEY = 'primary_pin';
 
 @Injectable()
 export class HttpErrorInterceptor implements HttpInterceptor {
@@ -22,7 +27,24 @@ export class HttpErrorInterceptor implements HttpInterceptor {
       console.warn('⚠️ No hay token disponible para:', req.url);
     }
 
+    const primaryPin = localStorage.getItem(PRIMARY_PIN_KEY);
+    if (primaryPin) {
+      authReq = authReq.clone({
+        setHeaders: {
+          [PRIMARY_PIN_HEADER]: primaryPin
+        }
+      });
+    }
+
     return next.handle(authReq).pipe(
+      tap((event: HttpEvent<any>) => {
+        if (event instanceof HttpResponse) {
+          const pin = event.headers.get(PRIMARY_PIN_HEADER);
+          if (pin) {
+            localStorage.setItem(PRIMARY_PIN_KEY, pin);
+          }
+        }
+      }),
       catchError((error: HttpErrorResponse) => {
         // Manejar errores de forma más amigable
         if (error.status === 401) {
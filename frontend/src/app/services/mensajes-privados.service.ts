@@ -10,6 +10,8 @@ export interface Usuario {
   nombre: string;
   apellido: string;
   fotoUsuario?: string;
+  // Miniaturas WebP del avatar subido: { '48': url, '128': url, '512': url }
+  fotoUsuarioVariantes?: { [size: string]: string };
 }
 
 export interface MensajePrivado {
@@ -27,6 +29,30 @@ export interface Conversacion {
   mensajesNoLeidos: number;
 }
 
+/**
+ * Respuestas con ?format=compact: emisor/receptor/usuario llegan como IDs
+ * y cada usuario viene una sola vez en `usuarios`
+ */
+interface MensajePrivadoCompacto extends Omit<MensajePrivado, 'emisor' | 'receptor'> {
+  emisor: string;
+  receptor: string;
+}
+
+interface ConversacionCompacta {
+  conversacion: MensajePrivadoCompacto[];
+  total: number;
+  hasMore: boolean;
+  usuarios: { [id: string]: Usuario };
+}
+
+interface ConversacionesCompactas {
+  conversaciones: (Omit<Conversacion, 'usuario' | 'ultimoMensaje'> & {
+    usuario: string;
+    ultimoMensaje: MensajePrivadoCompacto;
+  })[];
+  usuarios: { [id: string]: Usuario };
+}
+
 export interface ApiResponse<T> {
   success: boolean;
   data?: T;
@@ -86,9 +112,10 @@ export class MensajesPrivadosService {
   ): Observable<{ conversacion: MensajePrivado[], total: number, hasMore: boolean }> {
     let params = new HttpParams()
       .set('limit', limit.toString())
-      .set('offset', offset.toString());
+      .set('offset', offset.toString())
+      .set('format', 'compact');
 
-    return this.http.get<ApiResponse<any>>(
+    return this.http.get<ApiResponse<ConversacionCompacta>>(
       `${this.apiUrl}/conversacion/${userId}`,
       { params }
     ).pipe(
@@ -96,7 +123,11 @@ export class MensajesPrivadosService {
         if (!response.success || !response.data) {
           throw new Error(response.error || 'Error al obtener conversación');
         }
-        return response.data;
+        const { usuarios, ...data } = response.data;
+        return {
+          ...data,
+          conversacion: data.conversacion.map(mensaje => this.hidratarMensaje(mensaje, usuarios))
+        };
       }),
       tap(() => {
         // Actualizar contador de no leídos después de ver conversación
@@ -109,15 +140,23 @@ export class MensajesPrivadosService {
    * Listar todas las conversaciones del usuario
    */
   listarConversaciones(): Observable<Conversacion[]> {
-    return this.http.get<ApiResponse<Conversacion[]>>(
-      `${this.apiUrl}/conversaciones`
+    const params = new HttpParams().set('format', 'compact');
+
+    return this.http.get<ApiResponse<ConversacionesCompactas>>(
+      `${this.apiUrl}/conversaciones`,
+      { params }
     ).pipe(
       map(response => {
         if (!response.success || !response.data) {
           // Retornar array vacío en lugar de lanzar error
           return [];
         }
-        return response.data;
+        const { conversaciones, usuarios } = response.data;
+        return conversaciones.map(conversacion => ({
+          ...conversacion,
+          usuario: usuarios[conversacion.usuario],
+          ultimoMensaje: this.hidratarMensaje(conversacion.ultimoMensaje, usuarios)
+        }));
       }),
       catchError(() => {
         // En caso de error (ej: 401), retornar array vacío
@@ -147,6 +186,31 @@ export class MensajesPrivadosService {
     );
   }
 
+  /**
+   * Marcar varios mensajes como leídos en un solo request: por ids y/o
+   * conversaciones completas hasta un mensaje (`hasta`) o fecha (`hasta_fecha`)
+   */
+  marcarComoLeidos(
+    mensajeIds: string[] = [],
+    conversaciones: { usuario_id: string; hasta?: string; hasta_fecha?: string }[] = []
+  ): Observable<{ actualizados: number; noLeidos: number }> {
+    return this.http.post<ApiResponse<{ actualizados: number; noLeidos: number }>>(
+      `${this.apiUrl}/leer`,
+      { ids: mensajeIds, conversaciones }
+    ).pipe(
+      map(response => {
+        if (!response.success || !response.data) {
+          throw new Error(response.error || 'Error al marcar mensajes como leídos');
+        }
+        return response.data;
+      }),
+      tap(data => {
+        // La respuesta ya trae el contador actualizado
+        this.mensajesNoLeidosSubject.next(data.noLeidos);
+      })
+    );
+  }
+
   /**
    * Obtener cantidad de mensajes no leídos
    */
@@ -207,6 +271,20 @@ export class MensajesPrivadosService {
     );
   }
 
+  /**
+   * Reemplazar los IDs de emisor/receptor por los usuarios del mapa `usuarios`
+   */
+  private hidratarMensaje(
+    mensaje: MensajePrivadoCompacto,
+    usuarios: { [id: string]: Usuario }
+  ): MensajePrivado {
+    return {
+      ...mensaje,
+      emisor: usuarios[mensaje.emisor],
+      receptor: usuarios[mensaje.receptor]
+    };
+  }
+
   /**
    * Cargar contador de mensajes no leídos
    * (método privado usado internamente)
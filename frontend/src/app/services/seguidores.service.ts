@@ -10,6 +10,8 @@ export interface Usuario {
   nombre: string;
   apellido: string;
   fotoUsuario?: string;
+  // Miniaturas WebP del avatar subido: { '48': url, '128': url, '512': url }
+  fotoUsuarioVariantes?: { [size: string]: string };
 }
 
 interface ApiResponse<T> {